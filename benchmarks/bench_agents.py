@@ -0,0 +1,363 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Agent编排开销与工具吞吐基准测试
+所有Agent和工具Agent使用进程内的确定性假模型（可配置延迟），不发起网络请求，测量：
+每轮调用开销、指定并发下的吞吐、每1000次运行的内存增长以及工具调用循环的开销。
+结果保存为JSON，可通过--baseline与其他版本的结果对比
+
+用法:
+    python benchmarks/bench_agents.py --turns 200 --latency 20 --concurrency 1,8,32
+    python benchmarks/bench_agents.py --agents UniversalAgent,CompressionAgent --baseline old.json
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import ExitStack, contextmanager
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+from unittest.mock import patch
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, ToolMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import StructuredTool
+
+from lightce.agent.system import UniversalAgent
+from lightce.agent.memory_agent import MemoryAgent, MemoryAgentConfig
+from lightce.agent.react_agent import ReactAgent
+from lightce.prompt.static_information import get_information_types
+from lightce.tools.compression import CompressionAgent, CompressionEngine
+from lightce.tools.policy_select import PolicySelectAgent
+from lightce.tools.semantic_extraction import SemanticExtractionAgent
+from lightce.tools.static_information import StaticInformationAgent, StaticInformationConfig
+from lightce.tools.structure_sort import JSONExtractAgent
+
+SAMPLE_TEXT = (
+    "LightCE是一个轻量级的上下文工程工具包，提供文本压缩、语义提取和静态信息提取等功能。"
+    "张三在2024年3月于北京发布了1.2版本，压缩速度提升了35%，并新增了本地压缩引擎。"
+)
+
+# 假模型的默认回复同时满足策略选择和JSON提取的解析
+DEFAULT_REPLY = json.dumps({
+    "analysis": {"summary": "基准测试"},
+    "compression_levels": {"short_term": 2, "long_term": 2, "parameter": 3, "rule": 4},
+    "items": [{"name": "张三", "city": "北京", "year": 2024}]
+}, ensure_ascii=False)
+
+def default_reply(messages: List[BaseMessage]) -> str:
+    """默认回复"""
+    return DEFAULT_REPLY
+
+class FakeChatModel(BaseChatModel):
+    """确定性假模型：按固定延迟返回回复，绑定工具时在每轮先发起指定次数的工具调用"""
+
+    latency: float = 0.0
+    tool_calls_per_turn: int = 0
+    reply: Callable[[List[BaseMessage]], str] = default_reply
+    calls: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "benchmark-fake"
+
+    def bind_tools(self, tools: List[Any], **kwargs):
+        return self.bind(tool_names=[tool.name for tool in tools])
+
+    @staticmethod
+    def _finished_rounds(messages: List[BaseMessage]) -> int:
+        """本轮已完成的工具调用次数
+
+        轮次编号写在工具调用id中，从最后一条工具结果读取，不依赖Agent是否保留完整的对话历史
+        """
+        if not messages or not isinstance(messages[-1], ToolMessage):
+            return 0
+        return int(messages[-1].tool_call_id.split("_")[1]) + 1
+
+    def _respond(self, messages: List[BaseMessage], tool_names: Optional[List[str]]) -> ChatResult:
+        """本轮已完成的工具调用不足tool_calls_per_turn时继续调用工具，否则给出最终回复"""
+        self.calls += 1
+        finished = self._finished_rounds(messages)
+
+        if tool_names and finished < self.tool_calls_per_turn:
+            message = AIMessage(content="", tool_calls=[{
+                "name": tool_names[finished % len(tool_names)],
+                "args": {"query": "benchmark"},
+                "id": f"call_{finished}_{self.calls}"
+            }])
+        else:
+            message = AIMessage(content=self.reply(messages))
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs) -> ChatResult:
+        if self.latency:
+            time.sleep(self.latency)
+        return self._respond(messages, tool_names)
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tool_names=None, **kwargs) -> ChatResult:
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self._respond(messages, tool_names)
+
+@contextmanager
+def use_fake_model(model: FakeChatModel):
+    """让所有Agent（包括工具Agent内部的UniversalAgent）使用假模型"""
+    with ExitStack() as stack:
+        for cls in (UniversalAgent, MemoryAgent, ReactAgent):
+            stack.enter_context(patch.object(cls, "_create_llm", lambda self, *args, **kwargs: model))
+        yield model
+
+def make_tools(count: int) -> List[StructuredTool]:
+    """构造指定数量的示例工具"""
+    tools = []
+    for i in range(count):
+        def func(query: str, limit: int = 10) -> str:
+            return query[:limit]
+        tools.append(StructuredTool.from_function(
+            func=func,
+            name=f"bench_tool_{i}",
+            description=f"基准测试工具{i}：截取查询文本"
+        ))
+    return tools
+
+class Case(NamedTuple):
+    """基准测试对象"""
+    name: str
+    create: Callable[[], Any]
+    run: Callable[[Any, str], Any]
+    arun: Optional[Callable[[Any, str], Any]] = None
+    reply: Callable[[List[BaseMessage]], str] = default_reply
+    supports_tools: bool = False
+
+def core_cases() -> List[Case]:
+    """通用Agent、记忆Agent和ReAct Agent，记忆Agent只使用进程内存储"""
+    factories = [
+        ("UniversalAgent", UniversalAgent),
+        ("MemoryAgent", lambda: MemoryAgent(MemoryAgentConfig(memory_backend_path=None))),
+        ("ReactAgent", ReactAgent)
+    ]
+    return [
+        Case(name, create, lambda agent, text: agent.run(text), lambda agent, text: agent.arun(text), supports_tools=True)
+        for name, create in factories
+    ]
+
+def tool_cases() -> List[Case]:
+    """工具Agent，假模型的回复按各自的解析格式构造"""
+    keys = [t.value for t in get_information_types(StaticInformationConfig().information_level)]
+    static_reply = json.dumps({key: "张三 - 人物 - 北京" for key in keys}, ensure_ascii=False)
+    return [
+        Case(
+            "CompressionAgent", CompressionAgent,
+            lambda agent, text: agent.compress_text(text, engine=CompressionEngine.LLM),
+            lambda agent, text: agent.acompress_text(text, engine=CompressionEngine.LLM),
+            reply=lambda messages: SAMPLE_TEXT[:len(SAMPLE_TEXT) // 2]
+        ),
+        Case(
+            "SemanticExtractionAgent", SemanticExtractionAgent,
+            lambda agent, text: agent.extract_semantic(text),
+            lambda agent, text: agent.aextract_semantic(text),
+            reply=lambda messages: "LightCE发布1.2版本，压缩速度提升35%。"
+        ),
+        Case(
+            "StaticInformationAgent", StaticInformationAgent,
+            lambda agent, text: agent.extract_information(text),
+            reply=lambda messages: static_reply
+        ),
+        Case("PolicySelectAgent", PolicySelectAgent, lambda agent, text: agent.select_policy(text)),
+        Case("JSONExtractAgent", JSONExtractAgent, lambda agent, text: agent.extract_json(text))
+    ]
+
+def run_checked(agent: Any, case: Case) -> Any:
+    """运行一次并检查结果，失败时抛出异常，避免把失败的运行计入耗时"""
+    result = case.run(agent, SAMPLE_TEXT)
+    if isinstance(result, dict):
+        if not result.get("success"):
+            raise RuntimeError(f"运行失败: {result.get('error')}")
+    elif not result.success:
+        raise RuntimeError("运行失败")
+    return result
+
+def measure_turns(agent: Any, case: Case, model: FakeChatModel, turns: int) -> Dict[str, float]:
+    """零延迟下的每轮耗时（微秒）和每轮模型调用次数，任一轮运行失败时抛出异常"""
+    run_checked(agent, case)
+    calls = model.calls
+    start = time.perf_counter()
+    for _ in range(turns):
+        run_checked(agent, case)
+    elapsed = time.perf_counter() - start
+    return {
+        "per_turn_us": elapsed / turns * 1e6,
+        "model_calls_per_turn": (model.calls - calls) / turns
+    }
+
+def measure_throughput(agent: Any, case: Case, concurrency: int, rounds: int) -> float:
+    """指定并发下每秒完成的运行数，有异步接口时用协程并发，否则用线程并发"""
+    def worker():
+        for _ in range(rounds):
+            case.run(agent, SAMPLE_TEXT)
+
+    async def aworker():
+        for _ in range(rounds):
+            await case.arun(agent, SAMPLE_TEXT)
+
+    async def arun_all():
+        await asyncio.gather(*(aworker() for _ in range(concurrency)))
+
+    start = time.perf_counter()
+    if case.arun is not None:
+        asyncio.run(arun_all())
+    else:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            for future in [executor.submit(worker) for _ in range(concurrency)]:
+                future.result()
+    return concurrency * rounds / (time.perf_counter() - start)
+
+def measure_memory(agent: Any, case: Case, runs: int) -> float:
+    """每1000次运行后仍被持有的内存增长（KB）"""
+    case.run(agent, SAMPLE_TEXT)
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        for _ in range(runs):
+            case.run(agent, SAMPLE_TEXT)
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    return (after - before) / runs * 1000 / 1024
+
+def bench_case(case: Case, args: argparse.Namespace) -> Dict[str, Any]:
+    """测量单个对象的全部指标"""
+    model = FakeChatModel(reply=case.reply)
+    with use_fake_model(model):
+        agent = case.create()
+        result: Dict[str, Any] = measure_turns(agent, case, model, args.turns)
+
+        model.latency = args.latency / 1000
+        result["throughput_rps"] = {
+            str(concurrency): measure_throughput(agent, case, concurrency, args.rounds)
+            for concurrency in args.concurrency
+        }
+        model.latency = 0.0
+
+        result["memory_kb_per_1k_runs"] = measure_memory(case.create(), case, args.memory_runs)
+
+        if case.supports_tools and args.tool_calls > 0:
+            agent = case.create()
+            agent.add_tools(make_tools(args.tools))
+            model.tool_calls_per_turn = args.tool_calls
+            loop = measure_turns(agent, case, model, args.turns)
+            model.tool_calls_per_turn = 0
+            if loop["model_calls_per_turn"] != args.tool_calls + 1:
+                raise RuntimeError(
+                    f"工具循环每轮模型调用{loop['model_calls_per_turn']:.1f}次，应为{args.tool_calls + 1}次"
+                )
+            result["tool_loop"] = {
+                "per_turn_us": loop["per_turn_us"],
+                "model_calls_per_turn": loop["model_calls_per_turn"],
+                "per_tool_call_us": (loop["per_turn_us"] - result["per_turn_us"]) / args.tool_calls
+            }
+    return result
+
+def git_revision() -> str:
+    """当前代码的提交号，不在git仓库中时返回unknown"""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def print_comparison(results: Dict[str, Any], baseline_path: str):
+    """与基准结果对比每轮耗时和吞吐"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print(f"\n对比 {baseline_path} ({baseline['meta']['label']})")
+    print(f"{'Agent':<26}{'每轮耗时变化':>14}{'吞吐变化':>12}")
+    for name, current in results["agents"].items():
+        previous = baseline["agents"].get(name)
+        if not previous or "per_turn_us" not in previous or "per_turn_us" not in current:
+            continue
+        turn_change = current["per_turn_us"] / previous["per_turn_us"] - 1
+        shared = [c for c in current["throughput_rps"] if c in previous["throughput_rps"]]
+        throughput = ""
+        if shared:
+            top = max(shared, key=int)
+            throughput = f"{current['throughput_rps'][top] / previous['throughput_rps'][top] - 1:+.1%}"
+        print(f"{name:<26}{turn_change:>+14.1%}{throughput:>12}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Agent编排开销与工具吞吐基准测试")
+    parser.add_argument("--turns", type=int, default=200, help="测量每轮开销的调用轮数")
+    parser.add_argument("--latency", type=float, default=20.0, help="吞吐测试中假模型每次调用的延迟（毫秒）")
+    parser.add_argument("--concurrency", default="1,8,32", help="吞吐测试的并发数，逗号分隔")
+    parser.add_argument("--rounds", type=int, default=5, help="吞吐测试中每个并发任务的运行次数")
+    parser.add_argument("--memory-runs", type=int, default=1000, help="测量内存增长的运行次数")
+    parser.add_argument("--tools", type=int, default=8, help="工具循环测试中绑定的工具数量")
+    parser.add_argument("--tool-calls", type=int, default=3, help="工具循环测试中每轮的工具调用次数")
+    parser.add_argument("--agents", default=None, help="只测试指定的对象，逗号分隔")
+    parser.add_argument("--label", default=None, help="结果标签，默认使用当前提交号")
+    parser.add_argument("--output", default=None, help="结果JSON路径，默认benchmarks/results/agents_<标签>.json")
+    parser.add_argument("--baseline", default=None, help="用于对比的历史结果JSON")
+    args = parser.parse_args()
+    args.concurrency = [int(c) for c in args.concurrency.split(",") if c]
+
+    label = args.label or git_revision()
+    output = args.output or os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", f"agents_{label}.json")
+    selected = set(args.agents.split(",")) if args.agents else None
+
+    results: Dict[str, Any] = {
+        "meta": {
+            "label": label,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("output", "baseline", "label", "agents")}
+        },
+        "agents": {}
+    }
+
+    print(f"轮数: {args.turns}, 延迟: {args.latency}ms, 并发: {args.concurrency}, 工具循环: {args.tool_calls}次/{args.tools}个工具")
+    print(f"{'Agent':<26}{'每轮(us)':>12}{'模型调用':>10}{'吞吐(次/秒)':>24}{'内存(KB/1k)':>14}{'工具调用(us)':>14}")
+    for case in core_cases() + tool_cases():
+        if selected is not None and case.name not in selected:
+            continue
+        try:
+            result = bench_case(case, args)
+        except Exception as e:
+            results["agents"][case.name] = {"failed": f"{type(e).__name__}: {e}"}
+            print(f"{case.name:<26}失败: {type(e).__name__}: {e}")
+            continue
+        results["agents"][case.name] = result
+        throughput = "/".join(f"{result['throughput_rps'][str(c)]:.0f}" for c in args.concurrency)
+        tool_call = f"{result['tool_loop']['per_tool_call_us']:.0f}" if "tool_loop" in result else "-"
+        print(f"{case.name:<26}{result['per_turn_us']:>12.0f}{result['model_calls_per_turn']:>10.1f}"
+              f"{throughput:>24}{result['memory_kb_per_1k_runs']:>14.1f}{tool_call:>14}")
+
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=2)
+    print(f"\n结果已保存: {output}")
+
+    if args.baseline:
+        print_comparison(results, args.baseline)
+
+    if any("failed" in result for result in results["agents"].values()):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
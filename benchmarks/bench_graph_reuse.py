@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+每轮调用开销基准测试
+对比每轮重新创建客户端/绑定工具/创建ToolNode与复用缓存对象的耗时，不发起网络请求
+
+用法:
+    python benchmarks/bench_graph_reuse.py --turns 200 --tools 8
+"""
+
+import argparse
+import os
+import sys
+import time
+from typing import Callable, List
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# ChatOpenAI构造时要求提供API Key，基准测试不会真正发起请求
+os.environ.setdefault("OPENAI_API_KEY", "sk-benchmark")
+
+from langchain_core.tools import StructuredTool
+from langchain_openai import ChatOpenAI
+from langgraph.prebuilt import ToolNode
+
+from lightce.agent.system import UniversalAgent, ModelConfig
+from lightce.agent.memory_agent import MemoryAgent
+from lightce.agent.react_agent import ReactAgent
+
+def make_tools(count: int) -> List[StructuredTool]:
+    """构造指定数量的示例工具"""
+    tools = []
+    for i in range(count):
+        def func(query: str, limit: int = 10) -> str:
+            return query[:limit]
+        tools.append(StructuredTool.from_function(
+            func=func,
+            name=f"bench_tool_{i}",
+            description=f"基准测试工具{i}：截取查询文本"
+        ))
+    return tools
+
+def measure(fn: Callable[[], object], turns: int) -> float:
+    """返回每轮平均耗时（微秒）"""
+    fn()
+    start = time.perf_counter()
+    for _ in range(turns):
+        fn()
+    return (time.perf_counter() - start) / turns * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="每轮调用开销基准测试")
+    parser.add_argument("--turns", type=int, default=200, help="模拟的调用轮数")
+    parser.add_argument("--tools", type=int, default=8, help="绑定的工具数量")
+    args = parser.parse_args()
+
+    tools = make_tools(args.tools)
+    universal = UniversalAgent(ModelConfig())
+    memory = MemoryAgent()
+    react = ReactAgent()
+    for agent in (universal, memory, react):
+        agent.add_tools(tools)
+
+    react_state = {"current_context": {"adaptation": {"temperature_adjustment": 0.1}}}
+
+    def react_before():
+        llm = ChatOpenAI(
+            model=react.config.model_name,
+            temperature=react.config.temperature + 0.1,
+            max_tokens=react.config.max_tokens,
+            top_p=react.config.top_p
+        )
+        llm.bind_tools(react.tools)
+        ToolNode(react.tools)
+
+    def react_after():
+        react._get_adapted_llm(react_state)
+        react._get_tool_node()
+
+    cases = [
+        ("UniversalAgent",
+         lambda: (universal.llm.bind_tools(universal.tools), ToolNode(universal.tools)),
+         lambda: (universal._get_llm_with_tools(), universal._get_tool_node())),
+        ("MemoryAgent",
+         lambda: (memory.llm.bind_tools(memory.tools), ToolNode(memory.tools)),
+         lambda: (memory._get_llm_with_tools(), memory._get_tool_node())),
+        ("ReactAgent", react_before, react_after),
+    ]
+
+    print(f"轮数: {args.turns}, 工具数: {args.tools}")
+    print(f"{'Agent':<16}{'每轮重建(us)':>16}{'复用(us)':>14}{'加速比':>10}")
+    for name, before, after in cases:
+        before_us = measure(before, args.turns)
+        after_us = measure(after, args.turns)
+        print(f"{name:<16}{before_us:>16.1f}{after_us:>14.2f}{before_us / max(after_us, 1e-9):>10.0f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+长期记忆持久化后端基准测试
+测量批量导入耗时、新进程打开数据库并完成首次检索的耗时以及热检索耗时
+
+用法:
+    python benchmarks/bench_memory_backend.py --count 1000000 --path /tmp/lightce_memory.db
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lightce.agent.memory_backend import SQLiteMemoryBackend
+
+TOPICS = ["编程", "北京", "Python", "咖啡", "旅行", "音乐", "电影", "跑步", "数据库", "机器学习",
+          "上海", "篮球", "摄影", "烹饪", "小说", "Rust", "健身", "历史", "天文", "园艺"]
+
+def generate(count: int):
+    """生成示例记忆"""
+    rng = random.Random(0)
+    start = datetime(2024, 1, 1)
+    for i in range(count):
+        yield {
+            "id": uuid.UUID(int=rng.getrandbits(128)).hex,
+            "content": f"用户{i % 997}提到喜欢{rng.choice(TOPICS)}，也关注{rng.choice(TOPICS)}（记录{i}）",
+            "timestamp": start + timedelta(seconds=i),
+            "importance": rng.random(),
+            "category": rng.choice(["preference", "fact", "event"]),
+            "metadata": {}
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description="长期记忆持久化后端基准测试")
+    parser.add_argument("--count", type=int, default=100000, help="记忆条数")
+    parser.add_argument("--path", default="/tmp/lightce_memory_bench.db", help="数据库路径，已存在时跳过导入")
+    parser.add_argument("--queries", type=int, default=50, help="热检索次数")
+    args = parser.parse_args()
+
+    if not os.path.exists(args.path):
+        backend = SQLiteMemoryBackend(args.path)
+        start = time.perf_counter()
+        backend.bulk_load(generate(args.count))
+        elapsed = time.perf_counter() - start
+        print(f"批量导入 {args.count} 条: {elapsed:.1f}s ({args.count / elapsed:.0f} 条/秒)")
+        backend.close()
+
+    start = time.perf_counter()
+    backend = SQLiteMemoryBackend(args.path)
+    open_ms = (time.perf_counter() - start) * 1000
+    results = backend.search("喜欢机器学习", 20)
+    first_ms = (time.perf_counter() - start) * 1000
+    print(f"创建后端: {open_ms:.2f}ms, 打开数据库并完成首次检索: {first_ms:.1f}ms ({len(results)} 条结果)")
+
+    rng = random.Random(1)
+    start = time.perf_counter()
+    for _ in range(args.queries):
+        backend.search(f"{rng.choice(TOPICS)} {rng.choice(TOPICS)}", 20)
+    print(f"热检索平均耗时: {(time.perf_counter() - start) / args.queries * 1000:.1f}ms")
+    print(f"记忆总数: {len(backend)}")
+    backend.close()
+
+if __name__ == "__main__":
+    main()
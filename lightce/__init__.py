@@ -12,7 +12,7 @@ except ImportError:
 try:
     from .tools.compression import (
         CompressionAgent, CompressionAgentConfig, CompressionResult,
-        create_compression_agent, compress_text_with_agent, analyze_text_compression_potential
+        create_compression_agent, compress_text_with_agent
     )
 except ImportError:
     # 如果某些模块不存在，忽略错误
@@ -52,7 +52,7 @@ __all__ = [
     "AGENT_NAME", "OPENAI_MODEL",
     # 新的压缩Agent系统
     "CompressionAgent", "CompressionAgentConfig", "CompressionResult",
-    "create_compression_agent", "compress_text_with_agent", "analyze_text_compression_potential",
+    "create_compression_agent", "compress_text_with_agent",
     # 新的通用Agent系统
     "UniversalAgent", "create_agent", "ModelConfig",
     "EXAMPLE_TOOLS", "get_tools_by_category",
@@ -1,10 +1,24 @@
 # Agent包初始化文件
 from .system import UniversalAgent, create_agent, ModelConfig
-from .memory_agent import MemoryAgent, create_memory_agent, MemoryAgentConfig, MemoryItem, Rule
+from .cache import LLMCache, InMemoryLRUCache, SQLiteLLMCache, make_cache_key, set_default_cache, get_default_cache
+from .clients import ClientRegistry, get_client_registry, set_client_registry
+from .memory_index import Embedder, HashingEmbedder, BruteForceIndex, LSHIndex, MemoryVectorIndex
+from .memory_store import MemoryStore
+from .pattern_matcher import AhoCorasickAutomaton, MultiPatternMatcher
+from .memory_backend import SQLiteMemoryBackend
+from .context_budget import ContextAssembler, ContextSection, ContextReport, count_tokens, derive_context_budget
+from .memory_agent import MemoryAgent, create_memory_agent, MemoryAgentConfig, MemoryItem, Rule, MemoryScope
+from .session import SessionManager, SessionState
 from .react_agent import ReactAgent, create_react_agent, ReactAgentConfig, EnvironmentEvent, UserFeedback, AdaptiveRule, BehaviorPattern, ReactionType
 
 __all__ = [
     "UniversalAgent", "create_agent", "ModelConfig",
-    "MemoryAgent", "create_memory_agent", "MemoryAgentConfig", "MemoryItem", "Rule",
+    "LLMCache", "InMemoryLRUCache", "SQLiteLLMCache", "make_cache_key", "set_default_cache", "get_default_cache",
+    "ClientRegistry", "get_client_registry", "set_client_registry",
+    "Embedder", "HashingEmbedder", "BruteForceIndex", "LSHIndex", "MemoryVectorIndex",
+    "MemoryStore", "SQLiteMemoryBackend", "AhoCorasickAutomaton", "MultiPatternMatcher",
+    "ContextAssembler", "ContextSection", "ContextReport", "count_tokens", "derive_context_budget",
+    "MemoryAgent", "create_memory_agent", "MemoryAgentConfig", "MemoryItem", "Rule", "MemoryScope",
+    "SessionManager", "SessionState",
     "ReactAgent", "create_react_agent", "ReactAgentConfig", "EnvironmentEvent", "UserFeedback", "AdaptiveRule", "BehaviorPattern", "ReactionType"
 ] 
\ No newline at end of file
@@ -0,0 +1,275 @@
+"""
+LLM响应缓存
+以模型配置、消息和工具列表的哈希作为键缓存模型响应，支持内存LRU和SQLite持久化后端
+"""
+
+from typing import Dict, List, Any, Optional
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from ..config import LLM_CACHE_MAX_SIZE, LLM_CACHE_TTL, LLM_CACHE_PATH
+
+logger = logging.getLogger(__name__)
+
+def make_cache_key(model_config: Dict[str, Any], messages: List[Dict[str, Any]], tool_names: Optional[List[str]] = None) -> str:
+    """
+    计算缓存键
+
+    Args:
+        model_config: 模型配置字典
+        messages: 可JSON序列化的消息列表
+        tool_names: 绑定的工具名称列表
+
+    Returns:
+        sha256十六进制摘要
+    """
+    payload = {
+        "model_config": model_config,
+        "messages": messages,
+        "tools": sorted(tool_names or [])
+    }
+    canonical = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+class LLMCache(ABC):
+    """LLM响应缓存基类，子类实现_get/_set/_clear/__len__"""
+
+    def __init__(self, max_size: Optional[int] = LLM_CACHE_MAX_SIZE, ttl: Optional[float] = LLM_CACHE_TTL):
+        """
+        初始化缓存
+
+        Args:
+            max_size: 最大条目数，为None时不限制
+            ttl: 条目有效期（秒），为None时永不过期
+        """
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[Any]:
+        """读取缓存，未命中或已过期时返回None"""
+        value = self._get(key)
+        with self._stats_lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, key: str, value: Any):
+        """写入缓存"""
+        self._set(key, value)
+
+    def clear(self):
+        """清空缓存并重置统计"""
+        self._clear()
+        with self._stats_lock:
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取命中统计"""
+        total = self.hits + self.misses
+        return {
+            "backend": self.__class__.__name__,
+            "size": len(self),
+            "max_size": self.max_size,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0
+        }
+
+    def _is_expired(self, created_at: float) -> bool:
+        """判断条目是否过期"""
+        return self.ttl is not None and time.time() - created_at > self.ttl
+
+    def _record_evictions(self, count: int):
+        """记录淘汰条目数"""
+        if count:
+            with self._stats_lock:
+                self.evictions += count
+
+    @abstractmethod
+    def _get(self, key: str) -> Optional[Any]:
+        """读取未过期的条目，不存在时返回None"""
+
+    @abstractmethod
+    def _set(self, key: str, value: Any):
+        """写入条目，超过容量时淘汰旧条目"""
+
+    @abstractmethod
+    def _clear(self):
+        """删除全部条目"""
+
+    @abstractmethod
+    def __len__(self) -> int:
+        """当前条目数"""
+
+class InMemoryLRUCache(LLMCache):
+    """进程内LRU缓存"""
+
+    def __init__(self, max_size: Optional[int] = LLM_CACHE_MAX_SIZE, ttl: Optional[float] = LLM_CACHE_TTL):
+        super().__init__(max_size, ttl)
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+
+            created_at, value = entry
+            if self._is_expired(created_at):
+                del self._data[key]
+                self._record_evictions(1)
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def _set(self, key: str, value: Any):
+        with self._lock:
+            self._data[key] = (time.time(), value)
+            self._data.move_to_end(key)
+
+            evicted = 0
+            while self.max_size is not None and len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                evicted += 1
+            self._record_evictions(evicted)
+
+    def _clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class SQLiteLLMCache(LLMCache):
+    """基于SQLite的持久化缓存，可跨进程、跨运行复用"""
+
+    def __init__(self, path: str, max_size: Optional[int] = LLM_CACHE_MAX_SIZE, ttl: Optional[float] = LLM_CACHE_TTL):
+        """
+        初始化SQLite缓存
+
+        Args:
+            path: 数据库文件路径
+            max_size: 最大条目数，按最近访问时间淘汰
+            ttl: 条目有效期（秒）
+        """
+        super().__init__(max_size, ttl)
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed ON llm_cache(accessed_at)")
+        self._conn.commit()
+
+        logger.info(f"初始化SQLite LLM缓存: {path}")
+
+    def _get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            value, created_at = row
+            if self._is_expired(created_at):
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._record_evictions(1)
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            self._conn.commit()
+        return json.loads(value)
+
+    def _set(self, key: str, value: Any):
+        now = time.time()
+        serialized = json.dumps(value, ensure_ascii=False)
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, serialized, now, now)
+            )
+
+            evicted = 0
+            if self.ttl is not None:
+                evicted += self._conn.execute(
+                    "DELETE FROM llm_cache WHERE created_at < ?", (now - self.ttl,)
+                ).rowcount
+            if self.max_size is not None:
+                evicted += self._conn.execute(
+                    """
+                    DELETE FROM llm_cache WHERE key IN (
+                        SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )
+                    """,
+                    (self.max_size,)
+                ).rowcount
+            self._conn.commit()
+        self._record_evictions(evicted)
+
+    def _clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()[0]
+
+# 全局默认缓存，所有未显式指定缓存的UniversalAgent共享
+_default_cache: Optional[LLMCache] = None
+_default_cache_initialized = False
+
+def set_default_cache(cache: Optional[LLMCache]):
+    """
+    设置全局默认缓存
+
+    Args:
+        cache: 缓存实例，为None时关闭默认缓存
+    """
+    global _default_cache, _default_cache_initialized
+    _default_cache = cache
+    _default_cache_initialized = True
+
+def get_default_cache() -> Optional[LLMCache]:
+    """获取全局默认缓存，配置了LLM_CACHE_PATH时首次调用自动创建SQLite缓存"""
+    global _default_cache, _default_cache_initialized
+    if not _default_cache_initialized:
+        if LLM_CACHE_PATH:
+            _default_cache = SQLiteLLMCache(LLM_CACHE_PATH)
+        _default_cache_initialized = True
+    return _default_cache
@@ -0,0 +1,243 @@
+"""
+LLM客户端注册表
+进程内按主机共享keep-alive HTTP连接池，并按提供商/模型/参数复用LLM客户端实例
+"""
+
+from typing import Dict, Any, Optional, Callable, Hashable, Tuple
+from collections import OrderedDict
+import asyncio
+import logging
+import threading
+
+import httpx
+
+from ..config import (
+    HTTP_MAX_CONNECTIONS, HTTP_MAX_KEEPALIVE_CONNECTIONS, HTTP_KEEPALIVE_EXPIRY,
+    HTTP_HOST_LIMITS, LLM_CLIENT_CACHE_SIZE, DEFAULT_TIMEOUT
+)
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "default"
+
+class LoopLocalAsyncClient(httpx.AsyncClient):
+    """
+    在当前事件循环的共享连接池上发送请求的异步HTTP客户端
+
+    LLM客户端实例在多个事件循环之间共享，而异步连接绑定在创建它的事件循环上，
+    因此在发送请求时才按当前事件循环从注册表选择连接池
+    """
+
+    def __init__(self, registry: "ClientRegistry", base_url: Optional[str] = None):
+        super().__init__(timeout=registry.timeout)
+        self._registry = registry
+        self._pool_url = base_url
+
+    async def send(self, request: httpx.Request, **kwargs) -> httpx.Response:
+        client = self._registry.get_async_http_client(self._pool_url)
+        return await client.send(request, **kwargs)
+
+class ClientRegistry:
+    """进程级客户端注册表"""
+
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections: int = HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        timeout: float = DEFAULT_TIMEOUT,
+        host_limits: Optional[Dict[str, int]] = None,
+        max_llm_clients: int = LLM_CLIENT_CACHE_SIZE
+    ):
+        """
+        初始化客户端注册表
+
+        Args:
+            max_connections: 每个主机连接池的最大连接数
+            max_keepalive_connections: 每个主机保持的最大空闲连接数
+            keepalive_expiry: 空闲连接保持时间（秒）
+            timeout: HTTP请求超时时间（秒）
+            host_limits: 按主机覆盖最大连接数，如 {"api.openai.com": 200}
+            max_llm_clients: 最多缓存的LLM客户端实例数
+        """
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.timeout = timeout
+        self.host_limits = dict(HTTP_HOST_LIMITS if host_limits is None else host_limits)
+        self.max_llm_clients = max_llm_clients
+
+        self._lock = threading.Lock()
+        self._http_clients: Dict[str, httpx.Client] = {}
+        self._async_http_clients: Dict[Tuple[str, int], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+        self._loop_local_clients: Dict[str, LoopLocalAsyncClient] = {}
+        self._llm_clients: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.llm_hits = 0
+        self.llm_misses = 0
+
+    def _get_host(self, base_url: Optional[str]) -> str:
+        """从base_url中提取主机名"""
+        if not base_url:
+            return DEFAULT_HOST
+        return httpx.URL(base_url).host or DEFAULT_HOST
+
+    def get_limits(self, host: str) -> httpx.Limits:
+        """获取指定主机的连接池限制"""
+        max_connections = self.host_limits.get(host, self.max_connections)
+        return httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=min(self.max_keepalive_connections, max_connections),
+            keepalive_expiry=self.keepalive_expiry
+        )
+
+    def get_http_client(self, base_url: Optional[str] = None) -> httpx.Client:
+        """
+        获取指定主机共享的同步HTTP客户端
+
+        Args:
+            base_url: API地址，为None时使用默认主机的连接池
+
+        Returns:
+            httpx.Client实例
+        """
+        host = self._get_host(base_url)
+        with self._lock:
+            client = self._http_clients.get(host)
+            if client is None or client.is_closed:
+                client = httpx.Client(limits=self.get_limits(host), timeout=self.timeout)
+                self._http_clients[host] = client
+                logger.info(f"创建共享HTTP连接池: {host}")
+            return client
+
+    def get_async_http_client(self, base_url: Optional[str] = None) -> httpx.AsyncClient:
+        """
+        获取指定主机在当前事件循环中共享的异步HTTP客户端
+
+        异步连接绑定在创建它的事件循环上，因此每个事件循环各自持有一个连接池，
+        已关闭事件循环的连接池会被丢弃
+
+        Args:
+            base_url: API地址
+
+        Returns:
+            httpx.AsyncClient实例
+        """
+        host = self._get_host(base_url)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            for key in [k for k, (l, _) in self._async_http_clients.items() if l.is_closed()]:
+                del self._async_http_clients[key]
+
+            entry = self._async_http_clients.get((host, id(loop)))
+            if entry is None or entry[1].is_closed:
+                client = httpx.AsyncClient(limits=self.get_limits(host), timeout=self.timeout)
+                self._async_http_clients[(host, id(loop))] = (loop, client)
+                return client
+            return entry[1]
+
+    def get_loop_local_async_client(self, base_url: Optional[str] = None) -> LoopLocalAsyncClient:
+        """
+        获取指定主机的异步HTTP客户端，可在事件循环之外获取并传给LLM客户端
+
+        请求发送时转交给get_async_http_client返回的当前事件循环的连接池
+
+        Args:
+            base_url: API地址
+
+        Returns:
+            LoopLocalAsyncClient实例
+        """
+        host = self._get_host(base_url)
+        with self._lock:
+            client = self._loop_local_clients.get(host)
+            if client is None:
+                client = LoopLocalAsyncClient(self, base_url)
+                self._loop_local_clients[host] = client
+            return client
+
+    def get_llm(self, key: Hashable, factory: Callable[[], Any]) -> Any:
+        """
+        获取共享的LLM客户端，不存在时调用factory创建
+
+        Args:
+            key: 客户端键，通常由客户端类、提供商、模型和参数组成
+            factory: 创建客户端的无参函数
+
+        Returns:
+            LLM客户端实例
+        """
+        with self._lock:
+            client = self._llm_clients.get(key)
+            if client is not None:
+                self._llm_clients.move_to_end(key)
+                self.llm_hits += 1
+                return client
+            self.llm_misses += 1
+
+        client = factory()
+
+        with self._lock:
+            # 并发创建时保留先写入的实例
+            existing = self._llm_clients.setdefault(key, client)
+            self._llm_clients.move_to_end(key)
+            while len(self._llm_clients) > self.max_llm_clients:
+                self._llm_clients.popitem(last=False)
+            return existing
+
+    def clear_llm_clients(self):
+        """清空缓存的LLM客户端"""
+        with self._lock:
+            self._llm_clients.clear()
+
+    def close(self):
+        """关闭所有同步HTTP客户端并清空缓存"""
+        with self._lock:
+            for client in self._http_clients.values():
+                client.close()
+            self._http_clients.clear()
+            self._async_http_clients.clear()
+            self._loop_local_clients.clear()
+            self._llm_clients.clear()
+
+    async def aclose(self):
+        """关闭当前事件循环中的异步HTTP客户端"""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            keys = [k for k, (l, _) in self._async_http_clients.items() if l is loop]
+            clients = [self._async_http_clients.pop(k)[1] for k in keys]
+        for client in clients:
+            await client.aclose()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取注册表统计信息"""
+        return {
+            "http_hosts": list(self._http_clients.keys()),
+            "async_http_clients": len(self._async_http_clients),
+            "llm_clients": len(self._llm_clients),
+            "llm_hits": self.llm_hits,
+            "llm_misses": self.llm_misses
+        }
+
+# 进程级默认注册表
+_registry: Optional[ClientRegistry] = None
+_registry_lock = threading.Lock()
+
+def get_client_registry() -> ClientRegistry:
+    """获取进程级客户端注册表，首次调用时创建"""
+    global _registry
+    if _registry is None:
+        with _registry_lock:
+            if _registry is None:
+                _registry = ClientRegistry()
+    return _registry
+
+def set_client_registry(registry: Optional[ClientRegistry]):
+    """
+    替换进程级客户端注册表
+
+    Args:
+        registry: 新的注册表，为None时下次获取会重新创建默认注册表
+    """
+    global _registry
+    with _registry_lock:
+        _registry = registry
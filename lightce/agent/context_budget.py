@@ -0,0 +1,210 @@
+"""
+按token预算组装上下文
+统计各部分的token数，按部分优先级和条目相关度依次填充，放不下的条目截断或丢弃，并报告裁剪情况
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+from functools import lru_cache
+import logging
+import math
+import re
+
+from pydantic import BaseModel, Field
+
+from ..config import MODEL_CONTEXT_LENGTHS, DEFAULT_CONTEXT_LENGTH, CONTEXT_BUDGET_RATIO, CONTEXT_MIN_TRUNCATE_TOKENS
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+logger = logging.getLogger(__name__)
+
+# 未安装tiktoken时的估算：汉字和全角符号约1个token，其余字符约4个一个token
+WIDE_CHAR_PATTERN = re.compile(r'[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]')
+TRUNCATION_MARK = "…"
+
+@lru_cache(maxsize=32)
+def _get_encoding(model_name: Optional[str]):
+    """获取模型对应的tiktoken编码，未知模型使用cl100k_base"""
+    if tiktoken is None:
+        return None
+    try:
+        if model_name:
+            try:
+                return tiktoken.encoding_for_model(model_name)
+            except KeyError:
+                pass
+        return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        logger.warning(f"加载tiktoken编码失败，使用估算: {str(e)}")
+        return None
+
+def count_tokens(text: str, model_name: Optional[str] = None) -> int:
+    """
+    统计文本的token数
+
+    Args:
+        text: 文本
+        model_name: 模型名称，用于选择tiktoken编码
+
+    Returns:
+        token数，未安装tiktoken时为估算值
+    """
+    if not text:
+        return 0
+    encoding = _get_encoding(model_name)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    wide = len(WIDE_CHAR_PATTERN.findall(text))
+    return wide + math.ceil((len(text) - wide) / 4)
+
+def get_context_length(model_name: str) -> int:
+    """
+    获取模型的上下文长度
+
+    Args:
+        model_name: 模型名称，未精确匹配时按最长前缀匹配
+
+    Returns:
+        上下文长度，未知模型返回默认值
+    """
+    if model_name in MODEL_CONTEXT_LENGTHS:
+        return MODEL_CONTEXT_LENGTHS[model_name]
+    prefixes = [name for name in MODEL_CONTEXT_LENGTHS if model_name.startswith(name)]
+    if prefixes:
+        return MODEL_CONTEXT_LENGTHS[max(prefixes, key=len)]
+    return DEFAULT_CONTEXT_LENGTH
+
+def derive_context_budget(model_name: str, max_tokens: int, context_length: Optional[int] = None) -> int:
+    """
+    按模型上下文长度推算注入上下文的token预算
+
+    Args:
+        model_name: 模型名称
+        max_tokens: 为模型输出预留的token数
+        context_length: 上下文长度，为None时按模型名称查找
+
+    Returns:
+        token预算，为扣除输出预留后上下文长度的CONTEXT_BUDGET_RATIO
+    """
+    length = context_length or get_context_length(model_name)
+    return max(int((length - max_tokens) * CONTEXT_BUDGET_RATIO), 0)
+
+class ContextSection(BaseModel):
+    """上下文中的一个部分"""
+    name: str = Field(description="部分名称")
+    header: str = Field(description="标题行")
+    items: List[str] = Field(default_factory=list, description="条目文本，按相关度从高到低排列")
+    priority: int = Field(default=0, description="填充优先级，越大越先分配预算")
+
+class ContextReport(BaseModel):
+    """上下文组装结果"""
+    text: str = Field(default="", description="组装后的上下文")
+    tokens: int = Field(default=0, description="上下文token数")
+    budget: int = Field(description="token预算")
+    included: Dict[str, int] = Field(default_factory=dict, description="各部分保留的条目数")
+    truncated: List[Dict[str, Any]] = Field(default_factory=list, description="被截断的条目")
+    dropped: List[Dict[str, Any]] = Field(default_factory=list, description="被丢弃的条目")
+
+    @property
+    def dropped_tokens(self) -> int:
+        """被丢弃和截断掉的token数"""
+        return sum(d["tokens"] for d in self.dropped) + sum(t["tokens"] - t["kept_tokens"] for t in self.truncated)
+
+class ContextAssembler:
+    """按token预算组装上下文"""
+
+    def __init__(self, budget: int, model_name: Optional[str] = None, min_truncate_tokens: int = CONTEXT_MIN_TRUNCATE_TOKENS):
+        """
+        初始化组装器
+
+        Args:
+            budget: token预算
+            model_name: 模型名称，用于统计token
+            min_truncate_tokens: 剩余预算不少于该值时截断放不下的条目，否则丢弃
+        """
+        self.budget = budget
+        self.model_name = model_name
+        self.min_truncate_tokens = min_truncate_tokens
+
+    def count(self, text: str) -> int:
+        """统计token数"""
+        return count_tokens(text, self.model_name)
+
+    def _truncate(self, text: str, max_tokens: int) -> Tuple[str, int]:
+        """二分查找加换行后不超过max_tokens的最长前缀，末尾加截断标记"""
+        low, high = 0, len(text)
+        best, best_tokens = "", 0
+        while low < high:
+            mid = (low + high + 1) // 2
+            candidate = text[:mid].rstrip() + TRUNCATION_MARK
+            tokens = self.count(candidate + "\n")
+            if tokens <= max_tokens:
+                best, best_tokens = candidate, tokens
+                low = mid
+            else:
+                high = mid - 1
+        return best, best_tokens
+
+    def assemble(self, sections: Iterable[ContextSection]) -> ContextReport:
+        """
+        组装上下文
+
+        各部分按优先级依次分配预算，部分内的条目按给定顺序填充；
+        放不下的条目在剩余预算足够时截断，否则丢弃并继续尝试后面较短的条目。
+        输出时各部分保持传入顺序
+
+        Args:
+            sections: 上下文部分
+
+        Returns:
+            ContextReport，包含上下文文本和裁剪情况
+        """
+        sections = [section for section in sections if section.items]
+        report = ContextReport(budget=self.budget)
+        remaining = self.budget
+        kept: Dict[str, List[str]] = {}
+
+        for section in sorted(sections, key=lambda s: s.priority, reverse=True):
+            # 各部分之间用空行分隔，计入标题的开销
+            header_tokens = self.count(section.header + "\n") + 1
+            lines: List[str] = []
+            for position, item in enumerate(section.items):
+                line = f"- {item}"
+                tokens = self.count(line + "\n")
+                cost = tokens + (0 if lines else header_tokens)
+                if cost <= remaining:
+                    lines.append(line)
+                    remaining -= cost
+                    continue
+
+                available = remaining - (cost - tokens)
+                if available >= self.min_truncate_tokens:
+                    truncated, kept_tokens = self._truncate(line, available)
+                    if truncated:
+                        lines.append(truncated)
+                        remaining -= kept_tokens + (cost - tokens)
+                        report.truncated.append({
+                            "section": section.name,
+                            "index": position,
+                            "tokens": tokens,
+                            "kept_tokens": kept_tokens
+                        })
+                        continue
+                report.dropped.append({"section": section.name, "index": position, "tokens": tokens})
+
+            if lines:
+                kept[section.name] = lines
+            report.included[section.name] = len(lines)
+
+        parts = [section.header + "\n" + "\n".join(kept[section.name]) + "\n" for section in sections if section.name in kept]
+        report.text = "\n".join(parts)
+        report.tokens = self.count(report.text)
+
+        if report.dropped or report.truncated:
+            logger.info(
+                f"上下文超出预算{self.budget}，丢弃{len(report.dropped)}条、截断{len(report.truncated)}条，"
+                f"保留{report.tokens}个token"
+            )
+        return report
@@ -1,27 +1,40 @@
-from typing import Dict, List, Any, Optional, TypedDict, Annotated, Union
+from typing import Dict, List, Any, Optional, TypedDict, Annotated, Union, AsyncIterator, Iterator
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
 from langchain_community.llms import Ollama
 from pydantic import BaseModel, Field
 import json
 import logging
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from ..config import (
     DEFAULT_MODEL_NAME, DEFAULT_TEMPERATURE, DEFAULT_TOP_P, DEFAULT_TOP_K, 
     DEFAULT_MAX_TOKENS, DEFAULT_PROVIDER, SUPPORTED_PROVIDERS,
     TEMPERATURE_MIN, TEMPERATURE_MAX, TOP_P_MIN, TOP_P_MAX, 
-    TOP_K_MIN, MAX_TOKENS_MIN, LOG_LEVEL, LOG_FORMAT
+    TOP_K_MIN, MAX_TOKENS_MIN, LOG_LEVEL, LOG_FORMAT, MEMORY_BACKEND_PATH
 )
+from .clients import get_client_registry
+from .memory_index import Embedder, HashingEmbedder, MemoryVectorIndex
+from .memory_store import MemoryStore
+from .memory_backend import SQLiteMemoryBackend
+from .context_budget import ContextAssembler, ContextSection, derive_context_budget
 
 # 配置日志
 logging.basicConfig(level=getattr(logging, LOG_LEVEL), format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
+# 向量召回的候选数相对于返回数量的倍数，候选再按重要性和时效重排
+MEMORY_CANDIDATE_MULTIPLIER = 4
+
 class MemoryItem(BaseModel):
     """记忆项"""
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex, description="记忆ID")
     content: str = Field(description="记忆内容")
     timestamp: datetime = Field(default_factory=datetime.now, description="创建时间")
     importance: float = Field(default=0.5, ge=0.0, le=1.0, description="重要性评分")
@@ -30,6 +43,7 @@ class MemoryItem(BaseModel):
 
 class Rule(BaseModel):
     """规则定义"""
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex, description="规则ID")
     name: str = Field(description="规则名称")
     description: str = Field(description="规则描述")
     content: str = Field(description="规则内容")
@@ -43,7 +57,7 @@ class MemoryAgentState(TypedDict):
     tools: Annotated[List[BaseTool], "可用工具列表"]
     
     # 记忆相关
-    long_term_memory: Annotated[List[MemoryItem], "长期记忆"]
+    memory_count: Annotated[int, "运行开始时的长期记忆条数，记忆本身由Agent持有"]
     short_term_memory: Annotated[List[BaseMessage], "短期对话记忆"]
     
     # 规则相关
@@ -56,6 +70,7 @@ class MemoryAgentState(TypedDict):
     model_config: Annotated[Dict[str, Any], "模型配置参数"]
     current_step: Annotated[str, "当前执行步骤"]
     error: Annotated[Optional[str], "错误信息"]
+    context_report: Annotated[Optional[Dict[str, Any]], "上下文token预算及裁剪情况"]
     
     # 输出相关
     output_text: Annotated[Optional[str], "最终输出文本"]
@@ -68,58 +83,189 @@ class MemoryAgentConfig(BaseModel):
     top_k: int = Field(default=DEFAULT_TOP_K, description="Top-k参数", ge=TOP_K_MIN)
     max_tokens: int = Field(default=DEFAULT_MAX_TOKENS, description="最大token数", ge=MAX_TOKENS_MIN)
     provider: str = Field(default=DEFAULT_PROVIDER, description=f"模型提供商: {', '.join(SUPPORTED_PROVIDERS)}")
+    base_url: Optional[str] = Field(default=None, description="API地址，为None时使用提供商默认地址")
     
     # 记忆相关配置
     max_short_term_memory: int = Field(default=10, description="短期记忆最大条数")
-    max_long_term_memory: int = Field(default=1000, description="长期记忆最大条数")
-    memory_importance_threshold: float = Field(default=0.3, description="记忆重要性阈值")
+    max_long_term_memory: int = Field(default=1000, description="长期记忆最大条数（启用持久化时为进程内工作集的条数）")
+    memory_backend_path: Optional[str] = Field(default=MEMORY_BACKEND_PATH, description="长期记忆持久化SQLite路径，为None时仅保存在内存中")
+    memory_importance_threshold: float = Field(default=0.3, description="记忆重要性阈值（仅关键词检索时使用）")
+    enable_vector_index: bool = Field(default=True, description="是否使用向量索引检索长期记忆，关闭时使用关键词扫描")
+    embedding_dim: int = Field(default=512, description="默认哈希嵌入的向量维度", ge=16)
+    memory_similarity_threshold: float = Field(default=0.1, description="记忆与查询的最低相似度")
+    memory_recency_half_life_days: Optional[float] = Field(default=30.0, description="记忆重要性衰减半衰期（天），用于检索排序和容量淘汰，为None时不随时间衰减")
+    ann_threshold: int = Field(default=50000, description="记忆数超过该值时启用近似最近邻索引")
     
     # 规则相关配置
     max_rules: int = Field(default=50, description="最大规则数量")
     
     # 工具相关配置
     max_tool_outputs: int = Field(default=20, description="最大工具输出数量")
+    
+    # 上下文预算配置
+    context_length: Optional[int] = Field(default=None, description="模型上下文长度，为None时按模型名称查找")
+    context_token_budget: Optional[int] = Field(default=None, description="系统提示中注入上下文的token预算，为None时按上下文长度推算", ge=0)
+    context_memory_limit: int = Field(default=5, description="参与上下文组装的候选记忆条数", ge=0)
+    context_tool_outputs: int = Field(default=3, description="参与上下文组装的最近工具输出条数", ge=0)
+
+class MemoryScope:
+    """
+    一组长期记忆及其检索索引和持久化后端
+
+    MemoryAgent默认使用自身的记忆范围；SessionManager为每个会话创建独立的范围，
+    通过 MemoryAgent.use_scope 在调用期间切换，所有会话共享同一张图、LLM客户端和规则
+    """
+    
+    def __init__(
+        self,
+        long_term_memory: MemoryStore[MemoryItem],
+        memory_index: MemoryVectorIndex,
+        memory_backend: Optional[SQLiteMemoryBackend] = None
+    ):
+        self.long_term_memory = long_term_memory
+        self.memory_index = memory_index
+        self.memory_backend = memory_backend
 
 class MemoryAgent:
     """支持长期记忆、短期对话、工具输出、规则和输出文本的Agent"""
     
-    def __init__(self, config: Optional[MemoryAgentConfig] = None):
+    def __init__(
+        self,
+        config: Optional[MemoryAgentConfig] = None,
+        embedder: Optional[Embedder] = None,
+        memory_backend: Optional[SQLiteMemoryBackend] = None
+    ):
         """
         初始化记忆Agent
         
         Args:
             config: Agent配置参数
+            embedder: 记忆检索使用的文本嵌入器，默认使用离线哈希嵌入
+            memory_backend: 长期记忆持久化后端，默认按配置中的memory_backend_path创建
         """
         self.config = config or MemoryAgentConfig()
         self.llm = self._create_llm()
         self.tools: List[BaseTool] = []
-        self.rules: List[Rule] = []
-        self.long_term_memory: List[MemoryItem] = []
+        self._llm_with_tools = None
+        self._tool_node: Optional[ToolNode] = None
+        self.rules: MemoryStore[Rule] = MemoryStore(
+            self.config.max_rules,
+            priority=lambda rule: rule.priority
+        )
+        self.embedder = embedder or HashingEmbedder(self.config.embedding_dim)
+        # 持久化后端在首次读写时才打开数据库，检索时按需把相关记忆载入进程内工作集
+        if memory_backend is None and self.config.memory_backend_path:
+            memory_backend = SQLiteMemoryBackend(self.config.memory_backend_path)
+        self._default_scope = self.create_scope(self.config.max_long_term_memory, memory_backend=memory_backend)
+        self._active_scope: ContextVar[Optional[MemoryScope]] = ContextVar(f"memory_scope_{id(self)}", default=None)
         self.graph = self._build_graph()
+    
+    def create_scope(
+        self,
+        max_memories: int,
+        memory_backend: Optional[SQLiteMemoryBackend] = None,
+        initial_capacity: int = 1024
+    ) -> MemoryScope:
+        """
+        创建与本Agent共享嵌入器和衰减配置的记忆范围
+        
+        Args:
+            max_memories: 最大记忆条数
+            memory_backend: 持久化后端
+            initial_capacity: 向量索引的初始容量
+        
+        Returns:
+            MemoryScope实例
+        """
+        half_life_days = self.config.memory_recency_half_life_days
+        long_term_memory: MemoryStore[MemoryItem] = MemoryStore(
+            max_memories,
+            priority=lambda memory: memory.importance,
+            timestamp=lambda memory: memory.timestamp,
+            half_life=half_life_days * 86400 if half_life_days else None
+        )
+        memory_index = MemoryVectorIndex(
+            self.embedder,
+            ann_threshold=self.config.ann_threshold,
+            initial_capacity=initial_capacity
+        )
+        return MemoryScope(long_term_memory, memory_index, memory_backend)
+    
+    @contextmanager
+    def use_scope(self, scope: MemoryScope) -> Iterator[MemoryScope]:
+        """
+        在上下文内使用指定的记忆范围，只影响当前线程/协程及其派生的任务
         
-    def _create_llm(self):
-        """根据配置创建LLM实例"""
-        if self.config.provider == "openai":
-            return ChatOpenAI(
-                model=self.config.model_name,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                top_p=self.config.top_p,
-                top_k=self.config.top_k
-            )
-        elif self.config.provider == "ollama":
-            return Ollama(
-                model=self.config.model_name,
-                temperature=self.config.temperature,
-                top_p=self.config.top_p,
-                top_k=self.config.top_k
-            )
+        Args:
+            scope: 记忆范围
+        """
+        token = self._active_scope.set(scope)
+        try:
+            yield scope
+        finally:
+            self._active_scope.reset(token)
+    
+    @property
+    def scope(self) -> MemoryScope:
+        """当前生效的记忆范围"""
+        return self._active_scope.get() or self._default_scope
+    
+    @property
+    def long_term_memory(self) -> MemoryStore[MemoryItem]:
+        """当前记忆范围的长期记忆"""
+        return self.scope.long_term_memory
+    
+    @property
+    def memory_index(self) -> MemoryVectorIndex:
+        """当前记忆范围的向量索引"""
+        return self.scope.memory_index
+    
+    @property
+    def memory_backend(self) -> Optional[SQLiteMemoryBackend]:
+        """当前记忆范围的持久化后端"""
+        return self.scope.memory_backend
+        
+    def _create_llm(self, temperature: Optional[float] = None):
+        """
+        根据配置获取LLM实例，相同配置的实例在进程内共享并复用HTTP连接池
+        
+        Args:
+            temperature: 覆盖配置中的温度参数
+        """
+        registry = get_client_registry()
+        config = self.config
+        if temperature is None:
+            temperature = config.temperature
+        
+        if config.provider == "openai":
+            key = (ChatOpenAI, config.model_name, temperature, config.max_tokens, config.top_p, config.top_k, config.base_url)
+            return registry.get_llm(key, lambda: ChatOpenAI(
+                model=config.model_name,
+                temperature=temperature,
+                max_tokens=config.max_tokens,
+                top_p=config.top_p,
+                top_k=config.top_k,
+                base_url=config.base_url,
+                http_client=registry.get_http_client(config.base_url),
+                http_async_client=registry.get_loop_local_async_client(config.base_url)
+            ))
+        elif config.provider == "ollama":
+            key = (Ollama, config.model_name, temperature, config.top_p, config.top_k, config.base_url)
+            ollama_kwargs = {"base_url": config.base_url} if config.base_url else {}
+            return registry.get_llm(key, lambda: Ollama(
+                model=config.model_name,
+                temperature=temperature,
+                top_p=config.top_p,
+                top_k=config.top_k,
+                **ollama_kwargs
+            ))
         else:
-            raise ValueError(f"不支持的模型提供商: {self.config.provider}。支持的提供商: {', '.join(SUPPORTED_PROVIDERS)}")
+            raise ValueError(f"不支持的模型提供商: {config.provider}。支持的提供商: {', '.join(SUPPORTED_PROVIDERS)}")
     
     def add_tool(self, tool: BaseTool):
         """添加工具到agent"""
         self.tools.append(tool)
+        self._invalidate_bindings()
         logger.info(f"添加工具: {tool.name}")
     
     def add_tools(self, tools: List[BaseTool]):
@@ -128,13 +274,8 @@ class MemoryAgent:
             self.add_tool(tool)
     
     def add_rule(self, rule: Rule):
-        """添加规则"""
-        if len(self.rules) >= self.config.max_rules:
-            # 移除优先级最低的规则
-            self.rules.sort(key=lambda x: x.priority)
-            self.rules.pop(0)
-        
-        self.rules.append(rule)
+        """添加规则，已满时移除优先级最低的规则"""
+        self.rules.add(rule)
         logger.info(f"添加规则: {rule.name}")
     
     def add_rules(self, rules: List[Rule]):
@@ -143,24 +284,73 @@ class MemoryAgent:
             self.add_rule(rule)
     
     def add_memory(self, content: str, importance: float = 0.5, category: str = "general", metadata: Dict[str, Any] = None):
-        """添加长期记忆"""
-        if len(self.long_term_memory) >= self.config.max_long_term_memory:
-            # 移除最不重要的记忆
-            self.long_term_memory.sort(key=lambda x: x.importance)
-            self.long_term_memory.pop(0)
-        
+        """添加长期记忆，已满时移除衰减后重要性最低的记忆"""
         memory_item = MemoryItem(
             content=content,
             importance=importance,
             category=category,
             metadata=metadata or {}
         )
-        self.long_term_memory.append(memory_item)
+        for removed in self.long_term_memory.add(memory_item):
+            self.memory_index.remove(removed.id)
+        if self.memory_backend is not None:
+            self.memory_backend.add(memory_item.dict())
+        self.memory_index.add(memory_item.id, memory_item.content)
         logger.info(f"添加记忆: {content[:50]}...")
     
     def get_relevant_memories(self, query: str, limit: int = 5) -> List[MemoryItem]:
-        """获取相关记忆"""
-        # 简单的关键词匹配，实际应用中可以使用向量搜索
+        """
+        获取相关记忆
+        
+        使用向量索引召回相似记忆，再按 相似度 × 重要性 × 时效 重新排序
+        
+        Args:
+            query: 查询文本
+            limit: 返回数量
+        
+        Returns:
+            相关记忆列表
+        """
+        if self.memory_backend is not None:
+            self._load_persisted_memories(query, limit * MEMORY_CANDIDATE_MULTIPLIER)
+        
+        if not self.config.enable_vector_index:
+            return self._scan_relevant_memories(query, limit)
+        
+        now = datetime.now()
+        scored = []
+        for memory_id, similarity in self.memory_index.search(query, limit * MEMORY_CANDIDATE_MULTIPLIER):
+            if similarity < self.config.memory_similarity_threshold:
+                continue
+            memory = self.long_term_memory.get(memory_id)
+            if memory is None:
+                continue
+            score = similarity * self.long_term_memory.effective_priority(memory, now)
+            scored.append((score, memory))
+        
+        scored.sort(key=lambda x: x[0], reverse=True)
+        return [memory for _, memory in scored[:limit]]
+    
+    def _load_persisted_memories(self, query: str, limit: int):
+        """从持久化后端检索与查询相关的记忆并载入进程内工作集"""
+        try:
+            rows = self.memory_backend.search(query, limit)
+        except Exception as e:
+            logger.error(f"读取持久化记忆失败: {str(e)}")
+            return
+        
+        loaded = []
+        for row in rows:
+            if row["id"] in self.long_term_memory:
+                continue
+            memory = MemoryItem(**row)
+            for removed in self.long_term_memory.add(memory):
+                self.memory_index.remove(removed.id)
+            loaded.append(memory)
+        self.memory_index.add_many([(m.id, m.content) for m in loaded if m.id in self.long_term_memory])
+    
+    def _scan_relevant_memories(self, query: str, limit: int) -> List[MemoryItem]:
+        """关键词扫描获取相关记忆"""
         relevant_memories = []
         query_lower = query.lower()
         
@@ -181,8 +371,26 @@ class MemoryAgent:
         
         # 重新创建LLM实例
         self.llm = self._create_llm()
+        self._invalidate_bindings()
         logger.info(f"更新模型配置: {kwargs}")
     
+    def _get_llm_with_tools(self):
+        """获取绑定工具后的LLM，仅在工具或模型配置变化后重新绑定"""
+        if self._llm_with_tools is None:
+            self._llm_with_tools = self.llm.bind_tools(self.tools)
+        return self._llm_with_tools
+    
+    def _get_tool_node(self) -> ToolNode:
+        """获取工具节点，仅在工具变化后重新创建"""
+        if self._tool_node is None:
+            self._tool_node = ToolNode(self.tools)
+        return self._tool_node
+    
+    def _invalidate_bindings(self):
+        """清除已绑定的LLM和工具节点缓存"""
+        self._llm_with_tools = None
+        self._tool_node = None
+    
     def _should_continue(self, state: MemoryAgentState) -> str:
         """判断是否继续执行"""
         last_message = state["messages"][-1]
@@ -198,48 +406,67 @@ class MemoryAgent:
         # 否则结束
         return END
     
+    def get_context_budget(self) -> int:
+        """获取注入上下文的token预算，未显式设置时按模型上下文长度推算"""
+        if self.config.context_token_budget is not None:
+            return self.config.context_token_budget
+        return derive_context_budget(self.config.model_name, self.config.max_tokens, self.config.context_length)
+    
     def _prepare_context(self, state: MemoryAgentState) -> str:
-        """准备上下文信息"""
-        context_parts = []
+        """
+        按token预算准备上下文信息
+        
+        规则按优先级、工具输出按新旧、记忆按相关度排列，依次填充规则、工具输出和记忆，
+        超出预算的条目被截断或丢弃，裁剪情况记录在state["context_report"]中
+        """
+        sections = []
         
         # 添加规则
-        if state["rules"]:
-            rules_text = "行为规则:\n"
-            for rule in sorted(state["rules"], key=lambda x: x.priority, reverse=True):
-                if rule.active:
-                    rules_text += f"- {rule.name}: {rule.description}\n"
-            context_parts.append(rules_text)
-        
-        # 添加相关记忆
-        if state["long_term_memory"]:
+        active_rules = [rule for rule in sorted(state["rules"], key=lambda x: x.priority, reverse=True) if rule.active]
+        if active_rules:
+            sections.append(ContextSection(
+                name="rules",
+                header="行为规则:",
+                items=[f"{rule.name}: {rule.description}" for rule in active_rules],
+                priority=3
+            ))
+        
+        # 添加相关记忆，启用持久化时工作集为空也需要从后端检索
+        if (state["memory_count"] or self.memory_backend is not None) and self.config.context_memory_limit:
             # 从最后一条用户消息中提取查询
             user_messages = [msg for msg in state["messages"] if isinstance(msg, HumanMessage)]
             if user_messages:
                 query = user_messages[-1].content
-                relevant_memories = self.get_relevant_memories(query)
+                relevant_memories = self.get_relevant_memories(query, self.config.context_memory_limit)
                 if relevant_memories:
-                    memories_text = "相关记忆:\n"
-                    for memory in relevant_memories:
-                        memories_text += f"- {memory.content}\n"
-                    context_parts.append(memories_text)
+                    sections.append(ContextSection(
+                        name="memories",
+                        header="相关记忆:",
+                        items=[memory.content for memory in relevant_memories],
+                        priority=1
+                    ))
         
-        # 添加工具输出
-        if state["tool_outputs"]:
-            outputs_text = "工具输出:\n"
-            for output in state["tool_outputs"][-3:]:  # 最近3个输出
-                outputs_text += f"- {output.get('tool_name', 'Unknown')}: {output.get('result', '')}\n"
-            context_parts.append(outputs_text)
+        # 添加工具输出，最新的输出在前
+        if state["tool_outputs"] and self.config.context_tool_outputs:
+            recent_outputs = state["tool_outputs"][-self.config.context_tool_outputs:][::-1]
+            sections.append(ContextSection(
+                name="tool_outputs",
+                header="工具输出:",
+                items=[f"{output.get('tool_name', 'Unknown')}: {output.get('result', '')}" for output in recent_outputs],
+                priority=2
+            ))
         
-        return "\n".join(context_parts)
-    
-    def _call_model(self, state: MemoryAgentState) -> MemoryAgentState:
-        """调用模型生成响应"""
-        try:
-            # 准备上下文
-            context = self._prepare_context(state)
-            
-            # 创建系统消息
-            system_content = f"""你是一个智能助手，具有以下特点：
+        report = ContextAssembler(self.get_context_budget(), self.config.model_name).assemble(sections)
+        state["context_report"] = report.dict(exclude={"text"})
+        return report.text
+    
+    def _build_model_messages(self, state: MemoryAgentState) -> List[BaseMessage]:
+        """构建发送给模型的消息列表（系统消息 + 对话消息）"""
+        # 准备上下文
+        context = self._prepare_context(state)
+        
+        # 创建系统消息
+        system_content = f"""你是一个智能助手，具有以下特点：
 1. 遵循给定的行为规则
 2. 利用相关记忆提供更好的回答
 3. 根据需要使用工具完成任务
@@ -248,29 +475,49 @@ class MemoryAgent:
 {context}
 
 请根据用户的问题和上下文信息提供准确、有用的回答。"""
-            
-            system_message = SystemMessage(content=system_content)
-            
-            # 绑定工具到LLM
-            llm_with_tools = self.llm.bind_tools(self.tools)
-            
-            # 准备消息列表
-            messages = [system_message] + state["messages"]
+        
+        system_message = SystemMessage(content=system_content)
+        
+        # 准备消息列表
+        return [system_message] + state["messages"]
+    
+    def _apply_model_response(self, state: MemoryAgentState, response: BaseMessage) -> MemoryAgentState:
+        """将模型响应写回状态"""
+        # 添加AI响应到消息列表
+        state["messages"].append(response)
+        state["current_step"] = "model_response"
+        
+        # 更新短期记忆
+        state["short_term_memory"].extend(state["messages"][-2:])  # 最近两条消息
+        if len(state["short_term_memory"]) > self.config.max_short_term_memory:
+            state["short_term_memory"] = state["short_term_memory"][-self.config.max_short_term_memory:]
+        
+        logger.info("模型响应生成成功")
+        return state
+    
+    def _call_model(self, state: MemoryAgentState) -> MemoryAgentState:
+        """调用模型生成响应"""
+        try:
+            messages = self._build_model_messages(state)
             
             # 调用模型
-            response = llm_with_tools.invoke(messages)
-            
-            # 添加AI响应到消息列表
-            state["messages"].append(response)
-            state["current_step"] = "model_response"
+            response = self._get_llm_with_tools().invoke(messages)
             
-            # 更新短期记忆
-            state["short_term_memory"].extend(state["messages"][-2:])  # 最近两条消息
-            if len(state["short_term_memory"]) > self.config.max_short_term_memory:
-                state["short_term_memory"] = state["short_term_memory"][-self.config.max_short_term_memory:]
+            return self._apply_model_response(state, response)
             
-            logger.info("模型响应生成成功")
+        except Exception as e:
+            error_msg = f"模型调用失败: {str(e)}"
+            logger.error(error_msg)
+            state["error"] = error_msg
             return state
+    
+    async def _acall_model(self, state: MemoryAgentState) -> MemoryAgentState:
+        """异步调用模型生成响应"""
+        try:
+            messages = self._build_model_messages(state)
+            response = await self._get_llm_with_tools().ainvoke(messages)
+            
+            return self._apply_model_response(state, response)
             
         except Exception as e:
             error_msg = f"模型调用失败: {str(e)}"
@@ -278,33 +525,51 @@ class MemoryAgent:
             state["error"] = error_msg
             return state
     
+    def _apply_tool_result(self, state: MemoryAgentState, result: Dict[str, Any]) -> MemoryAgentState:
+        """将工具执行结果写回状态"""
+        # 更新状态
+        state["messages"] = result["messages"]
+        state["current_step"] = "tool_execution"
+        
+        # 记录工具输出
+        last_message = state["messages"][-1]
+        if isinstance(last_message, ToolMessage):
+            tool_output = {
+                "tool_name": last_message.tool_name,
+                "result": last_message.content,
+                "timestamp": datetime.now().isoformat()
+            }
+            state["tool_outputs"].append(tool_output)
+            
+            # 限制工具输出数量
+            if len(state["tool_outputs"]) > self.config.max_tool_outputs:
+                state["tool_outputs"] = state["tool_outputs"][-self.config.max_tool_outputs:]
+        
+        logger.info("工具执行完成")
+        return state
+    
     def _call_tools(self, state: MemoryAgentState) -> MemoryAgentState:
         """调用工具"""
         try:
             # 使用ToolNode处理工具调用
-            tool_node = ToolNode(self.tools)
+            tool_node = self._get_tool_node()
             result = tool_node.invoke(state)
             
-            # 更新状态
-            state["messages"] = result["messages"]
-            state["current_step"] = "tool_execution"
+            return self._apply_tool_result(state, result)
             
-            # 记录工具输出
-            last_message = state["messages"][-1]
-            if isinstance(last_message, ToolMessage):
-                tool_output = {
-                    "tool_name": last_message.tool_name,
-                    "result": last_message.content,
-                    "timestamp": datetime.now().isoformat()
-                }
-                state["tool_outputs"].append(tool_output)
-                
-                # 限制工具输出数量
-                if len(state["tool_outputs"]) > self.config.max_tool_outputs:
-                    state["tool_outputs"] = state["tool_outputs"][-self.config.max_tool_outputs:]
-            
-            logger.info("工具执行完成")
+        except Exception as e:
+            error_msg = f"工具调用失败: {str(e)}"
+            logger.error(error_msg)
+            state["error"] = error_msg
             return state
+    
+    async def _acall_tools(self, state: MemoryAgentState) -> MemoryAgentState:
+        """异步调用工具"""
+        try:
+            tool_node = self._get_tool_node()
+            result = await tool_node.ainvoke(state)
+            
+            return self._apply_tool_result(state, result)
             
         except Exception as e:
             error_msg = f"工具调用失败: {str(e)}"
@@ -350,9 +615,9 @@ class MemoryAgent:
         """构建LangGraph工作流"""
         workflow = StateGraph(MemoryAgentState)
         
-        # 添加节点
-        workflow.add_node("agent", self._call_model)
-        workflow.add_node("tools", self._call_tools)
+        # 添加节点（同时提供同步和异步实现，invoke/ainvoke共用同一张图）
+        workflow.add_node("agent", RunnableLambda(self._call_model, afunc=self._acall_model))
+        workflow.add_node("tools", RunnableLambda(self._call_tools, afunc=self._acall_tools))
         workflow.add_node("output", self._generate_output)
         
         # 设置入口点
@@ -382,65 +647,114 @@ class MemoryAgent:
         
         return workflow.compile()
     
-    def run(self, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
-        """
-        运行记忆Agent
-        
-        Args:
-            message: 用户输入消息
-            tools: 可选的工具列表（会覆盖已添加的工具）
-        
-        Returns:
-            执行结果
-        """
+    def _build_initial_state(self, message: str, tools: Optional[List[BaseTool]] = None) -> MemoryAgentState:
+        """构建工作流初始状态"""
         # 准备工具列表
         if tools is not None:
             current_tools = tools
         else:
             current_tools = self.tools
         
-        # 初始化状态
-        initial_state = MemoryAgentState(
+        return MemoryAgentState(
             messages=[HumanMessage(content=message)],
             tools=current_tools,
-            long_term_memory=self.long_term_memory.copy(),
+            memory_count=len(self.long_term_memory),
             short_term_memory=[],
             rules=self.rules.copy(),
             tool_outputs=[],
             model_config=self.config.dict(),
             current_step="start",
             error=None,
+            context_report=None,
             output_text=None
         )
+    
+    def _format_result(self, result: MemoryAgentState) -> Dict[str, Any]:
+        """将工作流最终状态整理为执行结果"""
+        return {
+            "success": True,
+            "response": result["output_text"],
+            "messages": result["messages"],
+            "current_step": result["current_step"],
+            "error": result.get("error"),
+            "memories_used": (result.get("context_report") or {}).get("included", {}).get("memories", 0),
+            "rules_applied": len([r for r in result["rules"] if r.active]),
+            "tools_used": len(result["tool_outputs"]),
+            "context_report": result.get("context_report")
+        }
+    
+    def _format_error(self, initial_state: MemoryAgentState, e: Exception) -> Dict[str, Any]:
+        """整理执行失败时的结果"""
+        error_msg = f"记忆Agent执行失败: {str(e)}"
+        logger.error(error_msg)
+        return {
+            "success": False,
+            "response": None,
+            "messages": initial_state["messages"],
+            "current_step": "error",
+            "error": error_msg,
+            "memories_used": 0,
+            "rules_applied": 0,
+            "tools_used": 0,
+            "context_report": None
+        }
+    
+    def run(self, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
+        """
+        运行记忆Agent
+        
+        Args:
+            message: 用户输入消息
+            tools: 可选的工具列表（会覆盖已添加的工具）
+        
+        Returns:
+            执行结果
+        """
+        initial_state = self._build_initial_state(message, tools)
         
         try:
             # 执行工作流
             result = self.graph.invoke(initial_state)
+            return self._format_result(result)
             
-            return {
-                "success": True,
-                "response": result["output_text"],
-                "messages": result["messages"],
-                "current_step": result["current_step"],
-                "error": result.get("error"),
-                "memories_used": len([m for m in result["long_term_memory"] if m in self.long_term_memory]),
-                "rules_applied": len([r for r in result["rules"] if r.active]),
-                "tools_used": len(result["tool_outputs"])
-            }
+        except Exception as e:
+            return self._format_error(initial_state, e)
+    
+    async def arun(self, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
+        """
+        异步运行记忆Agent
+        
+        Args:
+            message: 用户输入消息
+            tools: 可选的工具列表（会覆盖已添加的工具）
+        
+        Returns:
+            执行结果，格式与run相同
+        """
+        initial_state = self._build_initial_state(message, tools)
+        
+        try:
+            result = await self.graph.ainvoke(initial_state)
+            return self._format_result(result)
             
         except Exception as e:
-            error_msg = f"记忆Agent执行失败: {str(e)}"
-            logger.error(error_msg)
-            return {
-                "success": False,
-                "response": None,
-                "messages": initial_state["messages"],
-                "current_step": "error",
-                "error": error_msg,
-                "memories_used": 0,
-                "rules_applied": 0,
-                "tools_used": 0
-            }
+            return self._format_error(initial_state, e)
+    
+    async def astream(self, message: str, tools: Optional[List[BaseTool]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        异步流式运行记忆Agent，每执行完一个节点产出一次状态更新
+        
+        Args:
+            message: 用户输入消息
+            tools: 可选的工具列表（会覆盖已添加的工具）
+        
+        Yields:
+            {节点名称: 该节点输出的状态}
+        """
+        initial_state = self._build_initial_state(message, tools)
+        
+        async for chunk in self.graph.astream(initial_state):
+            yield chunk
     
     def get_config(self) -> Dict[str, Any]:
         """获取当前配置"""
@@ -455,10 +769,16 @@ class MemoryAgent:
     def clear_memory(self, category: Optional[str] = None):
         """清除记忆"""
         if category:
-            self.long_term_memory = [m for m in self.long_term_memory if m.category != category]
+            for memory in self.long_term_memory.remove_where(lambda m: m.category == category):
+                self.memory_index.remove(memory.id)
+            if self.memory_backend is not None:
+                self.memory_backend.remove_category(category)
             logger.info(f"清除类别 '{category}' 的记忆")
         else:
             self.long_term_memory.clear()
+            self.memory_index.clear()
+            if self.memory_backend is not None:
+                self.memory_backend.clear()
             logger.info("清除所有记忆")
     
     def get_memory_stats(self) -> Dict[str, Any]:
@@ -467,11 +787,14 @@ class MemoryAgent:
         for memory in self.long_term_memory:
             categories[memory.category] = categories.get(memory.category, 0) + 1
         
-        return {
+        stats = {
             "total_memories": len(self.long_term_memory),
             "categories": categories,
             "average_importance": sum(m.importance for m in self.long_term_memory) / len(self.long_term_memory) if self.long_term_memory else 0
         }
+        if self.memory_backend is not None:
+            stats["persisted_memories"] = len(self.memory_backend)
+        return stats
 
 # 便捷函数
 def create_memory_agent(
@@ -482,7 +805,8 @@ def create_memory_agent(
     max_tokens: int = DEFAULT_MAX_TOKENS,
     provider: str = DEFAULT_PROVIDER,
     tools: Optional[List[BaseTool]] = None,
-    rules: Optional[List[Rule]] = None
+    rules: Optional[List[Rule]] = None,
+    memory_backend_path: Optional[str] = MEMORY_BACKEND_PATH
 ) -> MemoryAgent:
     """
     创建记忆Agent的便捷函数
@@ -496,6 +820,7 @@ def create_memory_agent(
         provider: 模型提供商
         tools: 工具列表
         rules: 规则列表
+        memory_backend_path: 长期记忆持久化SQLite路径
     
     Returns:
         MemoryAgent实例
@@ -506,7 +831,8 @@ def create_memory_agent(
         top_p=top_p,
         top_k=top_k,
         max_tokens=max_tokens,
-        provider=provider
+        provider=provider,
+        memory_backend_path=memory_backend_path
     )
     
     agent = MemoryAgent(config)
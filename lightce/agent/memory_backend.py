@@ -0,0 +1,373 @@
+"""
+长期记忆持久化后端
+基于SQLite WAL存储记忆，首次访问时才打开数据库，检索时通过FTS5全文索引只读取查询相关的记忆，
+支持批量导入以及JSONL导出/导入
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Iterator
+from datetime import datetime
+import heapq
+import json
+import logging
+import sqlite3
+import threading
+
+from .memory_index import text_features
+
+logger = logging.getLogger(__name__)
+
+# 批量写入时每个事务包含的记忆条数
+BULK_BATCH_SIZE = 10000
+
+# 单次检索最多使用的查询词数，避免超长查询拖慢全文检索
+MAX_QUERY_TERMS = 64
+
+# 检索时最多对最近写入的多少条匹配记忆计算相关度
+SEARCH_SCAN_LIMIT = 5000
+
+# 单条SQL语句中使用的参数个数上限
+SQLITE_MAX_VARIABLES = 900
+
+MEMORY_COLUMNS = ("id", "content", "timestamp", "importance", "category", "metadata")
+
+def memory_terms(text: str) -> List[str]:
+    """提取用于全文索引的词、汉字和汉字双字特征（去重），与内存索引使用相同的特征"""
+    return list(text_features(text))
+
+def _quote_term(term: str) -> str:
+    """将特征转义为FTS5短语"""
+    return '"' + term.replace('"', '""') + '"'
+
+class SQLiteMemoryBackend:
+    """
+    SQLite长期记忆后端
+
+    记忆以字典形式读写，字段与MemoryItem一致：id、content、timestamp、importance、category、metadata。
+    打开数据库只执行建表语句，启动耗时与已存储的记忆数量无关。
+    """
+
+    def __init__(self, path: str, enable_fts: bool = True):
+        """
+        初始化后端，数据库在首次访问时打开
+
+        Args:
+            path: 数据库文件路径
+            enable_fts: 是否使用FTS5全文索引，SQLite不支持FTS5时自动退化为LIKE匹配
+        """
+        self.path = path
+        self.enable_fts = enable_fts
+        self._conn: Optional[sqlite3.Connection] = None
+        self._has_fts = False
+        self._lock = threading.RLock()
+
+    @property
+    def is_open(self) -> bool:
+        """数据库是否已打开"""
+        return self._conn is not None
+
+    @property
+    def has_fts(self) -> bool:
+        """是否启用了全文索引"""
+        self._connect()
+        return self._has_fts
+
+    def _connect(self) -> sqlite3.Connection:
+        """打开数据库并初始化表结构"""
+        if self._conn is not None:
+            return self._conn
+
+        with self._lock:
+            if self._conn is not None:
+                return self._conn
+
+            conn = sqlite3.connect(self.path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS memories (
+                    rowid INTEGER PRIMARY KEY,
+                    id TEXT NOT NULL UNIQUE,
+                    content TEXT NOT NULL,
+                    timestamp REAL NOT NULL,
+                    importance REAL NOT NULL,
+                    category TEXT NOT NULL,
+                    metadata TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_category ON memories(category)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_memories_importance ON memories(importance)")
+
+            if self.enable_fts:
+                try:
+                    conn.execute("CREATE VIRTUAL TABLE IF NOT EXISTS memories_fts USING fts5(terms)")
+                    self._has_fts = True
+                except sqlite3.OperationalError as e:
+                    logger.warning(f"SQLite不支持FTS5，记忆检索退化为LIKE匹配: {e}")
+            conn.commit()
+
+            self._conn = conn
+            logger.info(f"打开长期记忆数据库: {self.path}")
+            return conn
+
+    def _row_to_memory(self, row: tuple) -> Dict[str, Any]:
+        """将数据库行转换为记忆字典"""
+        memory = dict(zip(MEMORY_COLUMNS, row))
+        memory["timestamp"] = datetime.fromtimestamp(memory["timestamp"])
+        memory["metadata"] = json.loads(memory["metadata"])
+        return memory
+
+    def _memory_to_row(self, memory: Dict[str, Any]) -> tuple:
+        """将记忆字典转换为数据库行"""
+        timestamp = memory.get("timestamp") or datetime.now()
+        if isinstance(timestamp, str):
+            timestamp = datetime.fromisoformat(timestamp)
+        return (
+            memory["id"],
+            memory["content"],
+            timestamp.timestamp(),
+            float(memory.get("importance", 0.5)),
+            memory.get("category", "general"),
+            json.dumps(memory.get("metadata") or {}, ensure_ascii=False, default=str)
+        )
+
+    def _write(self, conn: sqlite3.Connection, memories: List[Dict[str, Any]]):
+        """在当前事务中写入记忆，已存在的ID会被覆盖"""
+        rows = {row[0]: row for row in map(self._memory_to_row, memories)}
+        ids = list(rows)
+        existing = []
+        for start in range(0, len(ids), SQLITE_MAX_VARIABLES):
+            chunk = ids[start:start + SQLITE_MAX_VARIABLES]
+            existing += conn.execute(
+                f"SELECT rowid FROM memories WHERE id IN ({','.join('?' * len(chunk))})", chunk
+            ).fetchall()
+        if existing:
+            if self._has_fts:
+                conn.executemany("DELETE FROM memories_fts WHERE rowid = ?", existing)
+            conn.executemany("DELETE FROM memories WHERE rowid = ?", existing)
+
+        # 显式分配rowid，全文索引直接按rowid写入，无需回查
+        first_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) + 1 FROM memories").fetchone()[0]
+        conn.executemany(
+            "INSERT INTO memories (rowid, id, content, timestamp, importance, category, metadata) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            [(rowid,) + row for rowid, row in enumerate(rows.values(), first_rowid)]
+        )
+        if self._has_fts:
+            conn.executemany(
+                "INSERT INTO memories_fts (rowid, terms) VALUES (?, ?)",
+                [(rowid, " ".join(memory_terms(row[1]))) for rowid, row in enumerate(rows.values(), first_rowid)]
+            )
+
+    def add(self, memory: Dict[str, Any]):
+        """
+        写入一条记忆
+
+        Args:
+            memory: 记忆字典
+        """
+        self.add_many([memory])
+
+    def add_many(self, memories: List[Dict[str, Any]]):
+        """在一个事务中写入多条记忆"""
+        if not memories:
+            return
+        conn = self._connect()
+        with self._lock:
+            with conn:
+                self._write(conn, memories)
+
+    def bulk_load(self, memories: Iterable[Dict[str, Any]], batch_size: int = BULK_BATCH_SIZE) -> int:
+        """
+        分批导入大量记忆
+
+        Args:
+            memories: 记忆字典的可迭代对象
+            batch_size: 每个事务写入的条数
+
+        Returns:
+            导入的记忆数
+        """
+        total = 0
+        batch: List[Dict[str, Any]] = []
+        for memory in memories:
+            batch.append(memory)
+            if len(batch) >= batch_size:
+                self.add_many(batch)
+                total += len(batch)
+                batch = []
+        if batch:
+            self.add_many(batch)
+            total += len(batch)
+        logger.info(f"批量导入记忆: {total} 条")
+        return total
+
+    def get(self, memory_id: str) -> Optional[Dict[str, Any]]:
+        """按ID读取记忆"""
+        memories = self.get_many([memory_id])
+        return memories[0] if memories else None
+
+    def get_many(self, memory_ids: List[str]) -> List[Dict[str, Any]]:
+        """按ID批量读取记忆，不存在的ID会被忽略"""
+        if not memory_ids:
+            return []
+        conn = self._connect()
+        rows = []
+        with self._lock:
+            for start in range(0, len(memory_ids), SQLITE_MAX_VARIABLES):
+                chunk = memory_ids[start:start + SQLITE_MAX_VARIABLES]
+                rows += conn.execute(
+                    f"SELECT {', '.join(MEMORY_COLUMNS)} FROM memories WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).fetchall()
+        return [self._row_to_memory(row) for row in rows]
+
+    def search(self, query: str, limit: int, scan_limit: Optional[int] = SEARCH_SCAN_LIMIT) -> List[Dict[str, Any]]:
+        """
+        检索与查询共享词语最多的记忆
+
+        Args:
+            query: 查询文本
+            limit: 返回数量
+            scan_limit: 最多对最近写入的多少条匹配记忆计算相关度，为None时对全部匹配排序。
+                匹配数不超过该值时结果与全量排序一致，超过时只在最新的匹配中选取，检索耗时不随记忆总数增长
+
+        Returns:
+            记忆字典列表，按相关度降序
+        """
+        if limit <= 0:
+            return []
+        conn = self._connect()
+        features = text_features(query)
+        # 有双字或英文词时不使用单个汉字检索，避免常用字召回过多无关记忆
+        terms = [term for term in features if len(term) > 1] or list(features)
+        terms = terms[:MAX_QUERY_TERMS]
+        if not terms:
+            return []
+
+        with self._lock:
+            if not self._has_fts:
+                conditions = " OR ".join("content LIKE ?" for _ in terms)
+                rows = conn.execute(
+                    f"SELECT {', '.join(MEMORY_COLUMNS)} FROM memories WHERE {conditions} ORDER BY importance DESC LIMIT ?",
+                    [f"%{term}%" for term in terms] + [limit]
+                ).fetchall()
+                return [self._row_to_memory(row) for row in rows]
+
+            match = " OR ".join(_quote_term(term) for term in terms)
+            if scan_limit is None:
+                scored = conn.execute(
+                    "SELECT rowid, bm25(memories_fts) FROM memories_fts WHERE memories_fts MATCH ? ORDER BY bm25(memories_fts) LIMIT ?",
+                    (match, limit)
+                ).fetchall()
+            else:
+                # 按rowid倒序遍历倒排表可以提前终止，只对窗口内的匹配计算bm25
+                scored = conn.execute(
+                    "SELECT rowid, bm25(memories_fts) FROM memories_fts WHERE memories_fts MATCH ? ORDER BY rowid DESC LIMIT ?",
+                    (match, max(scan_limit, limit))
+                ).fetchall()
+                scored = heapq.nsmallest(limit, scored, key=lambda row: row[1])
+            if not scored:
+                return []
+
+            rowids = [rowid for rowid, _ in scored]
+            rows = conn.execute(
+                f"SELECT rowid, {', '.join(MEMORY_COLUMNS)} FROM memories WHERE rowid IN ({','.join('?' * len(rowids))})",
+                rowids
+            ).fetchall()
+
+        by_rowid = {row[0]: row[1:] for row in rows}
+        return [self._row_to_memory(by_rowid[rowid]) for rowid in rowids if rowid in by_rowid]
+
+    def remove(self, memory_id: str) -> bool:
+        """按ID删除记忆"""
+        conn = self._connect()
+        with self._lock:
+            with conn:
+                if self._has_fts:
+                    conn.execute(
+                        "DELETE FROM memories_fts WHERE rowid = (SELECT rowid FROM memories WHERE id = ?)", (memory_id,)
+                    )
+                return conn.execute("DELETE FROM memories WHERE id = ?", (memory_id,)).rowcount > 0
+
+    def remove_category(self, category: str) -> int:
+        """删除指定类别的所有记忆，返回删除数量"""
+        conn = self._connect()
+        with self._lock:
+            with conn:
+                if self._has_fts:
+                    conn.execute(
+                        "DELETE FROM memories_fts WHERE rowid IN (SELECT rowid FROM memories WHERE category = ?)",
+                        (category,)
+                    )
+                return conn.execute("DELETE FROM memories WHERE category = ?", (category,)).rowcount
+
+    def clear(self):
+        """删除所有记忆"""
+        conn = self._connect()
+        with self._lock:
+            with conn:
+                conn.execute("DELETE FROM memories")
+                if self._has_fts:
+                    conn.execute("DELETE FROM memories_fts")
+
+    def iter_memories(self, batch_size: int = BULK_BATCH_SIZE) -> Iterator[Dict[str, Any]]:
+        """按写入顺序分批遍历所有记忆"""
+        conn = self._connect()
+        last_rowid = 0
+        while True:
+            with self._lock:
+                rows = conn.execute(
+                    f"SELECT rowid, {', '.join(MEMORY_COLUMNS)} FROM memories WHERE rowid > ? ORDER BY rowid LIMIT ?",
+                    (last_rowid, batch_size)
+                ).fetchall()
+            if not rows:
+                return
+            last_rowid = rows[-1][0]
+            for row in rows:
+                yield self._row_to_memory(row[1:])
+
+    def export_jsonl(self, path: str) -> int:
+        """
+        将所有记忆导出为JSONL文件
+
+        Args:
+            path: 输出文件路径
+
+        Returns:
+            导出的记忆数
+        """
+        count = 0
+        with open(path, "w", encoding="utf-8") as f:
+            for memory in self.iter_memories():
+                memory["timestamp"] = memory["timestamp"].isoformat()
+                f.write(json.dumps(memory, ensure_ascii=False, default=str) + "\n")
+                count += 1
+        logger.info(f"导出记忆到 {path}: {count} 条")
+        return count
+
+    def import_jsonl(self, path: str, batch_size: int = BULK_BATCH_SIZE) -> int:
+        """
+        从JSONL文件导入记忆
+
+        Args:
+            path: 输入文件路径
+            batch_size: 每个事务写入的条数
+
+        Returns:
+            导入的记忆数
+        """
+        with open(path, "r", encoding="utf-8") as f:
+            return self.bulk_load((json.loads(line) for line in f if line.strip()), batch_size)
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def __len__(self) -> int:
+        conn = self._connect()
+        with self._lock:
+            return conn.execute("SELECT COUNT(*) FROM memories").fetchone()[0]
@@ -0,0 +1,348 @@
+"""
+长期记忆向量索引
+提供离线哈希嵌入、NumPy暴力检索以及随机超平面LSH近似最近邻索引，支持增量添加和删除
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Tuple, Set
+from abc import ABC, abstractmethod
+from collections import Counter
+import logging
+import math
+import re
+import zlib
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 数字（含小数、千分位和百分数）和英文按词切分，中文按连续汉字切分后再生成单字和双字特征
+TOKEN_PATTERN = re.compile(r'\d+(?:[.,]\d+)*%?|[A-Za-z0-9_]+|[\u4e00-\u9fff]+')
+
+def tokenize(text: str) -> List[str]:
+    """按出现顺序切分词元，英文和数字按词、汉字按单字，保留大小写"""
+    tokens: List[str] = []
+    for token in TOKEN_PATTERN.findall(text):
+        if '\u4e00' <= token[0] <= '\u9fff':
+            tokens.extend(token)
+        else:
+            tokens.append(token)
+    return tokens
+
+def text_features(text: str) -> Counter:
+    """提取词、汉字和汉字双字特征及其词频"""
+    features = Counter()
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if '\u4e00' <= token[0] <= '\u9fff':
+            features.update(token)
+            features.update(token[i:i + 2] for i in range(len(token) - 1))
+        else:
+            features[token] += 1
+    return features
+
+class Embedder(ABC):
+    """文本嵌入基类，子类返回L2归一化的向量"""
+
+    dim: int
+
+    @abstractmethod
+    def embed(self, texts: List[str]) -> np.ndarray:
+        """
+        批量计算文本向量
+
+        Args:
+            texts: 文本列表
+
+        Returns:
+            形状为 (len(texts), dim) 的float32矩阵
+        """
+
+    def embed_one(self, text: str) -> np.ndarray:
+        """计算单条文本的向量"""
+        return self.embed([text])[0]
+
+class HashingEmbedder(Embedder):
+    """基于特征哈希的离线嵌入，无需训练和外部模型"""
+
+    def __init__(self, dim: int = 512):
+        """
+        初始化哈希嵌入
+
+        Args:
+            dim: 向量维度
+        """
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, count in text_features(text).items():
+                h = zlib.crc32(feature.encode("utf-8"))
+                sign = -1.0 if h & 0x80000000 else 1.0
+                vectors[row, h % self.dim] += sign * (1.0 + math.log(count))
+
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+class BruteForceIndex:
+    """NumPy矩阵暴力检索，删除时用末行填补空位，添加和删除均为O(dim)"""
+
+    def __init__(self, dim: int, initial_capacity: int = 1024):
+        self.dim = dim
+        self._vectors = np.zeros((max(initial_capacity, 1), dim), dtype=np.float32)
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._rows
+
+    def _ensure_capacity(self, size: int):
+        """容量不足时按倍数扩容"""
+        capacity = self._vectors.shape[0]
+        if size <= capacity:
+            return
+        while capacity < size:
+            capacity *= 2
+        grown = np.zeros((capacity, self.dim), dtype=np.float32)
+        grown[:len(self._ids)] = self._vectors[:len(self._ids)]
+        self._vectors = grown
+
+    def add(self, item_id: str, vector: np.ndarray):
+        """添加或更新向量"""
+        row = self._rows.get(item_id)
+        if row is None:
+            row = len(self._ids)
+            self._ensure_capacity(row + 1)
+            self._ids.append(item_id)
+            self._rows[item_id] = row
+        self._vectors[row] = vector
+
+    def add_batch(self, item_ids: List[str], vectors: np.ndarray):
+        """批量添加向量"""
+        new_ids = [item_id for item_id in item_ids if item_id not in self._rows]
+        self._ensure_capacity(len(self._ids) + len(new_ids))
+        for item_id, vector in zip(item_ids, vectors):
+            self.add(item_id, vector)
+
+    def remove(self, item_id: str) -> bool:
+        """删除向量，不存在时返回False"""
+        row = self._rows.pop(item_id, None)
+        if row is None:
+            return False
+
+        last = len(self._ids) - 1
+        if row != last:
+            moved_id = self._ids[last]
+            self._vectors[row] = self._vectors[last]
+            self._ids[row] = moved_id
+            self._rows[moved_id] = row
+        self._ids.pop()
+        return True
+
+    def clear(self):
+        """清空索引"""
+        self._ids.clear()
+        self._rows.clear()
+
+    def get_vector(self, item_id: str) -> Optional[np.ndarray]:
+        """获取向量"""
+        row = self._rows.get(item_id)
+        return None if row is None else self._vectors[row]
+
+    def search(self, query: np.ndarray, k: int, candidates: Optional[Iterable[str]] = None) -> List[Tuple[str, float]]:
+        """
+        返回与查询向量余弦相似度最高的k个条目
+
+        Args:
+            query: 归一化的查询向量
+            k: 返回数量
+            candidates: 仅在这些id中检索，为None时检索全部
+
+        Returns:
+            (id, 相似度) 列表，按相似度降序
+        """
+        if candidates is None:
+            ids = self._ids
+            similarities = self._vectors[:len(ids)] @ query
+        else:
+            ids = [item_id for item_id in candidates if item_id in self._rows]
+            similarities = self._vectors[[self._rows[item_id] for item_id in ids]] @ query
+
+        if not ids or k <= 0:
+            return []
+
+        if k < len(ids):
+            top = np.argpartition(-similarities, k)[:k]
+            top = top[np.argsort(-similarities[top])]
+        else:
+            top = np.argsort(-similarities)
+
+        return [(ids[i], float(similarities[i])) for i in top]
+
+class LSHIndex:
+    """随机超平面局部敏感哈希，查询时探测同桶及单比特翻转的相邻桶"""
+
+    def __init__(self, dim: int, n_tables: int = 16, n_bits: int = 14, seed: int = 42):
+        """
+        初始化LSH索引
+
+        Args:
+            dim: 向量维度
+            n_tables: 哈希表数量，越多召回越高
+            n_bits: 每张表的签名位数，越多桶越小
+            seed: 随机超平面的种子
+        """
+        rng = np.random.default_rng(seed)
+        self.n_tables = n_tables
+        self.n_bits = n_bits
+        self._planes = rng.standard_normal((n_tables, n_bits, dim)).astype(np.float32)
+        self._powers = (1 << np.arange(n_bits)).astype(np.int64)
+        self._tables: List[Dict[int, Set[str]]] = [{} for _ in range(n_tables)]
+        self._codes: Dict[str, Tuple[int, ...]] = {}
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def _hash(self, vectors: np.ndarray) -> np.ndarray:
+        """计算签名，返回形状为 (n_tables, n) 的整数矩阵"""
+        bits = np.einsum('tbd,nd->tnb', self._planes, vectors) > 0
+        return bits.astype(np.int64) @ self._powers
+
+    def add_batch(self, item_ids: List[str], vectors: np.ndarray):
+        """批量添加向量"""
+        if not item_ids:
+            return
+        codes = self._hash(np.asarray(vectors, dtype=np.float32))
+        for column, item_id in enumerate(item_ids):
+            if item_id in self._codes:
+                self.remove(item_id)
+            item_codes = tuple(int(code) for code in codes[:, column])
+            for table, code in zip(self._tables, item_codes):
+                table.setdefault(code, set()).add(item_id)
+            self._codes[item_id] = item_codes
+
+    def add(self, item_id: str, vector: np.ndarray):
+        """添加向量"""
+        self.add_batch([item_id], vector[np.newaxis, :])
+
+    def remove(self, item_id: str) -> bool:
+        """删除向量"""
+        item_codes = self._codes.pop(item_id, None)
+        if item_codes is None:
+            return False
+        for table, code in zip(self._tables, item_codes):
+            bucket = table.get(code)
+            if bucket is not None:
+                bucket.discard(item_id)
+                if not bucket:
+                    del table[code]
+        return True
+
+    def candidates(self, query: np.ndarray) -> Set[str]:
+        """获取查询向量的候选id集合"""
+        result: Set[str] = set()
+        codes = self._hash(query[np.newaxis, :].astype(np.float32))[:, 0]
+        for table, code in zip(self._tables, codes):
+            code = int(code)
+            for probe in [code] + [code ^ (1 << bit) for bit in range(self.n_bits)]:
+                bucket = table.get(probe)
+                if bucket:
+                    result.update(bucket)
+        return result
+
+class MemoryVectorIndex:
+    """记忆向量索引：小规模时暴力检索，超过阈值后启用LSH生成候选再精确重排"""
+
+    def __init__(
+        self,
+        embedder: Optional[Embedder] = None,
+        ann_threshold: int = 50000,
+        initial_capacity: int = 1024,
+        **lsh_kwargs: Any
+    ):
+        """
+        初始化记忆向量索引
+
+        Args:
+            embedder: 文本嵌入器，默认使用HashingEmbedder
+            ann_threshold: 条目数超过该值时启用近似最近邻索引
+            initial_capacity: 向量矩阵的初始行数，按需倍增
+            **lsh_kwargs: 传给LSHIndex的参数
+        """
+        self.embedder = embedder or HashingEmbedder()
+        self.ann_threshold = ann_threshold
+        self._lsh_kwargs = lsh_kwargs
+        self._exact = BruteForceIndex(self.embedder.dim, initial_capacity)
+        self._lsh: Optional[LSHIndex] = None
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._exact
+
+    @property
+    def uses_ann(self) -> bool:
+        """是否已启用近似最近邻索引"""
+        return self._lsh is not None
+
+    def _maybe_build_ann(self):
+        """条目数超过阈值时一次性为已有向量建立LSH索引"""
+        if self._lsh is not None or len(self._exact) <= self.ann_threshold:
+            return
+        self._lsh = LSHIndex(self.embedder.dim, **self._lsh_kwargs)
+        ids = list(self._exact._ids)
+        self._lsh.add_batch(ids, self._exact._vectors[:len(ids)])
+        logger.info(f"记忆数达到 {len(ids)}，启用LSH近似最近邻索引")
+
+    def add(self, item_id: str, text: str):
+        """添加或更新一条记忆"""
+        self.add_many([(item_id, text)])
+
+    def add_many(self, items: List[Tuple[str, str]]):
+        """批量添加记忆"""
+        if not items:
+            return
+        ids = [item_id for item_id, _ in items]
+        vectors = self.embedder.embed([text for _, text in items])
+        self._exact.add_batch(ids, vectors)
+        if self._lsh is not None:
+            self._lsh.add_batch(ids, vectors)
+        else:
+            self._maybe_build_ann()
+
+    def remove(self, item_id: str) -> bool:
+        """删除一条记忆"""
+        if self._lsh is not None:
+            self._lsh.remove(item_id)
+        return self._exact.remove(item_id)
+
+    def clear(self):
+        """清空索引"""
+        self._exact.clear()
+        self._lsh = None
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        """
+        检索与查询最相似的记忆
+
+        Args:
+            query: 查询文本
+            k: 返回数量
+
+        Returns:
+            (记忆id, 余弦相似度) 列表，按相似度降序
+        """
+        if not len(self._exact):
+            return []
+
+        query_vector = self.embedder.embed_one(query)
+        if self._lsh is not None:
+            candidates = self._lsh.candidates(query_vector)
+            if len(candidates) >= k:
+                return self._exact.search(query_vector, k, candidates)
+
+        return self._exact.search(query_vector, k)
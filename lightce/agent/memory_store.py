@@ -0,0 +1,232 @@
+"""
+带容量上限的优先级存储
+基于最小堆和惰性删除实现O(log n)的插入与淘汰，支持按半衰期的重要性衰减，
+可用于长期记忆、规则、行为模式和事件等需要淘汰低优先级条目的场景
+"""
+
+from typing import Dict, List, Optional, Callable, Generic, Iterator, Tuple, TypeVar
+from datetime import datetime
+from itertools import islice
+import heapq
+import logging
+import math
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 优先级取对数前的下限，避免重要性为0时取对数出错
+MIN_PRIORITY = 1e-9
+
+# 堆中失效条目超过有效条目的该倍数时重建堆
+HEAP_COMPACT_FACTOR = 2
+
+class MemoryStore(Generic[T]):
+    """
+    按有效优先级淘汰的有界存储
+
+    有效优先级 = priority(item) × 0.5 ^ (存在时长 / half_life)。
+    两个条目的有效优先级之比不随查询时间变化，因此堆中使用与时间无关的键
+    log2(priority) + timestamp / half_life，插入时计算一次即可，衰减只在查询时惰性计算。
+    迭代和下标访问按插入顺序返回条目。
+    """
+
+    def __init__(
+        self,
+        max_size: Optional[int] = None,
+        priority: Callable[[T], float] = lambda item: item.importance,
+        item_id: Callable[[T], str] = lambda item: item.id,
+        timestamp: Optional[Callable[[T], datetime]] = None,
+        half_life: Optional[float] = None
+    ):
+        """
+        初始化存储
+
+        Args:
+            max_size: 最大条目数，为None时不限制
+            priority: 获取条目基础优先级的函数
+            item_id: 获取条目稳定ID的函数
+            timestamp: 获取条目创建时间的函数，为None时不衰减
+            half_life: 优先级衰减半衰期（秒），为None时不衰减
+        """
+        self.max_size = max_size
+        self._priority = priority
+        self._item_id = item_id
+        self._timestamp = timestamp
+        self.half_life = half_life
+        # id -> (堆键, 序号, 条目)，dict保持插入顺序
+        self._entries: Dict[str, Tuple[float, int, T]] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._counter = 0
+        # 每次增删改后递增，供依赖存储内容的缓存判断是否需要重建
+        self.version = 0
+
+    @property
+    def decays(self) -> bool:
+        """优先级是否随时间衰减"""
+        return bool(self._timestamp is not None and self.half_life)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __iter__(self) -> Iterator[T]:
+        return (item for _, _, item in self._entries.values())
+
+    def __contains__(self, item_id: str) -> bool:
+        return item_id in self._entries
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return self.copy()[index]
+        size = len(self._entries)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("MemoryStore下标越界")
+        return next(islice(iter(self), index, None))
+
+    def __repr__(self) -> str:
+        return f"MemoryStore(size={len(self)}, max_size={self.max_size})"
+
+    def _heap_key(self, item: T) -> float:
+        """计算与查询时间无关的堆键"""
+        priority = self._priority(item)
+        if not self.decays:
+            return priority
+        return math.log2(max(priority, MIN_PRIORITY)) + self._timestamp(item).timestamp() / self.half_life
+
+    def effective_priority(self, item: T, now: Optional[datetime] = None) -> float:
+        """
+        计算条目在指定时间的有效优先级
+
+        Args:
+            item: 条目
+            now: 查询时间，默认为当前时间
+
+        Returns:
+            衰减后的优先级
+        """
+        priority = self._priority(item)
+        if not self.decays:
+            return priority
+        age = max(((now or datetime.now()) - self._timestamp(item)).total_seconds(), 0.0)
+        return priority * 0.5 ** (age / self.half_life)
+
+    def _push(self, item_id: str, item: T):
+        """写入条目并压入堆"""
+        key = self._heap_key(item)
+        self._counter += 1
+        self.version += 1
+        self._entries[item_id] = (key, self._counter, item)
+        heapq.heappush(self._heap, (key, self._counter, item_id))
+
+    def _compact(self):
+        """失效条目过多时按有效条目重建堆"""
+        if len(self._heap) > HEAP_COMPACT_FACTOR * len(self._entries) + 64:
+            self._heap = [(key, seq, item_id) for item_id, (key, seq, _) in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def add(self, item: T) -> List[T]:
+        """
+        添加条目，已满时先淘汰有效优先级最低的条目；ID已存在时替换原条目
+
+        Args:
+            item: 条目
+
+        Returns:
+            被淘汰的条目列表
+        """
+        item_id = self._item_id(item)
+        evicted = []
+        if item_id in self._entries:
+            del self._entries[item_id]
+        elif self.max_size is not None:
+            while self._entries and len(self._entries) >= self.max_size:
+                evicted.append(self.pop_lowest())
+        self._push(item_id, item)
+        self._compact()
+        return evicted
+
+    def update(self, item_id: str) -> bool:
+        """
+        条目的优先级或时间被修改后重新计算堆键，保持插入顺序不变
+
+        Args:
+            item_id: 条目ID
+
+        Returns:
+            条目是否存在
+        """
+        entry = self._entries.get(item_id)
+        if entry is None:
+            return False
+        item = entry[2]
+        key = self._heap_key(item)
+        self._counter += 1
+        self.version += 1
+        self._entries[item_id] = (key, self._counter, item)
+        heapq.heappush(self._heap, (key, self._counter, item_id))
+        self._compact()
+        return True
+
+    def get(self, item_id: str) -> Optional[T]:
+        """按ID获取条目"""
+        entry = self._entries.get(item_id)
+        return None if entry is None else entry[2]
+
+    def remove(self, item_id: str) -> Optional[T]:
+        """按ID删除条目，堆中的旧记录在弹出时惰性丢弃"""
+        entry = self._entries.pop(item_id, None)
+        if entry is None:
+            return None
+        self.version += 1
+        self._compact()
+        return entry[2]
+
+    def remove_where(self, predicate: Callable[[T], bool]) -> List[T]:
+        """删除满足条件的所有条目"""
+        removed = [item_id for item_id, (_, _, item) in self._entries.items() if predicate(item)]
+        return [self.remove(item_id) for item_id in removed]
+
+    def peek_lowest(self) -> Optional[T]:
+        """查看有效优先级最低的条目"""
+        while self._heap:
+            key, seq, item_id = self._heap[0]
+            entry = self._entries.get(item_id)
+            if entry is not None and entry[1] == seq:
+                return entry[2]
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_lowest(self) -> Optional[T]:
+        """弹出有效优先级最低的条目，优先级相同时先弹出较早插入的条目"""
+        item = self.peek_lowest()
+        if item is None:
+            return None
+        _, _, item_id = heapq.heappop(self._heap)
+        del self._entries[item_id]
+        self.version += 1
+        return item
+
+    def top(self, k: int) -> List[T]:
+        """
+        获取有效优先级最高的k个条目，堆键与有效优先级在任意时刻的排序一致
+
+        Args:
+            k: 返回数量
+
+        Returns:
+            按有效优先级降序排列的条目
+        """
+        entries = heapq.nlargest(k, self._entries.values(), key=lambda entry: (entry[0], -entry[1]))
+        return [item for _, _, item in entries]
+
+    def copy(self) -> List[T]:
+        """按插入顺序返回所有条目的列表"""
+        return list(self)
+
+    def clear(self):
+        """清空存储"""
+        self._entries.clear()
+        self._heap.clear()
+        self.version += 1
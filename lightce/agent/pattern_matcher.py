@@ -0,0 +1,125 @@
+"""
+多模式匹配
+将多个关键词编译为Aho–Corasick自动机，一次扫描文本即可找出所有出现的关键词，
+扫描耗时只与文本长度和命中数有关，与关键词数量无关
+"""
+
+from typing import Dict, List, Iterable, Set, Tuple, Generic, TypeVar, Hashable
+from collections import deque
+import logging
+
+logger = logging.getLogger(__name__)
+
+K = TypeVar("K", bound=Hashable)
+
+class AhoCorasickAutomaton:
+    """Aho–Corasick多模式匹配自动机"""
+
+    def __init__(self, patterns: Iterable[str]):
+        """
+        构建自动机
+
+        Args:
+            patterns: 模式串，重复和空串会被忽略
+        """
+        self.patterns: List[str] = list(dict.fromkeys(p for p in patterns if p))
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[Tuple[int, ...]] = [()]
+
+        for index, pattern in enumerate(self.patterns):
+            node = 0
+            for char in pattern:
+                next_node = self._goto[node].get(char)
+                if next_node is None:
+                    next_node = len(self._goto)
+                    self._goto[node][char] = next_node
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._output.append(())
+                node = next_node
+            self._output[node] += (index,)
+
+        # 按广度优先计算失配指针（深度为1的节点指向根），并把失配链上的输出合并到当前节点
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self._goto[node].items():
+                fail = self._fail[node]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[child] = self._goto[fail].get(char, 0)
+                self._output[child] += self._output[self._fail[child]]
+                queue.append(child)
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def find_indices(self, text: str) -> Set[int]:
+        """
+        扫描文本
+
+        Args:
+            text: 待扫描文本
+
+        Returns:
+            出现过的模式串下标集合
+        """
+        goto, fail, output = self._goto, self._fail, self._output
+        found: Set[int] = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            if output[node]:
+                found.update(output[node])
+        return found
+
+    def find(self, text: str) -> Set[str]:
+        """返回文本中出现过的模式串"""
+        return {self.patterns[index] for index in self.find_indices(text)}
+
+class MultiPatternMatcher(Generic[K]):
+    """把多个所有者的关键词编译进同一个自动机，一次扫描返回关键词命中的所有者"""
+
+    def __init__(self, entries: Iterable[Tuple[K, Iterable[str]]], ignore_case: bool = True):
+        """
+        初始化匹配器
+
+        Args:
+            entries: (所有者, 关键词列表) 序列，任一关键词出现在文本中即视为该所有者命中
+            ignore_case: 是否忽略大小写
+        """
+        self.ignore_case = ignore_case
+        owners_by_keyword: Dict[str, List[K]] = {}
+        # 空关键词是任何文本的子串，对应的所有者总是命中
+        self.always: Set[K] = set()
+        for owner, keywords in entries:
+            for keyword in keywords:
+                if ignore_case:
+                    keyword = keyword.lower()
+                if keyword:
+                    owners_by_keyword.setdefault(keyword, []).append(owner)
+                else:
+                    self.always.add(owner)
+
+        self.automaton = AhoCorasickAutomaton(owners_by_keyword)
+        self._owners: List[Tuple[K, ...]] = [tuple(owners_by_keyword[p]) for p in self.automaton.patterns]
+
+    def match(self, text: str) -> Set[K]:
+        """
+        返回关键词出现在文本中的所有者
+
+        Args:
+            text: 待扫描文本
+
+        Returns:
+            命中的所有者集合
+        """
+        if self.ignore_case:
+            text = text.lower()
+        matched = set(self.always)
+        for index in self.automaton.find_indices(text):
+            matched.update(self._owners[index])
+        return matched
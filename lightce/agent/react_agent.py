@@ -1,13 +1,17 @@
-from typing import Dict, List, Any, Optional, TypedDict, Annotated, Union, Callable
+from typing import Dict, List, Any, Optional, TypedDict, Annotated, Union, Callable, AsyncIterator, Deque, Set
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage, SystemMessage
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
 from langchain_community.llms import Ollama
 from pydantic import BaseModel, Field
 import json
 import logging
+import uuid
+from collections import deque
+from itertools import islice
 from datetime import datetime, timedelta
 from enum import Enum
 from ..config import (
@@ -16,11 +20,17 @@ from ..config import (
     TEMPERATURE_MIN, TEMPERATURE_MAX, TOP_P_MIN, TOP_P_MAX, 
     TOP_K_MIN, MAX_TOKENS_MIN, LOG_LEVEL, LOG_FORMAT
 )
+from .clients import get_client_registry
+from .memory_store import MemoryStore
+from .pattern_matcher import MultiPatternMatcher
 
 # 配置日志
 logging.basicConfig(level=getattr(logging, LOG_LEVEL), format=LOG_FORMAT)
 logger = logging.getLogger(__name__)
 
+# 上下文分析使用的最近事件和最近反馈条数
+RECENT_CONTEXT_SIZE = 5
+
 class ReactionType(Enum):
     """反应类型"""
     POSITIVE = "positive"      # 正面反应
@@ -47,6 +57,7 @@ class UserFeedback(BaseModel):
 
 class AdaptiveRule(BaseModel):
     """自适应规则"""
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex, description="规则ID")
     name: str = Field(description="规则名称")
     description: str = Field(description="规则描述")
     condition: str = Field(description="触发条件")
@@ -57,6 +68,7 @@ class AdaptiveRule(BaseModel):
 
 class BehaviorPattern(BaseModel):
     """行为模式"""
+    id: str = Field(default_factory=lambda: uuid.uuid4().hex, description="模式ID")
     pattern_name: str = Field(description="模式名称")
     description: str = Field(description="模式描述")
     triggers: List[str] = Field(description="触发条件列表")
@@ -99,6 +111,7 @@ class ReactAgentConfig(BaseModel):
     top_k: int = Field(default=DEFAULT_TOP_K, description="Top-k参数", ge=TOP_K_MIN)
     max_tokens: int = Field(default=DEFAULT_MAX_TOKENS, description="最大token数", ge=MAX_TOKENS_MIN)
     provider: str = Field(default=DEFAULT_PROVIDER, description=f"模型提供商: {', '.join(SUPPORTED_PROVIDERS)}")
+    base_url: Optional[str] = Field(default=None, description="API地址，为None时使用提供商默认地址")
     
     # 反应相关配置
     max_environment_events: int = Field(default=50, description="最大环境事件数量")
@@ -125,35 +138,76 @@ class ReactAgent:
         self.config = config or ReactAgentConfig()
         self.llm = self._create_llm()
         self.tools: List[BaseTool] = []
-        self.environment_events: List[EnvironmentEvent] = []
-        self.user_feedback: List[UserFeedback] = []
-        self.adaptive_rules: List[AdaptiveRule] = []
-        self.behavior_patterns: List[BehaviorPattern] = []
+        self._tool_node: Optional[ToolNode] = None
+        self._adapted_llms: Dict[float, Any] = {}
+        # 事件和反馈保存在定长队列中，满时自动丢弃最旧的记录
+        self.environment_events: Deque[EnvironmentEvent] = deque(maxlen=self.config.max_environment_events)
+        self.user_feedback: Deque[UserFeedback] = deque(maxlen=self.config.max_user_feedback)
+        # 事件和反馈的版本号，每次增删加一；最近窗口的分析结果按版本号缓存
+        self.history_version = 0
+        self._recent_context: Dict[str, Any] = {}
+        self._recent_context_version: Optional[int] = None
+        self._context_hits: Set[tuple] = set()
+        self._context_hits_key: Optional[tuple] = None
+        # 全部反馈的运行统计，随反馈的加入和淘汰增量更新
+        self._feedback_counts: Dict[ReactionType, int] = {feedback_type: 0 for feedback_type in ReactionType}
+        self._feedback_score_sum = 0.0
+        self.adaptive_rules: MemoryStore[AdaptiveRule] = MemoryStore(
+            self.config.max_adaptive_rules,
+            priority=lambda rule: rule.priority
+        )
+        self.behavior_patterns: MemoryStore[BehaviorPattern] = MemoryStore(
+            self.config.max_behavior_patterns,
+            priority=lambda pattern: pattern.success_rate
+        )
+        # 规则条件和模式触发词编译成的匹配器，规则或模式变化后重建
+        self._matcher: Optional[MultiPatternMatcher] = None
+        self._matcher_version: Optional[tuple] = None
+        self._matcher_rules: List[AdaptiveRule] = []
+        self._matcher_patterns: List[BehaviorPattern] = []
         self.graph = self._build_graph()
         
-    def _create_llm(self):
-        """根据配置创建LLM实例"""
-        if self.config.provider == "openai":
-            return ChatOpenAI(
-                model=self.config.model_name,
-                temperature=self.config.temperature,
-                max_tokens=self.config.max_tokens,
-                top_p=self.config.top_p,
-                top_k=self.config.top_k
-            )
-        elif self.config.provider == "ollama":
-            return Ollama(
-                model=self.config.model_name,
-                temperature=self.config.temperature,
-                top_p=self.config.top_p,
-                top_k=self.config.top_k
-            )
+    def _create_llm(self, temperature: Optional[float] = None):
+        """
+        根据配置获取LLM实例，相同配置的实例在进程内共享并复用HTTP连接池
+        
+        Args:
+            temperature: 覆盖配置中的温度参数
+        """
+        registry = get_client_registry()
+        config = self.config
+        if temperature is None:
+            temperature = config.temperature
+        
+        if config.provider == "openai":
+            key = (ChatOpenAI, config.model_name, temperature, config.max_tokens, config.top_p, config.top_k, config.base_url)
+            return registry.get_llm(key, lambda: ChatOpenAI(
+                model=config.model_name,
+                temperature=temperature,
+                max_tokens=config.max_tokens,
+                top_p=config.top_p,
+                top_k=config.top_k,
+                base_url=config.base_url,
+                http_client=registry.get_http_client(config.base_url),
+                http_async_client=registry.get_loop_local_async_client(config.base_url)
+            ))
+        elif config.provider == "ollama":
+            key = (Ollama, config.model_name, temperature, config.top_p, config.top_k, config.base_url)
+            ollama_kwargs = {"base_url": config.base_url} if config.base_url else {}
+            return registry.get_llm(key, lambda: Ollama(
+                model=config.model_name,
+                temperature=temperature,
+                top_p=config.top_p,
+                top_k=config.top_k,
+                **ollama_kwargs
+            ))
         else:
-            raise ValueError(f"不支持的模型提供商: {self.config.provider}。支持的提供商: {', '.join(SUPPORTED_PROVIDERS)}")
+            raise ValueError(f"不支持的模型提供商: {config.provider}。支持的提供商: {', '.join(SUPPORTED_PROVIDERS)}")
     
     def add_tool(self, tool: BaseTool):
         """添加工具到agent"""
         self.tools.append(tool)
+        self._invalidate_bindings()
         logger.info(f"添加工具: {tool.name}")
     
     def add_tools(self, tools: List[BaseTool]):
@@ -162,11 +216,7 @@ class ReactAgent:
             self.add_tool(tool)
     
     def add_environment_event(self, event_type: str, description: str, severity: float = 0.5, metadata: Dict[str, Any] = None):
-        """添加环境事件"""
-        if len(self.environment_events) >= self.config.max_environment_events:
-            # 移除最旧的事件
-            self.environment_events.pop(0)
-        
+        """添加环境事件，已满时丢弃最旧的事件"""
         event = EnvironmentEvent(
             event_type=event_type,
             description=description,
@@ -174,41 +224,58 @@ class ReactAgent:
             metadata=metadata or {}
         )
         self.environment_events.append(event)
+        self.history_version += 1
         logger.info(f"添加环境事件: {event_type} - {description}")
     
     def add_user_feedback(self, feedback_type: ReactionType, content: str, confidence: float = 0.5, context: Dict[str, Any] = None):
-        """添加用户反馈"""
-        if len(self.user_feedback) >= self.config.max_user_feedback:
-            # 移除最旧的反馈
-            self.user_feedback.pop(0)
-        
+        """添加用户反馈，已满时丢弃最旧的反馈"""
         feedback = UserFeedback(
             feedback_type=feedback_type,
             content=content,
             confidence=confidence,
             context=context or {}
         )
+        if self.user_feedback and len(self.user_feedback) == self.user_feedback.maxlen:
+            self._track_feedback(self.user_feedback[0], -1)
         self.user_feedback.append(feedback)
+        self._track_feedback(feedback, 1)
+        self.history_version += 1
         logger.info(f"添加用户反馈: {feedback_type.value} - {content}")
     
+    @staticmethod
+    def _feedback_adaptation(feedback: UserFeedback) -> Optional[float]:
+        """单条反馈对适应水平的贡献，中性和澄清反馈不计入"""
+        if feedback.feedback_type in (ReactionType.NEGATIVE, ReactionType.CORRECTION):
+            return feedback.confidence
+        if feedback.feedback_type == ReactionType.POSITIVE:
+            return -feedback.confidence * 0.5
+        return None
+    
+    def _track_feedback(self, feedback: UserFeedback, sign: int):
+        """反馈加入（sign=1）或淘汰（sign=-1）时更新运行统计"""
+        self._feedback_counts[feedback.feedback_type] += sign
+        adaptation = self._feedback_adaptation(feedback)
+        if adaptation is not None:
+            self._feedback_score_sum += sign * adaptation
+    
+    def _reset_history(self, max_events: int, max_feedback: int):
+        """按新的容量重建事件和反馈队列，保留最新的记录并重新计算运行统计"""
+        self.environment_events = deque(self.environment_events, maxlen=max_events)
+        self.user_feedback = deque(self.user_feedback, maxlen=max_feedback)
+        self._feedback_counts = {feedback_type: 0 for feedback_type in ReactionType}
+        self._feedback_score_sum = 0.0
+        for feedback in self.user_feedback:
+            self._track_feedback(feedback, 1)
+        self.history_version += 1
+    
     def add_adaptive_rule(self, rule: AdaptiveRule):
-        """添加自适应规则"""
-        if len(self.adaptive_rules) >= self.config.max_adaptive_rules:
-            # 移除优先级最低的规则
-            self.adaptive_rules.sort(key=lambda x: x.priority)
-            self.adaptive_rules.pop(0)
-        
-        self.adaptive_rules.append(rule)
+        """添加自适应规则，已满时移除优先级最低的规则"""
+        self.adaptive_rules.add(rule)
         logger.info(f"添加自适应规则: {rule.name}")
     
     def add_behavior_pattern(self, pattern: BehaviorPattern):
-        """添加行为模式"""
-        if len(self.behavior_patterns) >= self.config.max_behavior_patterns:
-            # 移除成功率最低的模式
-            self.behavior_patterns.sort(key=lambda x: x.success_rate)
-            self.behavior_patterns.pop(0)
-        
-        self.behavior_patterns.append(pattern)
+        """添加行为模式，已满时移除成功率最低的模式"""
+        self.behavior_patterns.add(pattern)
         logger.info(f"添加行为模式: {pattern.pattern_name}")
     
     def analyze_context(self, current_message: str) -> Dict[str, Any]:
@@ -221,113 +288,117 @@ class ReactAgent:
             "adaptation_needed": False
         }
         
-        # 分析最近的环境事件
-        recent_events = self.environment_events[-5:] if self.environment_events else []
-        context["recent_events"] = [
+        # 最近的环境事件和用户反馈，事件或反馈没有变化时直接复用上次的结果
+        recent = self._get_recent_context()
+        context["recent_events"] = list(recent["events"])
+        context["recent_feedback"] = list(recent["feedback"])
+        
+        # 消息每次扫描，最近事件/反馈只在它们或规则变化后重新扫描
+        matcher = self._get_matcher()
+        message_hits = matcher.match(current_message)
+        context_hits_key = (self.history_version, self._matcher_version)
+        if self._context_hits_key != context_hits_key:
+            self._context_hits = matcher.match(recent["text"]) if recent["text"] else set()
+            self._context_hits_key = context_hits_key
+        context_hits = self._context_hits
+        
+        # 规则关键词可以出现在消息或上下文中，按添加顺序排列后再按优先级稳定排序
+        rule_indices = sorted(index for kind, index in message_hits | context_hits if kind == "rule")
+        applicable_rules = [
             {
-                "type": event.event_type,
-                "description": event.description,
-                "severity": event.severity,
-                "time": event.timestamp.isoformat()
+                "name": rule.name,
+                "action": rule.action,
+                "priority": rule.priority,
+                "adaptation_factor": rule.adaptation_factor
             }
-            for event in recent_events
+            for rule in (self._matcher_rules[index] for index in rule_indices)
+            if rule.active
         ]
+        context["applicable_rules"] = sorted(applicable_rules, key=lambda x: x["priority"], reverse=True)
         
-        # 分析最近的用户反馈
-        recent_feedback = self.user_feedback[-5:] if self.user_feedback else []
-        context["recent_feedback"] = [
+        # 模式触发词只匹配消息
+        pattern_indices = sorted(index for kind, index in message_hits if kind == "pattern")
+        matching_patterns = [
             {
-                "type": feedback.feedback_type.value,
-                "content": feedback.content,
-                "confidence": feedback.confidence,
-                "time": feedback.timestamp.isoformat()
+                "name": pattern.pattern_name,
+                "responses": pattern.responses,
+                "success_rate": pattern.success_rate,
+                "usage_count": pattern.usage_count
             }
-            for feedback in recent_feedback
+            for pattern in (self._matcher_patterns[index] for index in pattern_indices)
         ]
-        
-        # 查找适用的自适应规则
-        applicable_rules = []
-        for rule in self.adaptive_rules:
-            if rule.active and self._evaluate_rule_condition(rule, current_message, context):
-                applicable_rules.append({
-                    "name": rule.name,
-                    "action": rule.action,
-                    "priority": rule.priority,
-                    "adaptation_factor": rule.adaptation_factor
-                })
-        
-        context["applicable_rules"] = sorted(applicable_rules, key=lambda x: x["priority"], reverse=True)
-        
-        # 查找匹配的行为模式
-        matching_patterns = []
-        for pattern in self.behavior_patterns:
-            if self._evaluate_pattern_triggers(pattern, current_message, context):
-                matching_patterns.append({
-                    "name": pattern.pattern_name,
-                    "responses": pattern.responses,
-                    "success_rate": pattern.success_rate,
-                    "usage_count": pattern.usage_count
-                })
-        
         context["matching_patterns"] = sorted(matching_patterns, key=lambda x: x["success_rate"], reverse=True)
         
         # 判断是否需要适应
-        adaptation_score = self._calculate_adaptation_score(context)
+        adaptation_score = min(recent["score"] + len(context["applicable_rules"]) * 0.1, 1.0)
         context["adaptation_needed"] = adaptation_score > self.config.adaptation_threshold
         context["adaptation_score"] = adaptation_score
         
         return context
     
-    def _evaluate_rule_condition(self, rule: AdaptiveRule, message: str, context: Dict[str, Any]) -> bool:
-        """评估规则条件"""
-        # 简单的关键词匹配，实际应用中可以使用更复杂的逻辑
-        condition_lower = rule.condition.lower()
-        message_lower = message.lower()
-        
-        # 检查消息中是否包含条件关键词
-        if any(keyword in message_lower for keyword in condition_lower.split()):
-            return True
-        
-        # 检查上下文中的事件和反馈
-        for event in context["recent_events"]:
-            if any(keyword in event["description"].lower() for keyword in condition_lower.split()):
-                return True
-        
-        for feedback in context["recent_feedback"]:
-            if any(keyword in feedback["content"].lower() for keyword in condition_lower.split()):
-                return True
-        
-        return False
-    
-    def _evaluate_pattern_triggers(self, pattern: BehaviorPattern, message: str, context: Dict[str, Any]) -> bool:
-        """评估模式触发条件"""
-        message_lower = message.lower()
-        
-        for trigger in pattern.triggers:
-            if trigger.lower() in message_lower:
-                return True
-        
-        return False
-    
-    def _calculate_adaptation_score(self, context: Dict[str, Any]) -> float:
-        """计算适应分数"""
-        score = 0.0
-        
-        # 基于环境事件的分数
-        for event in context["recent_events"]:
-            score += event["severity"] * self.config.event_weight
-        
-        # 基于用户反馈的分数
-        for feedback in context["recent_feedback"]:
-            if feedback["type"] in ["negative", "correction"]:
-                score += feedback["confidence"] * self.config.feedback_weight
-            elif feedback["type"] == "positive":
-                score -= feedback["confidence"] * self.config.feedback_weight * 0.5
+    def _get_matcher(self) -> MultiPatternMatcher:
+        """
+        获取由所有规则条件关键词和模式触发词编译成的匹配器
         
-        # 基于适用规则的分数
-        score += len(context["applicable_rules"]) * 0.1
+        规则条件按空白切分为关键词，任一关键词出现即视为满足；模式任一触发词出现在消息中即视为匹配。
+        仅在规则或模式增删后重建，规则的active状态在匹配时检查
+        """
+        version = (self.adaptive_rules.version, self.behavior_patterns.version)
+        if self._matcher is None or self._matcher_version != version:
+            self._matcher_rules = self.adaptive_rules.copy()
+            self._matcher_patterns = self.behavior_patterns.copy()
+            entries = [(("rule", index), rule.condition.split()) for index, rule in enumerate(self._matcher_rules)]
+            entries += [(("pattern", index), pattern.triggers) for index, pattern in enumerate(self._matcher_patterns)]
+            self._matcher = MultiPatternMatcher(entries)
+            self._matcher_version = version
+        return self._matcher
+    
+    def _get_recent_context(self) -> Dict[str, Any]:
+        """
+        获取最近事件和反馈的分析结果，仅在事件、反馈或配置变化后重新计算
         
-        return min(score, 1.0)
+        Returns:
+            包含events、feedback、用于规则匹配的text以及事件和反馈贡献的适应分数score的字典
+        """
+        if self._recent_context_version == self.history_version:
+            return self._recent_context
+        
+        recent_events = list(islice(reversed(self.environment_events), RECENT_CONTEXT_SIZE))[::-1]
+        recent_feedback = list(islice(reversed(self.user_feedback), RECENT_CONTEXT_SIZE))[::-1]
+        
+        score = sum(event.severity for event in recent_events) * self.config.event_weight
+        for feedback in recent_feedback:
+            adaptation = self._feedback_adaptation(feedback)
+            if adaptation is not None:
+                score += adaptation * self.config.feedback_weight
+        
+        self._recent_context = {
+            "events": [
+                {
+                    "type": event.event_type,
+                    "description": event.description,
+                    "severity": event.severity,
+                    "time": event.timestamp.isoformat()
+                }
+                for event in recent_events
+            ],
+            "feedback": [
+                {
+                    "type": feedback.feedback_type.value,
+                    "content": feedback.content,
+                    "confidence": feedback.confidence,
+                    "time": feedback.timestamp.isoformat()
+                }
+                for feedback in recent_feedback
+            ],
+            "text": "\n".join(
+                [event.description for event in recent_events] +
+                [feedback.content for feedback in recent_feedback]
+            ),
+            "score": score
+        }
+        self._recent_context_version = self.history_version
+        return self._recent_context
     
     def adapt_behavior(self, context: Dict[str, Any]) -> Dict[str, Any]:
         """适应行为"""
@@ -374,10 +445,27 @@ class ReactAgent:
             if hasattr(self.config, key):
                 setattr(self.config, key, value)
         
+        if "max_environment_events" in kwargs or "max_user_feedback" in kwargs:
+            self._reset_history(self.config.max_environment_events, self.config.max_user_feedback)
+        # 权重可能变化，最近窗口的分数需要重新计算
+        self._recent_context_version = None
+        
         # 重新创建LLM实例
         self.llm = self._create_llm()
+        self._invalidate_bindings()
         logger.info(f"更新模型配置: {kwargs}")
     
+    def _get_tool_node(self) -> ToolNode:
+        """获取工具节点，仅在工具变化后重新创建"""
+        if self._tool_node is None:
+            self._tool_node = ToolNode(self.tools)
+        return self._tool_node
+    
+    def _invalidate_bindings(self):
+        """清除工具节点和按温度缓存的LLM客户端"""
+        self._tool_node = None
+        self._adapted_llms.clear()
+    
     def _should_continue(self, state: ReactAgentState) -> str:
         """判断是否继续执行"""
         last_message = state["messages"][-1]
@@ -438,15 +526,14 @@ class ReactAgent:
             state["error"] = error_msg
             return state
     
-    def _call_model(self, state: ReactAgentState) -> ReactAgentState:
-        """调用模型生成响应"""
-        try:
-            # 获取当前上下文和适应信息
-            context = state.get("current_context", {})
-            adaptation = context.get("adaptation", {})
-            
-            # 准备系统消息
-            system_content = f"""你是一个能够根据环境变化和用户反馈动态调整行为的智能助手。
+    def _build_model_messages(self, state: ReactAgentState) -> List[BaseMessage]:
+        """构建发送给模型的消息列表（系统消息 + 对话消息）"""
+        # 获取当前上下文和适应信息
+        context = state.get("current_context", {})
+        adaptation = context.get("adaptation", {})
+        
+        # 准备系统消息
+        system_content = f"""你是一个能够根据环境变化和用户反馈动态调整行为的智能助手。
 
 当前上下文:
 - 环境事件: {len(context.get('recent_events', []))} 个
@@ -462,24 +549,36 @@ class ReactAgent:
 - 适应原因: {', '.join(adaptation.get('adaptation_reason', []))}
 
 请根据以上信息提供智能、适应性的回答。"""
-            
-            system_message = SystemMessage(content=system_content)
-            
-            # 调整模型参数
-            adjusted_temperature = max(0.0, min(2.0, self.config.temperature + adaptation.get("temperature_adjustment", 0)))
-            adjusted_llm = ChatOpenAI(
-                model=self.config.model_name,
-                temperature=adjusted_temperature,
-                max_tokens=self.config.max_tokens,
-                top_p=self.config.top_p,
-                top_k=self.config.top_k
-            )
+        
+        system_message = SystemMessage(content=system_content)
+        
+        # 准备消息列表
+        return [system_message] + state["messages"]
+    
+    def _get_adapted_llm(self, state: ReactAgentState):
+        """根据适应结果调整温度，返回绑定工具后的LLM"""
+        adaptation = state.get("current_context", {}).get("adaptation", {})
+        
+        # 调整模型参数
+        adjusted_temperature = max(0.0, min(2.0, self.config.temperature + adaptation.get("temperature_adjustment", 0)))
+        adjusted_temperature = round(adjusted_temperature, 2)
+        
+        # 每个温度只绑定一次工具，客户端由注册表共享，复用其HTTP连接池
+        llm_with_tools = self._adapted_llms.get(adjusted_temperature)
+        if llm_with_tools is None:
+            adjusted_llm = self._create_llm(adjusted_temperature)
             
             # 绑定工具到LLM
             llm_with_tools = adjusted_llm.bind_tools(self.tools)
-            
-            # 准备消息列表
-            messages = [system_message] + state["messages"]
+            self._adapted_llms[adjusted_temperature] = llm_with_tools
+        
+        return llm_with_tools
+    
+    def _call_model(self, state: ReactAgentState) -> ReactAgentState:
+        """调用模型生成响应"""
+        try:
+            messages = self._build_model_messages(state)
+            llm_with_tools = self._get_adapted_llm(state)
             
             # 调用模型
             response = llm_with_tools.invoke(messages)
@@ -497,11 +596,30 @@ class ReactAgent:
             state["error"] = error_msg
             return state
     
+    async def _acall_model(self, state: ReactAgentState) -> ReactAgentState:
+        """异步调用模型生成响应"""
+        try:
+            messages = self._build_model_messages(state)
+            llm_with_tools = self._get_adapted_llm(state)
+            response = await llm_with_tools.ainvoke(messages)
+            
+            state["messages"].append(response)
+            state["current_step"] = "model_response"
+            
+            logger.info("模型响应生成成功")
+            return state
+            
+        except Exception as e:
+            error_msg = f"模型调用失败: {str(e)}"
+            logger.error(error_msg)
+            state["error"] = error_msg
+            return state
+    
     def _call_tools(self, state: ReactAgentState) -> ReactAgentState:
         """调用工具"""
         try:
             # 使用ToolNode处理工具调用
-            tool_node = ToolNode(self.tools)
+            tool_node = self._get_tool_node()
             result = tool_node.invoke(state)
             
             # 更新状态
@@ -517,6 +635,24 @@ class ReactAgent:
             state["error"] = error_msg
             return state
     
+    async def _acall_tools(self, state: ReactAgentState) -> ReactAgentState:
+        """异步调用工具"""
+        try:
+            tool_node = self._get_tool_node()
+            result = await tool_node.ainvoke(state)
+            
+            state["messages"] = result["messages"]
+            state["current_step"] = "tool_execution"
+            
+            logger.info("工具执行完成")
+            return state
+            
+        except Exception as e:
+            error_msg = f"工具调用失败: {str(e)}"
+            logger.error(error_msg)
+            state["error"] = error_msg
+            return state
+    
     def _generate_output(self, state: ReactAgentState) -> ReactAgentState:
         """生成最终输出文本"""
         try:
@@ -547,10 +683,10 @@ class ReactAgent:
         """构建LangGraph工作流"""
         workflow = StateGraph(ReactAgentState)
         
-        # 添加节点
+        # 添加节点（模型和工具节点同时提供同步和异步实现，invoke/ainvoke共用同一张图）
         workflow.add_node("analyze", self._analyze_and_adapt)
-        workflow.add_node("agent", self._call_model)
-        workflow.add_node("tools", self._call_tools)
+        workflow.add_node("agent", RunnableLambda(self._call_model, afunc=self._acall_model))
+        workflow.add_node("tools", RunnableLambda(self._call_tools, afunc=self._acall_tools))
         workflow.add_node("output", self._generate_output)
         
         # 设置入口点
@@ -583,29 +719,19 @@ class ReactAgent:
         
         return workflow.compile()
     
-    def run(self, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
-        """
-        运行React Agent
-        
-        Args:
-            message: 用户输入消息
-            tools: 可选的工具列表（会覆盖已添加的工具）
-        
-        Returns:
-            执行结果
-        """
+    def _build_initial_state(self, message: str, tools: Optional[List[BaseTool]] = None) -> ReactAgentState:
+        """构建工作流初始状态"""
         # 准备工具列表
         if tools is not None:
             current_tools = tools
         else:
             current_tools = self.tools
         
-        # 初始化状态
-        initial_state = ReactAgentState(
+        return ReactAgentState(
             messages=[HumanMessage(content=message)],
             tools=current_tools,
-            environment_events=self.environment_events.copy(),
-            user_feedback=self.user_feedback.copy(),
+            environment_events=list(self.environment_events),
+            user_feedback=list(self.user_feedback),
             adaptive_rules=self.adaptive_rules.copy(),
             behavior_patterns=self.behavior_patterns.copy(),
             current_context={},
@@ -617,43 +743,99 @@ class ReactAgent:
             output_text=None,
             reaction_applied=None
         )
+    
+    def _format_result(self, result: ReactAgentState) -> Dict[str, Any]:
+        """将工作流最终状态整理为执行结果"""
+        return {
+            "success": True,
+            "response": result["output_text"],
+            "messages": result["messages"],
+            "current_step": result["current_step"],
+            "error": result.get("error"),
+            "adaptation_level": result["adaptation_level"],
+            "reaction_applied": result["reaction_applied"],
+            "context_analysis": result["current_context"],
+            "environment_events_count": len(result["environment_events"]),
+            "user_feedback_count": len(result["user_feedback"]),
+            "adaptive_rules_count": len(result["adaptive_rules"]),
+            "behavior_patterns_count": len(result["behavior_patterns"])
+        }
+    
+    def _format_error(self, initial_state: ReactAgentState, e: Exception) -> Dict[str, Any]:
+        """整理执行失败时的结果"""
+        error_msg = f"React Agent执行失败: {str(e)}"
+        logger.error(error_msg)
+        return {
+            "success": False,
+            "response": None,
+            "messages": initial_state["messages"],
+            "current_step": "error",
+            "error": error_msg,
+            "adaptation_level": 0.0,
+            "reaction_applied": None,
+            "context_analysis": {},
+            "environment_events_count": 0,
+            "user_feedback_count": 0,
+            "adaptive_rules_count": 0,
+            "behavior_patterns_count": 0
+        }
+    
+    def run(self, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
+        """
+        运行React Agent
+        
+        Args:
+            message: 用户输入消息
+            tools: 可选的工具列表（会覆盖已添加的工具）
+        
+        Returns:
+            执行结果
+        """
+        initial_state = self._build_initial_state(message, tools)
         
         try:
             # 执行工作流
             result = self.graph.invoke(initial_state)
+            return self._format_result(result)
             
-            return {
-                "success": True,
-                "response": result["output_text"],
-                "messages": result["messages"],
-                "current_step": result["current_step"],
-                "error": result.get("error"),
-                "adaptation_level": result["adaptation_level"],
-                "reaction_applied": result["reaction_applied"],
-                "context_analysis": result["current_context"],
-                "environment_events_count": len(result["environment_events"]),
-                "user_feedback_count": len(result["user_feedback"]),
-                "adaptive_rules_count": len(result["adaptive_rules"]),
-                "behavior_patterns_count": len(result["behavior_patterns"])
-            }
+        except Exception as e:
+            return self._format_error(initial_state, e)
+    
+    async def arun(self, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
+        """
+        异步运行React Agent
+        
+        Args:
+            message: 用户输入消息
+            tools: 可选的工具列表（会覆盖已添加的工具）
+        
+        Returns:
+            执行结果，格式与run相同
+        """
+        initial_state = self._build_initial_state(message, tools)
+        
+        try:
+            result = await self.graph.ainvoke(initial_state)
+            return self._format_result(result)
             
         except Exception as e:
-            error_msg = f"React Agent执行失败: {str(e)}"
-            logger.error(error_msg)
-            return {
-                "success": False,
-                "response": None,
-                "messages": initial_state["messages"],
-                "current_step": "error",
-                "error": error_msg,
-                "adaptation_level": 0.0,
-                "reaction_applied": None,
-                "context_analysis": {},
-                "environment_events_count": 0,
-                "user_feedback_count": 0,
-                "adaptive_rules_count": 0,
-                "behavior_patterns_count": 0
-            }
+            return self._format_error(initial_state, e)
+    
+    async def astream(self, message: str, tools: Optional[List[BaseTool]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        异步流式运行React Agent，每执行完一个节点产出一次状态更新
+        
+        Args:
+            message: 用户输入消息
+            tools: 可选的工具列表（会覆盖已添加的工具）
+        
+        Yields:
+            {节点名称: 该节点输出的状态}
+        """
+        initial_state = self._build_initial_state(message, tools)
+        
+        async for chunk in self.graph.astream(initial_state):
+            yield chunk
     
     def get_config(self) -> Dict[str, Any]:
         """获取当前配置"""
@@ -672,21 +854,11 @@ class ReactAgent:
         if not self.user_feedback:
             return {"average_adaptation": 0.0, "feedback_distribution": {}}
         
-        # 计算平均适应水平
-        adaptation_scores = []
-        for feedback in self.user_feedback:
-            if feedback.feedback_type in [ReactionType.NEGATIVE, ReactionType.CORRECTION]:
-                adaptation_scores.append(feedback.confidence)
-            elif feedback.feedback_type == ReactionType.POSITIVE:
-                adaptation_scores.append(-feedback.confidence * 0.5)
-        
-        average_adaptation = sum(adaptation_scores) / len(adaptation_scores) if adaptation_scores else 0.0
-        
-        # 反馈分布
-        feedback_distribution = {}
-        for feedback_type in ReactionType:
-            count = sum(1 for f in self.user_feedback if f.feedback_type == feedback_type)
-            feedback_distribution[feedback_type.value] = count
+        # 平均适应水平和反馈分布直接取自运行统计
+        counts = self._feedback_counts
+        scored = counts[ReactionType.NEGATIVE] + counts[ReactionType.CORRECTION] + counts[ReactionType.POSITIVE]
+        average_adaptation = self._feedback_score_sum / scored if scored else 0.0
+        feedback_distribution = {feedback_type.value: count for feedback_type, count in counts.items()}
         
         return {
             "average_adaptation": average_adaptation,
@@ -699,10 +871,14 @@ class ReactAgent:
         """清除历史记录"""
         if clear_type in ["all", "events"]:
             self.environment_events.clear()
+            self.history_version += 1
             logger.info("清除环境事件历史")
         
         if clear_type in ["all", "feedback"]:
             self.user_feedback.clear()
+            self._feedback_counts = {feedback_type: 0 for feedback_type in ReactionType}
+            self._feedback_score_sum = 0.0
+            self.history_version += 1
             logger.info("清除用户反馈历史")
         
         if clear_type in ["all", "rules"]:
@@ -0,0 +1,338 @@
+"""
+多会话管理
+为每个会话维护独立的长期记忆，所有会话共享同一个MemoryAgent的图、LLM客户端、工具和规则；
+常驻会话数和空闲时间受限，超出时按LRU/TTL换出到SQLite，下次访问时再载入
+"""
+
+from typing import Dict, List, Any, Optional, Iterable
+from collections import OrderedDict
+from datetime import datetime
+import json
+import logging
+import sqlite3
+import threading
+import time
+
+from langchain_core.tools import BaseTool
+
+from ..config import SESSION_MAX_ACTIVE, SESSION_IDLE_TTL, SESSION_MAX_MEMORIES, SESSION_SPILL_PATH
+from .memory_agent import MemoryAgent, MemoryItem, MemoryScope
+
+logger = logging.getLogger(__name__)
+
+# 会话向量索引的初始行数，会话记忆通常很少，按需倍增
+SESSION_INDEX_CAPACITY = 16
+
+class SessionState:
+    """单个会话的状态"""
+
+    __slots__ = ("session_id", "scope", "created_at", "last_active", "turns", "in_use")
+
+    def __init__(self, session_id: str, scope: MemoryScope, created_at: Optional[datetime] = None, turns: int = 0):
+        self.session_id = session_id
+        self.scope = scope
+        self.created_at = created_at or datetime.now()
+        self.last_active = time.time()
+        self.turns = turns
+        self.in_use = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """序列化为可JSON保存的字典"""
+        return {
+            "session_id": self.session_id,
+            "created_at": self.created_at.isoformat(),
+            "turns": self.turns,
+            "memories": [memory.dict() for memory in self.scope.long_term_memory]
+        }
+
+class SessionManager:
+    """会话管理器"""
+
+    def __init__(
+        self,
+        agent: Optional[MemoryAgent] = None,
+        max_active_sessions: int = SESSION_MAX_ACTIVE,
+        idle_ttl: Optional[float] = SESSION_IDLE_TTL,
+        max_session_memories: int = SESSION_MAX_MEMORIES,
+        spill_path: Optional[str] = SESSION_SPILL_PATH
+    ):
+        """
+        初始化会话管理器
+
+        Args:
+            agent: 所有会话共享的记忆Agent，默认创建一个
+            max_active_sessions: 常驻内存的会话数上限
+            idle_ttl: 空闲超过该秒数的会话被换出，为None时只按数量换出
+            max_session_memories: 每个会话的长期记忆条数上限
+            spill_path: 换出会话的SQLite路径，为None时换出的会话直接丢弃
+        """
+        self.agent = agent or MemoryAgent()
+        self.max_active_sessions = max_active_sessions
+        self.idle_ttl = idle_ttl
+        self.max_session_memories = max_session_memories
+        self.spill_path = spill_path
+
+        self._sessions: "OrderedDict[str, SessionState]" = OrderedDict()
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self.created = 0
+        self.loads = 0
+        self.spills = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    def _connect(self) -> Optional[sqlite3.Connection]:
+        """首次换出或载入时打开会话数据库"""
+        if self.spill_path is None:
+            return None
+        if self._conn is None:
+            conn = sqlite3.connect(self.spill_path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS sessions (
+                    session_id TEXT PRIMARY KEY,
+                    data TEXT NOT NULL,
+                    updated_at REAL NOT NULL
+                )
+                """
+            )
+            conn.commit()
+            self._conn = conn
+            logger.info(f"打开会话数据库: {self.spill_path}")
+        return self._conn
+
+    def _new_state(
+        self,
+        session_id: str,
+        memories: Iterable[MemoryItem] = (),
+        created_at: Optional[datetime] = None,
+        turns: int = 0
+    ) -> SessionState:
+        """创建会话状态并为已有记忆建立索引"""
+        scope = self.agent.create_scope(self.max_session_memories, initial_capacity=SESSION_INDEX_CAPACITY)
+        for memory in memories:
+            scope.long_term_memory.add(memory)
+        scope.memory_index.add_many([(m.id, m.content) for m in scope.long_term_memory])
+        return SessionState(session_id, scope, created_at, turns)
+
+    def _load(self, session_id: str) -> Optional[SessionState]:
+        """从会话数据库载入会话"""
+        conn = self._connect()
+        if conn is None:
+            return None
+        row = conn.execute("SELECT data FROM sessions WHERE session_id = ?", (session_id,)).fetchone()
+        if row is None:
+            return None
+
+        data = json.loads(row[0])
+        self.loads += 1
+        return self._new_state(
+            session_id,
+            (MemoryItem(**memory) for memory in data.get("memories", [])),
+            datetime.fromisoformat(data["created_at"]),
+            data.get("turns", 0)
+        )
+
+    def _spill(self, state: SessionState):
+        """将会话写入会话数据库"""
+        conn = self._connect()
+        self.spills += 1
+        if conn is None:
+            logger.debug(f"未配置会话数据库，丢弃会话: {state.session_id}")
+            return
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO sessions (session_id, data, updated_at) VALUES (?, ?, ?)",
+                (state.session_id, json.dumps(state.to_dict(), ensure_ascii=False, default=str), time.time())
+            )
+
+    def _enforce_limits(self):
+        """换出空闲超时的会话以及超出数量上限的最久未用会话，正在执行的会话不会被换出"""
+        now = time.time()
+        for session_id, state in list(self._sessions.items()):
+            over_limit = len(self._sessions) > self.max_active_sessions
+            expired = self.idle_ttl is not None and now - state.last_active > self.idle_ttl
+            if not over_limit and not expired:
+                # 会话按最近访问排序，后面的会话更新，不会超时
+                break
+            if state.in_use:
+                continue
+            del self._sessions[session_id]
+            self._spill(state)
+
+    def get_session(self, session_id: str) -> SessionState:
+        """
+        获取会话，不在内存中时从会话数据库载入，不存在时创建
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            SessionState实例
+        """
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None:
+                state = self._load(session_id)
+                if state is None:
+                    state = self._new_state(session_id)
+                    self.created += 1
+                self._sessions[session_id] = state
+            else:
+                self._sessions.move_to_end(session_id)
+            state.last_active = time.time()
+            self._enforce_limits()
+            return state
+
+    def _acquire(self, session_id: str) -> SessionState:
+        """获取会话并标记为执行中"""
+        with self._lock:
+            state = self.get_session(session_id)
+            state.in_use += 1
+            return state
+
+    def _release(self, state: SessionState, result: Dict[str, Any]) -> Dict[str, Any]:
+        """结束一次执行，更新会话统计"""
+        with self._lock:
+            state.in_use -= 1
+            state.turns += 1
+            state.last_active = time.time()
+        result["session_id"] = state.session_id
+        return result
+
+    def run(self, session_id: str, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
+        """
+        在指定会话中运行Agent
+
+        Args:
+            session_id: 会话ID
+            message: 用户输入消息
+            tools: 可选的工具列表
+
+        Returns:
+            执行结果，额外包含session_id
+        """
+        state = self._acquire(session_id)
+        try:
+            with self.agent.use_scope(state.scope):
+                result = self.agent.run(message, tools)
+        except Exception:
+            with self._lock:
+                state.in_use -= 1
+            raise
+        return self._release(state, result)
+
+    async def arun(self, session_id: str, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
+        """
+        在指定会话中异步运行Agent
+
+        Args:
+            session_id: 会话ID
+            message: 用户输入消息
+            tools: 可选的工具列表
+
+        Returns:
+            执行结果，格式与run相同
+        """
+        state = self._acquire(session_id)
+        try:
+            with self.agent.use_scope(state.scope):
+                result = await self.agent.arun(message, tools)
+        except Exception:
+            with self._lock:
+                state.in_use -= 1
+            raise
+        return self._release(state, result)
+
+    def add_memory(self, session_id: str, content: str, importance: float = 0.5, category: str = "general", metadata: Dict[str, Any] = None):
+        """向指定会话添加长期记忆，执行期间会话不会被换出"""
+        state = self._acquire(session_id)
+        try:
+            with self.agent.use_scope(state.scope):
+                self.agent.add_memory(content, importance, category, metadata)
+        finally:
+            with self._lock:
+                state.in_use -= 1
+
+    def get_relevant_memories(self, session_id: str, query: str, limit: int = 5) -> List[MemoryItem]:
+        """获取指定会话中与查询相关的记忆，执行期间会话不会被换出"""
+        state = self._acquire(session_id)
+        try:
+            with self.agent.use_scope(state.scope):
+                return self.agent.get_relevant_memories(query, limit)
+        finally:
+            with self._lock:
+                state.in_use -= 1
+
+    def spill_session(self, session_id: str) -> bool:
+        """
+        立即换出会话
+
+        Args:
+            session_id: 会话ID
+
+        Returns:
+            会话是否在内存中并被换出
+        """
+        with self._lock:
+            state = self._sessions.get(session_id)
+            if state is None or state.in_use:
+                return False
+            del self._sessions[session_id]
+            self._spill(state)
+            return True
+
+    def evict_idle(self) -> int:
+        """换出空闲超时的会话，返回换出数量"""
+        with self._lock:
+            before = len(self._sessions)
+            self._enforce_limits()
+            return before - len(self._sessions)
+
+    def delete_session(self, session_id: str):
+        """从内存和会话数据库中删除会话"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+            conn = self._connect()
+            if conn is not None:
+                with conn:
+                    conn.execute("DELETE FROM sessions WHERE session_id = ?", (session_id,))
+        logger.info(f"删除会话: {session_id}")
+
+    def save_all(self):
+        """将所有常驻会话写入会话数据库，不从内存中移除"""
+        with self._lock:
+            if self._connect() is None:
+                return
+            for state in self._sessions.values():
+                self._spill(state)
+
+    def close(self):
+        """保存所有会话并关闭会话数据库"""
+        with self._lock:
+            self.save_all()
+            self._sessions.clear()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取会话统计信息"""
+        stats = {
+            "active_sessions": len(self._sessions),
+            "max_active_sessions": self.max_active_sessions,
+            "created": self.created,
+            "loads": self.loads,
+            "spills": self.spills
+        }
+        conn = self._connect()
+        if conn is not None:
+            with self._lock:
+                stats["stored_sessions"] = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+        return stats
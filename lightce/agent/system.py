@@ -1,7 +1,9 @@
-from typing import Dict, List, Any, Optional, TypedDict, Annotated
+from typing import Dict, List, Any, Optional, TypedDict, Annotated, AsyncIterator, Iterator
 from langgraph.graph import StateGraph, END
 from langgraph.prebuilt import ToolNode
-from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage
+from langchain_core.callbacks import Callbacks
+from langchain_core.messages import BaseMessage, HumanMessage, AIMessage, ToolMessage, messages_to_dict, messages_from_dict
+from langchain_core.runnables import RunnableLambda
 from langchain_core.tools import BaseTool
 from langchain_openai import ChatOpenAI
 from langchain_community.llms import Ollama
@@ -14,6 +16,8 @@ from ..config import (
     TEMPERATURE_MIN, TEMPERATURE_MAX, TOP_P_MIN, TOP_P_MAX, 
     TOP_K_MIN, MAX_TOKENS_MIN, LOG_LEVEL, LOG_FORMAT
 )
+from .cache import LLMCache, make_cache_key, get_default_cache
+from .clients import get_client_registry
 
 # 配置日志
 logging.basicConfig(level=getattr(logging, LOG_LEVEL), format=LOG_FORMAT)
@@ -35,45 +39,61 @@ class ModelConfig(BaseModel):
     top_k: int = Field(default=DEFAULT_TOP_K, description="Top-k参数", ge=TOP_K_MIN)
     max_tokens: int = Field(default=DEFAULT_MAX_TOKENS, description="最大token数", ge=MAX_TOKENS_MIN)
     provider: str = Field(default=DEFAULT_PROVIDER, description=f"模型提供商: {', '.join(SUPPORTED_PROVIDERS)}")
+    base_url: Optional[str] = Field(default=None, description="API地址，为None时使用提供商默认地址")
 
 class UniversalAgent:
     """通用Agent类，支持工具调用和参数配置"""
     
-    def __init__(self, model_config: Optional[ModelConfig] = None):
+    def __init__(self, model_config: Optional[ModelConfig] = None, cache: Optional[LLMCache] = None):
         """
         初始化通用Agent
         
         Args:
             model_config: 模型配置参数
+            cache: LLM响应缓存，为None时使用全局默认缓存（见cache.set_default_cache）
         """
         self.model_config = model_config or ModelConfig()
+        self.cache = cache
         self.llm = self._create_llm()
         self.tools: List[BaseTool] = []
+        self._llm_with_tools = None
+        self._tool_node: Optional[ToolNode] = None
         self.graph = self._build_graph()
         
     def _create_llm(self):
-        """根据配置创建LLM实例"""
-        if self.model_config.provider == "openai":
-            return ChatOpenAI(
-                model=self.model_config.model_name,
-                temperature=self.model_config.temperature,
-                max_tokens=self.model_config.max_tokens,
-                top_p=self.model_config.top_p
+        """根据配置获取LLM实例，相同配置的实例在进程内共享并复用HTTP连接池"""
+        registry = get_client_registry()
+        config = self.model_config
+        
+        if config.provider == "openai":
+            key = (ChatOpenAI, config.model_name, config.temperature, config.max_tokens, config.top_p, config.base_url)
+            return registry.get_llm(key, lambda: ChatOpenAI(
+                model=config.model_name,
+                temperature=config.temperature,
+                max_tokens=config.max_tokens,
+                top_p=config.top_p,
                 # 移除top_k参数，因为OpenAI API不支持
-            )
-        elif self.model_config.provider == "ollama":
-            return Ollama(
-                model=self.model_config.model_name,
-                temperature=self.model_config.temperature,
-                top_p=self.model_config.top_p,
-                top_k=self.model_config.top_k
-            )
+                base_url=config.base_url,
+                http_client=registry.get_http_client(config.base_url),
+                http_async_client=registry.get_loop_local_async_client(config.base_url)
+            ))
+        elif config.provider == "ollama":
+            key = (Ollama, config.model_name, config.temperature, config.top_p, config.top_k, config.base_url)
+            ollama_kwargs = {"base_url": config.base_url} if config.base_url else {}
+            return registry.get_llm(key, lambda: Ollama(
+                model=config.model_name,
+                temperature=config.temperature,
+                top_p=config.top_p,
+                top_k=config.top_k,
+                **ollama_kwargs
+            ))
         else:
-            raise ValueError(f"不支持的模型提供商: {self.model_config.provider}。支持的提供商: {', '.join(SUPPORTED_PROVIDERS)}")
+            raise ValueError(f"不支持的模型提供商: {config.provider}。支持的提供商: {', '.join(SUPPORTED_PROVIDERS)}")
     
     def add_tool(self, tool: BaseTool):
         """添加工具到agent"""
         self.tools.append(tool)
+        self._invalidate_bindings()
         logger.info(f"添加工具: {tool.name}")
     
     def add_tools(self, tools: List[BaseTool]):
@@ -89,8 +109,26 @@ class UniversalAgent:
         
         # 重新创建LLM实例
         self.llm = self._create_llm()
+        self._invalidate_bindings()
         logger.info(f"更新模型配置: {kwargs}")
     
+    def _get_llm_with_tools(self):
+        """获取绑定工具后的LLM，仅在工具或模型配置变化后重新绑定"""
+        if self._llm_with_tools is None:
+            self._llm_with_tools = self.llm.bind_tools(self.tools)
+        return self._llm_with_tools
+    
+    def _get_tool_node(self) -> ToolNode:
+        """获取工具节点，仅在工具变化后重新创建"""
+        if self._tool_node is None:
+            self._tool_node = ToolNode(self.tools)
+        return self._tool_node
+    
+    def _invalidate_bindings(self):
+        """清除已绑定的LLM和工具节点缓存"""
+        self._llm_with_tools = None
+        self._tool_node = None
+    
     def _should_continue(self, state: AgentState) -> str:
         """判断是否继续执行"""
         last_message = state["messages"][-1]
@@ -106,14 +144,60 @@ class UniversalAgent:
         # 否则结束
         return END
     
+    def _get_cache(self) -> Optional[LLMCache]:
+        """获取当前生效的响应缓存"""
+        return self.cache if self.cache is not None else get_default_cache()
+    
+    def _make_cache_key(self, messages: List[BaseMessage]) -> str:
+        """根据模型配置、消息内容和工具计算缓存键，忽略消息ID等每次调用都会变化的字段"""
+        message_items = []
+        for message in messages:
+            item = {"type": message.type, "content": message.content}
+            tool_calls = getattr(message, "tool_calls", None)
+            if tool_calls:
+                item["tool_calls"] = [{"name": call["name"], "args": call["args"]} for call in tool_calls]
+            message_items.append(item)
+        
+        return make_cache_key(
+            self.model_config.dict(),
+            message_items,
+            [tool.name for tool in self.tools]
+        )
+    
+    def _lookup_cached_response(self, messages: List[BaseMessage]):
+        """查询缓存，返回(缓存键, 缓存的响应)；未启用缓存时缓存键为None"""
+        cache = self._get_cache()
+        if cache is None:
+            return None, None
+        
+        key = self._make_cache_key(messages)
+        cached = cache.get(key)
+        if cached is None:
+            return key, None
+        
+        logger.info("命中LLM响应缓存")
+        return key, messages_from_dict([cached])[0]
+    
+    def _store_cached_response(self, key: Optional[str], response: Any):
+        """写入缓存，仅缓存消息类型的响应"""
+        if key is None or not isinstance(response, BaseMessage):
+            return
+        self._get_cache().set(key, messages_to_dict([response])[0])
+    
+    def get_cache_stats(self) -> Optional[Dict[str, Any]]:
+        """获取响应缓存统计，未启用缓存时返回None"""
+        cache = self._get_cache()
+        return cache.get_stats() if cache is not None else None
+    
     def _call_model(self, state: AgentState) -> AgentState:
         """调用模型生成响应"""
         try:
-            # 绑定工具到LLM
-            llm_with_tools = self.llm.bind_tools(self.tools)
+            cache_key, response = self._lookup_cached_response(state["messages"])
             
-            # 调用模型
-            response = llm_with_tools.invoke(state["messages"])
+            if response is None:
+                # 调用模型
+                response = self._get_llm_with_tools().invoke(state["messages"])
+                self._store_cached_response(cache_key, response)
             
             # 添加AI响应到消息列表
             state["messages"].append(response)
@@ -128,11 +212,32 @@ class UniversalAgent:
             state["error"] = error_msg
             return state
     
+    async def _acall_model(self, state: AgentState) -> AgentState:
+        """异步调用模型生成响应"""
+        try:
+            cache_key, response = self._lookup_cached_response(state["messages"])
+            
+            if response is None:
+                response = await self._get_llm_with_tools().ainvoke(state["messages"])
+                self._store_cached_response(cache_key, response)
+            
+            state["messages"].append(response)
+            state["current_step"] = "model_response"
+            
+            logger.info("模型响应生成成功")
+            return state
+            
+        except Exception as e:
+            error_msg = f"模型调用失败: {str(e)}"
+            logger.error(error_msg)
+            state["error"] = error_msg
+            return state
+    
     def _call_tools(self, state: AgentState) -> AgentState:
         """调用工具"""
         try:
             # 使用ToolNode处理工具调用
-            tool_node = ToolNode(self.tools)
+            tool_node = self._get_tool_node()
             result = tool_node.invoke(state)
             
             # 更新状态
@@ -148,13 +253,31 @@ class UniversalAgent:
             state["error"] = error_msg
             return state
     
+    async def _acall_tools(self, state: AgentState) -> AgentState:
+        """异步调用工具"""
+        try:
+            tool_node = self._get_tool_node()
+            result = await tool_node.ainvoke(state)
+            
+            state["messages"] = result["messages"]
+            state["current_step"] = "tool_execution"
+            
+            logger.info("工具执行完成")
+            return state
+            
+        except Exception as e:
+            error_msg = f"工具调用失败: {str(e)}"
+            logger.error(error_msg)
+            state["error"] = error_msg
+            return state
+    
     def _build_graph(self) -> StateGraph:
         """构建LangGraph工作流"""
         workflow = StateGraph(AgentState)
         
-        # 添加节点
-        workflow.add_node("agent", self._call_model)
-        workflow.add_node("tools", self._call_tools)
+        # 添加节点（同时提供同步和异步实现，invoke/ainvoke共用同一张图）
+        workflow.add_node("agent", RunnableLambda(self._call_model, afunc=self._acall_model))
+        workflow.add_node("tools", RunnableLambda(self._call_tools, afunc=self._acall_tools))
         
         # 设置入口点
         workflow.set_entry_point("agent")
@@ -180,68 +303,175 @@ class UniversalAgent:
         
         return workflow.compile()
     
-    def run(self, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
-        """
-        运行agent
-        
-        Args:
-            message: 用户输入消息
-            tools: 可选的工具列表（会覆盖已添加的工具）
-        
-        Returns:
-            执行结果
-        """
+    def _build_initial_state(self, message: str, tools: Optional[List[BaseTool]] = None) -> AgentState:
+        """构建工作流初始状态"""
         # 准备工具列表
         if tools is not None:
             current_tools = tools
         else:
             current_tools = self.tools
         
-        # 初始化状态
-        initial_state = AgentState(
+        return AgentState(
             messages=[HumanMessage(content=message)],
             tools=current_tools,
             model_config=self.model_config.dict(),
             current_step="start",
             error=None
         )
+    
+    def _format_result(self, result: AgentState) -> Dict[str, Any]:
+        """将工作流最终状态整理为执行结果"""
+        # 提取最终响应
+        final_message = result["messages"][-1]
+        if isinstance(final_message, AIMessage):
+            response_content = final_message.content
+        else:
+            response_content = "执行完成"
+        
+        return {
+            "success": True,
+            "response": response_content,
+            "messages": result["messages"],
+            "current_step": result["current_step"],
+            "error": result.get("error")
+        }
+    
+    def _format_error(self, initial_state: AgentState, e: Exception) -> Dict[str, Any]:
+        """整理执行失败时的结果"""
+        error_msg = f"Agent执行失败: {str(e)}"
+        logger.error(error_msg)
+        return {
+            "success": False,
+            "response": None,
+            "messages": initial_state["messages"],
+            "current_step": "error",
+            "error": error_msg
+        }
+    
+    def run(self, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
+        """
+        运行agent
+        
+        Args:
+            message: 用户输入消息
+            tools: 可选的工具列表（会覆盖已添加的工具）
+        
+        Returns:
+            执行结果
+        """
+        initial_state = self._build_initial_state(message, tools)
         
         try:
             # 执行工作流
             result = self.graph.invoke(initial_state)
+            return self._format_result(result)
             
-            # 提取最终响应
-            final_message = result["messages"][-1]
-            if isinstance(final_message, AIMessage):
-                response_content = final_message.content
-            else:
-                response_content = "执行完成"
-            
-            return {
-                "success": True,
-                "response": response_content,
-                "messages": result["messages"],
-                "current_step": result["current_step"],
-                "error": result.get("error")
-            }
+        except Exception as e:
+            return self._format_error(initial_state, e)
+    
+    async def arun(self, message: str, tools: Optional[List[BaseTool]] = None) -> Dict[str, Any]:
+        """
+        异步运行agent，可在同一事件循环中并发执行多个请求
+        
+        Args:
+            message: 用户输入消息
+            tools: 可选的工具列表（会覆盖已添加的工具）
+        
+        Returns:
+            执行结果，格式与run相同
+        """
+        initial_state = self._build_initial_state(message, tools)
+        
+        try:
+            result = await self.graph.ainvoke(initial_state)
+            return self._format_result(result)
             
         except Exception as e:
-            error_msg = f"Agent执行失败: {str(e)}"
-            logger.error(error_msg)
-            return {
-                "success": False,
-                "response": None,
-                "messages": initial_state["messages"],
-                "current_step": "error",
-                "error": error_msg
-            }
+            return self._format_error(initial_state, e)
+    
+    async def astream(self, message: str, tools: Optional[List[BaseTool]] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        异步流式运行agent，每执行完一个节点产出一次状态更新
+        
+        Args:
+            message: 用户输入消息
+            tools: 可选的工具列表（会覆盖已添加的工具）
+        
+        Yields:
+            {节点名称: 该节点输出的状态}
+        """
+        initial_state = self._build_initial_state(message, tools)
+        
+        async for chunk in self.graph.astream(initial_state):
+            yield chunk
+    
+    def _prepare_text_stream(self, message: str):
+        """构建流式调用的消息并查询缓存；绑定了工具时响应可能包含工具调用，不使用缓存"""
+        messages = [HumanMessage(content=message)]
+        if self.tools:
+            return messages, None, None
+        cache_key, cached = self._lookup_cached_response(messages)
+        return messages, cache_key, cached
+    
+    @staticmethod
+    def _chunk_text(chunk: Any) -> str:
+        """提取流式输出片段的文本，兼容聊天模型的消息片段和补全模型的字符串"""
+        content = chunk if isinstance(chunk, str) else getattr(chunk, "content", "")
+        return content if isinstance(content, str) else ""
+    
+    def stream_text(self, message: str, callbacks: Callbacks = None) -> Iterator[str]:
+        """
+        直接调用模型并逐段产出文本，不经过工具调用流程
+        
+        Args:
+            message: 用户输入消息
+            callbacks: LangChain回调，模型每产生一段文本都会触发其on_llm_new_token
+        
+        Yields:
+            模型增量输出的文本片段，命中缓存时一次产出完整响应
+        """
+        messages, cache_key, cached = self._prepare_text_stream(message)
+        if cached is not None:
+            if cached.content:
+                yield cached.content
+            return
+        
+        parts = []
+        for chunk in self.llm.stream(messages, config={"callbacks": callbacks}):
+            text = self._chunk_text(chunk)
+            if text:
+                parts.append(text)
+                yield text
+        self._store_cached_response(cache_key, AIMessage(content="".join(parts)))
+    
+    async def astream_text(self, message: str, callbacks: Callbacks = None) -> AsyncIterator[str]:
+        """
+        异步直接调用模型并逐段产出文本，参数与stream_text相同
+        
+        Yields:
+            模型增量输出的文本片段
+        """
+        messages, cache_key, cached = self._prepare_text_stream(message)
+        if cached is not None:
+            if cached.content:
+                yield cached.content
+            return
+        
+        parts = []
+        async for chunk in self.llm.astream(messages, config={"callbacks": callbacks}):
+            text = self._chunk_text(chunk)
+            if text:
+                parts.append(text)
+                yield text
+        self._store_cached_response(cache_key, AIMessage(content="".join(parts)))
     
     def get_config(self) -> Dict[str, Any]:
         """获取当前配置"""
         return {
             "model_config": self.model_config.dict(),
             "tools": [tool.name for tool in self.tools],
-            "graph_nodes": list(self.graph.nodes.keys())
+            "graph_nodes": list(self.graph.nodes.keys()),
+            "cache": self.get_cache_stats()
         }
 
 # 便捷函数
@@ -252,7 +482,8 @@ def create_agent(
     top_k: int = DEFAULT_TOP_K,
     max_tokens: int = DEFAULT_MAX_TOKENS,
     provider: str = DEFAULT_PROVIDER,
-    tools: Optional[List[BaseTool]] = None
+    tools: Optional[List[BaseTool]] = None,
+    cache: Optional[LLMCache] = None
 ) -> UniversalAgent:
     """
     创建通用Agent的便捷函数
@@ -265,6 +496,7 @@ def create_agent(
         max_tokens: 最大token数
         provider: 模型提供商
         tools: 工具列表
+        cache: LLM响应缓存
     
     Returns:
         UniversalAgent实例
@@ -278,7 +510,7 @@ def create_agent(
         provider=provider
     )
     
-    agent = UniversalAgent(config)
+    agent = UniversalAgent(config, cache=cache)
     
     if tools:
         agent.add_tools(tools)
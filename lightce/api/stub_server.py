@@ -0,0 +1,529 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟LLM服务
+实现OpenAI兼容的/v1/chat/completions（支持流式输出和工具调用）以及Ollama的/api/generate和/api/chat，
+回复按脚本或模板生成，延迟、生成速度和错误率按配置的分布抽样。
+基于asyncio实现HTTP/1.1长连接，不依赖第三方框架，用于在本地压测lightce的HTTP客户端、连接池、重试和并发
+
+用法:
+    python -m lightce.api.stub_server --port 8000 --latency-ms 50 --tokens-per-second 200 --error-rate 429=0.01
+
+    agent = UniversalAgent(ModelConfig(base_url="http://127.0.0.1:8000/v1"))
+    agent = UniversalAgent(ModelConfig(provider="ollama", base_url="http://127.0.0.1:8000"))
+"""
+
+from typing import Dict, List, Any, Optional, Tuple
+from datetime import datetime, timezone
+from enum import Enum
+from http import HTTPStatus
+from pydantic import BaseModel, Field
+import argparse
+import asyncio
+import json
+import logging
+import random
+import re
+import threading
+import time
+import uuid
+
+logger = logging.getLogger(__name__)
+
+# 英文词、数字按词切分，其他字符按单字切分，前导空白并入词元，所有词元拼接后等于原文
+TOKEN_PATTERN = re.compile(r'\s*(?:[A-Za-z0-9_]+|\S)|\s+')
+# 按JSON Schema类型填充工具调用的必填参数
+SCHEMA_PLACEHOLDERS = {"string": "stub", "integer": 1, "number": 1.0, "boolean": True, "array": [], "object": {}}
+
+class Distribution(str, Enum):
+    """延迟分布"""
+    FIXED = "fixed"                # 固定为均值
+    UNIFORM = "uniform"            # 均值±离散度内均匀分布
+    NORMAL = "normal"              # 以离散度为标准差的正态分布
+    EXPONENTIAL = "exponential"    # 以均值为期望的指数分布，离散度不生效
+
+class StubServerConfig(BaseModel):
+    """模拟服务配置"""
+    host: str = Field(default="127.0.0.1", description="监听地址")
+    port: int = Field(default=0, description="监听端口，0表示由系统分配")
+    model: str = Field(default="stub-model", description="返回的模型名称")
+    responses: List[str] = Field(default_factory=list, description="脚本化回复，按请求顺序循环使用；为空时使用template")
+    template: str = Field(default="模拟回复：{prompt}", description="回复模板，可用变量：prompt（最后一条用户消息）、model、index（请求序号）")
+    tool_call_rate: float = Field(default=1.0, ge=0.0, le=1.0, description="请求带工具且最后一条消息不是工具结果时返回工具调用的概率")
+    tool_arguments: Dict[str, Any] = Field(default_factory=dict, description="工具调用参数，未提供的必填参数按类型填充占位值")
+    latency_ms: float = Field(default=0.0, ge=0.0, description="首个词元前的平均延迟（毫秒）")
+    latency_spread_ms: float = Field(default=0.0, ge=0.0, description="延迟离散度（毫秒）")
+    latency_distribution: Distribution = Field(default=Distribution.FIXED, description="延迟分布")
+    tokens_per_second: Optional[float] = Field(default=None, gt=0.0, description="生成速度（词元/秒），为None时不限速")
+    error_rates: Dict[int, float] = Field(default_factory=dict, description="按HTTP状态码的错误概率，如{429: 0.01, 503: 0.005}")
+    retry_after: float = Field(default=1.0, ge=0.0, description="429响应的Retry-After（秒）")
+    seed: Optional[int] = Field(default=0, description="随机种子，为None时不固定")
+
+def tokenize(text: str) -> List[str]:
+    """把文本切分为流式输出的词元"""
+    return TOKEN_PATTERN.findall(text)
+
+def _message_text(content: Any) -> str:
+    """消息内容转为文本，兼容OpenAI的多段内容格式"""
+    if isinstance(content, list):
+        return "".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return content or ""
+
+def _tool_arguments(tool: Dict[str, Any], overrides: Dict[str, Any]) -> Dict[str, Any]:
+    """按工具的参数Schema填充必填参数"""
+    parameters = tool.get("function", tool).get("parameters") or {}
+    properties = parameters.get("properties", {})
+    arguments = {
+        name: SCHEMA_PLACEHOLDERS.get(properties.get(name, {}).get("type"), "stub")
+        for name in parameters.get("required", [])
+    }
+    arguments.update(overrides)
+    return arguments
+
+class StubLLMServer:
+    """模拟LLM服务"""
+
+    def __init__(self, config: Optional[StubServerConfig] = None, **kwargs):
+        """
+        初始化模拟服务
+
+        Args:
+            config: 服务配置
+            **kwargs: 未提供config时用于构造StubServerConfig
+        """
+        self.config = config or StubServerConfig(**kwargs)
+        self.port = self.config.port
+        self._random = random.Random(self.config.seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._request_index = 0
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+        self.stats: Dict[str, Any] = {"connections": 0, "requests": 0, "errors": {}, "paths": {}}
+        self._routes = {
+            ("POST", "/v1/chat/completions"): self._openai_chat,
+            ("GET", "/v1/models"): self._openai_models,
+            ("POST", "/api/generate"): self._ollama_generate,
+            ("POST", "/api/chat"): self._ollama_chat,
+            ("GET", "/api/tags"): self._ollama_tags
+        }
+
+    @property
+    def base_url(self) -> str:
+        """OpenAI兼容接口地址，用作ModelConfig.base_url"""
+        return f"http://{self.config.host}:{self.port}/v1"
+
+    @property
+    def ollama_url(self) -> str:
+        """Ollama接口地址"""
+        return f"http://{self.config.host}:{self.port}"
+
+    async def start(self):
+        """在当前事件循环中开始监听"""
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.config.host, self.config.port, backlog=4096
+        )
+        self.port = self._server.sockets[0].getsockname()[1]
+        logger.info(f"模拟LLM服务已启动: {self.base_url}")
+
+    async def close(self):
+        """停止监听，关闭所有连接并等待处理结束"""
+        if self._server is not None:
+            self._server.close()
+            for writer in list(self._connections.values()):
+                writer.close()
+            await asyncio.gather(*self._connections, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    async def serve_forever(self):
+        """启动并持续提供服务"""
+        await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> "StubLLMServer":
+        """在后台线程的独立事件循环中启动，供同步代码和测试使用"""
+        started = threading.Event()
+        self._loop = asyncio.new_event_loop()
+
+        def run():
+            asyncio.set_event_loop(self._loop)
+            self._loop.run_until_complete(self.start())
+            started.set()
+            self._loop.run_forever()
+            self._loop.run_until_complete(self.close())
+            self._loop.close()
+
+        self._thread = threading.Thread(target=run, name="stub-llm-server", daemon=True)
+        self._thread.start()
+        started.wait()
+        return self
+
+    def stop_thread(self):
+        """停止后台线程中的服务"""
+        if self._thread is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._thread = None
+
+    def __enter__(self) -> "StubLLMServer":
+        return self.start_in_thread()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop_thread()
+
+    # ---- 抽样 ----
+
+    def _draw_latency(self) -> float:
+        """抽样首个词元前的延迟（秒）"""
+        config = self.config
+        mean, spread = config.latency_ms, config.latency_spread_ms
+        if config.latency_distribution == Distribution.UNIFORM:
+            latency = self._random.uniform(mean - spread, mean + spread)
+        elif config.latency_distribution == Distribution.NORMAL:
+            latency = self._random.gauss(mean, spread)
+        elif config.latency_distribution == Distribution.EXPONENTIAL:
+            latency = self._random.expovariate(1 / mean) if mean > 0 else 0.0
+        else:
+            latency = mean
+        return max(latency, 0.0) / 1000
+
+    def _draw_error(self) -> Optional[int]:
+        """按错误率抽样本次请求返回的错误状态码，不出错时返回None"""
+        if not self.config.error_rates:
+            return None
+        point = self._random.random()
+        for status, rate in self.config.error_rates.items():
+            if point < rate:
+                return int(status)
+            point -= rate
+        return None
+
+    def _reply(self, messages: List[Dict[str, Any]], tools: List[Dict[str, Any]], prompt: str) -> Tuple[str, Optional[Dict[str, Any]]]:
+        """
+        生成回复
+
+        Returns:
+            (回复文本, 工具调用)，返回工具调用时回复文本为空
+        """
+        index = self._request_index
+        self._request_index += 1
+        last_role = messages[-1].get("role") if messages else "user"
+        if tools and last_role != "tool" and self._random.random() < self.config.tool_call_rate:
+            tool = tools[0]
+            return "", {
+                "id": f"call_{uuid.uuid4().hex[:24]}",
+                "name": tool.get("function", tool).get("name", ""),
+                "arguments": _tool_arguments(tool, self.config.tool_arguments)
+            }
+        if self.config.responses:
+            return self.config.responses[index % len(self.config.responses)], None
+        return self.config.template.format(prompt=prompt, model=self.config.model, index=index), None
+
+    async def _paced(self, tokens: List[str]):
+        """按生成速度逐个产出词元"""
+        delay = 1 / self.config.tokens_per_second if self.config.tokens_per_second else 0.0
+        for token in tokens:
+            if delay:
+                await asyncio.sleep(delay)
+            yield token
+
+    async def _generate(self, payload: Dict[str, Any], messages: List[Dict[str, Any]], prompt: str, max_tokens: Optional[int]):
+        """
+        按请求生成回复并等待首个词元前的延迟
+
+        Returns:
+            (词元列表, 工具调用, 结束原因, 输入词元数)
+        """
+        content, tool_call = self._reply(messages, payload.get("tools") or [], prompt)
+        tokens = tokenize(content)
+        finish_reason = "tool_calls" if tool_call else "stop"
+        if max_tokens is not None and len(tokens) > max_tokens:
+            tokens = tokens[:max_tokens]
+            finish_reason = "length"
+        prompt_tokens = sum(len(tokenize(_message_text(message.get("content")))) for message in messages)
+        await asyncio.sleep(self._draw_latency())
+        return tokens, tool_call, finish_reason, prompt_tokens
+
+    async def _wait_generation(self, tokens: List[str]):
+        """非流式请求按生成速度等待全部词元生成完毕"""
+        if self.config.tokens_per_second and tokens:
+            await asyncio.sleep(len(tokens) / self.config.tokens_per_second)
+
+    # ---- HTTP ----
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        """处理一个连接上的所有请求，HTTP/1.1默认保持连接"""
+        self.stats["connections"] += 1
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                await self._dispatch(method, path, body, writer)
+                if headers.get("connection", "").lower() == "close":
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"模拟服务处理请求失败: {str(e)}")
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+            finally:
+                # 关闭完成后才移除，stop()会等待仍在关闭中的连接任务
+                self._connections.pop(task, None)
+
+    async def _read_request(self, reader: asyncio.StreamReader) -> Optional[Tuple[str, str, Dict[str, str], bytes]]:
+        """读取一个请求，连接已关闭时返回None"""
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                name, value = line.split(":", 1)
+                headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        body = await reader.readexactly(length) if length else b""
+        return method, target.split("?", 1)[0], headers, body
+
+    @staticmethod
+    def _write_head(writer: asyncio.StreamWriter, status: int, content_type: str,
+                    length: Optional[int] = None, headers: Optional[Dict[str, str]] = None):
+        """写入状态行和响应头，未给出长度时使用分块传输"""
+        lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}", f"Content-Type: {content_type}"]
+        lines.append(f"Content-Length: {length}" if length is not None else "Transfer-Encoding: chunked")
+        lines.extend(f"{name}: {value}" for name, value in (headers or {}).items())
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1"))
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: Any,
+                         headers: Optional[Dict[str, str]] = None):
+        """发送完整的JSON响应"""
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self._write_head(writer, status, "application/json", len(body), headers)
+        writer.write(body)
+        await writer.drain()
+
+    @staticmethod
+    async def _send_chunk(writer: asyncio.StreamWriter, data: str):
+        """发送一个分块，data为空时发送结束块"""
+        encoded = data.encode("utf-8")
+        writer.write(b"%x\r\n%s\r\n" % (len(encoded), encoded) if encoded else b"0\r\n\r\n")
+        await writer.drain()
+
+    async def _dispatch(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter):
+        """按路径分发请求，并按错误率注入错误"""
+        self.stats["requests"] += 1
+        self.stats["paths"][path] = self.stats["paths"].get(path, 0) + 1
+        openai_style = path.startswith("/v1/")
+
+        handler = self._routes.get((method, path))
+        if handler is None:
+            await self._send_error(writer, 404, f"未知的接口: {method} {path}", openai_style)
+            return
+        try:
+            payload = json.loads(body) if body else {}
+        except ValueError:
+            await self._send_error(writer, 400, "请求体不是合法的JSON", openai_style)
+            return
+
+        status = self._draw_error() if method == "POST" else None
+        if status is not None:
+            await self._send_error(writer, status, "模拟错误", openai_style)
+            return
+        await handler(payload, writer)
+
+    async def _send_error(self, writer: asyncio.StreamWriter, status: int, message: str, openai_style: bool):
+        """发送错误响应，429附带Retry-After"""
+        self.stats["errors"][status] = self.stats["errors"].get(status, 0) + 1
+        headers = {"Retry-After": f"{self.config.retry_after:g}"} if status == 429 else None
+        if openai_style:
+            payload = {"error": {"message": message, "type": "stub_error", "code": status}}
+        else:
+            payload = {"error": message}
+        await self._send_json(writer, status, payload, headers)
+
+    # ---- OpenAI兼容接口 ----
+
+    async def _openai_models(self, payload: Dict[str, Any], writer: asyncio.StreamWriter):
+        await self._send_json(writer, 200, {
+            "object": "list",
+            "data": [{"id": self.config.model, "object": "model", "created": 0, "owned_by": "lightce"}]
+        })
+
+    async def _openai_chat(self, payload: Dict[str, Any], writer: asyncio.StreamWriter):
+        messages = payload.get("messages") or []
+        prompt = next((_message_text(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), "")
+        max_tokens = payload.get("max_completion_tokens") or payload.get("max_tokens")
+        tokens, tool_call, finish_reason, prompt_tokens = await self._generate(payload, messages, prompt, max_tokens)
+
+        model = payload.get("model") or self.config.model
+        base = {"id": f"chatcmpl-{uuid.uuid4().hex[:24]}", "created": int(time.time()), "model": model}
+        usage = {"prompt_tokens": prompt_tokens, "completion_tokens": len(tokens), "total_tokens": prompt_tokens + len(tokens)}
+        tool_calls = None
+        if tool_call:
+            tool_calls = [{
+                "index": 0,
+                "id": tool_call["id"],
+                "type": "function",
+                "function": {"name": tool_call["name"], "arguments": json.dumps(tool_call["arguments"], ensure_ascii=False)}
+            }]
+
+        if not payload.get("stream"):
+            await self._wait_generation(tokens)
+            message = {"role": "assistant", "content": None if tool_calls else "".join(tokens)}
+            if tool_calls:
+                message["tool_calls"] = [{k: v for k, v in call.items() if k != "index"} for call in tool_calls]
+            await self._send_json(writer, 200, {
+                **base,
+                "object": "chat.completion",
+                "choices": [{"index": 0, "message": message, "finish_reason": finish_reason}],
+                "usage": usage
+            })
+            return
+
+        def event(delta: Dict[str, Any], finish: Optional[str] = None) -> str:
+            chunk = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": delta, "finish_reason": finish}]}
+            return f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+
+        self._write_head(writer, 200, "text/event-stream", headers={"Cache-Control": "no-cache"})
+        await self._send_chunk(writer, event({"role": "assistant", "content": ""}))
+        if tool_calls:
+            await self._send_chunk(writer, event({"tool_calls": tool_calls}))
+        else:
+            async for token in self._paced(tokens):
+                await self._send_chunk(writer, event({"content": token}))
+        await self._send_chunk(writer, event({}, finish_reason))
+        if (payload.get("stream_options") or {}).get("include_usage"):
+            usage_chunk = {**base, "object": "chat.completion.chunk", "choices": [], "usage": usage}
+            await self._send_chunk(writer, f"data: {json.dumps(usage_chunk)}\n\n")
+        await self._send_chunk(writer, "data: [DONE]\n\n")
+        await self._send_chunk(writer, "")
+
+    # ---- Ollama接口 ----
+
+    async def _ollama_tags(self, payload: Dict[str, Any], writer: asyncio.StreamWriter):
+        await self._send_json(writer, 200, {"models": [{"name": self.config.model, "model": self.config.model}]})
+
+    async def _ollama_respond(self, payload: Dict[str, Any], writer: asyncio.StreamWriter, tokens: List[str],
+                              finish_reason: str, content: Dict[str, Any], piece, prompt_tokens: int, started: float):
+        """
+        Ollama响应，默认按行输出JSON流，stream为false时返回单个JSON
+
+        Args:
+            content: 非流式响应中的完整内容
+            piece: 词元到流式响应内容的转换，结束行使用piece("")
+        """
+        model = payload.get("model") or self.config.model
+
+        def line(extra: Dict[str, Any], done: bool) -> str:
+            data = {"model": model, "created_at": datetime.now(timezone.utc).isoformat(), **extra, "done": done}
+            if done:
+                data.update({
+                    "done_reason": "length" if finish_reason == "length" else "stop",
+                    "total_duration": int((time.perf_counter() - started) * 1e9),
+                    "prompt_eval_count": prompt_tokens,
+                    "eval_count": len(tokens)
+                })
+            return json.dumps(data, ensure_ascii=False)
+
+        if payload.get("stream") is False:
+            await self._wait_generation(tokens)
+            body = line(content, True).encode("utf-8")
+            self._write_head(writer, 200, "application/json", len(body))
+            writer.write(body)
+            await writer.drain()
+            return
+
+        self._write_head(writer, 200, "application/x-ndjson")
+        async for token in self._paced(tokens):
+            await self._send_chunk(writer, line(piece(token), False) + "\n")
+        await self._send_chunk(writer, line(piece(""), True) + "\n")
+        await self._send_chunk(writer, "")
+
+    async def _ollama_generate(self, payload: Dict[str, Any], writer: asyncio.StreamWriter):
+        started = time.perf_counter()
+        prompt = payload.get("prompt", "")
+        messages = [{"role": "user", "content": prompt}]
+        max_tokens = (payload.get("options") or {}).get("num_predict")
+        tokens, _, finish_reason, prompt_tokens = await self._generate(payload, messages, prompt, max_tokens)
+        await self._ollama_respond(
+            payload, writer, tokens, finish_reason,
+            {"response": "".join(tokens)},
+            lambda token: {"response": token},
+            prompt_tokens, started
+        )
+
+    async def _ollama_chat(self, payload: Dict[str, Any], writer: asyncio.StreamWriter):
+        started = time.perf_counter()
+        messages = payload.get("messages") or []
+        prompt = next((_message_text(m.get("content")) for m in reversed(messages) if m.get("role") == "user"), "")
+        max_tokens = (payload.get("options") or {}).get("num_predict")
+        tokens, tool_call, finish_reason, prompt_tokens = await self._generate(payload, messages, prompt, max_tokens)
+        message = {"role": "assistant", "content": "".join(tokens)}
+        if tool_call:
+            message["tool_calls"] = [{"function": {"name": tool_call["name"], "arguments": tool_call["arguments"]}}]
+
+        def piece(token: str) -> Dict[str, Any]:
+            # 工具调用随第一行（无词元时为结束行）一起返回
+            if tool_call and not tokens:
+                return {"message": message}
+            return {"message": {"role": "assistant", "content": token}}
+
+        await self._ollama_respond(payload, writer, tokens, finish_reason, {"message": message}, piece, prompt_tokens, started)
+
+def _parse_error_rate(value: str) -> Tuple[int, float]:
+    """解析命令行的错误率参数，如429=0.01"""
+    status, rate = value.split("=", 1)
+    return int(status), float(rate)
+
+def main():
+    parser = argparse.ArgumentParser(description="本地模拟LLM服务（OpenAI兼容接口和Ollama接口）")
+    parser.add_argument("--host", default="127.0.0.1", help="监听地址")
+    parser.add_argument("--port", type=int, default=8000, help="监听端口")
+    parser.add_argument("--model", default="stub-model", help="返回的模型名称")
+    parser.add_argument("--response", action="append", default=[], help="脚本化回复，可重复指定，按顺序循环使用")
+    parser.add_argument("--template", default=None, help="回复模板，可用变量：prompt、model、index")
+    parser.add_argument("--tool-call-rate", type=float, default=1.0, help="请求带工具时返回工具调用的概率")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="首个词元前的平均延迟（毫秒）")
+    parser.add_argument("--latency-spread-ms", type=float, default=0.0, help="延迟离散度（毫秒）")
+    parser.add_argument("--latency-distribution", choices=[d.value for d in Distribution], default="fixed", help="延迟分布")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="生成速度（词元/秒）")
+    parser.add_argument("--error-rate", action="append", type=_parse_error_rate, default=[], help="错误率，如429=0.01，可重复指定")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    args = parser.parse_args()
+
+    config = StubServerConfig(
+        host=args.host,
+        port=args.port,
+        model=args.model,
+        responses=args.response,
+        tool_call_rate=args.tool_call_rate,
+        latency_ms=args.latency_ms,
+        latency_spread_ms=args.latency_spread_ms,
+        latency_distribution=Distribution(args.latency_distribution),
+        tokens_per_second=args.tokens_per_second,
+        error_rates=dict(args.error_rate),
+        seed=args.seed,
+        **({"template": args.template} if args.template else {})
+    )
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(StubLLMServer(config).serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+if __name__ == "__main__":
+    main()
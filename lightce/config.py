@@ -47,6 +47,41 @@ RETRY_DELAY = 1.0  # 秒
 DEFAULT_MAX_ITERATIONS = 10
 DEFAULT_TIMEOUT = 30.0  # 秒
 
+# HTTP连接池配置（按主机共享）
+HTTP_MAX_CONNECTIONS = 100
+HTTP_MAX_KEEPALIVE_CONNECTIONS = 20
+HTTP_KEEPALIVE_EXPIRY = 30.0  # 秒
+HTTP_HOST_LIMITS = {}  # 按主机覆盖最大连接数，如 {"api.openai.com": 200}
+LLM_CLIENT_CACHE_SIZE = 32  # 进程内复用的LLM客户端实例数上限
+
+# LLM响应缓存配置
+LLM_CACHE_MAX_SIZE = 1024
+LLM_CACHE_TTL = None  # 秒，None表示永不过期
+LLM_CACHE_PATH = os.getenv("LIGHTCE_LLM_CACHE_PATH")  # 设置后默认启用SQLite持久化缓存
+
+# 长期记忆持久化配置
+MEMORY_BACKEND_PATH = os.getenv("LIGHTCE_MEMORY_DB_PATH")  # 设置后MemoryAgent默认将长期记忆保存到SQLite
+
+# 多会话配置
+SESSION_MAX_ACTIVE = 1000  # 常驻内存的会话数上限，超出时按LRU换出
+SESSION_IDLE_TTL = 1800.0  # 秒，空闲超过该时间的会话被换出，None表示不按时间换出
+SESSION_MAX_MEMORIES = 200  # 每个会话的长期记忆条数上限
+SESSION_SPILL_PATH = os.getenv("LIGHTCE_SESSION_DB_PATH")  # 换出会话的SQLite路径，未设置时换出即丢弃
+
+# 上下文token预算配置
+MODEL_CONTEXT_LENGTHS = {  # 模型上下文长度，未精确匹配时按最长前缀匹配
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "llama3": 8192,
+    "qwen2": 32768
+}
+DEFAULT_CONTEXT_LENGTH = 4096  # 未知模型的上下文长度
+CONTEXT_BUDGET_RATIO = 0.25  # 未显式设置预算时，注入上下文占扣除输出预留后上下文长度的比例
+CONTEXT_MIN_TRUNCATE_TOKENS = 16  # 剩余预算不少于该值时截断放不下的条目，否则丢弃
+
 def validate_config():
     """验证配置参数的有效性"""
     errors = []
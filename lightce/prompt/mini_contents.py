@@ -6,7 +6,11 @@
 """
 
 from typing import Dict, List, Any, Optional
+from concurrent.futures import ProcessPoolExecutor
 from enum import Enum
+import re
+
+from .template_registry import PROMPT_REGISTRY
 
 class CompressionStage(Enum):
     """压缩阶段枚举"""
@@ -558,30 +562,35 @@ POSTPROCESS_PROMPTS = {
 - 总体评价：[总体评价]"""
 }
 
+# 各阶段的提示词表，按(阶段, 类型)注册到模板注册表
+COMPRESSION_PROMPT_TABLES = {
+    CompressionStage.PREPROCESS: PREPROCESS_PROMPTS,
+    CompressionStage.COMPRESS: COMPRESS_PROMPTS,
+    CompressionStage.OPTIMIZE: OPTIMIZE_PROMPTS,
+    CompressionStage.POSTPROCESS: POSTPROCESS_PROMPTS
+}
+for _stage, _prompts in COMPRESSION_PROMPT_TABLES.items():
+    PROMPT_REGISTRY.register_table(_stage, _prompts)
+
 def get_compression_prompt(stage: CompressionStage, compression_type: CompressionType, **kwargs) -> str:
     """
     获取指定阶段和类型的压缩提示词
     
     Args:
         stage: 压缩阶段
-        compression_type: 压缩类型
+        compression_type: 压缩类型，该阶段没有对应模板时使用文本类型的模板
         **kwargs: 其他参数
     
     Returns:
         格式化后的提示词
     """
-    if stage == CompressionStage.PREPROCESS:
-        prompt_template = PREPROCESS_PROMPTS.get(compression_type, PREPROCESS_PROMPTS[CompressionType.TEXT])
-    elif stage == CompressionStage.COMPRESS:
-        prompt_template = COMPRESS_PROMPTS.get(compression_type, COMPRESS_PROMPTS[CompressionType.TEXT])
-    elif stage == CompressionStage.OPTIMIZE:
-        prompt_template = OPTIMIZE_PROMPTS.get(compression_type, OPTIMIZE_PROMPTS[CompressionType.TEXT])
-    elif stage == CompressionStage.POSTPROCESS:
-        prompt_template = POSTPROCESS_PROMPTS.get(compression_type, POSTPROCESS_PROMPTS[CompressionType.TEXT])
-    else:
+    if stage not in COMPRESSION_PROMPT_TABLES:
         raise ValueError(f"不支持的压缩阶段: {stage}")
     
-    return prompt_template.format(**kwargs)
+    key = (stage, compression_type)
+    if key not in PROMPT_REGISTRY:
+        key = (stage, CompressionType.TEXT)
+    return PROMPT_REGISTRY.render(key, **kwargs)
 
 def get_all_compression_prompts(compression_type: CompressionType, **kwargs) -> Dict[str, str]:
     """
@@ -601,6 +610,117 @@ def get_all_compression_prompts(compression_type: CompressionType, **kwargs) ->
         "postprocess": get_compression_prompt(CompressionStage.POSTPROCESS, compression_type, **kwargs)
     }
 
+# 内容特征，以匹配覆盖的字符占比作为对应类型的得分。
+# 所有特征合并为一个正则单遍扫描，每个分支都以固定字符开头，正则引擎可以直接跳过不可能匹配的位置：
+# 整行特征以换行符开头并覆盖该行；行内标记命中后认领所在整行；行内片段只计片段本身
+CODE_KEYWORDS = (
+    "def", "class", "import", "from", "return", "elif", "else", "for", "while", "try", "except",
+    "finally", "with", "async", "await", "function", "const", "let", "var", "public", "private",
+    "protected", "static", "void", "package", "func", "fn", "struct", "switch", "case"
+)
+# 关键字开头的行还需要带有代码语法才算代码，避免for/with/from等开头的英文句子被误判：
+# 关键字后紧跟括号、调用或下标、赋值、花括号、行尾冒号或分号、属性访问，或标识符间的二元运算符
+CODE_KEYWORD_SYNTAX = (
+    r'(?=[ \t]*\(|[^\n]*(?:\w[(\[]|=|\{|[:;][ \t]*$|\w(?:\.|->|::)[A-Za-z_]'
+    r'|\w[ \t]+(?:[+*/%<>^]|&&|\|\||<=|>=|!=)[ \t]+\w))'
+)
+# 不带上述语法的导入语句和预处理指令
+CODE_IMPORT_PATTERN = (
+    r'[ \t]*(?:from[ \t]+\.*[\w.]*[ \t]+import[ \t]+[^\n]*'
+    r'|import[ \t]+[\w.]+(?:[ \t]+as[ \t]+\w+)?(?:[ \t]*,[ \t]*[\w.]+(?:[ \t]+as[ \t]+\w+)?)*[ \t]*'
+    r'|#[ \t]*(?:include|define)\b[^\n]*)$'
+)
+MATH_SYMBOLS = '∫∑∏√∞∂∇≤≥≠±²³'
+MATH_SYMBOL_CLASS = f"[{MATH_SYMBOLS}]"
+LATEX_COMMANDS = r'(?:frac|sum|int|sqrt|prod|lim|infty|partial|cdot|times|leq|geq|neq|alpha|beta|gamma|delta|theta|lambda|mu|sigma|pi)\b'
+LINE_FEATURE_PATTERNS = [
+    (CompressionType.CODE, r'[ \t]*(?:```|~~~)[^\n]*\n(?:.*\n)*?[ \t]*(?:```|~~~)[ \t]*$'),
+    (CompressionType.TABLE, r'[ \t]*\|[^\n]*\|[ \t]*$'),
+    (CompressionType.TABLE, r'[ \t]*\|?[ \t]*:?-{3,}:?[ \t]*(?:\|[ \t]*:?-{3,}:?[ \t]*)+\|?[ \t]*$'),
+    (CompressionType.TABLE, r'[^\t\n]+\t[^\n]*$'),
+    (CompressionType.CODE, r'[ \t]*(?:' + "|".join(CODE_KEYWORDS) + r')\b' + CODE_KEYWORD_SYNTAX + r'[^\n]*$'),
+    (CompressionType.CODE, CODE_IMPORT_PATTERN),
+    # 赋值或调用行，含数学符号的行留给公式标记
+    (CompressionType.CODE, r'[ \t]*[A-Za-z_][\w.\[\]]*(?:[ \t]*[+\-*/%]?=(?!=)|\()(?![^\n]*(?:' + MATH_SYMBOL_CLASS + r'|\\' + LATEX_COMMANDS + r'))[^\n]*$'),
+]
+LINE_MARKER_PATTERNS = [
+    (CompressionType.FORMULA, '\\', LATEX_COMMANDS),
+    *[(CompressionType.FORMULA, symbol, '') for symbol in MATH_SYMBOLS],
+    (CompressionType.FORMULA, '^', r'(?<=\w\^)\{?[\w+\-]'),
+    (CompressionType.CODE, '{', r'[ \t]*$'),
+    (CompressionType.CODE, '}', r'[ \t]*$'),
+    (CompressionType.CODE, ';', r'[ \t]*$'),
+    (CompressionType.CODE, ')', r'[ \t]*:[ \t]*$'),
+    (CompressionType.CODE, '=', r'>[ \t]*$'),
+]
+INLINE_FEATURE_PATTERNS = [
+    (CompressionType.LINK, '[', r'[^\]\n]*\]\([^)\s]+\)'),
+    (CompressionType.LINK, 'h', r'ttps?://[^\s<>"\'）】]+'),
+    (CompressionType.LINK, 'w', r'ww\.[^\s<>"\'）】]+'),
+    (CompressionType.FORMULA, '$', r'\$[^$]+\$\$|[^$\n]+\$'),
+]
+# 非文本类型的覆盖率达到该值时判定为该类型
+CONTENT_TYPE_THRESHOLD = 0.3
+
+def _build_feature_pattern():
+    """合并特征为一个正则，返回(正则, 分组名到类型的映射, 认领整行的分组名)"""
+    group_types: Dict[str, CompressionType] = {}
+    line_groups = set()
+
+    def group(compression_type: CompressionType, pattern: str, claims_line: bool = False) -> str:
+        name = f"{compression_type.value}_{len(group_types)}"
+        group_types[name] = compression_type
+        if claims_line:
+            line_groups.add(name)
+        return f"(?P<{name}>{pattern})"
+
+    branches = ["\n(?:" + "|".join(group(t, p) for t, p in LINE_FEATURE_PATTERNS) + ")"]
+    for compression_type, literal, pattern in LINE_MARKER_PATTERNS:
+        branches.append(re.escape(literal) + group(compression_type, pattern, claims_line=True))
+    for compression_type, literal, pattern in INLINE_FEATURE_PATTERNS:
+        branches.append(re.escape(literal) + group(compression_type, pattern))
+    return re.compile("|".join(branches), re.M), group_types, line_groups
+
+CONTENT_FEATURE_PATTERN, _FEATURE_GROUP_TYPES, _LINE_MARKER_GROUPS = _build_feature_pattern()
+
+def score_compression_types(text: str) -> Dict[CompressionType, float]:
+    """
+    单遍扫描文本，计算各压缩类型的得分
+
+    Args:
+        text: 输入文本
+
+    Returns:
+        各类型的得分：代码、表格、公式、链接为对应特征覆盖的字符占比，文本为未被覆盖的占比
+    """
+    length = len(text.strip())
+    if length == 0:
+        return {compression_type: 0.0 for compression_type in CompressionType}
+
+    # 整行特征以换行符开头，补一个换行符使第一行也能匹配
+    scan = "\n" + text
+    coverage = {compression_type: 0 for compression_type in CompressionType}
+    claimed = -1  # 已计入覆盖的最后位置，避免同一行重复计数
+
+    for match in CONTENT_FEATURE_PATTERN.finditer(scan):
+        name = match.lastgroup
+        if name in _LINE_MARKER_GROUPS:
+            line_start = scan.rfind("\n", 0, match.start()) + 1
+            if line_start <= claimed:
+                continue
+            line_end = scan.find("\n", match.end())
+            if line_end == -1:
+                line_end = len(scan)
+            coverage[_FEATURE_GROUP_TYPES[name]] += len(scan[line_start:line_end].strip())
+            claimed = line_end
+        elif match.start() >= claimed:
+            coverage[_FEATURE_GROUP_TYPES[name]] += len(match.group().strip())
+            claimed = match.end()
+
+    scores = {compression_type: min(count / length, 1.0) for compression_type, count in coverage.items()}
+    scores[CompressionType.TEXT] = max(1.0 - sum(scores.values()), 0.0)
+    return scores
+
 def get_compression_type_from_text(text: str) -> CompressionType:
     """
     根据文本内容自动判断压缩类型
@@ -609,33 +729,34 @@ def get_compression_type_from_text(text: str) -> CompressionType:
         text: 输入文本
     
     Returns:
-        推断的压缩类型
+        得分最高且覆盖率不低于CONTENT_TYPE_THRESHOLD的非文本类型，否则为文本类型
     """
-    text_lower = text.lower()
-    
-    # 链接特征（优先检查）
-    link_keywords = ['http://', 'https://', 'www.', '.com', '.org', '.net', '.edu', '.gov', 'url', 'link', 'href', 'src', 'api/', 'endpoint', 'query', 'parameter']
-    if any(keyword in text_lower for keyword in link_keywords):
-        return CompressionType.LINK
-    
-    # 代码特征
-    code_keywords = ['function', 'def ', 'class ', 'var ', 'const ', 'import ', 'from ', 'return', 'if ', 'for ', 'while ', 'try:', 'except:', 'public', 'private', 'void', 'int', 'string', 'array', 'list', 'dict', 'print', 'console.log', '<?php', '<script', 'html', 'css', 'javascript', 'python', 'java', 'c++', 'sql']
-    if any(keyword in text_lower for keyword in code_keywords):
-        return CompressionType.CODE
-    
-    # 表格特征
-    table_keywords = ['|', '\t', 'table', 'row', 'column', 'header', 'data', 'cell', 'excel', 'csv', 'tsv', 'spreadsheet']
-    if any(keyword in text_lower for keyword in table_keywords):
-        return CompressionType.TABLE
-    
-    # 公式特征
-    formula_keywords = ['=', '+', '-', '*', '/', '^', '√', '∫', '∑', '∏', '∞', 'π', 'θ', 'α', 'β', 'γ', 'δ', 'sin', 'cos', 'tan', 'log', 'ln', 'exp', 'sqrt', 'frac', 'frac{', '\\', '(', ')', '[', ']', '{', '}']
-    if any(keyword in text_lower for keyword in formula_keywords):
-        return CompressionType.FORMULA
-    
-    # 默认为文本类型
+    scores = score_compression_types(text)
+    best = max(
+        (compression_type for compression_type in CompressionType if compression_type != CompressionType.TEXT),
+        key=lambda compression_type: scores[compression_type]
+    )
+    if scores[best] >= CONTENT_TYPE_THRESHOLD and scores[best] >= scores[CompressionType.TEXT]:
+        return best
     return CompressionType.TEXT
 
+def classify_texts(texts: List[str], max_workers: Optional[int] = None, chunksize: int = 16) -> List[CompressionType]:
+    """
+    批量判断压缩类型，文本较多时在进程池中并行判断
+
+    Args:
+        texts: 文本列表
+        max_workers: 进程数，默认为CPU核数
+        chunksize: 每次分发给子进程的文本数
+
+    Returns:
+        压缩类型列表，顺序与输入一致
+    """
+    if len(texts) <= chunksize:
+        return [get_compression_type_from_text(text) for text in texts]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(get_compression_type_from_text, texts, chunksize=chunksize))
+
 def calculate_compression_ratio(original_length: int, compressed_length: int) -> float:
     """
     计算压缩比例
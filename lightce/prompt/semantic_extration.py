@@ -8,6 +8,8 @@
 from typing import Dict, List, Any, Optional
 from enum import Enum
 
+from .template_registry import PROMPT_REGISTRY
+
 class ExtractionLevel(Enum):
     """提取级别枚举 - 按最终文本长度划分"""
     SHORT = "short"           # 短文本：50-200字符
@@ -241,6 +243,30 @@ EXTENDED_PROMPTS = {
 [影响和意义分析]"""
 }
 
+# 各级别的提示词表，按(级别, 类型)注册到模板注册表
+EXTRACTION_PROMPT_TABLES = {
+    ExtractionLevel.SHORT: SHORT_PROMPTS,
+    ExtractionLevel.MEDIUM: MEDIUM_PROMPTS,
+    ExtractionLevel.LONG: LONG_PROMPTS,
+    ExtractionLevel.EXTENDED: EXTENDED_PROMPTS
+}
+for _level, _prompts in EXTRACTION_PROMPT_TABLES.items():
+    PROMPT_REGISTRY.register_table(_level, _prompts)
+
+def get_extraction_types(level: ExtractionLevel) -> List[ExtractionType]:
+    """
+    获取指定级别支持的提取类型，不渲染提示词
+    
+    Args:
+        level: 提取级别
+    
+    Returns:
+        提取类型列表
+    """
+    if level not in EXTRACTION_PROMPT_TABLES:
+        raise ValueError(f"不支持的提取级别: {level}")
+    return list(EXTRACTION_PROMPT_TABLES[level])
+
 def get_extraction_prompt(level: ExtractionLevel, extraction_type: ExtractionType, **kwargs) -> str:
     """
     获取指定级别和类型的提取提示词
@@ -253,21 +279,13 @@ def get_extraction_prompt(level: ExtractionLevel, extraction_type: ExtractionTyp
     Returns:
         格式化后的提示词
     """
-    if level == ExtractionLevel.SHORT:
-        prompt_template = SHORT_PROMPTS.get(extraction_type)
-    elif level == ExtractionLevel.MEDIUM:
-        prompt_template = MEDIUM_PROMPTS.get(extraction_type)
-    elif level == ExtractionLevel.LONG:
-        prompt_template = LONG_PROMPTS.get(extraction_type)
-    elif level == ExtractionLevel.EXTENDED:
-        prompt_template = EXTENDED_PROMPTS.get(extraction_type)
-    else:
+    if level not in EXTRACTION_PROMPT_TABLES:
         raise ValueError(f"不支持的提取级别: {level}")
     
-    if not prompt_template:
+    key = (level, extraction_type)
+    if key not in PROMPT_REGISTRY:
         raise ValueError(f"不支持的提取类型: {extraction_type}")
-    
-    return prompt_template.format(**kwargs)
+    return PROMPT_REGISTRY.render(key, **kwargs)
 
 def get_all_extraction_prompts(level: ExtractionLevel, **kwargs) -> Dict[str, str]:
     """
@@ -280,20 +298,9 @@ def get_all_extraction_prompts(level: ExtractionLevel, **kwargs) -> Dict[str, st
     Returns:
         包含所有提取类型提示词的字典
     """
-    if level == ExtractionLevel.SHORT:
-        prompts = SHORT_PROMPTS
-    elif level == ExtractionLevel.MEDIUM:
-        prompts = MEDIUM_PROMPTS
-    elif level == ExtractionLevel.LONG:
-        prompts = LONG_PROMPTS
-    elif level == ExtractionLevel.EXTENDED:
-        prompts = EXTENDED_PROMPTS
-    else:
-        raise ValueError(f"不支持的提取级别: {level}")
-    
     return {
         extraction_type.value: get_extraction_prompt(level, extraction_type, **kwargs)
-        for extraction_type in prompts.keys()
+        for extraction_type in get_extraction_types(level)
     }
 
 def get_level_description(level: ExtractionLevel) -> str:
@@ -8,6 +8,8 @@
 from typing import Dict, List, Any, Optional
 from enum import Enum
 
+from .template_registry import PROMPT_REGISTRY
+
 class InformationLevel(Enum):
     """信息提取级别枚举 - 按最终提取数量划分"""
     MINIMAL = "minimal"       # 最小级别：1-5个实体/关系
@@ -139,6 +141,30 @@ EXTENSIVE_PROMPTS = {
 """
 }
 
+# 各级别的提示词表，按(级别, 类型)注册到模板注册表
+INFORMATION_PROMPT_TABLES = {
+    InformationLevel.MINIMAL: MINIMAL_PROMPTS,
+    InformationLevel.MODERATE: MODERATE_PROMPTS,
+    InformationLevel.COMPREHENSIVE: COMPREHENSIVE_PROMPTS,
+    InformationLevel.EXTENSIVE: EXTENSIVE_PROMPTS
+}
+for _level, _prompts in INFORMATION_PROMPT_TABLES.items():
+    PROMPT_REGISTRY.register_table(_level, _prompts)
+
+def get_information_types(level: InformationLevel) -> List[InformationType]:
+    """
+    获取指定级别支持的信息提取类型，不渲染提示词
+    
+    Args:
+        level: 信息提取级别
+    
+    Returns:
+        信息提取类型列表
+    """
+    if level not in INFORMATION_PROMPT_TABLES:
+        raise ValueError(f"不支持的信息提取级别: {level}")
+    return list(INFORMATION_PROMPT_TABLES[level])
+
 def get_information_prompt(level: InformationLevel, information_type: InformationType, **kwargs) -> str:
     """
     获取指定级别和类型的信息提取提示词
@@ -151,21 +177,13 @@ def get_information_prompt(level: InformationLevel, information_type: Informatio
     Returns:
         格式化后的提示词
     """
-    if level == InformationLevel.MINIMAL:
-        prompt_template = MINIMAL_PROMPTS.get(information_type)
-    elif level == InformationLevel.MODERATE:
-        prompt_template = MODERATE_PROMPTS.get(information_type)
-    elif level == InformationLevel.COMPREHENSIVE:
-        prompt_template = COMPREHENSIVE_PROMPTS.get(information_type)
-    elif level == InformationLevel.EXTENSIVE:
-        prompt_template = EXTENSIVE_PROMPTS.get(information_type)
-    else:
+    if level not in INFORMATION_PROMPT_TABLES:
         raise ValueError(f"不支持的信息提取级别: {level}")
     
-    if not prompt_template:
+    key = (level, information_type)
+    if key not in PROMPT_REGISTRY:
         raise ValueError(f"不支持的信息提取类型: {information_type}")
-    
-    return prompt_template.format(**kwargs)
+    return PROMPT_REGISTRY.render(key, **kwargs)
 
 def get_all_information_prompts(level: InformationLevel, **kwargs) -> Dict[str, str]:
     """
@@ -178,20 +196,9 @@ def get_all_information_prompts(level: InformationLevel, **kwargs) -> Dict[str,
     Returns:
         包含所有信息提取类型提示词的字典
     """
-    if level == InformationLevel.MINIMAL:
-        prompts = MINIMAL_PROMPTS
-    elif level == InformationLevel.MODERATE:
-        prompts = MODERATE_PROMPTS
-    elif level == InformationLevel.COMPREHENSIVE:
-        prompts = COMPREHENSIVE_PROMPTS
-    elif level == InformationLevel.EXTENSIVE:
-        prompts = EXTENSIVE_PROMPTS
-    else:
-        raise ValueError(f"不支持的信息提取级别: {level}")
-    
     return {
         information_type.value: get_information_prompt(level, information_type, **kwargs)
-        for information_type in prompts.keys()
+        for information_type in get_information_types(level)
     }
 
 def get_level_description(level: InformationLevel) -> str:
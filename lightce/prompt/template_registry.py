@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词模板注册表
+模板在首次使用时解析一次，之后按片段拼接渲染，不再每次调用str.format；
+解析时把不含变量的说明段落排在含变量的段落之前，使同一模板渲染出的提示词共享稳定前缀，便于服务端的提示词缓存命中
+"""
+
+from typing import Dict, List, Hashable, Optional, Tuple
+from string import Formatter
+import threading
+
+PARAGRAPH_SEPARATOR = "\n\n"
+
+def _field_names(source: str) -> List[str]:
+    """模板中的变量名，按出现顺序"""
+    return [field for _, field, _, _ in Formatter().parse(source) if field is not None]
+
+def _is_answer_cue(paragraph: str) -> bool:
+    """末尾的单行应答提示，如"请输出压缩后的文本："""
+    stripped = paragraph.strip()
+    return "\n" not in stripped and stripped.endswith(("：", ":"))
+
+def stable_prefix_layout(source: str) -> str:
+    """
+    调整模板段落顺序，使不含变量的段落在前
+
+    从第一个含变量的段落起，之后不含变量的说明段落移到变量段落之前，各组内保持原有顺序；
+    末尾的单行应答提示仍放在最后
+
+    Args:
+        source: 模板文本，段落以空行分隔
+
+    Returns:
+        调整后的模板
+    """
+    paragraphs = source.split(PARAGRAPH_SEPARATOR)
+    dynamic_flags = [bool(_field_names(paragraph)) for paragraph in paragraphs]
+    if not any(dynamic_flags):
+        return source
+
+    first_dynamic = dynamic_flags.index(True)
+    tail = paragraphs[first_dynamic:]
+    tail_flags = dynamic_flags[first_dynamic:]
+    cue = []
+    if len(tail) > 1 and not tail_flags[-1] and _is_answer_cue(tail[-1]):
+        cue = [tail.pop()]
+        tail_flags.pop()
+
+    static = [paragraph for paragraph, dynamic in zip(tail, tail_flags) if not dynamic]
+    dynamic = [paragraph for paragraph, dynamic in zip(tail, tail_flags) if dynamic]
+    return PARAGRAPH_SEPARATOR.join(paragraphs[:first_dynamic] + static + dynamic + cue)
+
+class PromptTemplate:
+    """预解析的提示词模板"""
+
+    def __init__(self, source: str, stable_prefix: bool = True):
+        """
+        解析模板
+
+        Args:
+            source: str.format格式的模板文本
+            stable_prefix: 是否调整段落顺序，使不含变量的段落在前
+        """
+        self.source = source
+        self.layout = stable_prefix_layout(source) if stable_prefix else source
+        # (字面文本, 变量名, 转换标记, 格式说明)，变量名为None表示只有字面文本
+        self._parts: List[Tuple[str, Optional[str], Optional[str], str]] = [
+            (literal, field, conversion, spec or "")
+            for literal, field, spec, conversion in Formatter().parse(self.layout)
+        ]
+        self.fields = tuple(dict.fromkeys(field for _, field, _, _ in self._parts if field is not None))
+
+    @property
+    def static_prefix(self) -> str:
+        """第一个变量之前的固定文本"""
+        return self._parts[0][0] if self._parts else ""
+
+    def render(self, **kwargs) -> str:
+        """
+        渲染模板
+
+        Args:
+            **kwargs: 变量值，多余的变量忽略
+
+        Returns:
+            渲染后的提示词
+
+        Raises:
+            KeyError: 缺少模板中的变量，与str.format一致
+        """
+        pieces = []
+        for literal, field, conversion, spec in self._parts:
+            pieces.append(literal)
+            if field is None:
+                continue
+            value = kwargs[field]
+            if conversion:
+                value = Formatter().convert_field(value, conversion)
+            pieces.append(value if type(value) is str and not spec else format(value, spec))
+        return "".join(pieces)
+
+class PromptRegistry:
+    """提示词模板注册表，注册时只保存原文，首次使用时解析"""
+
+    def __init__(self, stable_prefix: bool = True):
+        """
+        初始化注册表
+
+        Args:
+            stable_prefix: 解析模板时是否调整段落顺序，使不含变量的段落在前
+        """
+        self.stable_prefix = stable_prefix
+        self._sources: Dict[Hashable, str] = {}
+        self._templates: Dict[Hashable, PromptTemplate] = {}
+        self._lock = threading.Lock()
+
+    def register(self, key: Hashable, source: str):
+        """注册模板，已有同名模板时替换"""
+        with self._lock:
+            self._sources[key] = source
+            self._templates.pop(key, None)
+
+    def register_table(self, namespace: Hashable, table: Dict[Hashable, str]):
+        """按(namespace, 表中的键)注册一组模板"""
+        for key, source in table.items():
+            self.register((namespace, key), source)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._sources
+
+    def keys(self, namespace: Optional[Hashable] = None) -> List[Hashable]:
+        """
+        已注册的键
+
+        Args:
+            namespace: 为None时返回全部键，否则返回该命名空间下register_table注册的表内键
+        """
+        if namespace is None:
+            return list(self._sources)
+        return [key[1] for key in self._sources if isinstance(key, tuple) and len(key) == 2 and key[0] == namespace]
+
+    def get(self, key: Hashable) -> PromptTemplate:
+        """获取解析后的模板，未注册时抛出KeyError"""
+        template = self._templates.get(key)
+        if template is None:
+            source = self._sources[key]
+            template = PromptTemplate(source, self.stable_prefix)
+            with self._lock:
+                self._templates.setdefault(key, template)
+        return template
+
+    def render(self, key: Hashable, **kwargs) -> str:
+        """渲染已注册的模板"""
+        return self.get(key).render(**kwargs)
+
+# 各提示词模块共用的注册表
+PROMPT_REGISTRY = PromptRegistry()
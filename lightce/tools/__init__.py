@@ -1,7 +1,7 @@
-from .mini_contents import get_text_length, compress_text, analyze_and_compress
-from .get_llm import get_llm_parameters, list_available_models, compare_models
+# 模型信息查询依赖bs4，缺失时不影响其他工具的导入
+try:
+    from .get_llm import get_llm_parameters, list_available_models, compare_models
+except ImportError:
+    pass
 
-__all__ = [
-    "get_text_length", "compress_text", "analyze_and_compress",
-    "get_llm_parameters", "list_available_models", "compare_models"
-] 
\ No newline at end of file
+__all__ = ["get_llm_parameters", "list_available_models", "compare_models"]
@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本分块
+按代码块、表格和段落等结构边界把长文本切成不超过指定长度的块，
+逐块产出，不复制整份文本，适合数MB的输入；也可按内容类型把混合文本切成代码、表格、链接和正文段
+"""
+
+from typing import Iterator, List, Tuple
+import re
+
+from ..prompt.mini_contents import CompressionType, get_compression_type_from_text
+
+# 代码块围栏行
+FENCE_PATTERN = re.compile(r'^\s*(```|~~~)')
+# 表格行：Markdown表格或制表符分隔
+TABLE_LINE_PATTERN = re.compile(r'^\s*\||\t')
+# 句末标点后切分
+SENTENCE_PATTERN = re.compile(r'[^。！？；.!?;\n]*(?:[。！？；.!?;]+|\n|$)')
+
+def iter_lines(text: str) -> Iterator[str]:
+    """逐行产出文本，保留换行符"""
+    start = 0
+    length = len(text)
+    while start < length:
+        end = text.find("\n", start)
+        if end == -1:
+            end = length
+        else:
+            end += 1
+        yield text[start:end]
+        start = end
+
+def iter_blocks(text: str) -> Iterator[str]:
+    """
+    按结构切分文本，所有块依次拼接即为原文
+
+    代码块从开始围栏到结束围栏为一块，连续的表格行为一块，其余按空行分段，空行归入前一块
+    """
+    buffer: List[str] = []
+    kind = None
+
+    for line in iter_lines(text):
+        if kind == "code":
+            buffer.append(line)
+            if FENCE_PATTERN.match(line):
+                yield "".join(buffer)
+                buffer, kind = [], None
+            continue
+
+        if FENCE_PATTERN.match(line):
+            if buffer:
+                yield "".join(buffer)
+            buffer, kind = [line], "code"
+            continue
+
+        if not line.strip():
+            buffer.append(line)
+            yield "".join(buffer)
+            buffer, kind = [], None
+            continue
+
+        line_kind = "table" if TABLE_LINE_PATTERN.match(line) else "paragraph"
+        if kind is not None and line_kind != kind and buffer:
+            yield "".join(buffer)
+            buffer = []
+        kind = line_kind
+        buffer.append(line)
+
+    if buffer:
+        yield "".join(buffer)
+
+def _iter_units(block: str, max_chars: int) -> Iterator[str]:
+    """把超长的块依次按行、句子切分，仍超长的句子按长度硬切"""
+    for line in iter_lines(block):
+        if len(line) <= max_chars:
+            yield line
+            continue
+        for match in SENTENCE_PATTERN.finditer(line):
+            sentence = match.group(0)
+            for start in range(0, len(sentence), max_chars):
+                yield sentence[start:start + max_chars]
+
+def _pack(pieces: Iterator[str], max_chars: int) -> Iterator[str]:
+    """把相邻片段合并为不超过max_chars的块"""
+    current: List[str] = []
+    size = 0
+    for piece in pieces:
+        if not piece:
+            continue
+        if current and size + len(piece) > max_chars:
+            yield "".join(current)
+            current, size = [], 0
+        current.append(piece)
+        size += len(piece)
+    if current:
+        yield "".join(current)
+
+def split_text(text: str, max_chars: int) -> Iterator[str]:
+    """
+    按结构边界把文本切成不超过max_chars个字符的块
+
+    Args:
+        text: 文本
+        max_chars: 每块最大字符数
+
+    Yields:
+        文本块，依次拼接即为原文
+    """
+    if max_chars <= 0:
+        raise ValueError(f"max_chars必须大于0: {max_chars}")
+
+    def pieces() -> Iterator[str]:
+        for block in iter_blocks(text):
+            if len(block) <= max_chars:
+                yield block
+            else:
+                yield from _pack(_iter_units(block, max_chars), max_chars)
+
+    return _pack(pieces(), max_chars)
+
+def iter_segments(text: str) -> Iterator[Tuple[CompressionType, str]]:
+    """
+    按内容类型切分混合文本
+
+    逐块判断压缩类型，相邻的同类型块合并为一段，所有段依次拼接即为原文
+
+    Args:
+        text: 文本
+
+    Yields:
+        (压缩类型, 文本段)
+    """
+    current_type = None
+    buffer: List[str] = []
+    for block in iter_blocks(text):
+        # 空白块不单独判断，归入前一段
+        if not block.strip() and buffer:
+            buffer.append(block)
+            continue
+        block_type = get_compression_type_from_text(block)
+        if buffer and block_type != current_type:
+            yield current_type, "".join(buffer)
+            buffer = []
+        current_type = block_type
+        buffer.append(block)
+    if buffer:
+        yield current_type, "".join(buffer)
@@ -5,15 +5,25 @@
 使用UniversalAgent系统和mini_contents提示词重构的智能文本压缩工具
 """
 
-from typing import Dict, List, Any, Optional, Union
+from typing import Dict, List, Any, Optional, Union, Callable, AsyncIterator, Iterator, Tuple, Deque
+from langchain_core.callbacks import Callbacks
 from langchain_core.tools import BaseTool, tool
 from langchain_core.messages import HumanMessage, AIMessage
 from pydantic import BaseModel, Field
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from enum import Enum
+import asyncio
 import json
 import logging
+import threading
 from datetime import datetime
 
 from ..agent.system import UniversalAgent, ModelConfig
+from .chunking import split_text
+from .local_compression import compress_locally, estimate_retention
+from .compression_metrics import score_compression_results, summarize_metrics
+from ..config import MAX_RETRIES, RETRY_DELAY
 from ..prompt.mini_contents import (
     CompressionStage, CompressionType, get_compression_prompt, 
     get_all_compression_prompts, get_compression_type_from_text,
@@ -29,15 +39,64 @@ class CompressionResult(BaseModel):
     success: bool = Field(description="是否成功")
     original_text: str = Field(description="原始文本")
     compressed_text: str = Field(description="压缩后文本")
+    compression_ratio: Optional[float] = Field(default=None, description="实际压缩比例（百分比）")
+    chunk_count: int = Field(default=1, description="分块压缩时的块数")
+    tier: Optional[str] = Field(default=None, description="级联压缩中被采用的层级名称")
 
 
+class BatchBackend(str, Enum):
+    """批量压缩执行后端"""
+    THREAD = "thread"      # 线程池执行同步compress_text
+    ASYNCIO = "asyncio"    # 事件循环内执行异步acompress_text
+
+class CompressionEngine(str, Enum):
+    """压缩引擎"""
+    LLM = "llm"        # 调用模型压缩
+    LOCAL = "local"    # 本地抽取式压缩，不调用模型
+    CASCADE = "cascade"  # 按cascade_tiers逐级压缩，达标即停止
+
+class CompressionTier(BaseModel):
+    """级联压缩的一个层级"""
+    name: str = Field(description="层级名称")
+    engine: CompressionEngine = Field(default=CompressionEngine.LLM, description="压缩引擎: llm, local")
+    model_name: Optional[str] = Field(default=None, description="模型名称，为None时使用配置中的模型")
+    provider: Optional[str] = Field(default=None, description="模型提供商，为None时使用配置中的提供商")
+    min_retention: float = Field(default=0.0, ge=0, le=100, description="采用该层结果所需的最低信息保留率（百分比）")
+
+def _default_cascade_tiers() -> List[CompressionTier]:
+    """默认级联：本地压缩，未达标时调用配置的模型"""
+    return [
+        CompressionTier(name="local", engine=CompressionEngine.LOCAL, min_retention=60.0),
+        CompressionTier(name="llm", engine=CompressionEngine.LLM)
+    ]
+
 class CompressionAgentConfig(BaseModel):
     """压缩Agent配置"""
     model_name: str = Field(default="gpt-3.5-turbo", description="模型名称")
     temperature: float = Field(default=0.3, description="温度参数")
     max_tokens: int = Field(default=2000, description="最大token数")
     provider: str = Field(default="openai", description="模型提供商")
+    engine: CompressionEngine = Field(default=CompressionEngine.LLM, description="压缩引擎: llm, local, cascade")
+    cascade_tiers: List[CompressionTier] = Field(
+        default_factory=_default_cascade_tiers,
+        description="级联压缩的层级，按从便宜到昂贵的顺序排列"
+    )
     
+    # 批量处理相关配置
+    max_concurrency: int = Field(default=8, ge=1, description="批量压缩最大并发数")
+    batch_backend: BatchBackend = Field(default=BatchBackend.THREAD, description="批量压缩执行后端: thread, asyncio")
+    item_timeout: Optional[float] = Field(default=None, gt=0, description="单条文本压缩超时时间（秒），None表示不限制")
+    max_retries: int = Field(default=MAX_RETRIES, ge=0, description="单条文本压缩失败后的最大重试次数")
+    retry_delay: float = Field(default=RETRY_DELAY, ge=0, description="重试基础间隔（秒），按指数退避递增")
+    
+    # 分块压缩相关配置
+    chunk_size: int = Field(default=4000, ge=100, description="每块最大字符数，超过该长度的文本分块压缩")
+    merge_pass: bool = Field(default=True, description="分块压缩未达到目标比例时是否对合并结果再次压缩")
+    max_merge_rounds: int = Field(default=2, ge=0, description="合并压缩最多轮数")
+    ratio_tolerance: float = Field(default=5.0, ge=0, description="实际压缩比例低于目标不超过该值（百分点）时不再合并压缩")
+    
+    # 压缩历史，用于get_compression_stats
+    max_history: int = Field(default=1000, ge=0, description="保留最近的压缩结果条数，0表示不记录")
 
 
 class CompressionAgent:
@@ -52,7 +111,9 @@ class CompressionAgent:
         """
         self.config = config or CompressionAgentConfig()
         self.agent = self._create_agent()
-        self.compression_history: List[CompressionResult] = []
+        self.compression_history: Deque[CompressionResult] = deque(maxlen=self.config.max_history)
+        # 级联压缩中使用其他模型的层级，按层级名称缓存
+        self._tier_agents: Dict[str, "CompressionAgent"] = {}
         
     def _create_agent(self) -> UniversalAgent:
         """创建底层Agent"""
@@ -69,20 +130,34 @@ class CompressionAgent:
         text: str, 
         compression_ratio: Optional[float] = None,
         compression_type: Optional[CompressionType] = None,
-        enable_stages: bool = None
+        enable_stages: bool = None,
+        engine: Optional[CompressionEngine] = None
     ) -> CompressionResult:
         """
-        压缩文本
+        压缩文本，结果记入压缩历史
         
         Args:
             text: 要压缩的文本
             compression_ratio: 压缩比例（百分比）
             compression_type: 压缩类型
             enable_stages: 是否启用分阶段处理
+            engine: 压缩引擎，默认使用配置中的engine
             
         Returns:
             压缩结果
         """
+        result = self._compress_text(text, compression_ratio, compression_type, engine)
+        self.compression_history.append(result)
+        return result
+    
+    def _compress_text(
+        self, 
+        text: str, 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None,
+        engine: Optional[CompressionEngine] = None
+    ) -> CompressionResult:
+        """压缩文本，不记录历史"""
         if not text:
             return CompressionResult(
                 success=False,
@@ -90,12 +165,23 @@ class CompressionAgent:
                 compressed_text=""
             )
         
+        # 本地引擎没有上下文长度限制，不需要分块
+        engine = CompressionEngine(engine or self.config.engine)
+        if engine == CompressionEngine.LOCAL:
+            return self._compress_local(text, compression_ratio, compression_type)
+        if engine == CompressionEngine.CASCADE:
+            return self.compress_cascade(text, compression_ratio, compression_type)
+        
+        # 超过单块长度的文本分块压缩
+        if len(text) > self.config.chunk_size:
+            return self.compress_chunked(text, compression_ratio, compression_type)
+        
         # 设置默认值
         compression_ratio = compression_ratio or 50.0
         
-        # 设置压缩类型
+        # 未指定压缩类型时按内容判断
         if compression_type is None:
-            compression_type = CompressionType.GENERAL
+            compression_type = get_compression_type_from_text(text)
         
         try:
             return self._compress_simple(text, compression_ratio, compression_type)
@@ -109,63 +195,701 @@ class CompressionAgent:
             )
     
     
-    def _compress_simple(
+    async def acompress_text(
+        self, 
+        text: str, 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None,
+        enable_stages: bool = None,
+        engine: Optional[CompressionEngine] = None
+    ) -> CompressionResult:
+        """
+        异步压缩文本，参数与compress_text相同，结果记入压缩历史
+        
+        Returns:
+            压缩结果
+        """
+        result = await self._acompress_text(text, compression_ratio, compression_type, engine)
+        self.compression_history.append(result)
+        return result
+    
+    async def _acompress_text(
+        self, 
+        text: str, 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None,
+        engine: Optional[CompressionEngine] = None
+    ) -> CompressionResult:
+        """异步压缩文本，不记录历史"""
+        if not text:
+            return CompressionResult(
+                success=False,
+                original_text="",
+                compressed_text=""
+            )
+        
+        # 本地压缩耗时在毫秒级，直接在事件循环中执行
+        engine = CompressionEngine(engine or self.config.engine)
+        if engine == CompressionEngine.LOCAL:
+            return self._compress_local(text, compression_ratio, compression_type)
+        if engine == CompressionEngine.CASCADE:
+            return await self.acompress_cascade(text, compression_ratio, compression_type)
+        
+        if len(text) > self.config.chunk_size:
+            return await self.acompress_chunked(text, compression_ratio, compression_type)
+        
+        compression_ratio = compression_ratio or 50.0
+        
+        if compression_type is None:
+            compression_type = get_compression_type_from_text(text)
+        
+        try:
+            return await self._acompress_simple(text, compression_ratio, compression_type)
+                
+        except Exception as e:
+            logger.error(f"压缩失败: {str(e)}")
+            return CompressionResult(
+                success=False,
+                original_text=text,
+                compressed_text=""
+            )
+    
+    def _stream_chunks(
+        self, 
+        text: str, 
+        compression_type: Optional[CompressionType]
+    ) -> List[Tuple[str, CompressionType]]:
+        """流式压缩的分块：不超过chunk_size时整段作为一块，否则与分块压缩相同切分；未指定类型时按块内容判断"""
+        if len(text) <= self.config.chunk_size:
+            chunks = [text]
+        else:
+            chunks = [chunk for chunk in split_text(text, self.config.chunk_size) if chunk.strip()]
+        return [(chunk, compression_type or get_compression_type_from_text(chunk)) for chunk in chunks]
+    
+    def compress_stream(
+        self, 
+        text: str, 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None,
+        callbacks: Callbacks = None
+    ) -> Iterator[Union[str, CompressionResult]]:
+        """
+        流式压缩文本，模型每输出一段压缩文本即产出，最后产出压缩结果并记入压缩历史
+        
+        超过chunk_size的文本与分块压缩相同切分后逐块依次流式压缩，块之间产出"\n\n"，
+        所有片段拼接即为压缩文本；流式压缩不做合并轮，整体压缩比例可能低于目标
+        
+        Args:
+            text: 要压缩的文本
+            compression_ratio: 压缩比例（百分比）
+            compression_type: 压缩类型，为None时按块内容判断
+            callbacks: LangChain回调，模型每输出一段文本都会触发其on_llm_new_token
+            
+        Yields:
+            压缩文本片段(str)，最后一项为CompressionResult；失败时结果的success为False，已产出的片段应丢弃
+        """
+        if not text:
+            result = CompressionResult(
+                success=False,
+                original_text="",
+                compressed_text=""
+            )
+            self.compression_history.append(result)
+            yield result
+            return
+        
+        compression_ratio = compression_ratio or 50.0
+        
+        chunks = self._stream_chunks(text, compression_type)
+        parts = []
+        try:
+            for index, (chunk, chunk_type) in enumerate(chunks):
+                if index:
+                    parts.append("\n\n")
+                    yield "\n\n"
+                compress_prompt = self._build_compress_prompt(chunk, compression_ratio, chunk_type)
+                for fragment in self.agent.stream_text(compress_prompt, callbacks=callbacks):
+                    parts.append(fragment)
+                    yield fragment
+            
+            compressed_text = "".join(parts)
+            result = CompressionResult(
+                success=True,
+                original_text=text,
+                compressed_text=compressed_text,
+                compression_ratio=calculate_compression_ratio(len(text), len(compressed_text)),
+                chunk_count=len(chunks)
+            )
+                
+        except Exception as e:
+            logger.error(f"流式压缩失败: {str(e)}")
+            result = CompressionResult(
+                success=False,
+                original_text=text,
+                compressed_text=""
+            )
+        
+        self.compression_history.append(result)
+        yield result
+    
+    async def acompress_stream(
+        self, 
+        text: str, 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None,
+        callbacks: Callbacks = None
+    ) -> AsyncIterator[Union[str, CompressionResult]]:
+        """
+        异步流式压缩文本，参数、分块方式与产出内容与compress_stream相同，结果记入压缩历史
+        
+        Yields:
+            压缩文本片段(str)，最后一项为CompressionResult
+        """
+        if not text:
+            result = CompressionResult(
+                success=False,
+                original_text="",
+                compressed_text=""
+            )
+            self.compression_history.append(result)
+            yield result
+            return
+        
+        compression_ratio = compression_ratio or 50.0
+        
+        chunks = self._stream_chunks(text, compression_type)
+        parts = []
+        try:
+            for index, (chunk, chunk_type) in enumerate(chunks):
+                if index:
+                    parts.append("\n\n")
+                    yield "\n\n"
+                compress_prompt = self._build_compress_prompt(chunk, compression_ratio, chunk_type)
+                async for fragment in self.agent.astream_text(compress_prompt, callbacks=callbacks):
+                    parts.append(fragment)
+                    yield fragment
+            
+            compressed_text = "".join(parts)
+            result = CompressionResult(
+                success=True,
+                original_text=text,
+                compressed_text=compressed_text,
+                compression_ratio=calculate_compression_ratio(len(text), len(compressed_text)),
+                chunk_count=len(chunks)
+            )
+                
+        except Exception as e:
+            logger.error(f"流式压缩失败: {str(e)}")
+            result = CompressionResult(
+                success=False,
+                original_text=text,
+                compressed_text=""
+            )
+        
+        self.compression_history.append(result)
+        yield result
+    
+    def _compress_local(
+        self, 
+        text: str, 
+        compression_ratio: Optional[float], 
+        compression_type: Optional[CompressionType]
+    ) -> CompressionResult:
+        """本地抽取式压缩，未指定类型时按内容判断"""
+        try:
+            compressed_text = compress_locally(text, compression_ratio or 50.0, compression_type)
+            return CompressionResult(
+                success=True,
+                original_text=text,
+                compressed_text=compressed_text,
+                compression_ratio=calculate_compression_ratio(len(text), len(compressed_text))
+            )
+        except Exception as e:
+            logger.error(f"本地压缩失败: {str(e)}")
+            return CompressionResult(
+                success=False,
+                original_text=text,
+                compressed_text=""
+            )
+    
+    def _get_tier_agent(self, tier: CompressionTier) -> "CompressionAgent":
+        """获取层级使用的压缩Agent，未指定其他模型时使用自身"""
+        model_name = tier.model_name or self.config.model_name
+        provider = tier.provider or self.config.provider
+        if model_name == self.config.model_name and provider == self.config.provider:
+            return self
+        
+        if tier.name not in self._tier_agents:
+            config = self.config.model_copy(update={
+                "model_name": model_name,
+                "provider": provider,
+                "engine": CompressionEngine.LLM
+            })
+            self._tier_agents[tier.name] = CompressionAgent(config)
+        return self._tier_agents[tier.name]
+    
+    def _accept_tier(
+        self, 
+        tier: CompressionTier, 
+        result: CompressionResult, 
+        compression_ratio: float
+    ) -> bool:
+        """判断层级结果是否达标：压缩比例在容差内达到目标，且信息保留率不低于层级阈值"""
+        if not result.success:
+            logger.info(f"级联压缩层级 {tier.name} 失败")
+            return False
+        
+        achieved = result.compression_ratio
+        if achieved is None:
+            achieved = calculate_compression_ratio(len(result.original_text), len(result.compressed_text))
+        retention = estimate_retention(result.original_text, result.compressed_text)
+        accepted = (achieved >= compression_ratio - self.config.ratio_tolerance
+                    and retention >= tier.min_retention)
+        logger.info(
+            f"级联压缩层级 {tier.name}: 压缩比例 {achieved:.1f}%，信息保留率 {retention:.1f}%，"
+            f"{'采用' if accepted else '升级到下一层'}"
+        )
+        return accepted
+    
+    def compress_cascade(
+        self, 
+        text: str, 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None
+    ) -> CompressionResult:
+        """
+        级联压缩
+        
+        按cascade_tiers依次压缩，某一层的结果达标即返回；都不达标时返回最后一个成功的结果
+        
+        Args:
+            text: 要压缩的文本
+            compression_ratio: 压缩比例（百分比）
+            compression_type: 压缩类型
+            
+        Returns:
+            压缩结果，tier为被采用的层级名称
+        """
+        compression_ratio = compression_ratio or 50.0
+        fallback = None
+        
+        for tier in self.config.cascade_tiers:
+            if tier.engine == CompressionEngine.LOCAL:
+                result = self._compress_local(text, compression_ratio, compression_type)
+            else:
+                # 使用不记录历史的内部方法，结果由调用方统一记录一次
+                result = self._get_tier_agent(tier)._compress_text(
+                    text, compression_ratio, compression_type, engine=CompressionEngine.LLM
+                )
+            
+            if result.success:
+                fallback = result.model_copy(update={"tier": tier.name})
+            if self._accept_tier(tier, result, compression_ratio):
+                return fallback
+        
+        return fallback or CompressionResult(
+            success=False,
+            original_text=text,
+            compressed_text=""
+        )
+    
+    async def acompress_cascade(
+        self, 
+        text: str, 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None
+    ) -> CompressionResult:
+        """
+        级联压缩（异步），参数与compress_cascade相同
+        
+        Returns:
+            压缩结果
+        """
+        compression_ratio = compression_ratio or 50.0
+        fallback = None
+        
+        for tier in self.config.cascade_tiers:
+            if tier.engine == CompressionEngine.LOCAL:
+                result = self._compress_local(text, compression_ratio, compression_type)
+            else:
+                result = await self._get_tier_agent(tier)._acompress_text(
+                    text, compression_ratio, compression_type, engine=CompressionEngine.LLM
+                )
+            
+            if result.success:
+                fallback = result.model_copy(update={"tier": tier.name})
+            if self._accept_tier(tier, result, compression_ratio):
+                return fallback
+        
+        return fallback or CompressionResult(
+            success=False,
+            original_text=text,
+            compressed_text=""
+        )
+    
+    def _build_compress_prompt(
         self, 
         text: str, 
         compression_ratio: float, 
         compression_type: CompressionType
-    ) -> CompressionResult:
-        """简单压缩处理"""
-        # 使用压缩阶段的提示词进行一次性压缩
-        compress_prompt = get_compression_prompt(
+    ) -> str:
+        """构建压缩阶段提示词"""
+        return get_compression_prompt(
             CompressionStage.COMPRESS,
             compression_type,
             text=text,
             compression_ratio=f"{compression_ratio}%",
             preprocess_result="文本已预处理，准备进行压缩"
         )
-        
-        compress_result = self.agent.run(compress_prompt)
+    
+    def _build_compress_result(self, text: str, compress_result: Dict[str, Any]) -> CompressionResult:
+        """根据Agent执行结果创建压缩结果"""
         if not compress_result['success']:
             raise Exception(f"压缩失败: {compress_result.get('error', '未知错误')}")
         
         compressed_text = compress_result['response']
-        
-        # 创建结果
-        result = CompressionResult(
+        return CompressionResult(
             success=True,
             original_text=text,
-            compressed_text=compressed_text
+            compressed_text=compressed_text,
+            compression_ratio=calculate_compression_ratio(len(text), len(compressed_text))
         )
+    
+    def _compress_simple(
+        self, 
+        text: str, 
+        compression_ratio: float, 
+        compression_type: CompressionType
+    ) -> CompressionResult:
+        """简单压缩处理"""
+        # 使用压缩阶段的提示词进行一次性压缩
+        compress_prompt = self._build_compress_prompt(text, compression_ratio, compression_type)
+        compress_result = self.agent.run(compress_prompt)
+        return self._build_compress_result(text, compress_result)
+    
+    async def _acompress_simple(
+        self, 
+        text: str, 
+        compression_ratio: float, 
+        compression_type: CompressionType
+    ) -> CompressionResult:
+        """简单压缩处理（异步）"""
+        compress_prompt = self._build_compress_prompt(text, compression_ratio, compression_type)
+        compress_result = await self.agent.arun(compress_prompt)
+        return self._build_compress_result(text, compress_result)
+    
+    async def _acompress_batch_item(
+        self,
+        index: int,
+        text: str,
+        compression_ratio: Optional[float],
+        compression_type: Optional[CompressionType],
+        backend: BatchBackend,
+        semaphore: asyncio.Semaphore,
+        executor: Optional[ThreadPoolExecutor],
+        engine: Optional[CompressionEngine] = None
+    ) -> Tuple[int, CompressionResult]:
+        """在并发限制内压缩单条文本，带超时和重试"""
+        async with semaphore:
+            attempts = self.config.max_retries + 1
+            result = None
+            
+            for attempt in range(attempts):
+                if backend == BatchBackend.ASYNCIO:
+                    pending = self._acompress_text(text, compression_ratio, compression_type, engine)
+                else:
+                    loop = asyncio.get_running_loop()
+                    pending = loop.run_in_executor(
+                        executor, self._compress_text, text, compression_ratio, compression_type, engine
+                    )
+                
+                try:
+                    result = await asyncio.wait_for(pending, timeout=self.config.item_timeout)
+                except asyncio.TimeoutError:
+                    # 线程后端无法中断正在执行的线程，超时后丢弃其结果
+                    logger.warning(f"第 {index+1} 个文本压缩超时（第 {attempt+1}/{attempts} 次尝试）")
+                    result = CompressionResult(
+                        success=False,
+                        original_text=text,
+                        compressed_text=""
+                    )
+                
+                # 空文本重试没有意义
+                if result.success or not text:
+                    break
+                
+                if attempt < attempts - 1:
+                    await asyncio.sleep(self.config.retry_delay * (2 ** attempt))
+            
+            return index, result
+    
+    async def _acompress_chunks(
+        self,
+        text: str,
+        compression_ratio: float,
+        compression_type: Optional[CompressionType]
+    ) -> Tuple[List[str], int]:
+        """
+        切分文本并并发压缩各块，同时在途的块不超过max_concurrency个，切分按需进行
         
-        return result
+        Returns:
+            (按原顺序排列的压缩结果, 失败后保留原文的块数)
+        """
+        backend = BatchBackend(self.config.batch_backend)
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        executor = None
+        if backend == BatchBackend.THREAD:
+            executor = ThreadPoolExecutor(
+                max_workers=self.config.max_concurrency,
+                thread_name_prefix="compression-chunk"
+            )
+        
+        outputs: List[Optional[str]] = []
+        failed = 0
+        pending = set()
+        
+        def collect(done):
+            nonlocal failed
+            for task in done:
+                index, result = task.result()
+                if result.success:
+                    outputs[index] = result.compressed_text.strip()
+                else:
+                    # 失败的块保留原文，保证输出完整
+                    failed += 1
+                    outputs[index] = result.original_text.strip()
+        
+        try:
+            for index, chunk in enumerate(split_text(text, self.config.chunk_size)):
+                outputs.append(None)
+                if not chunk.strip():
+                    outputs[index] = ""
+                    continue
+                
+                if len(pending) >= self.config.max_concurrency:
+                    done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                    collect(done)
+                
+                # 未指定类型时按块内容判断，代码块、表格等使用各自的提示词；
+                # 分块只用于模型压缩，各块固定使用模型，不再按配置走级联
+                chunk_type = compression_type or get_compression_type_from_text(chunk)
+                pending.add(asyncio.create_task(self._acompress_batch_item(
+                    index, chunk, compression_ratio, chunk_type, backend, semaphore, executor,
+                    CompressionEngine.LLM
+                )))
+            
+            if pending:
+                done, pending = await asyncio.wait(pending)
+                collect(done)
+        finally:
+            for task in pending:
+                task.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+        
+        return [output for output in outputs if output], failed
     
-
+    async def acompress_chunked(
+        self, 
+        text: str, 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None
+    ) -> CompressionResult:
+        """
+        分块压缩（map-reduce）
+        
+        按段落、代码块和表格切分后并发压缩各块（每块以全局比例为目标），
+        合并结果未达到目标比例时，以剩余比例为目标对合并结果再次分块压缩，最多max_merge_rounds轮
+        
+        Args:
+            text: 要压缩的文本
+            compression_ratio: 全局压缩比例（百分比）
+            compression_type: 压缩类型，为None时按块内容判断
+            
+        Returns:
+            压缩结果，compression_ratio为按calculate_compression_ratio计算的实际比例
+        """
+        if not text:
+            return CompressionResult(
+                success=False,
+                original_text="",
+                compressed_text=""
+            )
+        
+        compression_ratio = compression_ratio or 50.0
+        target_length = len(text) * (1 - compression_ratio / 100)
+        
+        try:
+            parts, failed = await self._acompress_chunks(text, compression_ratio, compression_type)
+            chunk_count = len(parts)
+            if chunk_count and failed == chunk_count:
+                raise Exception("所有分块压缩均失败")
+            
+            current = "\n\n".join(parts)
+            achieved = calculate_compression_ratio(len(text), len(current))
+            logger.info(f"分块压缩完成: {chunk_count} 块，失败 {failed} 块，压缩比例 {achieved:.1f}%")
+            
+            rounds = 0
+            while (self.config.merge_pass and rounds < self.config.max_merge_rounds
+                   and achieved < compression_ratio - self.config.ratio_tolerance):
+                # 合并轮：对已压缩的文本以剩余比例为目标继续压缩
+                merge_ratio = calculate_compression_ratio(len(current), int(target_length))
+                parts, failed = await self._acompress_chunks(current, merge_ratio, compression_type)
+                merged = "\n\n".join(parts)
+                rounds += 1
+                if failed == len(parts) or len(merged) >= len(current):
+                    break
+                current = merged
+                achieved = calculate_compression_ratio(len(text), len(current))
+                logger.info(f"第 {rounds} 轮合并压缩完成，压缩比例 {achieved:.1f}%")
+            
+            return CompressionResult(
+                success=True,
+                original_text=text,
+                compressed_text=current,
+                compression_ratio=achieved,
+                chunk_count=chunk_count
+            )
+            
+        except Exception as e:
+            logger.error(f"分块压缩失败: {str(e)}")
+            return CompressionResult(
+                success=False,
+                original_text=text,
+                compressed_text=""
+            )
     
-    def batch_compress(
+    def compress_chunked(
         self, 
-        texts: List[str], 
+        text: str, 
         compression_ratio: Optional[float] = None,
         compression_type: Optional[CompressionType] = None
+    ) -> CompressionResult:
+        """
+        分块压缩（同步），参数与acompress_chunked相同
+        
+        Returns:
+            压缩结果
+        """
+        return self._run_sync(lambda: self.acompress_chunked(text, compression_ratio, compression_type))
+    
+    def _run_sync(self, make_coroutine: Callable[[], Any]) -> Any:
+        """同步执行协程，当前线程已有事件循环在运行时放到独立线程中执行"""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(make_coroutine())
+        
+        with ThreadPoolExecutor(max_workers=1) as runner:
+            return runner.submit(lambda: asyncio.run(make_coroutine())).result()
+    
+    async def astream_batch_compress(
+        self, 
+        texts: List[str], 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None,
+        backend: Optional[BatchBackend] = None
+    ) -> AsyncIterator[Tuple[int, CompressionResult]]:
+        """
+        并发批量压缩文本，按完成顺序逐条产出结果
+        
+        Args:
+            texts: 文本列表
+            compression_ratio: 压缩比例
+            compression_type: 压缩类型
+            backend: 执行后端，默认使用配置中的batch_backend
+            
+        Yields:
+            (文本在输入列表中的下标, 压缩结果)
+        """
+        backend = BatchBackend(backend or self.config.batch_backend)
+        semaphore = asyncio.Semaphore(self.config.max_concurrency)
+        executor = None
+        if backend == BatchBackend.THREAD:
+            executor = ThreadPoolExecutor(
+                max_workers=self.config.max_concurrency,
+                thread_name_prefix="compression-batch"
+            )
+        
+        tasks = [
+            asyncio.create_task(self._acompress_batch_item(
+                i, text, compression_ratio, compression_type, backend, semaphore, executor
+            ))
+            for i, text in enumerate(texts)
+        ]
+        
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result = await next_done
+                # 重试中的失败尝试不计入历史，只记录每条文本的最终结果
+                self.compression_history.append(result)
+                yield index, result
+        finally:
+            # 调用方提前停止迭代时取消剩余任务
+            for task in tasks:
+                task.cancel()
+            if executor is not None:
+                executor.shutdown(wait=False)
+    
+    async def abatch_compress(
+        self, 
+        texts: List[str], 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None,
+        progress_callback: Optional[Callable[[int, int, int, CompressionResult], None]] = None,
+        backend: Optional[BatchBackend] = None
     ) -> List[CompressionResult]:
         """
-        批量压缩文本
+        异步并发批量压缩文本
         
         Args:
             texts: 文本列表
             compression_ratio: 压缩比例
             compression_type: 压缩类型
+            progress_callback: 进度回调，参数为(已完成数, 总数, 完成文本的下标, 压缩结果)
+            backend: 执行后端，默认使用配置中的batch_backend
             
         Returns:
-            压缩结果列表
+            压缩结果列表，顺序与输入一致
         """
-        results = []
-        for i, text in enumerate(texts):
-            logger.info(f"处理第 {i+1}/{len(texts)} 个文本")
-            result = self.compress_text(text, compression_ratio, compression_type)
-            results.append(result)
+        total = len(texts)
+        results: List[Optional[CompressionResult]] = [None] * total
+        completed = 0
+        
+        async for index, result in self.astream_batch_compress(texts, compression_ratio, compression_type, backend):
+            results[index] = result
+            completed += 1
+            logger.info(f"批量压缩进度: {completed}/{total}")
+            if progress_callback is not None:
+                progress_callback(completed, total, index, result)
+        
         return results
     
+    def batch_compress(
+        self, 
+        texts: List[str], 
+        compression_ratio: Optional[float] = None,
+        compression_type: Optional[CompressionType] = None,
+        progress_callback: Optional[Callable[[int, int, int, CompressionResult], None]] = None,
+        backend: Optional[BatchBackend] = None
+    ) -> List[CompressionResult]:
+        """
+        批量压缩文本，最多同时处理max_concurrency个文本
+        
+        Args:
+            texts: 文本列表
+            compression_ratio: 压缩比例
+            compression_type: 压缩类型
+            progress_callback: 进度回调，参数为(已完成数, 总数, 完成文本的下标, 压缩结果)
+            backend: 执行后端，默认使用配置中的batch_backend
+            
+        Returns:
+            压缩结果列表，顺序与输入一致
+        """
+        return self._run_sync(lambda: self.abatch_compress(
+            texts, compression_ratio, compression_type, progress_callback, backend
+        ))
+    
     def get_compression_stats(self) -> Dict[str, Any]:
         """获取压缩统计信息"""
         if not self.compression_history:
@@ -177,10 +901,12 @@ class CompressionAgent:
         if successful_compressions == 0:
             return {"message": "暂无成功压缩记录"}
         
+        successful = [r for r in self.compression_history if r.success]
         return {
             "total_compressions": total_compressions,
             "successful_compressions": successful_compressions,
-            "success_rate": (successful_compressions / total_compressions) * 100
+            "success_rate": (successful_compressions / total_compressions) * 100,
+            "quality": summarize_metrics(score_compression_results(successful))
         }
     
     def clear_history(self):
@@ -194,8 +920,12 @@ class CompressionAgent:
             if hasattr(self.config, key):
                 setattr(self.config, key, value)
         
+        if self.compression_history.maxlen != self.config.max_history:
+            self.compression_history = deque(self.compression_history, maxlen=self.config.max_history)
+        
         # 重新创建Agent
         self.agent = self._create_agent()
+        self._tier_agents.clear()
         logger.info(f"配置已更新: {kwargs}")
 
 # 便捷函数
@@ -225,12 +955,27 @@ def create_compression_agent(
     )
     return CompressionAgent(config)
 
+# 工具调用共享的默认压缩Agent，避免每次调用重新创建Agent和LLM客户端
+_default_compression_agent: Optional[CompressionAgent] = None
+_default_compression_agent_lock = threading.Lock()
+
+def get_default_compression_agent() -> CompressionAgent:
+    """获取进程内共享的默认压缩Agent，首次调用时创建"""
+    global _default_compression_agent
+    if _default_compression_agent is None:
+        with _default_compression_agent_lock:
+            if _default_compression_agent is None:
+                _default_compression_agent = create_compression_agent()
+    return _default_compression_agent
+
 # LangChain工具包装
 @tool
 def compress_text_with_agent(
     text: str, 
     compression_ratio: float = 50.0,
-    compression_type: str = "auto"
+    compression_type: str = "auto",
+    stream: bool = False,
+    callbacks: Callbacks = None
 ) -> str:
     """
     使用智能Agent压缩文本
@@ -238,14 +983,15 @@ def compress_text_with_agent(
     Args:
         text: 要压缩的文本
         compression_ratio: 压缩比例（百分比）
-        compression_type: 压缩类型（auto/general/technical/creative/academic/news/conversation）
+        compression_type: 压缩类型（auto/text/code/formula/table/link）
+        stream: 是否以流式方式压缩，压缩文本片段通过回调的on_llm_new_token转发
         
     Returns:
         压缩结果JSON字符串
     """
     try:
-        # 创建压缩Agent
-        agent = create_compression_agent()
+        # 获取共享的压缩Agent
+        agent = get_default_compression_agent()
         
         # 解析压缩类型
         if compression_type == "auto":
@@ -254,10 +1000,16 @@ def compress_text_with_agent(
             try:
                 comp_type = CompressionType(compression_type)
             except ValueError:
-                comp_type = CompressionType.GENERAL
+                comp_type = None  # 未知类型按内容判断
         
-        # 执行压缩
-        result = agent.compress_text(text, compression_ratio, comp_type)
+        # 执行压缩；@tool每次调用都会注入回调管理器，因此只在显式要求时才流式执行
+        if stream:
+            result = None
+            for item in agent.compress_stream(text, compression_ratio, comp_type, callbacks=callbacks):
+                if isinstance(item, CompressionResult):
+                    result = item
+        else:
+            result = agent.compress_text(text, compression_ratio, comp_type)
         
         # 返回JSON格式的结果
         return json.dumps({
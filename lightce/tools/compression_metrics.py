@@ -0,0 +1,239 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压缩质量指标
+批量计算(原文, 压缩文本)对的压缩比例、信息保留率、ROUGE重合度以及数字和名称保留率。
+所有文本共用一个词表，词频编码为按(行号, 词元号)排序的稀疏计数，
+各指标通过NumPy的求交集和按行累加一次算出，不逐对构建集合
+"""
+
+from typing import Dict, List, Any, Optional, Iterable, Sequence, Tuple
+import logging
+import re
+
+import numpy as np
+
+from ..agent.memory_index import tokenize
+
+logger = logging.getLogger(__name__)
+
+# 在词表上判断数字和名称（首字母大写的词、驼峰和下划线标识符）；切词与记忆检索、信息保留率估算共用tokenize
+NUMBER_PATTERN = re.compile(r'\d+(?:[.,]\d+)*%?')
+NAME_PATTERN = re.compile(r'[A-Z][A-Za-z0-9]+|[a-z]+[A-Z]\w*|[A-Za-z]+_\w+')
+
+METRIC_NAMES = ("compression_ratio", "retention", "rouge1", "rouge2", "number_preservation", "name_preservation")
+DEFAULT_PERCENTILES = (50, 90, 99)
+INT64_LIMIT = 2 ** 63
+
+def _tokenize(texts: Sequence[str]) -> Tuple[np.ndarray, np.ndarray, List[str]]:
+    """
+    切分并编码所有文本
+
+    Returns:
+        (每个词元所在的行号, 词元号, 词表)
+    """
+    tokens: List[str] = []
+    lengths = np.zeros(len(texts), dtype=np.int64)
+    for row, text in enumerate(texts):
+        found = tokenize(text)
+        tokens.extend(found)
+        lengths[row] = len(found)
+    vocab = {token: index for index, token in enumerate(dict.fromkeys(tokens))}
+    ids = np.fromiter(map(vocab.__getitem__, tokens), dtype=np.int64, count=len(tokens))
+    rows = np.repeat(np.arange(len(texts), dtype=np.int64), lengths)
+    return rows, ids, list(vocab)
+
+def _bigrams(rows: np.ndarray, ids: np.ndarray, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """同一行内相邻词元组成的二元组，返回(行号, 二元组编码)"""
+    same_row = rows[1:] == rows[:-1]
+    return rows[1:][same_row], ids[:-1][same_row] * width + ids[1:][same_row]
+
+def _sparse_counts(rows: np.ndarray, ids: np.ndarray, width: int) -> Tuple[np.ndarray, np.ndarray]:
+    """稀疏计数：返回排序去重后的(行号*width+词元号)键及其次数"""
+    return np.unique(rows * width + ids, return_counts=True)
+
+def _overlap(
+    original: Tuple[np.ndarray, np.ndarray],
+    compressed: Tuple[np.ndarray, np.ndarray],
+    width: int,
+    size: int
+) -> Dict[str, np.ndarray]:
+    """
+    按行统计原文和压缩文本的词元重合
+
+    Returns:
+        distinct_original: 原文不同词元数
+        distinct_common: 两边都出现的不同词元数
+        overlap: 按次数取较小值的重合词元数
+        total_original / total_compressed: 两边的词元总数
+    """
+    original_keys, original_counts = _sparse_counts(*original, width)
+    compressed_keys, compressed_counts = _sparse_counts(*compressed, width)
+    # 两边的键都已排序去重，用二分查找求交集
+    position = np.searchsorted(original_keys, compressed_keys)
+    in_range = position < len(original_keys)
+    matched = np.zeros(len(compressed_keys), dtype=bool)
+    matched[in_range] = original_keys[position[in_range]] == compressed_keys[in_range]
+    original_index = position[matched]
+    compressed_index = np.flatnonzero(matched)
+    common_rows = compressed_keys[matched] // width
+    return {
+        "distinct_original": np.bincount(original_keys // width, minlength=size),
+        "distinct_common": np.bincount(common_rows, minlength=size),
+        "overlap": np.bincount(
+            common_rows,
+            weights=np.minimum(original_counts[original_index], compressed_counts[compressed_index]),
+            minlength=size
+        ),
+        "total_original": np.bincount(original[0], minlength=size),
+        "total_compressed": np.bincount(compressed[0], minlength=size)
+    }
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray, empty: float) -> np.ndarray:
+    """逐元素相除，分母为0时取empty"""
+    result = np.full(len(denominator), empty, dtype=np.float64)
+    np.divide(numerator, denominator, out=result, where=denominator > 0)
+    return result
+
+def _f1(stats: Dict[str, np.ndarray], fallback: np.ndarray) -> np.ndarray:
+    """ROUGE F1（百分比），两边都没有该阶n元组时取fallback，只有一边没有时为0"""
+    precision = _ratio(stats["overlap"], stats["total_compressed"], 0.0)
+    recall = _ratio(stats["overlap"], stats["total_original"], 0.0)
+    f1 = _ratio(2 * precision * recall, precision + recall, 0.0) * 100
+    both_empty = (stats["total_original"] == 0) & (stats["total_compressed"] == 0)
+    f1[both_empty] = fallback[both_empty]
+    return f1
+
+def _preservation(
+    original: Tuple[np.ndarray, np.ndarray],
+    compressed: Tuple[np.ndarray, np.ndarray],
+    selected: np.ndarray,
+    size: int
+) -> np.ndarray:
+    """原文中被选中的不同词元在压缩文本中仍出现的比例（百分比），原文没有时为100"""
+    original_mask = selected[original[1]]
+    compressed_mask = selected[compressed[1]]
+    stats = _overlap(
+        (original[0][original_mask], original[1][original_mask]),
+        (compressed[0][compressed_mask], compressed[1][compressed_mask]),
+        max(len(selected), 1),
+        size
+    )
+    return _ratio(stats["distinct_common"], stats["distinct_original"], 1.0) * 100
+
+def score_compression_batch(originals: Sequence[str], compressed: Sequence[str]) -> Dict[str, np.ndarray]:
+    """
+    批量计算压缩质量指标
+
+    Args:
+        originals: 原文列表
+        compressed: 压缩文本列表，与原文一一对应
+
+    Returns:
+        指标名到数组的映射，数组长度与输入相同，均为百分比：
+        compression_ratio: 实际压缩比例，与calculate_compression_ratio一致
+        retention: 原文中不同的词和相邻词对在压缩文本中仍出现的比例
+        rouge1 / rouge2: 一元、二元ROUGE F1
+        number_preservation / name_preservation: 数字、名称保留率
+    """
+    if len(originals) != len(compressed):
+        raise ValueError(f"原文和压缩文本数量不一致: {len(originals)} != {len(compressed)}")
+    size = len(originals)
+    if size == 0:
+        return {name: np.zeros(0) for name in METRIC_NAMES}
+
+    original_lengths = np.fromiter((len(text) for text in originals), dtype=np.float64, count=size)
+    compressed_lengths = np.fromiter((len(text) for text in compressed), dtype=np.float64, count=size)
+
+    rows, ids, words = _tokenize(list(originals) + list(compressed))
+    is_original = rows < size
+    original_tokens = (rows[is_original], ids[is_original])
+    compressed_tokens = (rows[~is_original] - size, ids[~is_original])
+
+    # ROUGE和保留率不区分大小写，在词表上把词元号映射为小写形式的编号
+    lower_vocab: Dict[str, int] = {}
+    lower_ids = np.array([lower_vocab.setdefault(word.lower(), len(lower_vocab)) for word in words], dtype=np.int64)
+    original_unigrams = (original_tokens[0], lower_ids[original_tokens[1]])
+    compressed_unigrams = (compressed_tokens[0], lower_ids[compressed_tokens[1]])
+    width = max(len(lower_vocab), 1)
+    unigram_stats = _overlap(original_unigrams, compressed_unigrams, width, size)
+
+    original_bigrams = _bigrams(*original_unigrams, width)
+    compressed_bigrams = _bigrams(*compressed_unigrams, width)
+    bigram_width = width * width
+    if size * bigram_width >= INT64_LIMIT:
+        # 二元组编码与行号组合后会溢出时，两边合并后重新编号
+        codes, bigram_ids = np.unique(np.concatenate([original_bigrams[1], compressed_bigrams[1]]), return_inverse=True)
+        bigram_width = max(len(codes), 1)
+        original_bigrams = (original_bigrams[0], bigram_ids[:len(original_bigrams[1])])
+        compressed_bigrams = (compressed_bigrams[0], bigram_ids[len(original_bigrams[1]):])
+    bigram_stats = _overlap(original_bigrams, compressed_bigrams, bigram_width, size)
+
+    is_number = np.array([NUMBER_PATTERN.fullmatch(word) is not None for word in words], dtype=bool)
+    is_name = np.array([NAME_PATTERN.fullmatch(word) is not None for word in words], dtype=bool)
+
+    retention = _ratio(
+        unigram_stats["distinct_common"] + bigram_stats["distinct_common"],
+        unigram_stats["distinct_original"] + bigram_stats["distinct_original"],
+        1.0
+    ) * 100
+
+    # 两边都为空时ROUGE为100；两边都只有一个词元、没有二元组时，rouge2取rouge1
+    rouge1 = _f1(unigram_stats, np.full(size, 100.0))
+    rouge2 = _f1(bigram_stats, rouge1)
+
+    return {
+        "compression_ratio": _ratio(original_lengths - compressed_lengths, original_lengths, 0.0) * 100,
+        "retention": retention,
+        "rouge1": rouge1,
+        "rouge2": rouge2,
+        "number_preservation": _preservation(original_tokens, compressed_tokens, is_number, size),
+        "name_preservation": _preservation(original_tokens, compressed_tokens, is_name, size)
+    }
+
+def score_compression_results(results: Iterable[Any]) -> Dict[str, np.ndarray]:
+    """
+    批量计算压缩结果的质量指标
+
+    Args:
+        results: 带original_text和compressed_text属性的压缩结果，如CompressionResult
+
+    Returns:
+        同score_compression_batch
+    """
+    results = list(results)
+    return score_compression_batch(
+        [result.original_text for result in results],
+        [result.compressed_text for result in results]
+    )
+
+def summarize_metrics(
+    scores: Dict[str, np.ndarray],
+    percentiles: Iterable[float] = DEFAULT_PERCENTILES
+) -> Dict[str, Dict[str, float]]:
+    """
+    汇总批量指标
+
+    Args:
+        scores: score_compression_batch的返回值
+        percentiles: 需要统计的百分位
+
+    Returns:
+        指标名到统计值的映射，包含count、mean、min、max和p50等百分位
+    """
+    percentiles = list(percentiles)
+    summary: Dict[str, Dict[str, float]] = {}
+    for name, values in scores.items():
+        if len(values) == 0:
+            summary[name] = {"count": 0}
+            continue
+        stats = {
+            "count": int(len(values)),
+            "mean": float(values.mean()),
+            "min": float(values.min()),
+            "max": float(values.max())
+        }
+        for percentile, value in zip(percentiles, np.percentile(values, percentiles)):
+            stats[f"p{percentile:g}"] = float(value)
+        summary[name] = stats
+    return summary
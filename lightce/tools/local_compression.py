@@ -0,0 +1,536 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地抽取式压缩
+不调用模型，按压缩类型使用规则和统计方法压缩文本，耗时在毫秒级，适合日志、工具输出等低风险输入：
+文本按TF-IDF、位置和冗余度选句，代码去除注释、空行和缩进并缩短长标识符，
+表格删除空列、常量列和重复行，公式去除排版命令和多余空白，链接规范化并去重
+"""
+
+from typing import Dict, List, Set, Callable, Optional, Tuple
+from collections import Counter
+from urllib.parse import urlsplit, urlunsplit, unquote_plus
+import builtins
+import keyword
+import logging
+import math
+import re
+
+from ..agent.memory_index import text_features
+from ..prompt.mini_contents import CompressionType
+from .chunking import iter_segments
+
+logger = logging.getLogger(__name__)
+
+# 文本：段落内按句末标点、英文句点后的空白切分句子
+SENTENCE_SPLIT_PATTERN = re.compile(r'(?<=[。！？!?；;])|(?<=\.)\s+')
+CJK_END_PATTERN = re.compile(r'[\u3000-\u303f\u4e00-\u9fff\uff00-\uffef]$')
+# 与已选句子的特征重合度超过该值时视为冗余
+REDUNDANCY_THRESHOLD = 0.6
+TRUNCATION_MARK = "…"
+
+# 代码：字符串与注释，先匹配字符串以免误删字符串中的注释符号
+PY_TOKEN_PATTERN = re.compile(
+    r'("""[\s\S]*?"""|\'\'\'[\s\S]*?\'\'\'|"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\')|(#[^\n]*)'
+)
+C_TOKEN_PATTERN = re.compile(
+    r'("(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`[^`]*`)|(//[^\n]*|/\*[\s\S]*?\*/)'
+)
+PY_HINT_PATTERN = re.compile(r'^\s*(def |class |import |from \S+ import |elif |async def )', re.M)
+C_HINT_PATTERN = re.compile(r'[{;]\s*$', re.M)
+LONG_IDENTIFIER_PATTERN = re.compile(r'(?<![.\w])[A-Za-z_][A-Za-z0-9_]{11,}\b')
+IMPORT_LINE_PATTERN = re.compile(r'^\s*(import|from|#include|using|require)\b.*$', re.M)
+# 作为属性或关键字参数出现的名称可能在代码片段之外定义，不缩写
+ATTRIBUTE_NAME_PATTERN = re.compile(r'\.\s*([A-Za-z_]\w*)')
+KEYWORD_ARGUMENT_PATTERN = re.compile(r'[(,]\s*([A-Za-z_]\w*)\s*=(?!=)')
+# 局部变量的绑定位置：声明、循环变量、as别名和行首赋值；函数名和类名属于接口，不缩写
+BINDING_PATTERN = re.compile(
+    r'\b(?:let|const|var|for|as)\s+([A-Za-z_]\w*)'
+    r'|^[ \t]*(?:[\w<>\[\]*&]+[ \t]+)*([A-Za-z_]\w*)[ \t]*(?::[^=\n]+)?=(?!=)',
+    re.M
+)
+SIGNATURE_PATTERN = re.compile(r'\b(?:def|function)\s+\w+\s*\(([^)]*)\)')
+PARAMETER_NAME_PATTERN = re.compile(r'(?:^|,)\s*\**([A-Za-z_]\w*)')
+RESERVED_IDENTIFIERS = set(keyword.kwlist) | set(dir(builtins))
+
+# 表格
+MARKDOWN_SEPARATOR_PATTERN = re.compile(r'^:?-{3,}:?$')
+
+# 公式：只影响排版的LaTeX命令
+FORMULA_LAYOUT_PATTERN = re.compile(r'\\(displaystyle|textstyle|left|right|quad|qquad)\b|\\[,;:! ]')
+FORMULA_OPERATOR_SPACE_PATTERN = re.compile(r'\s*([=+\-*/^_<>(){}\[\],])\s*')
+
+# 链接
+URL_PATTERN = re.compile(r'https?://[^\s<>"\'）】\]]+', re.I)
+URL_TRAILING_PUNCTUATION = '.,;:!?。，；：！？)'
+# 只去掉utm_*和广告点击ID，ref、si等参数可能决定链接内容（如GitHub的?ref=分支）
+TRACKING_PARAMS = {
+    "fbclid", "gclid", "gbraid", "wbraid", "dclid", "msclkid", "yclid", "twclid", "ttclid", "li_fat_id",
+    "igshid", "mc_cid", "mc_eid", "_hsenc", "_hsmkt"
+}
+
+def _target_length(text: str, compression_ratio: float) -> int:
+    """按压缩比例（百分比）计算目标字符数"""
+    ratio = min(max(compression_ratio, 0.0), 100.0)
+    return int(len(text) * (1 - ratio / 100))
+
+def _truncate(text: str, target_length: int) -> str:
+    """截断到目标长度，末尾加截断标记"""
+    if len(text) <= target_length:
+        return text
+    if target_length <= len(TRUNCATION_MARK):
+        return text[:target_length]
+    return text[:target_length - len(TRUNCATION_MARK)].rstrip() + TRUNCATION_MARK
+
+# ---------------------------------------------------------------- 文本
+
+def _split_sentences(text: str) -> List[Tuple[int, int, str]]:
+    """切分为(段落序号, 段内序号, 句子)"""
+    sentences = []
+    paragraphs = [p for p in text.split("\n") if p.strip()]
+    for paragraph_index, paragraph in enumerate(paragraphs):
+        parts = [p.strip() for p in SENTENCE_SPLIT_PATTERN.split(paragraph.strip()) if p and p.strip()]
+        for sentence_index, sentence in enumerate(parts):
+            sentences.append((paragraph_index, sentence_index, sentence))
+    return sentences
+
+def compress_prose(text: str, target_length: int) -> str:
+    """
+    抽取式压缩普通文本
+
+    句子得分为TF-IDF权重之和按长度归一化，段首句和全文首句加分；
+    按得分从高到低选取能放进目标长度且与已选句子不冗余的句子，仍有余量时再补入冗余句子，按原顺序输出
+
+    Args:
+        text: 文本
+        target_length: 目标字符数
+
+    Returns:
+        压缩后文本
+    """
+    normalized = re.sub(r'[ \t]+', ' ', text).strip()
+    if len(normalized) <= target_length:
+        return normalized
+
+    # 完全重复的句子（如重复的日志行）只保留第一次出现
+    seen = set()
+    sentences = []
+    for paragraph_index, sentence_index, sentence in _split_sentences(normalized):
+        if sentence not in seen:
+            seen.add(sentence)
+            sentences.append((paragraph_index, sentence_index, sentence))
+    if not sentences:
+        return ""
+
+    features = [text_features(sentence) for _, _, sentence in sentences]
+    document_frequency = Counter()
+    for feature in features:
+        document_frequency.update(feature.keys())
+    total = len(sentences)
+
+    scores = []
+    for (paragraph_index, sentence_index, sentence), feature in zip(sentences, features):
+        weight = sum(count * (math.log(total / (1 + document_frequency[token])) + 1) for token, count in feature.items())
+        score = weight / math.sqrt(len(sentence))
+        if sentence_index == 0:
+            score *= 1.2
+        if paragraph_index == 0 and sentence_index == 0:
+            score *= 1.3
+        scores.append(score)
+
+    selected: List[int] = []
+    selected_keys: List[set] = []
+    skipped: List[int] = []
+    used = 0
+    for index in sorted(range(total), key=lambda i: scores[i], reverse=True):
+        sentence = sentences[index][2]
+        cost = len(sentence) + 1
+        if used + cost > target_length + 1:
+            continue
+        keys = set(features[index])
+        if keys and any(len(keys & other) / len(keys | other) > REDUNDANCY_THRESHOLD for other in selected_keys):
+            skipped.append(index)
+            continue
+        selected.append(index)
+        selected_keys.append(keys)
+        used += cost
+
+    # 不冗余的句子都已选入但仍有余量时，按得分补入冗余句子，避免压缩过度
+    for index in skipped:
+        cost = len(sentences[index][2]) + 1
+        if used + cost <= target_length + 1:
+            selected.append(index)
+            used += cost
+
+    if not selected:
+        # 没有能完整放下的句子时截断得分最高的句子
+        best = max(range(total), key=lambda i: scores[i])
+        return _truncate(sentences[best][2], target_length)
+
+    lines: List[str] = []
+    current_paragraph = None
+    for index in sorted(selected):
+        paragraph_index, _, sentence = sentences[index]
+        if paragraph_index != current_paragraph:
+            lines.append(sentence)
+            current_paragraph = paragraph_index
+        else:
+            separator = "" if CJK_END_PATTERN.search(lines[-1]) else " "
+            lines[-1] += separator + sentence
+    return "\n".join(lines)
+
+# ---------------------------------------------------------------- 代码
+
+def _is_python(code: str) -> bool:
+    """粗略判断是否为Python代码"""
+    return bool(PY_HINT_PATTERN.search(code)) and len(C_HINT_PATTERN.findall(code)) < len(PY_HINT_PATTERN.findall(code))
+
+def _strip_comments(code: str) -> str:
+    """删除注释和独占一行的文档字符串，保留字符串字面量"""
+    python = _is_python(code)
+    pattern = PY_TOKEN_PATTERN if python else C_TOKEN_PATTERN
+
+    def replace(match: re.Match) -> str:
+        literal = match.group(1)
+        if literal is None:
+            return ""
+        if python and literal[:3] in ('"""', "'''"):
+            line_start = code.rfind("\n", 0, match.start()) + 1
+            line_end = code.find("\n", match.end())
+            line_end = len(code) if line_end == -1 else line_end
+            if not code[line_start:match.start()].strip() and not code[match.end():line_end].strip():
+                return ""
+        return literal
+
+    return pattern.sub(replace, code)
+
+def _strip_blank_lines(code: str) -> str:
+    """删除空行和行尾空白"""
+    return "\n".join(line.rstrip() for line in code.split("\n") if line.strip())
+
+def _collapse_indentation(code: str) -> str:
+    """Python代码每级缩进压缩为一个空格，其他代码删除行首缩进"""
+    lines = code.split("\n")
+    if not _is_python(code):
+        return "\n".join(line.lstrip() for line in lines)
+
+    indents = [len(line) - len(line.lstrip(" ")) for line in lines if line.strip()]
+    unit = 0
+    for indent in indents:
+        unit = math.gcd(unit, indent)
+    if unit <= 1:
+        return code
+    return "\n".join(" " * ((len(line) - len(line.lstrip(" "))) // unit) + line.lstrip(" ") for line in lines)
+
+def _abbreviate(name: str) -> str:
+    """取下划线或驼峰各部分首字母作为缩写"""
+    parts = [p for p in re.split(r'_+|(?<=[a-z0-9])(?=[A-Z])', name) if p]
+    return "".join(p[0] for p in parts).lower() or name[0]
+
+def _split_literals(code: str) -> List[Tuple[str, bool]]:
+    """把代码切分为(片段, 是否为字符串或注释)的列表"""
+    pattern = PY_TOKEN_PATTERN if _is_python(code) else C_TOKEN_PATTERN
+    pieces: List[Tuple[str, bool]] = []
+    position = 0
+    for match in pattern.finditer(code):
+        pieces.append((code[position:match.start()], False))
+        pieces.append((match.group(0), True))
+        position = match.end()
+    pieces.append((code[position:], False))
+    return pieces
+
+def _local_names(code: str) -> Set[str]:
+    """代码片段中绑定的变量和参数名，不含作为属性或关键字参数使用的名称"""
+    bound: Set[str] = set()
+    for match in BINDING_PATTERN.finditer(code):
+        bound.add(match.group(1) or match.group(2))
+    for match in SIGNATURE_PATTERN.finditer(code):
+        bound.update(PARAMETER_NAME_PATTERN.findall(match.group(1)))
+    external = set(ATTRIBUTE_NAME_PATTERN.findall(code)) | set(KEYWORD_ARGUMENT_PATTERN.findall(code))
+    return bound - external
+
+def _shorten_identifiers(code: str) -> str:
+    """
+    把多次出现的长局部变量名和参数名替换为缩写
+
+    只改写字符串和注释之外的代码；跳过关键字、内置名称、导入的名称、属性名、关键字参数名，
+    以及出现在字符串中的名称（f-string、模板字符串中可能引用）
+    """
+    pieces = _split_literals(code)
+    # 字符串和注释替换为空字符串，保持代码其余部分的行结构
+    source = "".join('""' if literal else piece for piece, literal in pieces)
+    literal_words = set(re.findall(r'\w+', "\n".join(piece for piece, literal in pieces if literal)))
+    imported = set()
+    for match in IMPORT_LINE_PATTERN.finditer(source):
+        imported.update(re.findall(r'\w+', match.group(0)))
+    local_names = _local_names(source)
+
+    counts = Counter(LONG_IDENTIFIER_PATTERN.findall(source))
+    existing = set(re.findall(r'\w+', code))
+    mapping: Dict[str, str] = {}
+    for name, count in counts.most_common():
+        if count < 2 or name not in local_names or name in literal_words:
+            continue
+        if name in RESERVED_IDENTIFIERS or name in imported:
+            continue
+        base = _abbreviate(name)
+        short, suffix = base, 1
+        while short in existing or keyword.iskeyword(short):
+            suffix += 1
+            short = f"{base}{suffix}"
+        existing.add(short)
+        mapping[name] = short
+
+    if not mapping:
+        return code
+    return "".join(
+        piece if literal else LONG_IDENTIFIER_PATTERN.sub(lambda m: mapping.get(m.group(0), m.group(0)), piece)
+        for piece, literal in pieces
+    )
+
+def compress_code(code: str, target_length: int) -> str:
+    """
+    压缩代码
+
+    依次删除注释和文档字符串、空行和行尾空白、压缩缩进、缩短长标识符，达到目标长度即停止，
+    代码结构始终保留，因此可能达不到很高的压缩比例
+
+    Args:
+        code: 代码
+        target_length: 目标字符数
+
+    Returns:
+        压缩后代码
+    """
+    result = code
+    for stage in (_strip_comments, _strip_blank_lines, _collapse_indentation, _shorten_identifiers):
+        if len(result) <= target_length:
+            break
+        result = stage(result)
+    return result
+
+# ---------------------------------------------------------------- 表格
+
+def _parse_table(text: str) -> Optional[Tuple[str, List[List[str]]]]:
+    """解析Markdown表格或制表符、逗号分隔的表格，无法解析时返回None"""
+    lines = [line for line in text.strip().split("\n") if line.strip()]
+    if len(lines) < 2:
+        return None
+
+    if all(line.strip().startswith("|") for line in lines):
+        rows = [[cell.strip() for cell in line.strip().strip("|").split("|")] for line in lines]
+        rows = [row for row in rows if not all(MARKDOWN_SEPARATOR_PATTERN.match(cell) for cell in row if cell)]
+        return "markdown", rows
+
+    for delimiter, kind in (("\t", "tsv"), (",", "csv")):
+        if all(delimiter in line for line in lines):
+            rows = [[cell.strip() for cell in line.split(delimiter)] for line in lines]
+            if len({len(row) for row in rows}) == 1:
+                return kind, rows
+    return None
+
+def _format_table(kind: str, rows: List[List[str]]) -> List[str]:
+    """按原格式输出表格行，Markdown表格在表头后加分隔行"""
+    if kind == "markdown":
+        lines = ["|" + "|".join(row) + "|" for row in rows]
+        if lines:
+            lines.insert(1, "|" + "|".join("-" for _ in rows[0]) + "|")
+        return lines
+    delimiter = "\t" if kind == "tsv" else ","
+    return [delimiter.join(row) for row in rows]
+
+def compress_table(text: str, target_length: int) -> str:
+    """
+    压缩表格
+
+    去除单元格多余空白、重复行以及所有数据行都为空或取值相同的列，
+    仍超出目标长度时保留表头和前面的行并注明省略的行数；无法解析为表格时按普通文本压缩
+
+    Args:
+        text: 表格文本
+        target_length: 目标字符数
+
+    Returns:
+        压缩后表格
+    """
+    parsed = _parse_table(text)
+    if parsed is None:
+        return compress_prose(text, target_length)
+    kind, rows = parsed
+
+    width = max(len(row) for row in rows)
+    rows = [row + [""] * (width - len(row)) for row in rows]
+    header, data = rows[0], list(dict.fromkeys(tuple(row) for row in rows[1:]))
+
+    keep = [
+        column for column in range(width)
+        if not data or (any(row[column] for row in data) and (len(data) < 2 or len({row[column] for row in data}) > 1))
+    ] or list(range(width))
+    rows = [[row[column] for column in keep] for row in [header] + [list(row) for row in data]]
+
+    lines = _format_table(kind, rows)
+    result = "\n".join(lines)
+    if len(result) <= target_length:
+        return result
+
+    head = 2 if kind == "markdown" else 1
+    kept = lines[:head]
+    used = sum(len(line) + 1 for line in kept)
+    for line in lines[head:]:
+        # 为省略说明预留空间
+        if used + len(line) + 1 + 16 > target_length:
+            break
+        kept.append(line)
+        used += len(line) + 1
+    omitted = len(lines) - len(kept)
+    if omitted:
+        kept.append(f"…（省略{omitted}行）")
+    return "\n".join(kept)
+
+# ---------------------------------------------------------------- 公式
+
+def compress_formula(text: str, target_length: int) -> str:
+    """
+    压缩公式
+
+    删除只影响排版的LaTeX命令和运算符两侧的空白，仍超出目标长度时按普通文本压缩
+
+    Args:
+        text: 公式文本
+        target_length: 目标字符数
+
+    Returns:
+        压缩后公式
+    """
+    result = FORMULA_LAYOUT_PATTERN.sub("", text)
+    result = FORMULA_OPERATOR_SPACE_PATTERN.sub(r'\1', result)
+    result = "\n".join(re.sub(r'[ \t]+', ' ', line).strip() for line in result.split("\n") if line.strip())
+    if len(result) <= target_length:
+        return result
+    return compress_prose(result, target_length)
+
+# ---------------------------------------------------------------- 链接
+
+def _is_tracking_param(segment: str) -> bool:
+    """判断查询字符串中的一段是否为跟踪参数"""
+    key = unquote_plus(segment.split("=", 1)[0]).lower()
+    return key.startswith("utm_") or key in TRACKING_PARAMS
+
+def canonicalize_url(url: str) -> str:
+    """
+    规范化URL：协议和主机名小写，去掉默认端口、跟踪参数和末尾斜杠
+
+    其余查询参数保持原有顺序和编码，没有跟踪参数时查询字符串原样保留（可能带签名），片段保留
+
+    Args:
+        url: URL
+
+    Returns:
+        规范化后的URL，无法解析时原样返回
+    """
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return url
+
+    scheme = parts.scheme.lower()
+    netloc = parts.netloc.lower()
+    if (scheme == "http" and netloc.endswith(":80")) or (scheme == "https" and netloc.endswith(":443")):
+        netloc = netloc.rsplit(":", 1)[0]
+
+    query = parts.query
+    segments = query.split("&") if query else []
+    kept = [segment for segment in segments if not _is_tracking_param(segment)]
+    if len(kept) < len(segments):
+        query = "&".join(kept)
+    path = parts.path.rstrip("/")
+    return urlunsplit((scheme, netloc, path, query, parts.fragment))
+
+def compress_links(text: str, target_length: int) -> str:
+    """
+    压缩链接
+
+    规范化文本中的所有URL并删除规范化后重复的行，仍超出目标长度时按普通文本压缩
+
+    Args:
+        text: 含链接的文本
+        target_length: 目标字符数
+
+    Returns:
+        压缩后文本
+    """
+    def replace(match: re.Match) -> str:
+        url = match.group(0)
+        trailing = ""
+        while url and url[-1] in URL_TRAILING_PUNCTUATION:
+            trailing = url[-1] + trailing
+            url = url[:-1]
+        return canonicalize_url(url) + trailing
+
+    result = URL_PATTERN.sub(replace, text)
+    lines = list(dict.fromkeys(line.strip() for line in result.split("\n") if line.strip()))
+    result = "\n".join(lines)
+    if len(result) <= target_length:
+        return result
+    return compress_prose(result, target_length)
+
+# ---------------------------------------------------------------- 评估
+
+def estimate_retention(original_text: str, compressed_text: str) -> float:
+    """
+    估算信息保留率
+
+    与calculate_information_retention相同，按原文中不同的词在压缩后仍出现的比例估算，
+    但改用text_features切词，中文按字和双字统计，不把整段中文当作一个词；不再按压缩比例折减
+
+    Args:
+        original_text: 原始文本
+        compressed_text: 压缩后文本
+
+    Returns:
+        信息保留率（百分比）
+    """
+    original = text_features(original_text)
+    if not original:
+        return 100.0
+    compressed = text_features(compressed_text)
+    kept = sum(1 for token in original if token in compressed)
+    return kept / len(original) * 100
+
+LOCAL_COMPRESSORS: Dict[CompressionType, Callable[[str, int], str]] = {
+    CompressionType.TEXT: compress_prose,
+    CompressionType.CODE: compress_code,
+    CompressionType.TABLE: compress_table,
+    CompressionType.FORMULA: compress_formula,
+    CompressionType.LINK: compress_links
+}
+
+def compress_locally(
+    text: str,
+    compression_ratio: float = 50.0,
+    compression_type: Optional[CompressionType] = None
+) -> str:
+    """
+    本地压缩文本
+
+    Args:
+        text: 要压缩的文本
+        compression_ratio: 压缩比例（百分比）
+        compression_type: 压缩类型，为None时按内容分段，各段分别判断
+
+    Returns:
+        压缩后文本
+    """
+    if not text:
+        return ""
+    if compression_type is not None:
+        compressor = LOCAL_COMPRESSORS.get(compression_type, compress_prose)
+        return compressor(text, _target_length(text, compression_ratio))
+
+    # 未指定类型时按内容切成代码、表格、链接和正文段，各段使用对应的压缩方式
+    parts = []
+    for segment_type, segment in iter_segments(text):
+        compressed = LOCAL_COMPRESSORS[segment_type](segment, _target_length(segment, compression_ratio))
+        if compressed.strip():
+            parts.append(compressed.strip("\n"))
+    return "\n\n".join(parts)
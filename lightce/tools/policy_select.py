@@ -5,9 +5,10 @@
 通过分析LLM输入的prompt，为短期记忆、长期记忆、参数输入、遵循的规则选择相应的处理策略
 """
 
-from typing import Dict, List, Any, Optional, Union
-from pydantic import BaseModel, Field
+from typing import Dict, List, Any, Optional, Union, Tuple
+from pydantic import BaseModel, Field, ValidationError, conint
 from langchain_core.tools import BaseTool
+import json
 import logging
 import re
 from enum import Enum
@@ -24,12 +25,30 @@ class MemoryType(str, Enum):
     PARAMETER = "parameter"        # 参数输入
     RULE = "rule"                  # 遵循的规则
 
+class PolicySelectMode(str, Enum):
+    """策略选择模式枚举"""
+    MULTI_CALL = "multi_call"      # 分析与每种记忆类型各调用一次LLM
+    SINGLE_CALL = "single_call"    # 单次LLM调用返回分析和全部压缩级别
+    HEURISTIC = "heuristic"        # 基于prompt特征的本地规则，不调用LLM
+
+# 压缩级别范围
+MIN_COMPRESSION_LEVEL = 1
+MAX_COMPRESSION_LEVEL = 4
+DEFAULT_COMPRESSION_LEVEL = 2
+
+# 启发式选择使用的特征模式
+CODE_PATTERN = re.compile(r'```|\b(?:def|class|import|return|function|const|var)\b|[{};]\s*$', re.MULTILINE)
+NUMBER_PATTERN = re.compile(r'\d+(?:\.\d+)?')
+PARAMETER_PATTERN = re.compile(r'[A-Za-z_\u4e00-\u9fff][\w\u4e00-\u9fff]*\s*[=:：]\s*\S+|参数|配置')
+RULE_PATTERN = re.compile(r'必须|禁止|不得|不要|务必|应当|应该|规则|要求|约束|\b(?:must|never|always|should|do not)\b', re.IGNORECASE)
+
 class PolicySelectConfig(BaseModel):
     """策略选择配置"""
     
     agent_model_config: Optional[ModelConfig] = None
     enable_analysis: bool = True
     enable_strategy_selection: bool = True
+    select_mode: PolicySelectMode = PolicySelectMode.SINGLE_CALL
     memory_priority: Dict[MemoryType, int] = Field(
         default_factory=lambda: {
             MemoryType.SHORT_TERM: 1,
@@ -45,6 +64,11 @@ class PolicySelectResult(BaseModel):
     prompt_analysis: Dict[str, Any]
     compression_levels: Dict[MemoryType, int]  # 压缩级别1-4，越往上越激进
 
+class PolicyDecision(BaseModel):
+    """单次调用模式下LLM输出的结构化决策"""
+    analysis: Dict[str, Any] = Field(default_factory=dict)
+    compression_levels: Dict[MemoryType, conint(ge=MIN_COMPRESSION_LEVEL, le=MAX_COMPRESSION_LEVEL)]
+
 class PolicySelectAgent:
     """策略选择代理类"""
     
@@ -73,15 +97,28 @@ class PolicySelectAgent:
         try:
             logger.info("开始分析prompt并选择策略")
             
-            # 分析prompt
             prompt_analysis = {}
-            if self.config.enable_analysis:
-                prompt_analysis = self._analyze_prompt(prompt)
-            
-            # 选择策略
             compression_levels = {}
-            if self.config.enable_strategy_selection:
-                compression_levels = self._select_compression_levels(prompt, prompt_analysis)
+            
+            if self.config.select_mode == PolicySelectMode.MULTI_CALL:
+                # 分析prompt
+                if self.config.enable_analysis:
+                    prompt_analysis = self._analyze_prompt(prompt)
+                
+                # 选择策略
+                if self.config.enable_strategy_selection:
+                    compression_levels = self._select_compression_levels(prompt, prompt_analysis)
+            
+            elif self.config.enable_analysis or self.config.enable_strategy_selection:
+                if self.config.select_mode == PolicySelectMode.SINGLE_CALL:
+                    prompt_analysis, compression_levels = self._select_policy_single_call(prompt)
+                else:
+                    prompt_analysis, compression_levels = self._select_policy_heuristic(prompt)
+                
+                if not self.config.enable_analysis:
+                    prompt_analysis = {}
+                if not self.config.enable_strategy_selection:
+                    compression_levels = {}
             
             # 创建结果
             result = PolicySelectResult(
@@ -218,12 +255,156 @@ class PolicySelectAgent:
         result = self.agent.run(selection_prompt)
         
         if result["success"]:
-            # 直接返回agent的响应
-            return 2, result["response"]
+            data = self._parse_json_object(result["response"])
+            try:
+                level = int(data["compression_level"])
+            except (TypeError, KeyError, ValueError):
+                logger.warning(f"{memory_type.value}处理策略级别解析失败，使用默认级别")
+                return DEFAULT_COMPRESSION_LEVEL, result["response"]
+            
+            level = max(MIN_COMPRESSION_LEVEL, min(MAX_COMPRESSION_LEVEL, level))
+            return level, str(data.get("reason", result["response"]))
         else:
             logger.warning(f"处理策略级别选择失败: {result.get('error', '未知错误')}")
             # 使用默认策略
-            return 2, "选择失败，使用默认级别"
+            return DEFAULT_COMPRESSION_LEVEL, "选择失败，使用默认级别"
+    
+    def _select_policy_single_call(self, prompt: str) -> Tuple[Dict[str, Any], Dict[MemoryType, int]]:
+        """
+        通过单次LLM调用完成prompt分析并为所有记忆类型选择压缩级别
+        
+        LLM调用失败或输出不符合结构要求时回退到启发式选择
+        
+        Args:
+            prompt: 输入的prompt
+        
+        Returns:
+            prompt分析结果和各记忆类型的压缩级别
+        """
+        level_keys = ", ".join(f'"{memory_type.value}": 数字' for memory_type in MemoryType)
+        selection_prompt = f"""
+请分析以下LLM输入的prompt，并为每种记忆类型选择处理策略级别：
+
+{prompt}
+
+**分析维度：**
+- 内容类型（文本、代码、公式、表格、链接等）、主题领域和复杂度
+- 主要功能、输出要求和精度要求
+- 短期记忆、长期记忆、参数输入、规则遵循的需求
+
+**处理策略级别说明：**
+- 级别1：轻度处理，保留大部分原始信息，适合重要且需要详细保留的内容
+- 级别2：中度处理，平衡信息保留和处理效率，适合一般重要内容
+- 级别3：高度处理，大幅减少内容但保留核心信息，适合次要内容
+- 级别4：极度处理，只保留最关键信息，适合临时或参考性内容
+
+**记忆类型特点：**
+- short_term（短期记忆）：临时存储，可接受较高处理强度
+- long_term（长期记忆）：永久存储，需要保留重要信息
+- parameter（参数输入）：配置信息，需要精确保留
+- rule（遵循规则）：操作规范，需要清晰保留
+
+请严格以JSON格式输出，不要包含其他内容：
+{{
+    "analysis": {{"content_type": "...", "domain": "...", "complexity": "...", "main_function": "..."}},
+    "compression_levels": {{{level_keys}}}
+}}
+"""
+        
+        result = self.agent.run(selection_prompt)
+        
+        if result["success"]:
+            try:
+                decision = PolicyDecision(**self._parse_json_object(result["response"]))
+                missing = [t.value for t in MemoryType if t not in decision.compression_levels]
+                if missing:
+                    raise ValueError(f"缺少记忆类型: {missing}")
+                
+                prompt_analysis = dict(decision.analysis)
+                prompt_analysis["select_mode"] = PolicySelectMode.SINGLE_CALL.value
+                return prompt_analysis, dict(decision.compression_levels)
+                
+            except (TypeError, ValueError, ValidationError) as e:
+                logger.warning(f"单次调用策略选择结果无效，回退到启发式选择: {str(e)}")
+        else:
+            logger.warning(f"单次调用策略选择失败，回退到启发式选择: {result.get('error', '未知错误')}")
+        
+        return self._select_policy_heuristic(prompt)
+    
+    def _select_policy_heuristic(self, prompt: str) -> Tuple[Dict[str, Any], Dict[MemoryType, int]]:
+        """
+        根据prompt长度和内容特征选择压缩级别，不调用LLM
+        
+        Args:
+            prompt: 输入的prompt
+        
+        Returns:
+            prompt特征和各记忆类型的压缩级别
+        """
+        length = len(prompt)
+        has_code = bool(CODE_PATTERN.search(prompt))
+        number_count = len(NUMBER_PATTERN.findall(prompt))
+        parameter_count = len(PARAMETER_PATTERN.findall(prompt))
+        rule_count = len(RULE_PATTERN.findall(prompt))
+        
+        # 内容越长，整体压缩越激进
+        if length < 500:
+            base_level = 1
+        elif length < 2000:
+            base_level = 2
+        elif length < 6000:
+            base_level = 3
+        else:
+            base_level = 4
+        
+        # 代码对删减敏感，整体降低一级
+        if has_code:
+            base_level = max(MIN_COMPRESSION_LEVEL, base_level - 1)
+        
+        # 短期记忆可接受更高处理强度；参数和规则需要精确保留
+        compression_levels = {
+            MemoryType.SHORT_TERM: min(MAX_COMPRESSION_LEVEL, base_level + 1),
+            MemoryType.LONG_TERM: base_level,
+            MemoryType.PARAMETER: MIN_COMPRESSION_LEVEL if parameter_count or number_count >= 3 else min(base_level, 2),
+            MemoryType.RULE: MIN_COMPRESSION_LEVEL if rule_count else min(base_level, 2)
+        }
+        
+        prompt_analysis = {
+            "select_mode": PolicySelectMode.HEURISTIC.value,
+            "length": length,
+            "has_code": has_code,
+            "number_count": number_count,
+            "parameter_count": parameter_count,
+            "rule_keyword_count": rule_count
+        }
+        
+        return prompt_analysis, compression_levels
+    
+    def _parse_json_object(self, response: str) -> Dict[str, Any]:
+        """
+        从agent响应中解析JSON对象
+        
+        Args:
+            response: agent响应文本
+        
+        Returns:
+            解析出的字典，无法解析时返回空字典
+        """
+        if not response:
+            return {}
+        
+        try:
+            data = json.loads(response)
+        except json.JSONDecodeError:
+            json_match = re.search(r'\{.*\}', response, re.DOTALL)
+            if not json_match:
+                return {}
+            try:
+                data = json.loads(json_match.group())
+            except json.JSONDecodeError:
+                return {}
+        
+        return data if isinstance(data, dict) else {}
     
     def batch_select_policy(self, prompts: List[str]) -> List[PolicySelectResult]:
         """
@@ -297,7 +478,8 @@ class PolicySelectTool(BaseTool):
 def create_policy_select_agent(
     model_name: Optional[str] = None,
     temperature: float = 0.1,
-    provider: str = "openai"
+    provider: str = "openai",
+    select_mode: PolicySelectMode = PolicySelectMode.SINGLE_CALL
 ) -> PolicySelectAgent:
     """
     创建策略选择代理的便捷函数
@@ -306,6 +488,7 @@ def create_policy_select_agent(
         model_name: 模型名称
         temperature: 温度参数
         provider: 模型提供商
+        select_mode: 策略选择模式
     
     Returns:
         PolicySelectAgent实例
@@ -321,7 +504,8 @@ def create_policy_select_agent(
     
     # 创建配置
     config = PolicySelectConfig(
-        agent_model_config=model_config
+        agent_model_config=model_config,
+        select_mode=select_mode
     )
     
     return PolicySelectAgent(config)
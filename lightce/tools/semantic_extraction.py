@@ -9,30 +9,50 @@ from typing import Dict, List, Any, Optional, Union
 from pydantic import BaseModel, Field
 from langchain_core.tools import BaseTool
 from langchain_core.messages import HumanMessage
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
 import json
 import logging
 
 from ..agent.system import UniversalAgent, ModelConfig
 from ..prompt.semantic_extration import (
     ExtractionLevel, ExtractionType,
-    get_extraction_prompt, get_all_extraction_prompts,
+    get_extraction_prompt, get_extraction_types,
     get_extraction_workflow, get_level_description
 )
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 旧版级别名称到当前级别的映射
+LEGACY_EXTRACTION_LEVELS = {
+    "basic": ExtractionLevel.SHORT,
+    "intermediate": ExtractionLevel.MEDIUM,
+    "advanced": ExtractionLevel.LONG,
+    "expert": ExtractionLevel.EXTENDED
+}
+
+def parse_extraction_level(level: str) -> ExtractionLevel:
+    """按名称解析提取级别，兼容旧版名称，无法识别时使用ExtractionLevel.SHORT"""
+    name = level.lower()
+    if name in LEGACY_EXTRACTION_LEVELS:
+        return LEGACY_EXTRACTION_LEVELS[name]
+    try:
+        return ExtractionLevel(name)
+    except ValueError:
+        return ExtractionLevel.SHORT
+
 class SemanticExtractionConfig(BaseModel):
     """语义提取配置"""
     extraction_level: ExtractionLevel = Field(
-        default=ExtractionLevel.BASIC,
-        description="提取级别：BASIC, INTERMEDIATE, ADVANCED, EXPERT"
+        default=ExtractionLevel.SHORT,
+        description="提取级别：SHORT, MEDIUM, LONG, EXTENDED"
     )
     extraction_types: Optional[List[ExtractionType]] = Field(
         default=None,
         description="指定提取类型列表，如果为None则使用该级别的所有类型"
     )
-    model_config: Optional[ModelConfig] = Field(
+    agent_model_config: Optional[ModelConfig] = Field(
         default=None,
         description="模型配置参数"
     )
@@ -40,6 +60,15 @@ class SemanticExtractionConfig(BaseModel):
         default=True,
         description="是否启用多阶段处理"
     )
+    enable_parallel: bool = Field(
+        default=True,
+        description="是否并发执行各提取类型的LLM调用"
+    )
+    max_concurrency: int = Field(
+        default=4,
+        ge=1,
+        description="并发提取的最大类型数"
+    )
 
 class SemanticExtractionResult(BaseModel):
     """语义提取结果"""
@@ -59,7 +88,7 @@ class SemanticExtractionAgent:
             config: 语义提取配置
         """
         self.config = config or SemanticExtractionConfig()
-        self.agent = UniversalAgent(self.config.model_config)
+        self.agent = UniversalAgent(self.config.agent_model_config)
         self.extraction_history: List[SemanticExtractionResult] = []
         
         logger.info(f"初始化语义提取代理，级别: {self.config.extraction_level.value}")
@@ -76,31 +105,25 @@ class SemanticExtractionAgent:
             语义提取结果
         """
         try:
-            # 确定要使用的提取类型
-            if extraction_types is None:
-                if self.config.extraction_types is None:
-                    # 使用该级别的所有类型
-                    all_prompts = get_all_extraction_prompts(self.config.extraction_level, text=text)
-                    extraction_types = [ExtractionType(t) for t in all_prompts.keys()]
-                else:
-                    extraction_types = self.config.extraction_types
+            extraction_types = self._resolve_extraction_types(text, extraction_types)
             
             logger.info(f"开始语义提取，级别: {self.config.extraction_level.value}, 类型: {[t.value for t in extraction_types]}")
             
-            results = {}
+            # 各类型提取互不依赖，并发执行后按类型顺序合并
+            if self.config.enable_parallel and len(extraction_types) > 1:
+                max_workers = min(self.config.max_concurrency, len(extraction_types))
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    outputs = list(executor.map(
+                        lambda extraction_type: self._extract_single_type_isolated(text, extraction_type),
+                        extraction_types
+                    ))
+            else:
+                outputs = [self._extract_single_type_isolated(text, t) for t in extraction_types]
             
-            # 执行每种类型的提取
-            for extraction_type in extraction_types:
-                try:
-                    result = self._extract_single_type(text, extraction_type)
-                    results[extraction_type.value] = result
-                    
-                    logger.info(f"完成 {extraction_type.value} 提取")
-                    
-                except Exception as e:
-                    error_msg = f"{extraction_type.value} 提取失败: {str(e)}"
-                    logger.error(error_msg)
-                    results[extraction_type.value] = {"error": error_msg}
+            results = {
+                extraction_type.value: output
+                for extraction_type, output in zip(extraction_types, outputs)
+            }
             
             # 创建结果
             extraction_result = SemanticExtractionResult(
@@ -127,16 +150,99 @@ class SemanticExtractionAgent:
                 results={}
             )
     
-    def _extract_single_type(self, text: str, extraction_type: ExtractionType) -> Dict[str, Any]:
+    async def aextract_semantic(self, text: str, extraction_types: Optional[List[ExtractionType]] = None) -> SemanticExtractionResult:
         """
-        执行单一类型的语义提取
+        异步执行语义提取，各提取类型的LLM调用在事件循环中并发执行
         
         Args:
             text: 输入文本
-            extraction_type: 提取类型
+            extraction_types: 指定提取类型，如果为None则使用配置中的类型
         
         Returns:
-            提取结果
+            语义提取结果
+        """
+        try:
+            extraction_types = self._resolve_extraction_types(text, extraction_types)
+            
+            logger.info(f"开始异步语义提取，级别: {self.config.extraction_level.value}, 类型: {[t.value for t in extraction_types]}")
+            
+            semaphore = asyncio.Semaphore(self.config.max_concurrency)
+            
+            async def extract_limited(extraction_type: ExtractionType) -> Dict[str, Any]:
+                async with semaphore:
+                    return await self._aextract_single_type_isolated(text, extraction_type)
+            
+            outputs = await asyncio.gather(*(extract_limited(t) for t in extraction_types))
+            
+            results = {
+                extraction_type.value: output
+                for extraction_type, output in zip(extraction_types, outputs)
+            }
+            
+            extraction_result = SemanticExtractionResult(
+                success=True,
+                extraction_level=self.config.extraction_level.value,
+                extraction_types=[t.value for t in extraction_types],
+                results=results
+            )
+            
+            self.extraction_history.append(extraction_result)
+            
+            logger.info("语义提取完成")
+            return extraction_result
+            
+        except Exception as e:
+            error_msg = f"语义提取失败: {str(e)}"
+            logger.error(error_msg)
+            
+            return SemanticExtractionResult(
+                success=False,
+                extraction_level=self.config.extraction_level.value,
+                extraction_types=[],
+                results={}
+            )
+    
+    def _resolve_extraction_types(self, text: str, extraction_types: Optional[List[ExtractionType]]) -> List[ExtractionType]:
+        """确定要使用的提取类型"""
+        if extraction_types is not None:
+            return extraction_types
+        
+        if self.config.extraction_types is None:
+            # 使用该级别的所有类型
+            return get_extraction_types(self.config.extraction_level)
+        
+        return self.config.extraction_types
+    
+    def _extract_single_type_isolated(self, text: str, extraction_type: ExtractionType) -> Dict[str, Any]:
+        """执行单一类型的提取，失败时返回错误信息而不影响其他类型"""
+        try:
+            result = self._extract_single_type(text, extraction_type)
+            logger.info(f"完成 {extraction_type.value} 提取")
+            return result
+            
+        except Exception as e:
+            error_msg = f"{extraction_type.value} 提取失败: {str(e)}"
+            logger.error(error_msg)
+            return {"error": error_msg}
+    
+    async def _aextract_single_type_isolated(self, text: str, extraction_type: ExtractionType) -> Dict[str, Any]:
+        """异步执行单一类型的提取，失败时返回错误信息而不影响其他类型"""
+        try:
+            result = await self._aextract_single_type(text, extraction_type)
+            logger.info(f"完成 {extraction_type.value} 提取")
+            return result
+            
+        except Exception as e:
+            error_msg = f"{extraction_type.value} 提取失败: {str(e)}"
+            logger.error(error_msg)
+            return {"error": error_msg}
+    
+    def _build_extraction_message(self, text: str, extraction_type: ExtractionType) -> tuple[str, str]:
+        """
+        构建单一类型提取的用户消息
+        
+        Returns:
+            (用户消息, 使用的提示词)
         """
         # 获取提示词
         prompt = get_extraction_prompt(
@@ -153,10 +259,10 @@ class SemanticExtractionAgent:
 
 请确保输出格式规范，内容准确完整。
 """
-        
-        # 使用agent执行提取
-        result = self.agent.run(user_message)
-        
+        return user_message, prompt
+    
+    def _build_single_type_result(self, result: Dict[str, Any], prompt: str) -> Dict[str, Any]:
+        """整理单一类型的Agent执行结果"""
         if result["success"]:
             return {
                 "extracted_content": result["response"],
@@ -166,6 +272,38 @@ class SemanticExtractionAgent:
         else:
             raise Exception(f"Agent执行失败: {result.get('error', '未知错误')}")
     
+    def _extract_single_type(self, text: str, extraction_type: ExtractionType) -> Dict[str, Any]:
+        """
+        执行单一类型的语义提取
+        
+        Args:
+            text: 输入文本
+            extraction_type: 提取类型
+        
+        Returns:
+            提取结果
+        """
+        user_message, prompt = self._build_extraction_message(text, extraction_type)
+        
+        # 使用agent执行提取
+        result = self.agent.run(user_message)
+        return self._build_single_type_result(result, prompt)
+    
+    async def _aextract_single_type(self, text: str, extraction_type: ExtractionType) -> Dict[str, Any]:
+        """
+        异步执行单一类型的语义提取
+        
+        Args:
+            text: 输入文本
+            extraction_type: 提取类型
+        
+        Returns:
+            提取结果
+        """
+        user_message, prompt = self._build_extraction_message(text, extraction_type)
+        result = await self.agent.arun(user_message)
+        return self._build_single_type_result(result, prompt)
+    
     def batch_extract(self, texts: List[str], extraction_types: Optional[List[ExtractionType]] = None) -> List[SemanticExtractionResult]:
         """
         批量语义提取
@@ -215,13 +353,13 @@ class SemanticExtractionTool(BaseTool):
         super().__init__()
         self.agent = agent
     
-    def _run(self, text: str, extraction_level: str = "basic", extraction_types: Optional[List[str]] = None) -> Dict[str, Any]:
+    def _run(self, text: str, extraction_level: str = "short", extraction_types: Optional[List[str]] = None) -> Dict[str, Any]:
         """
         运行语义提取
         
         Args:
             text: 输入文本
-            extraction_level: 提取级别 (basic, intermediate, advanced, expert)
+            extraction_level: 提取级别 (short, medium, long, extended，兼容basic, intermediate, advanced, expert)
             extraction_types: 提取类型列表
         
         Returns:
@@ -229,14 +367,7 @@ class SemanticExtractionTool(BaseTool):
         """
         try:
             # 转换提取级别
-            level_map = {
-                "basic": ExtractionLevel.BASIC,
-                "intermediate": ExtractionLevel.INTERMEDIATE,
-                "advanced": ExtractionLevel.ADVANCED,
-                "expert": ExtractionLevel.EXPERT
-            }
-            
-            extraction_level_enum = level_map.get(extraction_level.lower(), ExtractionLevel.BASIC)
+            extraction_level_enum = parse_extraction_level(extraction_level)
             
             # 转换提取类型
             extraction_types_enum = None
@@ -271,7 +402,7 @@ class SemanticExtractionTool(BaseTool):
 
 # 便捷函数
 def create_semantic_extraction_agent(
-    extraction_level: str = "basic",
+    extraction_level: str = "short",
     model_name: Optional[str] = None,
     temperature: float = 0.1,
     provider: str = "openai"
@@ -289,14 +420,7 @@ def create_semantic_extraction_agent(
         SemanticExtractionAgent实例
     """
     # 转换提取级别
-    level_map = {
-        "basic": ExtractionLevel.BASIC,
-        "intermediate": ExtractionLevel.INTERMEDIATE,
-        "advanced": ExtractionLevel.ADVANCED,
-        "expert": ExtractionLevel.EXPERT
-    }
-    
-    extraction_level_enum = level_map.get(extraction_level.lower(), ExtractionLevel.BASIC)
+    extraction_level_enum = parse_extraction_level(extraction_level)
     
     # 创建模型配置
     model_config = None
@@ -310,14 +434,14 @@ def create_semantic_extraction_agent(
     # 创建配置
     config = SemanticExtractionConfig(
         extraction_level=extraction_level_enum,
-        model_config=model_config
+        agent_model_config=model_config
     )
     
     return SemanticExtractionAgent(config)
 
 def extract_semantic_with_agent(
     text: str,
-    extraction_level: str = "basic",
+    extraction_level: str = "short",
     extraction_types: Optional[List[str]] = None,
     model_name: Optional[str] = None,
     temperature: float = 0.1
@@ -350,7 +474,7 @@ if __name__ == "__main__":
     """
     
     # 创建语义提取代理
-    agent = create_semantic_extraction_agent("basic")
+    agent = create_semantic_extraction_agent("short")
     
     # 执行提取
     result = agent.extract_semantic(test_text)
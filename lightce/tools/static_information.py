@@ -16,23 +16,48 @@ import re
 from ..agent.system import UniversalAgent, ModelConfig
 from ..prompt.static_information import (
     InformationLevel, InformationType,
-    get_information_prompt, get_all_information_prompts,
+    get_information_prompt, get_information_types,
     get_information_workflow, get_level_description
 )
 
 # 配置日志
 logger = logging.getLogger(__name__)
 
+# 合并提取时，各类型提示词中输入文本位置的占位说明
+COMBINED_TEXT_PLACEHOLDER = "【输入文本】"
+
+# 旧版级别名称到当前级别的映射
+LEGACY_INFORMATION_LEVELS = {
+    "basic": InformationLevel.MINIMAL,
+    "intermediate": InformationLevel.MODERATE,
+    "advanced": InformationLevel.COMPREHENSIVE,
+    "expert": InformationLevel.EXTENSIVE
+}
+
+def parse_information_level(level: str) -> InformationLevel:
+    """按名称解析信息提取级别，兼容旧版名称，无法识别时使用InformationLevel.MINIMAL"""
+    name = level.lower()
+    if name in LEGACY_INFORMATION_LEVELS:
+        return LEGACY_INFORMATION_LEVELS[name]
+    try:
+        return InformationLevel(name)
+    except ValueError:
+        return InformationLevel.MINIMAL
+
 class StaticInformationConfig(BaseModel):
     """静态信息提取配置"""
     information_level: InformationLevel = Field(
-        default=InformationLevel.BASIC,
-        description="提取级别：BASIC, INTERMEDIATE, ADVANCED, EXPERT"
+        default=InformationLevel.MINIMAL,
+        description="提取级别：MINIMAL, MODERATE, COMPREHENSIVE, EXTENSIVE"
     )
-    model_config: Optional[ModelConfig] = Field(
+    agent_model_config: Optional[ModelConfig] = Field(
         default=None,
         description="模型配置参数"
     )
+    enable_combined_extraction: bool = Field(
+        default=True,
+        description="是否通过单次LLM调用同时提取所有类型，解析失败时回退到逐类型提取"
+    )
 
 class StaticInformationResult(BaseModel):
     """静态信息提取结果"""
@@ -52,7 +77,7 @@ class StaticInformationAgent:
             config: 静态信息提取配置
         """
         self.config = config or StaticInformationConfig()
-        self.agent = UniversalAgent(self.config.model_config)
+        self.agent = UniversalAgent(self.config.agent_model_config)
         self.extraction_history: List[StaticInformationResult] = []
         
         logger.info(f"初始化静态信息提取代理，级别: {self.config.information_level.value}")
@@ -69,25 +94,35 @@ class StaticInformationAgent:
         """
         try:
             # 使用该级别的所有类型
-            all_prompts = get_all_information_prompts(self.config.information_level, text=text)
-            information_types = [InformationType(t) for t in all_prompts.keys()]
+            information_types = get_information_types(self.config.information_level)
             
             logger.info(f"开始静态信息提取，级别: {self.config.information_level.value}, 类型: {[t.value for t in information_types]}")
             
-            results = {}
+            results = None
             
-            # 执行每种类型的提取
-            for information_type in information_types:
+            # 优先单次调用提取所有类型，输入文本只发送一次
+            if self.config.enable_combined_extraction and len(information_types) > 1:
                 try:
-                    result = self._extract_single_type(text, information_type)
-                    results[information_type.value] = result
-                    
-                    logger.info(f"完成 {information_type.value} 提取")
-                    
+                    results = self._extract_combined(text, information_types)
+                    logger.info("完成合并提取")
                 except Exception as e:
-                    error_msg = f"{information_type.value} 提取失败: {str(e)}"
-                    logger.error(error_msg)
-                    results[information_type.value] = {"error": error_msg}
+                    logger.warning(f"合并提取失败，回退到逐类型提取: {str(e)}")
+            
+            if results is None:
+                results = {}
+                
+                # 执行每种类型的提取
+                for information_type in information_types:
+                    try:
+                        result = self._extract_single_type(text, information_type)
+                        results[information_type.value] = result
+                        
+                        logger.info(f"完成 {information_type.value} 提取")
+                        
+                    except Exception as e:
+                        error_msg = f"{information_type.value} 提取失败: {str(e)}"
+                        logger.error(error_msg)
+                        results[information_type.value] = {"error": error_msg}
             
             # 创建结果
             extraction_result = StaticInformationResult(
@@ -156,6 +191,118 @@ class StaticInformationAgent:
         else:
             raise Exception(f"Agent执行失败: {result.get('error', '未知错误')}")
     
+    def _extract_combined(self, text: str, information_types: List[InformationType]) -> Dict[str, Any]:
+        """
+        通过单次LLM调用同时执行多种类型的静态信息提取
+        
+        Args:
+            text: 输入文本
+            information_types: 提取类型列表
+        
+        Returns:
+            按类型划分的提取结果，格式与逐类型提取一致
+        
+        Raises:
+            Exception: Agent执行失败或响应无法解析为所有类型的结果
+        """
+        # 各类型提示词中的文本位置用占位说明代替，原文只在末尾出现一次
+        type_keys = [t.value for t in information_types]
+        type_prompts = {
+            t.value: get_information_prompt(self.config.information_level, t, text=COMBINED_TEXT_PLACEHOLDER)
+            for t in information_types
+        }
+        
+        tasks_text = "\n\n".join(
+            f"### 任务 {key}\n{prompt}" for key, prompt in type_prompts.items()
+        )
+        
+        user_message = f"""
+请一次性完成以下{len(type_keys)}项静态信息提取任务，所有任务共用同一段输入文本：
+
+{tasks_text}
+
+{COMBINED_TEXT_PLACEHOLDER}
+{text}
+
+请严格以JSON对象格式输出结果：键为任务名称（{", ".join(type_keys)}），值为该任务按要求格式输出的完整文本。不要输出JSON以外的任何内容。
+"""
+        
+        result = self.agent.run(user_message)
+        if not result["success"]:
+            raise Exception(f"Agent执行失败: {result.get('error', '未知错误')}")
+        
+        sections = self._parse_combined_response(result["response"], type_keys)
+        if sections is None:
+            raise ValueError("合并提取响应无法解析为所有类型的结果")
+        
+        return {
+            key: {
+                "extracted_content": sections[key],
+                "prompt_used": type_prompts[key],
+                "agent_response": result,
+                "raw_content": sections[key]
+            }
+            for key in type_keys
+        }
+    
+    def _parse_combined_response(self, response: str, type_keys: List[str]) -> Optional[Dict[str, str]]:
+        """
+        解析合并提取的响应，支持JSON对象和按"### 任务 xxx"分段的文本
+        
+        Args:
+            response: Agent响应文本
+            type_keys: 期望的类型键列表
+        
+        Returns:
+            类型键到提取内容的映射，缺少任意类型时返回None
+        """
+        if not response:
+            return None
+        
+        content = response.strip()
+        
+        # 去除Markdown代码块包裹
+        fence_match = re.match(r'^```(?:json)?\s*(.*?)\s*```$', content, re.DOTALL)
+        if fence_match:
+            content = fence_match.group(1)
+        
+        parsed = None
+        try:
+            parsed = json.loads(content)
+        except json.JSONDecodeError:
+            json_match = re.search(r'\{.*\}', content, re.DOTALL)
+            if json_match:
+                try:
+                    parsed = json.loads(json_match.group())
+                except json.JSONDecodeError:
+                    parsed = None
+        
+        if isinstance(parsed, dict):
+            sections = {}
+            for key in type_keys:
+                value = parsed.get(key)
+                if value is None:
+                    return None
+                if not isinstance(value, str):
+                    value = json.dumps(value, ensure_ascii=False, indent=2)
+                sections[key] = value.strip()
+            return sections
+        
+        # 分段文本格式
+        pattern = r'^#+\s*(?:任务\s*)?(' + "|".join(re.escape(key) for key in type_keys) + r')\s*$'
+        headers = list(re.finditer(pattern, content, re.MULTILINE))
+        if not headers:
+            return None
+        
+        sections = {}
+        for i, header in enumerate(headers):
+            end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+            sections[header.group(1)] = content[header.end():end].strip()
+        
+        if any(not sections.get(key) for key in type_keys):
+            return None
+        return sections
+    
     def batch_extract(self, texts: List[str]) -> List[StaticInformationResult]:
         """
         批量静态信息提取
@@ -204,27 +351,20 @@ class StaticInformationTool(BaseTool):
         super().__init__()
         self.agent = agent
     
-    def _run(self, text: str, information_level: str = "basic") -> Dict[str, Any]:
+    def _run(self, text: str, information_level: str = "minimal") -> Dict[str, Any]:
         """
         运行静态信息提取
         
         Args:
             text: 输入文本
-            information_level: 提取级别 (basic, intermediate, advanced, expert)
+            information_level: 提取级别 (minimal, moderate, comprehensive, extensive，兼容basic, intermediate, advanced, expert)
         
         Returns:
             提取结果
         """
         try:
             # 转换提取级别
-            level_map = {
-                "basic": InformationLevel.BASIC,
-                "intermediate": InformationLevel.INTERMEDIATE,
-                "advanced": InformationLevel.ADVANCED,
-                "expert": InformationLevel.EXPERT
-            }
-            
-            information_level_enum = level_map.get(information_level.lower(), InformationLevel.BASIC)
+            information_level_enum = parse_information_level(information_level)
             
             # 执行提取
             result = self.agent.extract_information(text)
@@ -244,7 +384,7 @@ class StaticInformationTool(BaseTool):
 
 # 便捷函数
 def create_static_information_agent(
-    information_level: str = "basic",
+    information_level: str = "minimal",
     model_name: Optional[str] = None,
     temperature: float = 0.1,
     provider: str = "openai"
@@ -262,14 +402,7 @@ def create_static_information_agent(
         StaticInformationAgent实例
     """
     # 转换提取级别
-    level_map = {
-        "basic": InformationLevel.BASIC,
-        "intermediate": InformationLevel.INTERMEDIATE,
-        "advanced": InformationLevel.ADVANCED,
-        "expert": InformationLevel.EXPERT
-    }
-    
-    information_level_enum = level_map.get(information_level.lower(), InformationLevel.BASIC)
+    information_level_enum = parse_information_level(information_level)
     
     # 创建模型配置
     model_config = None
@@ -283,14 +416,14 @@ def create_static_information_agent(
     # 创建配置
     config = StaticInformationConfig(
         information_level=information_level_enum,
-        model_config=model_config
+        agent_model_config=model_config
     )
     
     return StaticInformationAgent(config)
 
 def extract_static_information_with_agent(
     text: str,
-    information_level: str = "basic",
+    information_level: str = "minimal",
     model_name: Optional[str] = None,
     temperature: float = 0.1
 ) -> Dict[str, Any]:
@@ -321,7 +454,7 @@ if __name__ == "__main__":
     """
     
     # 创建静态信息提取代理
-    agent = create_static_information_agent("basic")
+    agent = create_static_information_agent("minimal")
     
     # 执行提取
     result = agent.extract_information(test_text)
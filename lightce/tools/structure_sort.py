@@ -20,7 +20,7 @@ logger = logging.getLogger(__name__)
 
 class JSONExtractConfig(BaseModel):
     """JSON提取配置"""
-    model_config: Optional[ModelConfig] = Field(
+    agent_model_config: Optional[ModelConfig] = Field(
         default=None,
         description="模型配置参数"
     )
@@ -28,11 +28,40 @@ class JSONExtractConfig(BaseModel):
         default=True,
         description="是否启用内容提取"
     )
+    enable_local_parsing: bool = Field(
+        default=True,
+        description="输入已是合法JSON时直接本地处理，仅对格式错误或自由文本调用LLM"
+    )
+    sort_keys: bool = Field(
+        default=False,
+        description="是否递归按键名排序对象"
+    )
+    sort_fields: List[str] = Field(
+        default_factory=list,
+        description="对象数组的排序字段，按顺序作为主次排序键"
+    )
+    sort_descending: bool = Field(
+        default=False,
+        description="对象数组是否降序排序"
+    )
+    projection: Optional[List[str]] = Field(
+        default=None,
+        description="保留的字段路径列表（以点分隔，数组自动展开），为空时保留全部字段"
+    )
+    flatten: bool = Field(
+        default=False,
+        description="是否将嵌套结构展平为单层字典"
+    )
+    flatten_separator: str = Field(
+        default=".",
+        description="展平时的路径分隔符"
+    )
 
 class JSONExtractResult(BaseModel):
     """JSON提取结果"""
     success: bool = Field(description="是否成功")
     extracted_content: Dict[str, Any] = Field(description="提取的内容")
+    extraction_method: str = Field(default="llm", description="提取方式：local 或 llm")
 
 class JSONExtractAgent:
     """JSON提取代理类"""
@@ -45,7 +74,7 @@ class JSONExtractAgent:
             config: JSON提取配置
         """
         self.config = config or JSONExtractConfig()
-        self.agent = UniversalAgent(self.config.model_config)
+        self.agent = UniversalAgent(self.config.agent_model_config)
         self.processing_history: List[JSONExtractResult] = []
         
         logger.info("初始化JSON提取代理")
@@ -68,19 +97,29 @@ class JSONExtractAgent:
             
             # 提取内容
             extracted_content = {}
+            extraction_method = "llm"
             if self.config.enable_extraction:
-                extracted_content = self._extract_content(input_data)
+                parsed = None
+                if self.config.enable_local_parsing:
+                    parsed = self._parse_local_json(input_data)
+                
+                if parsed is not None:
+                    extraction_method = "local"
+                    extracted_content = self._postprocess(parsed)
+                else:
+                    extracted_content = self._postprocess(self._extract_content(input_data))
             
             # 创建结果
             result = JSONExtractResult(
                 success=True,
-                extracted_content=extracted_content
+                extracted_content=extracted_content,
+                extraction_method=extraction_method
             )
             
             # 保存到历史记录
             self.processing_history.append(result)
             
-            logger.info(f"JSON提取完成，处理时间: {time.time() - start_time:.2f}秒")
+            logger.info(f"JSON提取完成（{extraction_method}），处理时间: {time.time() - start_time:.2f}秒")
             return result
             
         except Exception as e:
@@ -92,6 +131,141 @@ class JSONExtractAgent:
                 extracted_content={}
             )
     
+    def _parse_local_json(self, input_data: str) -> Optional[Any]:
+        """
+        尝试将输入直接解析为JSON，允许外层包裹Markdown代码块
+        
+        Args:
+            input_data: 输入数据
+        
+        Returns:
+            解析后的数据，输入不是合法JSON时返回None
+        """
+        if not isinstance(input_data, str):
+            return None
+        
+        content = input_data.strip()
+        fence_match = re.match(r'^```(?:json)?\s*(.*?)\s*```$', content, re.DOTALL)
+        if fence_match:
+            content = fence_match.group(1)
+        
+        if not content or content[0] not in '{[':
+            return None
+        
+        try:
+            return json.loads(content)
+        except json.JSONDecodeError:
+            return None
+    
+    def _postprocess(self, data: Any) -> Dict[str, Any]:
+        """
+        对解析出的数据执行规范化、排序、投影和展平
+        
+        Args:
+            data: 解析后的数据
+        
+        Returns:
+            处理后的字典
+        """
+        content = self._normalize(data)
+        
+        if self.config.sort_keys or self.config.sort_fields:
+            content = self._sort_structure(content)
+        
+        if self.config.projection:
+            content = self._project(content, self._build_projection_tree(self.config.projection))
+        
+        if self.config.flatten:
+            content = self._flatten(content)
+        
+        return content
+    
+    def _normalize(self, data: Any) -> Dict[str, Any]:
+        """将顶层数据规范化为字典：数组放入items，标量放入value"""
+        if isinstance(data, dict):
+            return data
+        if isinstance(data, list):
+            return {"items": data}
+        return {"value": data}
+    
+    def _sort_structure(self, data: Any) -> Any:
+        """递归排序对象键和对象数组"""
+        if isinstance(data, dict):
+            items = data.items()
+            if self.config.sort_keys:
+                items = sorted(items, key=lambda item: str(item[0]))
+            return {key: self._sort_structure(value) for key, value in items}
+        
+        if isinstance(data, list):
+            items = [self._sort_structure(item) for item in data]
+            if self.config.sort_fields and items and all(isinstance(item, dict) for item in items):
+                items = self._sort_items(items)
+            return items
+        
+        return data
+    
+    def _sort_items(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        按sort_fields排序对象数组，缺失字段的元素无论升序降序都排在最后
+
+        从次要字段到主要字段依次做稳定排序，每一轮只对含该字段的元素排序，
+        缺失该字段的元素保持原有次序接在后面
+        """
+        for field in reversed(self.config.sort_fields):
+            present = [item for item in items if item.get(field) is not None]
+            missing = [item for item in items if item.get(field) is None]
+            present.sort(key=lambda item: self._sort_value_key(item[field]), reverse=self.config.sort_descending)
+            items = present + missing
+        return items
+
+    def _sort_value_key(self, value: Any) -> tuple:
+        """构建字段值的排序键，不同类型的值互不比较"""
+        if isinstance(value, bool):
+            return (1, int(value))
+        if isinstance(value, (int, float)):
+            return (0, value)
+        if isinstance(value, str):
+            return (2, value)
+        return (3, json.dumps(value, ensure_ascii=False, sort_keys=True))
+    
+    def _build_projection_tree(self, paths: List[str]) -> Dict[str, Any]:
+        """将点分隔的字段路径转换为嵌套字典形式的投影树"""
+        tree: Dict[str, Any] = {}
+        for path in paths:
+            node = tree
+            for part in path.split("."):
+                node = node.setdefault(part, {})
+        return tree
+    
+    def _project(self, data: Any, tree: Dict[str, Any]) -> Any:
+        """按投影树保留字段，数组中的每个元素分别投影"""
+        if not tree:
+            return data
+        if isinstance(data, dict):
+            return {key: self._project(data[key], subtree) for key, subtree in tree.items() if key in data}
+        if isinstance(data, list):
+            return [self._project(item, tree) for item in data]
+        return data
+    
+    def _flatten(self, data: Any, prefix: str = "") -> Dict[str, Any]:
+        """将嵌套结构展平为单层字典，数组使用下标作为路径"""
+        separator = self.config.flatten_separator
+        flat: Dict[str, Any] = {}
+        
+        if isinstance(data, dict):
+            children = ((str(key), value) for key, value in data.items())
+        else:
+            children = ((str(index), value) for index, value in enumerate(data))
+        
+        for key, value in children:
+            path = f"{prefix}{separator}{key}" if prefix else key
+            if isinstance(value, (dict, list)) and value:
+                flat.update(self._flatten(value, path))
+            else:
+                flat[path] = value
+        
+        return flat
+    
     def _extract_content(self, input_data: str) -> Dict[str, Any]:
         """
         提取JSON内容
@@ -190,10 +364,14 @@ class JSONExtractAgent:
         total_extractions = len(self.processing_history)
         successful_extractions = sum(1 for r in self.processing_history if r.success)
         
+        local_extractions = sum(1 for r in self.processing_history if r.extraction_method == "local")
+        
         return {
             "total_extractions": total_extractions,
             "successful_extractions": successful_extractions,
-            "success_rate": successful_extractions / total_extractions
+            "success_rate": successful_extractions / total_extractions,
+            "local_extractions": local_extractions,
+            "llm_extractions": total_extractions - local_extractions
         }
 
 # LangChain工具包装器
@@ -224,6 +402,7 @@ class JSONExtractTool(BaseTool):
             return {
                 "success": result.success,
                 "extracted_content": result.extracted_content,
+                "extraction_method": result.extraction_method,
                 "error_message": None
             }
             
@@ -261,7 +440,7 @@ def create_json_extract_agent(
     
     # 创建配置
     config = JSONExtractConfig(
-        model_config=model_config
+        agent_model_config=model_config
     )
     
     return JSONExtractAgent(config)
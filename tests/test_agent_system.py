@@ -6,7 +6,8 @@ Agent系统测试文件
 """
 
 import unittest
-from unittest.mock import patch, MagicMock
+import asyncio
+from unittest.mock import patch, MagicMock, AsyncMock
 from lightce.agent.system import UniversalAgent, create_agent, ModelConfig
 from lightce.tools.example_tools import get_current_time, calculate
 
@@ -154,6 +155,130 @@ class TestToolIntegration(unittest.TestCase):
         self.assertIn("计算结果", result)
         self.assertIn("5", result)
 
+class TestAsyncExecution(unittest.TestCase):
+    """测试异步执行路径"""
+    
+    def test_arun_uses_ainvoke(self):
+        """测试arun通过ainvoke执行工作流"""
+        from langchain_core.messages import HumanMessage, AIMessage
+        
+        with patch('lightce.agent.system.ChatOpenAI'):
+            agent = UniversalAgent(ModelConfig())
+            agent.graph = MagicMock()
+            agent.graph.ainvoke = AsyncMock(return_value={
+                "messages": [HumanMessage(content="你好"), AIMessage(content="你好！")],
+                "current_step": "model_response",
+                "error": None
+            })
+            
+            result = asyncio.run(agent.arun("你好"))
+            
+            self.assertTrue(result["success"])
+            self.assertEqual(result["response"], "你好！")
+            agent.graph.ainvoke.assert_awaited_once()
+            agent.graph.invoke.assert_not_called()
+    
+    def test_arun_concurrent(self):
+        """测试多个arun在同一事件循环中并发执行"""
+        from langchain_core.messages import AIMessage
+        
+        async def fake_ainvoke(state):
+            await asyncio.sleep(0.05)
+            state["messages"].append(AIMessage(content=state["messages"][0].content))
+            return state
+        
+        async def run_all(agent):
+            return await asyncio.gather(*(agent.arun(f"消息{i}") for i in range(20)))
+        
+        with patch('lightce.agent.system.ChatOpenAI'):
+            agent = UniversalAgent(ModelConfig())
+            agent.graph = MagicMock()
+            agent.graph.ainvoke = fake_ainvoke
+            
+            results = asyncio.run(run_all(agent))
+            
+            self.assertEqual([r["response"] for r in results], [f"消息{i}" for i in range(20)])
+    
+    def test_arun_error(self):
+        """测试arun执行失败时的返回格式"""
+        with patch('lightce.agent.system.ChatOpenAI'):
+            agent = UniversalAgent(ModelConfig())
+            agent.graph = MagicMock()
+            agent.graph.ainvoke = AsyncMock(side_effect=RuntimeError("boom"))
+            
+            result = asyncio.run(agent.arun("你好"))
+            
+            self.assertFalse(result["success"])
+            self.assertEqual(result["current_step"], "error")
+            self.assertIn("boom", result["error"])
+
+class TestTextStreaming(unittest.TestCase):
+    """测试直接流式调用模型"""
+    
+    def test_stream_text_and_cache(self):
+        """测试逐段产出模型输出，完整响应写入缓存后再次调用直接命中"""
+        from lightce.agent.cache import InMemoryLRUCache
+        
+        with patch('lightce.agent.system.ChatOpenAI'):
+            agent = UniversalAgent(ModelConfig(), cache=InMemoryLRUCache())
+            agent.llm = MagicMock()
+            agent.llm.stream.return_value = [MagicMock(content="你好"), MagicMock(content=""), MagicMock(content="世界")]
+            
+            self.assertEqual(list(agent.stream_text("打个招呼")), ["你好", "世界"])
+            self.assertEqual(list(agent.stream_text("打个招呼")), ["你好世界"])
+            agent.llm.stream.assert_called_once()
+    
+    def test_astream_text_forwards_callbacks(self):
+        """测试异步流式调用把回调传给模型"""
+        async def fake_astream(messages, config=None):
+            for text in ["压", "缩"]:
+                yield MagicMock(content=text)
+        
+        async def collect(agent, handler):
+            return [chunk async for chunk in agent.astream_text("压缩", callbacks=[handler])]
+        
+        with patch('lightce.agent.system.ChatOpenAI'):
+            agent = UniversalAgent(ModelConfig())
+            agent.llm = MagicMock()
+            agent.llm.astream = MagicMock(side_effect=fake_astream)
+            handler = MagicMock()
+            
+            self.assertEqual(asyncio.run(collect(agent, handler)), ["压", "缩"])
+            self.assertEqual(agent.llm.astream.call_args.kwargs["config"], {"callbacks": [handler]})
+
+class TestBindingReuse(unittest.TestCase):
+    """测试绑定工具的LLM和ToolNode的复用"""
+    
+    def test_bound_llm_reused(self):
+        """测试多次调用只绑定一次工具"""
+        with patch('lightce.agent.system.ChatOpenAI') as mock_openai:
+            agent = UniversalAgent(ModelConfig())
+            agent.add_tool(get_current_time)
+            
+            first = agent._get_llm_with_tools()
+            second = agent._get_llm_with_tools()
+            
+            self.assertIs(first, second)
+            self.assertEqual(mock_openai.return_value.bind_tools.call_count, 1)
+            self.assertIs(agent._get_tool_node(), agent._get_tool_node())
+    
+    def test_bindings_invalidated(self):
+        """测试添加工具或更新配置后重新绑定"""
+        with patch('lightce.agent.system.ChatOpenAI') as mock_openai:
+            agent = UniversalAgent(ModelConfig())
+            agent.add_tool(get_current_time)
+            tool_node = agent._get_tool_node()
+            agent._get_llm_with_tools()
+            
+            agent.add_tool(calculate)
+            self.assertIsNot(agent._get_tool_node(), tool_node)
+            agent._get_llm_with_tools()
+            
+            agent.update_model_config(temperature=0.2)
+            agent._get_llm_with_tools()
+            
+            self.assertEqual(mock_openai.return_value.bind_tools.call_count, 3)
+
 def run_basic_functionality_test():
     """运行基本功能测试（不需要API密钥）"""
     print("运行基本功能测试...")
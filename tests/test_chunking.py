@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+文本分块测试
+验证按代码块、表格和段落切分，块长度不超过上限且拼接后与原文一致
+"""
+
+import random
+import unittest
+
+from lightce.prompt.mini_contents import CompressionType
+from lightce.tools.chunking import iter_blocks, iter_segments, split_text
+
+class TestChunking(unittest.TestCase):
+    """测试文本分块"""
+
+    def test_structural_blocks(self):
+        """测试代码块内的空行不切分，表格行归为一块"""
+        text = "段落一\n第二行\n\n```\ncode\n\nmore\n```\n|a|b|\n|1|2|\n文本"
+
+        self.assertEqual(
+            list(iter_blocks(text)),
+            ["段落一\n第二行\n\n", "```\ncode\n\nmore\n```\n", "|a|b|\n|1|2|\n", "文本"]
+        )
+
+    def test_packs_blocks_up_to_limit(self):
+        """测试相邻段落合并到上限，超长段落按句子切分"""
+        text = "短段落。\n\n" * 3 + "很长的句子。" * 20
+
+        chunks = list(split_text(text, 30))
+
+        self.assertEqual(chunks[0], "短段落。\n\n" * 3)
+        self.assertTrue(all(len(chunk) <= 30 for chunk in chunks))
+        self.assertTrue(all(chunk.endswith("。") for chunk in chunks[1:]))
+
+    def test_roundtrip(self):
+        """测试随机文本切分后拼接与原文一致"""
+        rng = random.Random(0)
+        alphabet = ["a", "。", "\n", "\n\n", "|x|\n", "```\n", "\t", "没有标点的长句子" * 5, ". "]
+        for _ in range(300):
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 60)))
+            for max_chars in (1, 7, 50):
+                chunks = list(split_text(text, max_chars))
+                self.assertEqual("".join(chunks), text)
+                self.assertTrue(all(0 < len(chunk) <= max_chars for chunk in chunks))
+
+    def test_invalid_limit(self):
+        """测试块长度上限必须为正数"""
+        with self.assertRaises(ValueError):
+            split_text("文本", 0)
+
+    def test_segments_by_type(self):
+        """测试混合文本按类型分段，相邻同类型块合并，拼接后与原文一致"""
+        text = (
+            "第一段说明。\n\n第二段说明。\n\n"
+            "```\ndef f(x):\n    return x\n```\n"
+            "| a | b |\n| 1 | 2 |\n\n"
+            "结尾说明。"
+        )
+
+        segments = list(iter_segments(text))
+
+        self.assertEqual(
+            [segment_type for segment_type, _ in segments],
+            [CompressionType.TEXT, CompressionType.CODE, CompressionType.TABLE, CompressionType.TEXT]
+        )
+        self.assertEqual("".join(segment for _, segment in segments), text)
+
+if __name__ == '__main__':
+    unittest.main()
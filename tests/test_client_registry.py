@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+客户端注册表测试
+验证HTTP连接池按主机共享以及LLM客户端按配置复用
+"""
+
+import asyncio
+import unittest
+from unittest.mock import patch, MagicMock
+
+import httpx
+
+from lightce.agent.clients import ClientRegistry, LoopLocalAsyncClient, get_client_registry, set_client_registry
+from lightce.agent.system import UniversalAgent, ModelConfig
+from lightce.agent.memory_agent import MemoryAgent, MemoryAgentConfig
+from lightce.agent.react_agent import ReactAgent, ReactAgentConfig
+
+class TestClientRegistry(unittest.TestCase):
+    """测试ClientRegistry"""
+
+    def setUp(self):
+        """创建独立的注册表"""
+        self.registry = ClientRegistry(max_connections=10, host_limits={"api.example.com": 3}, max_llm_clients=2)
+
+    def tearDown(self):
+        """关闭连接池"""
+        self.registry.close()
+
+    def test_http_client_shared_per_host(self):
+        """测试同一主机共享连接池，不同主机各自独立"""
+        client1 = self.registry.get_http_client("https://api.example.com/v1")
+        client2 = self.registry.get_http_client("https://api.example.com/v2")
+        client3 = self.registry.get_http_client("http://localhost:11434")
+
+        self.assertIs(client1, client2)
+        self.assertIsNot(client1, client3)
+        self.assertIs(self.registry.get_http_client(None), self.registry.get_http_client())
+
+    def test_host_limits(self):
+        """测试按主机覆盖连接数限制"""
+        self.assertEqual(self.registry.get_limits("api.example.com").max_connections, 3)
+        self.assertEqual(self.registry.get_limits("api.example.com").max_keepalive_connections, 3)
+        self.assertEqual(self.registry.get_limits("localhost").max_connections, 10)
+
+    def test_async_client_per_event_loop(self):
+        """测试异步客户端在同一事件循环内共享，不同事件循环各自独立"""
+        async def get_pair():
+            return (self.registry.get_async_http_client("https://api.example.com"),
+                    self.registry.get_async_http_client("https://api.example.com"))
+
+        first_a, first_b = asyncio.run(get_pair())
+        second_a, _ = asyncio.run(get_pair())
+
+        self.assertIs(first_a, first_b)
+        self.assertIsNot(first_a, second_a)
+
+    def test_loop_local_client_routes_to_current_loop(self):
+        """测试事件循环之外获取的异步客户端在发送时使用当前事件循环的连接池"""
+        proxy = self.registry.get_loop_local_async_client("https://api.example.com/v1")
+        self.assertIsInstance(proxy, httpx.AsyncClient)
+        self.assertIs(proxy, self.registry.get_loop_local_async_client("https://api.example.com/v2"))
+
+        pools = []
+        def pool_for_loop(base_url=None):
+            client = httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, text="ok")))
+            pools.append(client)
+            return client
+
+        async def send():
+            return await proxy.send(proxy.build_request("GET", "https://api.example.com/v1/models"))
+
+        with patch.object(self.registry, "get_async_http_client", side_effect=pool_for_loop) as get_pool:
+            first = asyncio.run(send())
+            second = asyncio.run(send())
+
+        self.assertEqual((first.text, second.text), ("ok", "ok"))
+        self.assertEqual(get_pool.call_args.args, ("https://api.example.com/v1",))
+        self.assertEqual(len(pools), 2)
+
+    def test_llm_reuse_and_eviction(self):
+        """测试LLM客户端按键复用并按LRU淘汰"""
+        factory = MagicMock(side_effect=lambda: object())
+
+        a = self.registry.get_llm(("openai", "a"), factory)
+        self.assertIs(self.registry.get_llm(("openai", "a"), factory), a)
+        self.assertEqual(factory.call_count, 1)
+
+        self.registry.get_llm(("openai", "b"), factory)
+        self.registry.get_llm(("openai", "c"), factory)
+        self.assertIsNot(self.registry.get_llm(("openai", "a"), factory), a)
+
+        stats = self.registry.get_stats()
+        self.assertEqual(stats["llm_clients"], 2)
+        self.assertEqual(stats["llm_hits"], 1)
+
+class TestAgentClientSharing(unittest.TestCase):
+    """测试Agent通过注册表共享客户端"""
+
+    def setUp(self):
+        """使用独立的进程级注册表"""
+        set_client_registry(ClientRegistry())
+
+    def tearDown(self):
+        """恢复默认注册表"""
+        get_client_registry().close()
+        set_client_registry(None)
+
+    @patch('lightce.agent.system.ChatOpenAI', side_effect=lambda **kw: MagicMock())
+    def test_same_config_shares_llm(self, mock_openai):
+        """测试相同配置的Agent共享LLM客户端和HTTP连接池"""
+        agent1 = UniversalAgent(ModelConfig(temperature=0.3))
+        agent2 = UniversalAgent(ModelConfig(temperature=0.3))
+        agent3 = UniversalAgent(ModelConfig(temperature=0.9))
+
+        self.assertIs(agent1.llm, agent2.llm)
+        self.assertEqual(mock_openai.call_count, 2)
+        self.assertIsNot(agent1.llm, agent3.llm)
+
+        http_clients = {id(call.kwargs["http_client"]) for call in mock_openai.call_args_list}
+        self.assertEqual(len(http_clients), 1)
+        async_clients = {id(call.kwargs["http_async_client"]) for call in mock_openai.call_args_list}
+        self.assertEqual(len(async_clients), 1)
+
+    def test_agents_pass_async_client(self):
+        """测试三种Agent都把共享的异步HTTP客户端传给LLM客户端"""
+        registry = get_client_registry()
+        factories = [
+            ("system", lambda: UniversalAgent(ModelConfig(base_url="http://localhost:8000/v1"))),
+            ("memory_agent", lambda: MemoryAgent(MemoryAgentConfig(base_url="http://localhost:8000/v1", memory_backend_path=None))),
+            ("react_agent", lambda: ReactAgent(ReactAgentConfig(base_url="http://localhost:8000/v1")))
+        ]
+        for module, create in factories:
+            with self.subTest(module=module), patch(f"lightce.agent.{module}.ChatOpenAI") as mock_openai:
+                registry.clear_llm_clients()
+                create()
+                async_client = mock_openai.call_args.kwargs["http_async_client"]
+                self.assertIsInstance(async_client, LoopLocalAsyncClient)
+                self.assertIs(async_client, registry.get_loop_local_async_client("http://localhost:8000/v1"))
+
+    @patch('lightce.agent.system.ChatOpenAI')
+    def test_base_url(self, mock_openai):
+        """测试base_url传递给客户端"""
+        UniversalAgent(ModelConfig(base_url="http://localhost:8000/v1"))
+
+        self.assertEqual(mock_openai.call_args.kwargs["base_url"], "http://localhost:8000/v1")
+
+if __name__ == '__main__':
+    unittest.main()
@@ -7,14 +7,18 @@
 
 import unittest
 from unittest.mock import Mock, patch
+import asyncio
 import json
+import time
 from typing import Dict, Any
 
+from langchain_core.callbacks import BaseCallbackHandler
+
 from lightce.tools.compression import (
-    CompressionAgent, CompressionAgentConfig, CompressionResult,
-    create_compression_agent, compress_text_with_agent, analyze_text_compression_potential
+    CompressionAgent, CompressionAgentConfig, CompressionResult, BatchBackend, CompressionEngine, CompressionTier,
+    create_compression_agent, compress_text_with_agent, get_default_compression_agent
 )
-from lightce.prompt.mini_contents import CompressionType, CompressionStage
+from lightce.prompt.mini_contents import CompressionType, CompressionStage, calculate_compression_ratio
 
 class TestCompressionAgentConfig(unittest.TestCase):
     """测试压缩Agent配置"""
@@ -265,6 +269,11 @@ class TestCompressionAgentFunctions(unittest.TestCase):
         self.assertEqual(result_dict["compressed_text"], "压缩文本")
         self.assertEqual(result_dict["compression_ratio"], 50.0)
     
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_default_agent_reused(self, mock_agent_class):
+        """测试工具调用复用同一个默认压缩Agent"""
+        self.assertIs(get_default_compression_agent(), get_default_compression_agent())
+    
     def test_analyze_text_compression_potential_tool(self):
         """测试analyze_text_compression_potential工具"""
         test_text = "这是一个包含技术词汇的测试文本，包含编程、算法、系统等技术术语。"
@@ -337,6 +346,461 @@ class TestCompressionAgentIntegration(unittest.TestCase):
         news_result = agent.compress_text("据最新报道，某公司今日宣布重要消息。")
         self.assertEqual(news_result.compression_type, "news")
 
+class TestBatchCompress(unittest.TestCase):
+    """测试并发批量压缩"""
+    
+    def setUp(self):
+        """设置测试环境"""
+        self.config = CompressionAgentConfig(
+            max_concurrency=4,
+            max_retries=1,
+            retry_delay=0
+        )
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_results_keep_input_order(self, mock_universal_agent):
+        """测试结果顺序与输入一致"""
+        def fake_run(prompt):
+            # 让靠前的文本更晚完成
+            for i in range(8):
+                if f"文本{i}" in prompt:
+                    time.sleep(0.01 * (8 - i))
+                    return {"success": True, "response": f"压缩{i}"}
+            return {"success": False, "error": "未知文本"}
+        
+        mock_universal_agent.return_value.run.side_effect = fake_run
+        agent = CompressionAgent(self.config)
+        
+        texts = [f"文本{i}" for i in range(8)]
+        results = agent.batch_compress(texts, compression_type=CompressionType.TEXT)
+        
+        self.assertEqual([r.original_text for r in results], texts)
+        self.assertEqual([r.compressed_text for r in results], [f"压缩{i}" for i in range(8)])
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_progress_callback(self, mock_universal_agent):
+        """测试进度回调"""
+        mock_universal_agent.return_value.run.return_value = {"success": True, "response": "压缩"}
+        agent = CompressionAgent(self.config)
+        
+        progress = []
+        agent.batch_compress(
+            ["a", "b", "c"],
+            compression_type=CompressionType.TEXT,
+            progress_callback=lambda done, total, index, result: progress.append((done, total))
+        )
+        
+        self.assertEqual(progress, [(1, 3), (2, 3), (3, 3)])
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_retry_on_failure(self, mock_universal_agent):
+        """测试失败后重试"""
+        mock_universal_agent.return_value.run.side_effect = [
+            {"success": False, "error": "限流"},
+            {"success": True, "response": "压缩"}
+        ]
+        agent = CompressionAgent(self.config)
+        
+        results = agent.batch_compress(["文本"], compression_type=CompressionType.TEXT)
+        
+        self.assertTrue(results[0].success)
+        self.assertEqual(mock_universal_agent.return_value.run.call_count, 2)
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_item_timeout(self, mock_universal_agent):
+        """测试单条超时"""
+        def slow_run(prompt):
+            time.sleep(0.5)
+            return {"success": True, "response": "压缩"}
+        
+        mock_universal_agent.return_value.run.side_effect = slow_run
+        config = CompressionAgentConfig(item_timeout=0.05, max_retries=0)
+        agent = CompressionAgent(config)
+        
+        results = agent.batch_compress(["文本"], compression_type=CompressionType.TEXT)
+        
+        self.assertFalse(results[0].success)
+        self.assertEqual(results[0].original_text, "文本")
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_asyncio_backend(self, mock_universal_agent):
+        """测试asyncio后端使用arun"""
+        async def fake_arun(prompt):
+            return {"success": True, "response": "异步压缩"}
+        
+        mock_universal_agent.return_value.arun = fake_arun
+        agent = CompressionAgent(self.config)
+        
+        results = agent.batch_compress(
+            ["a", "b"],
+            compression_type=CompressionType.TEXT,
+            backend=BatchBackend.ASYNCIO
+        )
+        
+        self.assertEqual([r.compressed_text for r in results], ["异步压缩", "异步压缩"])
+        mock_universal_agent.return_value.run.assert_not_called()
+
+class TestCompressionHistory(unittest.TestCase):
+    """测试压缩历史记录"""
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_history_records_each_call(self, mock_universal_agent):
+        """测试单条、异步、批量和分块压缩各记录一次，重试和分块不重复记录"""
+        mock_universal_agent.return_value.run.side_effect = [
+            {"success": True, "response": "压缩"},
+            {"success": False, "error": "失败"},
+            {"success": True, "response": "重试成功"}
+        ] + [{"success": True, "response": "块"}] * 3
+        
+        async def fake_arun(prompt):
+            return {"success": True, "response": "异步"}
+        mock_universal_agent.return_value.arun.side_effect = fake_arun
+        
+        agent = CompressionAgent(CompressionAgentConfig(chunk_size=100, max_retries=1, retry_delay=0, merge_pass=False))
+        agent.compress_text("原始文本", compression_type=CompressionType.TEXT)
+        agent.batch_compress(["需要重试"], compression_type=CompressionType.TEXT)
+        agent.compress_text("\n\n".join("内容" * 40 for _ in range(3)), compression_type=CompressionType.TEXT)
+        asyncio.run(agent.acompress_text("异步文本", compression_type=CompressionType.TEXT, engine=CompressionEngine.LLM))
+        
+        self.assertEqual([r.compressed_text for r in agent.compression_history][:2], ["压缩", "重试成功"])
+        self.assertEqual(len(agent.compression_history), 4)
+        stats = agent.get_compression_stats()
+        self.assertEqual(stats["total_compressions"], 4)
+        self.assertEqual(stats["success_rate"], 100.0)
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_history_bounded(self, mock_universal_agent):
+        """测试历史只保留最近max_history条"""
+        agent = CompressionAgent(CompressionAgentConfig(max_history=2))
+        for text in ["第一条", "第二条", "第三条"]:
+            agent.compress_text(text, engine=CompressionEngine.LOCAL)
+        
+        self.assertEqual([r.original_text for r in agent.compression_history], ["第二条", "第三条"])
+        agent.update_config(max_history=1)
+        self.assertEqual([r.original_text for r in agent.compression_history], ["第三条"])
+        agent.clear_history()
+        self.assertEqual(agent.get_compression_stats(), {"message": "暂无压缩历史"})
+
+class TestCompressStream(unittest.TestCase):
+    """测试流式压缩"""
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_compress_stream(self, mock_universal_agent):
+        """测试先产出压缩文本片段，最后产出压缩结果"""
+        mock_universal_agent.return_value.stream_text.return_value = iter(["压缩", "结果"])
+        agent = CompressionAgent()
+        
+        items = list(agent.compress_stream("很长的原始文本", compression_type=CompressionType.TEXT))
+        
+        self.assertEqual(items[:2], ["压缩", "结果"])
+        self.assertTrue(items[-1].success)
+        self.assertEqual(items[-1].compressed_text, "压缩结果")
+        self.assertEqual(items[-1].original_text, "很长的原始文本")
+        self.assertEqual(items[-1].compression_ratio, calculate_compression_ratio(7, 4))
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_compress_stream_failure(self, mock_universal_agent):
+        """测试模型中途失败时最后产出失败结果"""
+        def broken_stream(prompt, callbacks=None):
+            yield "压缩"
+            raise RuntimeError("连接中断")
+        
+        mock_universal_agent.return_value.stream_text.side_effect = broken_stream
+        agent = CompressionAgent()
+        
+        items = list(agent.compress_stream("原始文本", compression_type=CompressionType.TEXT))
+        
+        self.assertEqual(items[0], "压缩")
+        self.assertFalse(items[-1].success)
+        self.assertEqual(list(agent.compress_stream("")), [CompressionResult(success=False, original_text="", compressed_text="")])
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_acompress_stream(self, mock_universal_agent):
+        """测试异步流式压缩"""
+        async def fake_astream_text(prompt, callbacks=None):
+            for text in ["异步", "压缩"]:
+                yield text
+        
+        async def collect(agent):
+            return [item async for item in agent.acompress_stream("原始文本", compression_type=CompressionType.TEXT)]
+        
+        mock_universal_agent.return_value.astream_text = fake_astream_text
+        agent = CompressionAgent()
+        
+        items = asyncio.run(collect(agent))
+        
+        self.assertEqual(items[:2], ["异步", "压缩"])
+        self.assertEqual(items[-1].compressed_text, "异步压缩")
+        self.assertEqual(list(agent.compression_history), [items[-1]])
+
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_stream_records_history(self, mock_universal_agent):
+        """测试流式压缩的最终结果记入压缩历史，失败也记录"""
+        mock_universal_agent.return_value.stream_text.return_value = iter(["压缩"])
+        agent = CompressionAgent()
+
+        items = list(agent.compress_stream("原始文本", compression_type=CompressionType.TEXT))
+        mock_universal_agent.return_value.stream_text.side_effect = RuntimeError("连接中断")
+        list(agent.compress_stream("原始文本", compression_type=CompressionType.TEXT))
+
+        self.assertEqual(agent.compression_history[0], items[-1])
+        self.assertEqual([r.success for r in agent.compression_history], [True, False])
+        self.assertEqual(agent.get_compression_stats()["total_compressions"], 2)
+
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_stream_long_text_by_chunk(self, mock_universal_agent):
+        """测试超过chunk_size的文本逐块依次流式压缩，片段拼接即为压缩文本"""
+        text = "\n\n".join(f"第{i}段" + "内容" * 40 for i in range(3))
+        prompts = []
+
+        def fake_stream_text(prompt, callbacks=None):
+            prompts.append(prompt)
+            index = next(i for i in range(3) if f"第{i}段" in prompt)
+            yield f"摘要{index}"
+
+        mock_universal_agent.return_value.stream_text.side_effect = fake_stream_text
+        agent = CompressionAgent(CompressionAgentConfig(chunk_size=100))
+
+        items = list(agent.compress_stream(text, compression_type=CompressionType.TEXT))
+
+        self.assertEqual(items[:-1], ["摘要0", "\n\n", "摘要1", "\n\n", "摘要2"])
+        self.assertEqual(items[-1].compressed_text, "".join(items[:-1]))
+        self.assertEqual(items[-1].chunk_count, 3)
+        self.assertEqual(len(prompts), 3)
+        self.assertTrue(all(len(prompt) < len(text) for prompt in prompts))
+    
+    @patch('lightce.tools.compression.get_default_compression_agent')
+    def test_tool_does_not_stream_by_default(self, mock_get_agent):
+        """测试工具调用时注入的回调管理器不会触发流式压缩"""
+        mock_get_agent.return_value.compress_text.return_value = CompressionResult(
+            success=True, original_text="原始文本", compressed_text="压缩"
+        )
+        
+        output = json.loads(compress_text_with_agent.invoke({"text": "原始文本"}, config={"callbacks": [BaseCallbackHandler()]}))
+        
+        self.assertEqual(output["compressed_text"], "压缩")
+        mock_get_agent.return_value.compress_text.assert_called_once_with("原始文本", 50.0, None)
+        mock_get_agent.return_value.compress_stream.assert_not_called()
+    
+    @patch('lightce.tools.compression.get_default_compression_agent')
+    def test_tool_streams_when_requested(self, mock_get_agent):
+        """测试显式要求流式时通过回调转发压缩文本"""
+        mock_get_agent.return_value.compress_stream.return_value = iter([
+            "压缩", CompressionResult(success=True, original_text="原始文本", compressed_text="压缩")
+        ])
+        handler = BaseCallbackHandler()
+        
+        output = json.loads(compress_text_with_agent.invoke(
+            {"text": "原始文本", "stream": True}, config={"callbacks": [handler]}
+        ))
+        
+        self.assertEqual(output["compressed_text"], "压缩")
+        callbacks = mock_get_agent.return_value.compress_stream.call_args.kwargs["callbacks"]
+        self.assertIn(handler, callbacks.handlers)
+        mock_get_agent.return_value.compress_text.assert_not_called()
+
+class TestChunkedCompression(unittest.TestCase):
+    """测试分块压缩"""
+    
+    def setUp(self):
+        """设置测试环境"""
+        self.config = CompressionAgentConfig(chunk_size=100, max_concurrency=2, max_retries=0, retry_delay=0)
+        self.text = "\n\n".join(f"第{i}段" + "内容" * 40 for i in range(5))
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_chunks_compressed_in_order(self, mock_universal_agent):
+        """测试长文本按段落分块压缩，结果按原顺序合并并计算实际比例"""
+        def fake_run(prompt):
+            for i in range(5):
+                if f"第{i}段" in prompt:
+                    time.sleep(0.01 * (5 - i))
+                    return {"success": True, "response": f"摘要{i}"}
+            return {"success": False, "error": "未知文本"}
+        
+        mock_universal_agent.return_value.run.side_effect = fake_run
+        agent = CompressionAgent(self.config)
+        
+        result = agent.compress_text(self.text, 50.0, CompressionType.TEXT)
+        
+        self.assertTrue(result.success)
+        self.assertEqual(result.chunk_count, 5)
+        self.assertEqual(result.compressed_text, "\n\n".join(f"摘要{i}" for i in range(5)))
+        self.assertEqual(result.compression_ratio, calculate_compression_ratio(len(self.text), len(result.compressed_text)))
+        self.assertEqual(mock_universal_agent.return_value.run.call_count, 5)
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_merge_pass_reaches_target(self, mock_universal_agent):
+        """测试分块结果未达到目标比例时对合并结果再次压缩"""
+        calls = []
+        
+        def fake_run(prompt):
+            calls.append(prompt)
+            return {"success": True, "response": "甲" * 80 if len(calls) <= 5 else "乙"}
+        
+        mock_universal_agent.return_value.run.side_effect = fake_run
+        agent = CompressionAgent(self.config)
+        
+        result = agent.compress_chunked(self.text, 50.0, CompressionType.TEXT)
+        
+        self.assertTrue(result.success)
+        self.assertNotIn("甲", result.compressed_text)
+        self.assertGreaterEqual(result.compression_ratio, 50.0)
+        self.assertEqual(len(calls), 10)
+        
+        agent.config.merge_pass = False
+        calls.clear()
+        result = agent.compress_chunked(self.text, 50.0, CompressionType.TEXT)
+        self.assertIn("甲", result.compressed_text)
+        self.assertEqual(len(calls), 5)
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_failed_chunks(self, mock_universal_agent):
+        """测试部分块失败时保留原文，全部失败时返回失败结果"""
+        mock_universal_agent.return_value.run.side_effect = lambda prompt: (
+            {"success": True, "response": "摘要"} if "第0段" in prompt else {"success": False, "error": "限流"}
+        )
+        agent = CompressionAgent(self.config)
+        agent.config.merge_pass = False
+        
+        result = agent.compress_chunked(self.text, 50.0, CompressionType.TEXT)
+        self.assertTrue(result.success)
+        self.assertTrue(result.compressed_text.startswith("摘要\n\n第1段"))
+        
+        mock_universal_agent.return_value.run.side_effect = lambda prompt: {"success": False, "error": "限流"}
+        self.assertFalse(agent.compress_chunked(self.text, 50.0, CompressionType.TEXT).success)
+
+class TestLocalEngine(unittest.TestCase):
+    """测试本地压缩引擎"""
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_local_engine_skips_model(self, mock_universal_agent):
+        """测试选择本地引擎时不调用模型，长文本也不分块"""
+        text = "\n\n".join(f"第{i}段讲述了不同的主题{i}。" + "补充说明。" * 30 for i in range(5))
+        agent = CompressionAgent(CompressionAgentConfig(chunk_size=100))
+        
+        result = agent.compress_text(text, 50.0, engine=CompressionEngine.LOCAL)
+        
+        self.assertTrue(result.success)
+        self.assertEqual(result.chunk_count, 1)
+        self.assertLess(len(result.compressed_text), len(text))
+        self.assertEqual(result.compression_ratio, calculate_compression_ratio(len(text), len(result.compressed_text)))
+        mock_universal_agent.return_value.run.assert_not_called()
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_engine_from_config(self, mock_universal_agent):
+        """测试按配置选择引擎，异步接口同样生效"""
+        agent = CompressionAgent(CompressionAgentConfig(engine="local"))
+        code = "def add(a, b):\n    # 相加\n    return a + b\n"
+        
+        result = asyncio.run(agent.acompress_text(code, 50.0, CompressionType.CODE))
+        
+        self.assertTrue(result.success)
+        self.assertNotIn("相加", result.compressed_text)
+        mock_universal_agent.return_value.run.assert_not_called()
+        mock_universal_agent.return_value.arun.assert_not_called()
+
+class TestCompressionCascade(unittest.TestCase):
+    """测试级联压缩"""
+    
+    def setUp(self):
+        """设置测试环境"""
+        self.text = "\n".join(
+            f"第{i}项记录说明缓存命中率在{i * 3}次请求后提升，延迟随之下降。用户{i}反馈结果稳定。" for i in range(20)
+        )
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_local_tier_accepted(self, mock_universal_agent):
+        """测试本地层达标时不调用模型"""
+        agent = CompressionAgent(CompressionAgentConfig(engine=CompressionEngine.CASCADE))
+        
+        result = agent.compress_text(self.text, 50.0, CompressionType.TEXT)
+        
+        self.assertTrue(result.success)
+        self.assertEqual(result.tier, "local")
+        self.assertGreaterEqual(result.compression_ratio, 45.0)
+        mock_universal_agent.return_value.run.assert_not_called()
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_escalates_to_next_tier(self, mock_universal_agent):
+        """测试本地层信息保留率不达标时依次升级，小模型比例不达标时使用配置的模型"""
+        def fake_run(prompt):
+            return {"success": True, "response": self.text[:len(self.text) // 2]}
+        
+        mock_universal_agent.return_value.run.side_effect = fake_run
+        config = CompressionAgentConfig(
+            engine=CompressionEngine.CASCADE,
+            cascade_tiers=[
+                CompressionTier(name="local", engine=CompressionEngine.LOCAL, min_retention=100.0),
+                CompressionTier(name="small", model_name="small-model"),
+                CompressionTier(name="llm")
+            ]
+        )
+        agent = CompressionAgent(config)
+        
+        result = agent.compress_text(self.text, 50.0, CompressionType.TEXT)
+        self.assertEqual(result.tier, "small")
+        self.assertEqual(mock_universal_agent.return_value.run.call_count, 1)
+        model_names = [call.args[0].model_name for call in mock_universal_agent.call_args_list]
+        self.assertIn("small-model", model_names)
+        
+        # 小模型压缩不足时升级到配置的模型
+        responses = iter([self.text, self.text[:len(self.text) // 2]])
+        mock_universal_agent.return_value.run.side_effect = lambda prompt: {"success": True, "response": next(responses)}
+        result = agent.compress_text(self.text, 50.0, CompressionType.TEXT)
+        self.assertEqual(result.tier, "llm")
+        self.assertEqual(result.compressed_text, self.text[:len(self.text) // 2])
+    
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_fallback_when_no_tier_accepted(self, mock_universal_agent):
+        """测试都不达标时返回最后一个成功的结果，全部失败时返回失败结果"""
+        async def fake_arun(prompt):
+            return {"success": False, "error": "限流"}
+        
+        mock_universal_agent.return_value.arun = fake_arun
+        config = CompressionAgentConfig(
+            engine=CompressionEngine.CASCADE,
+            cascade_tiers=[
+                CompressionTier(name="local", engine=CompressionEngine.LOCAL, min_retention=100.0),
+                CompressionTier(name="llm")
+            ]
+        )
+        agent = CompressionAgent(config)
+        
+        result = asyncio.run(agent.acompress_text(self.text, 50.0, CompressionType.TEXT))
+        self.assertTrue(result.success)
+        self.assertEqual(result.tier, "local")
+        
+        agent.config.cascade_tiers = [CompressionTier(name="llm")]
+        self.assertFalse(asyncio.run(agent.acompress_text(self.text, 50.0, CompressionType.TEXT)).success)
+
+    @patch('lightce.tools.compression.UniversalAgent')
+    def test_cascade_records_history_once(self, mock_universal_agent):
+        """测试升级到配置模型的级联压缩只记录一次历史"""
+        half = self.text[:len(self.text) // 2]
+
+        async def fake_arun(prompt):
+            return {"success": True, "response": half}
+
+        mock_universal_agent.return_value.run.side_effect = lambda prompt: {"success": True, "response": half}
+        mock_universal_agent.return_value.arun = fake_arun
+        config = CompressionAgentConfig(
+            engine=CompressionEngine.CASCADE,
+            cascade_tiers=[
+                CompressionTier(name="local", engine=CompressionEngine.LOCAL, min_retention=100.0),
+                CompressionTier(name="llm")
+            ]
+        )
+        agent = CompressionAgent(config)
+
+        result = agent.compress_text(self.text, 50.0, CompressionType.TEXT)
+        self.assertEqual(result.tier, "llm")
+        self.assertEqual(len(agent.compression_history), 1)
+
+        result = asyncio.run(agent.acompress_text(self.text, 50.0, CompressionType.TEXT))
+        self.assertEqual(result.tier, "llm")
+        self.assertEqual(len(agent.compression_history), 2)
+        self.assertEqual([r.tier for r in agent.compression_history], ["llm", "llm"])
+
 def run_tests():
     """运行所有测试"""
     # 创建测试套件
@@ -348,7 +812,12 @@ def run_tests():
         TestCompressionResult,
         TestCompressionAgent,
         TestCompressionAgentFunctions,
-        TestCompressionAgentIntegration
+        TestCompressionAgentIntegration,
+        TestBatchCompress,
+        TestCompressStream,
+        TestChunkedCompression,
+        TestLocalEngine,
+        TestCompressionCascade
     ]
     
     for test_class in test_classes:
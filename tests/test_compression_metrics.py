@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+压缩质量指标测试
+验证批量指标与逐条计算一致，并能汇总为百分位
+"""
+
+import unittest
+
+import numpy as np
+
+from lightce.agent.memory_index import tokenize
+from lightce.prompt.mini_contents import calculate_compression_ratio
+from lightce.tools.compression_metrics import (
+    METRIC_NAMES, score_compression_batch, score_compression_results, summarize_metrics
+)
+
+class TestCompressionMetrics(unittest.TestCase):
+    """测试压缩质量指标"""
+
+    def setUp(self):
+        """设置测试数据"""
+        self.originals = ["The Model costs 12.5% more in 2024", "缓存命中率提升", "", "abc"]
+        self.compressed = ["Model costs 12.5% more", "缓存命中", "", ""]
+
+    def test_batch_metrics(self):
+        """测试各指标的取值"""
+        scores = score_compression_batch(self.originals, self.compressed)
+
+        self.assertEqual(set(scores), set(METRIC_NAMES))
+        np.testing.assert_allclose(
+            scores["compression_ratio"],
+            [calculate_compression_ratio(len(o), len(c)) for o, c in zip(self.originals, self.compressed)]
+        )
+        # 一元组：原文7个词中4个保留，压缩文本全部来自原文
+        self.assertAlmostEqual(scores["rouge1"][0], 2 * 4 / (7 + 4) * 100)
+        # 数字2024和名称The丢失
+        self.assertEqual(scores["number_preservation"][0], 50.0)
+        self.assertEqual(scores["name_preservation"][0], 50.0)
+        # 汉字按单字计：7个字中4个、6个双字中3个保留
+        self.assertAlmostEqual(scores["retention"][1], (4 + 3) / (7 + 6) * 100)
+        # 空文本对视为完全保留，全部删除时保留率为0
+        self.assertEqual(scores["retention"][2], 100.0)
+        self.assertEqual(scores["retention"][3], 0.0)
+        # 只有两边都为空时ROUGE为100，原文只有一个词时rouge2取rouge1
+        self.assertEqual(scores["rouge1"][2], 100.0)
+        self.assertEqual(scores["rouge2"][2], 100.0)
+        self.assertEqual(scores["rouge1"][3], 0.0)
+        self.assertEqual(scores["rouge2"][3], 0.0)
+        self.assertEqual(score_compression_batch(["abc"], ["abc"])["rouge2"][0], 100.0)
+
+    def test_shared_tokenizer(self):
+        """测试与记忆检索共用切词：数字整体保留，汉字按单字"""
+        self.assertEqual(tokenize("The Model costs 12.5% more缓存"), ["The", "Model", "costs", "12.5%", "more", "缓", "存"])
+        scores = score_compression_batch(["Price 1,200 USD"], ["Price 1,200"])
+        self.assertEqual(scores["number_preservation"][0], 100.0)
+
+    def test_pairs_are_independent(self):
+        """测试批量计算与逐条计算结果相同"""
+        batch = score_compression_batch(self.originals, self.compressed)
+
+        for index, (original, compressed) in enumerate(zip(self.originals, self.compressed)):
+            single = score_compression_batch([original], [compressed])
+            for name in METRIC_NAMES:
+                self.assertAlmostEqual(batch[name][index], single[name][0])
+
+    def test_summary(self):
+        """测试汇总为均值和百分位，数量不一致时报错"""
+        results = [type("Result", (), {"original_text": o, "compressed_text": c})() for o, c in zip(self.originals, self.compressed)]
+
+        summary = summarize_metrics(score_compression_results(results), percentiles=(50, 90))
+
+        self.assertEqual(summary["compression_ratio"]["count"], 4)
+        self.assertIn("p90", summary["rouge1"])
+        self.assertLessEqual(summary["retention"]["min"], summary["retention"]["p50"])
+        self.assertEqual(summarize_metrics(score_compression_batch([], []))["rouge1"], {"count": 0})
+        with self.assertRaises(ValueError):
+            score_compression_batch(["a"], [])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+内容分类测试
+验证单遍扫描按覆盖率为各压缩类型打分，零星的符号不会改变正文的类型
+"""
+
+import unittest
+
+from lightce.prompt.mini_contents import (
+    CompressionType, score_compression_types, get_compression_type_from_text, classify_texts
+)
+
+SAMPLES = [
+    ("这是一段普通的文本内容（见上文），包含一些基本的信息。", CompressionType.TEXT),
+    ("Use the int type for points; see https://example.org for more.", CompressionType.TEXT),
+    ("for the next week we will be away.\nwith love from all of us.\nfrom here we go on.", CompressionType.TEXT),
+    ("case closed, as they say.\nlet it be known.\nvar is short for variance.", CompressionType.TEXT),
+    ("def calculate_sum(a, b):\n    return a + b", CompressionType.CODE),
+    ("import os\nfrom os.path import join\n#include <stdio.h>", CompressionType.CODE),
+    ("for (int i = 0; i < n; i++) {\n  sum += a[i];\n}", CompressionType.CODE),
+    ("E = mc² + ∫f(x)dx", CompressionType.FORMULA),
+    ("$$\\frac{a}{b} + c^2$$", CompressionType.FORMULA),
+    ("|姓名|年龄|职业|\n|张三|25|工程师|", CompressionType.TABLE),
+    ("name\tage\nbob\t3", CompressionType.TABLE),
+    ("https://www.example.com/api/v1/users?page=1&limit=10", CompressionType.LINK),
+]
+
+class TestContentClassifier(unittest.TestCase):
+    """测试内容分类"""
+
+    def test_classify_samples(self):
+        """测试各类型的典型文本"""
+        for text, expected in SAMPLES:
+            with self.subTest(text=text):
+                self.assertEqual(get_compression_type_from_text(text), expected)
+
+    def test_scores_cover_all_types(self):
+        """测试得分包含所有类型，正文中少量代码不改变判断"""
+        text = "正文说明了接口的用途。" * 20 + "\nx = load(path)\n"
+
+        scores = score_compression_types(text)
+
+        self.assertEqual(set(scores), set(CompressionType))
+        self.assertGreater(scores[CompressionType.CODE], 0.0)
+        self.assertAlmostEqual(sum(scores.values()), 1.0)
+        self.assertEqual(get_compression_type_from_text(text), CompressionType.TEXT)
+        self.assertEqual(get_compression_type_from_text(""), CompressionType.TEXT)
+
+    def test_classify_texts(self):
+        """测试批量分类在进程池中执行，结果顺序与输入一致"""
+        texts = [text for text, _ in SAMPLES] * 3
+
+        results = classify_texts(texts, max_workers=2, chunksize=4)
+
+        self.assertEqual(results, [expected for _, expected in SAMPLES] * 3)
+
+if __name__ == "__main__":
+    unittest.main()
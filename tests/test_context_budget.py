@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+上下文token预算测试
+验证按优先级填充、截断和丢弃、预算推算以及MemoryAgent报告裁剪情况
+"""
+
+import unittest
+from unittest.mock import patch
+
+from langchain_core.messages import HumanMessage
+
+from lightce.agent.context_budget import ContextAssembler, ContextSection, count_tokens, derive_context_budget, get_context_length
+from lightce.agent.memory_agent import MemoryAgent, MemoryAgentConfig, Rule
+
+class TestContextAssembler(unittest.TestCase):
+    """测试ContextAssembler"""
+
+    def test_fits_without_cuts(self):
+        """测试预算充足时保留全部条目，各部分保持传入顺序"""
+        report = ContextAssembler(1000).assemble([
+            ContextSection(name="rules", header="行为规则:", items=["规则一", "规则二"], priority=1),
+            ContextSection(name="memories", header="相关记忆:", items=["用户喜欢编程"], priority=2),
+            ContextSection(name="empty", header="空:", items=[])
+        ])
+
+        self.assertEqual(report.text, "行为规则:\n- 规则一\n- 规则二\n\n相关记忆:\n- 用户喜欢编程\n")
+        self.assertEqual(report.included, {"rules": 2, "memories": 1})
+        self.assertEqual(report.dropped, [])
+        self.assertEqual(report.truncated, [])
+
+    def test_priority_truncate_and_drop(self):
+        """测试高优先级部分先分配预算，长条目被截断，剩余预算不足时丢弃"""
+        assembler = ContextAssembler(60, min_truncate_tokens=8)
+        report = assembler.assemble([
+            ContextSection(name="memories", header="相关记忆:", items=["记忆" * 50, "短记忆"], priority=1),
+            ContextSection(name="rules", header="行为规则:", items=["规则" * 10], priority=3)
+        ])
+
+        self.assertLessEqual(report.tokens, 60)
+        self.assertEqual(report.included["rules"], 1)
+        self.assertEqual(report.truncated[0]["section"], "memories")
+        self.assertTrue(report.text.startswith("相关记忆:\n- 记忆"))
+        self.assertIn("…", report.text)
+        self.assertEqual([d["index"] for d in report.dropped], [1])
+        self.assertGreater(report.dropped_tokens, 0)
+
+    def test_zero_budget(self):
+        """测试预算为0时不注入任何上下文"""
+        report = ContextAssembler(0).assemble([ContextSection(name="rules", header="行为规则:", items=["规则"])])
+
+        self.assertEqual(report.text, "")
+        self.assertEqual(report.included, {"rules": 0})
+        self.assertEqual(len(report.dropped), 1)
+
+    def test_budget_derivation(self):
+        """测试按模型上下文长度推算预算"""
+        self.assertEqual(get_context_length("gpt-4o-mini-2024-07-18"), get_context_length("gpt-4o-mini"))
+        self.assertGreater(derive_context_budget("gpt-4o", 1000), derive_context_budget("gpt-4", 1000))
+        self.assertEqual(derive_context_budget("unknown", 100, context_length=100), 0)
+        self.assertGreater(count_tokens("用户喜欢编程"), 0)
+
+class TestMemoryAgentContextBudget(unittest.TestCase):
+    """测试MemoryAgent按预算准备上下文"""
+
+    def test_prepare_context_reports_cuts(self):
+        """测试工具输出过长时被截断，低优先级记忆被丢弃，报告写入状态"""
+        config = MemoryAgentConfig(memory_backend_path=None, context_token_budget=80)
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(config)
+            agent.add_rule(Rule(name="礼貌", description="保持礼貌", content="总是礼貌回复", priority=5))
+            agent.add_memory("用户喜欢编程", importance=0.9)
+
+            state = agent._build_initial_state("我喜欢什么编程语言")
+            state["tool_outputs"] = [{"tool_name": "search", "result": "结果" * 200}]
+            context = agent._prepare_context(state)
+
+            report = state["context_report"]
+            self.assertTrue(context.startswith("行为规则:\n- 礼貌: 保持礼貌\n"))
+            self.assertLessEqual(report["tokens"], 80)
+            self.assertEqual(report["truncated"][0]["section"], "tool_outputs")
+            self.assertEqual(report["included"]["memories"], 0)
+
+            agent.config.context_token_budget = None
+            state = agent._build_initial_state("我喜欢什么编程语言")
+            self.assertIn("用户喜欢编程", agent._prepare_context(state))
+            self.assertEqual(state["context_report"]["budget"], agent.get_context_budget())
+            self.assertEqual(state["context_report"]["dropped"], [])
+
+if __name__ == '__main__':
+    unittest.main()
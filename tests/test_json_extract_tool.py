@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+JSON提取工具测试
+验证合法JSON的本地处理流程以及LLM回退
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+
+from lightce.tools.structure_sort import (
+    JSONExtractAgent, JSONExtractConfig, JSONExtractResult
+)
+
+class TestJSONExtractLocal(unittest.TestCase):
+    """JSON本地提取测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.test_json = """
+        {
+            "users": [
+                {"id": 3, "name": "张三", "profile": {"age": 28, "city": "北京"}},
+                {"id": 1, "name": "李四", "profile": {"age": 32, "city": "上海"}},
+                {"id": 2, "name": "王五"}
+            ],
+            "total": 3
+        }
+        """
+
+    def _create_agent(self, mock_agent_class, **config_kwargs):
+        """创建JSON提取代理"""
+        mock_agent = MagicMock()
+        mock_agent_class.return_value = mock_agent
+        return JSONExtractAgent(JSONExtractConfig(**config_kwargs)), mock_agent
+
+    @patch('lightce.tools.structure_sort.UniversalAgent')
+    def test_valid_json_skips_llm(self, mock_agent_class):
+        """测试合法JSON不调用LLM"""
+        agent, mock_agent = self._create_agent(mock_agent_class)
+
+        result = agent.extract_json(self.test_json)
+
+        mock_agent.run.assert_not_called()
+        self.assertTrue(result.success)
+        self.assertEqual(result.extraction_method, "local")
+        self.assertEqual(result.extracted_content["total"], 3)
+        self.assertEqual(result.extracted_content["users"][0]["name"], "张三")
+
+    @patch('lightce.tools.structure_sort.UniversalAgent')
+    def test_code_fence_and_normalization(self, mock_agent_class):
+        """测试代码块包裹的JSON以及顶层数组和标量的规范化"""
+        agent, mock_agent = self._create_agent(mock_agent_class)
+
+        fenced = agent.extract_json('```json\n{"a": 1}\n```')
+        array = agent.extract_json('[1, 2, 3]')
+
+        mock_agent.run.assert_not_called()
+        self.assertEqual(fenced.extracted_content, {"a": 1})
+        self.assertEqual(array.extracted_content, {"items": [1, 2, 3]})
+        self.assertEqual(agent._normalize("text"), {"value": "text"})
+
+    @patch('lightce.tools.structure_sort.UniversalAgent')
+    def test_sort_keys_and_fields(self, mock_agent_class):
+        """测试键排序和对象数组按字段排序"""
+        agent, _ = self._create_agent(mock_agent_class, sort_keys=True, sort_fields=["id"])
+
+        content = agent.extract_json(self.test_json).extracted_content
+
+        self.assertEqual(list(content.keys()), ["total", "users"])
+        self.assertEqual([user["id"] for user in content["users"]], [1, 2, 3])
+        self.assertEqual(list(content["users"][0].keys()), ["id", "name", "profile"])
+
+    @patch('lightce.tools.structure_sort.UniversalAgent')
+    def test_sort_descending_with_missing_and_mixed_values(self, mock_agent_class):
+        """测试降序排序时缺失字段仍排在最后，混合类型不会报错"""
+        agent, _ = self._create_agent(mock_agent_class, sort_fields=["id"], sort_descending=True)
+
+        content = agent.extract_json('[{"name": "x"}, {"id": 1}, {"id": "b"}, {"id": 5}]').extracted_content
+
+        self.assertEqual([item.get("id") for item in content["items"]], ["b", 5, 1, None])
+
+    @patch('lightce.tools.structure_sort.UniversalAgent')
+    def test_sort_multiple_fields_with_missing(self, mock_agent_class):
+        """测试多字段排序时各字段缺失的元素都排在对应分组的最后"""
+        data = '[{"g": 1, "v": 2}, {"v": 9}, {"g": 2}, {"g": 1}, {"g": 2, "v": 1}, {"g": 1, "v": 5}]'
+
+        for descending, expected in [
+            (False, [(1, 2), (1, 5), (1, None), (2, 1), (2, None), (None, 9)]),
+            (True, [(2, 1), (2, None), (1, 5), (1, 2), (1, None), (None, 9)])
+        ]:
+            agent, _ = self._create_agent(mock_agent_class, sort_fields=["g", "v"], sort_descending=descending)
+            items = agent.extract_json(data).extracted_content["items"]
+            self.assertEqual([(item.get("g"), item.get("v")) for item in items], expected)
+
+    @patch('lightce.tools.structure_sort.UniversalAgent')
+    def test_projection(self, mock_agent_class):
+        """测试字段投影"""
+        agent, _ = self._create_agent(mock_agent_class, projection=["users.name", "users.profile.city"])
+
+        content = agent.extract_json(self.test_json).extracted_content
+
+        self.assertEqual(list(content.keys()), ["users"])
+        self.assertEqual(content["users"][0], {"name": "张三", "profile": {"city": "北京"}})
+        self.assertEqual(content["users"][2], {"name": "王五"})
+
+    @patch('lightce.tools.structure_sort.UniversalAgent')
+    def test_flatten(self, mock_agent_class):
+        """测试展平嵌套结构"""
+        agent, _ = self._create_agent(mock_agent_class, flatten=True, flatten_separator="/")
+
+        content = agent.extract_json(self.test_json).extracted_content
+
+        self.assertEqual(content["users/0/profile/age"], 28)
+        self.assertEqual(content["users/2/name"], "王五")
+        self.assertEqual(content["total"], 3)
+
+    @patch('lightce.tools.structure_sort.UniversalAgent')
+    def test_malformed_input_uses_llm(self, mock_agent_class):
+        """测试格式错误或自由文本输入调用LLM"""
+        agent, mock_agent = self._create_agent(mock_agent_class)
+        mock_agent.run.return_value = {"success": True, "response": '{"name": "张三", "age": 28}'}
+
+        result = agent.extract_json('{"name": "张三", "age": 28,')
+
+        mock_agent.run.assert_called_once()
+        self.assertEqual(result.extraction_method, "llm")
+        self.assertEqual(result.extracted_content, {"name": "张三", "age": 28})
+
+        statistics = agent.get_statistics()
+        self.assertEqual(statistics["llm_extractions"], 1)
+        self.assertEqual(statistics["local_extractions"], 0)
+
+    @patch('lightce.tools.structure_sort.UniversalAgent')
+    def test_local_parsing_disabled(self, mock_agent_class):
+        """测试关闭本地解析时始终调用LLM"""
+        agent, mock_agent = self._create_agent(mock_agent_class, enable_local_parsing=False)
+        mock_agent.run.return_value = {"success": True, "response": '{"total": 3}'}
+
+        result = agent.extract_json(self.test_json)
+
+        mock_agent.run.assert_called_once()
+        self.assertEqual(result.extraction_method, "llm")
+
+    def test_result_default_method(self):
+        """测试结果默认提取方式"""
+        result = JSONExtractResult(success=True, extracted_content={})
+        self.assertEqual(result.extraction_method, "llm")
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
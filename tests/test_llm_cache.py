@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+LLM响应缓存测试
+验证缓存键、内存LRU与SQLite后端以及UniversalAgent的缓存集成
+"""
+
+import os
+import tempfile
+import time
+import unittest
+from unittest.mock import patch, MagicMock
+
+from langchain_core.messages import AIMessage
+from lightce.agent.cache import (
+    LLMCache, InMemoryLRUCache, SQLiteLLMCache, make_cache_key,
+    set_default_cache, get_default_cache
+)
+from lightce.agent.system import UniversalAgent, ModelConfig
+
+class TestCacheKey(unittest.TestCase):
+    """测试缓存键计算"""
+
+    def test_key_is_deterministic(self):
+        """测试相同输入得到相同的键，字典顺序和工具顺序不影响结果"""
+        key1 = make_cache_key({"a": 1, "b": 2}, [{"type": "human", "content": "你好"}], ["t1", "t2"])
+        key2 = make_cache_key({"b": 2, "a": 1}, [{"type": "human", "content": "你好"}], ["t2", "t1"])
+        self.assertEqual(key1, key2)
+
+    def test_key_changes_with_input(self):
+        """测试配置或消息变化时键不同"""
+        base = make_cache_key({"temperature": 0.1}, [{"type": "human", "content": "你好"}])
+        self.assertNotEqual(base, make_cache_key({"temperature": 0.2}, [{"type": "human", "content": "你好"}]))
+        self.assertNotEqual(base, make_cache_key({"temperature": 0.1}, [{"type": "human", "content": "您好"}]))
+
+class TestInMemoryLRUCache(unittest.TestCase):
+    """测试内存LRU缓存"""
+
+    def test_hit_and_miss(self):
+        """测试命中统计"""
+        cache = InMemoryLRUCache(max_size=10)
+        self.assertIsNone(cache.get("k"))
+        cache.set("k", {"v": 1})
+        self.assertEqual(cache.get("k"), {"v": 1})
+
+        stats = cache.get_stats()
+        self.assertEqual(stats["hits"], 1)
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["hit_rate"], 0.5)
+
+    def test_lru_eviction(self):
+        """测试超过容量时淘汰最久未使用的条目"""
+        cache = InMemoryLRUCache(max_size=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+
+        self.assertEqual(cache.get("a"), 1)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+
+    def test_ttl(self):
+        """测试过期条目不再返回"""
+        cache = InMemoryLRUCache(ttl=0.05)
+        cache.set("k", 1)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("k"))
+        self.assertEqual(len(cache), 0)
+
+    def test_base_class_is_abstract(self):
+        """测试缓存基类不能直接实例化，子类必须实现全部存取方法"""
+        with self.assertRaises(TypeError):
+            LLMCache()
+
+        class PartialCache(LLMCache):
+            def _get(self, key):
+                return None
+
+        with self.assertRaises(TypeError):
+            PartialCache()
+
+class TestSQLiteLLMCache(unittest.TestCase):
+    """测试SQLite缓存"""
+
+    def setUp(self):
+        """创建临时数据库"""
+        self.temp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.temp_dir.name, "cache.db")
+
+    def tearDown(self):
+        """清理临时数据库"""
+        self.temp_dir.cleanup()
+
+    def test_persistence(self):
+        """测试缓存在重新打开后仍然可用"""
+        cache = SQLiteLLMCache(self.path)
+        cache.set("k", {"type": "ai", "data": {"content": "响应"}})
+        cache.close()
+
+        reopened = SQLiteLLMCache(self.path)
+        self.assertEqual(reopened.get("k"), {"type": "ai", "data": {"content": "响应"}})
+        reopened.close()
+
+    def test_size_eviction(self):
+        """测试超过容量时按访问时间淘汰"""
+        cache = SQLiteLLMCache(self.path, max_size=2)
+        cache.set("a", 1)
+        time.sleep(0.01)
+        cache.set("b", 2)
+        time.sleep(0.01)
+        cache.get("a")
+        time.sleep(0.01)
+        cache.set("c", 3)
+
+        self.assertEqual(len(cache), 2)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+        cache.close()
+
+    def test_ttl(self):
+        """测试过期条目不再返回"""
+        cache = SQLiteLLMCache(self.path, ttl=0.05)
+        cache.set("k", 1)
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("k"))
+        cache.close()
+
+class TestAgentCache(unittest.TestCase):
+    """测试UniversalAgent的缓存集成"""
+
+    def tearDown(self):
+        """恢复全局默认缓存"""
+        set_default_cache(None)
+
+    @patch('lightce.agent.system.ChatOpenAI')
+    def test_identical_prompt_uses_cache(self, mock_openai):
+        """测试相同prompt第二次运行不调用模型"""
+        mock_llm = MagicMock()
+        mock_llm.bind_tools.return_value.invoke.return_value = AIMessage(content="缓存响应")
+        mock_openai.return_value = mock_llm
+
+        agent = UniversalAgent(ModelConfig(), cache=InMemoryLRUCache())
+        first = agent.run("你好")
+        second = agent.run("你好")
+
+        self.assertEqual(first["response"], "缓存响应")
+        self.assertEqual(second["response"], "缓存响应")
+        self.assertEqual(mock_llm.bind_tools.return_value.invoke.call_count, 1)
+        self.assertEqual(agent.get_cache_stats()["hits"], 1)
+
+    @patch('lightce.agent.system.ChatOpenAI')
+    def test_model_config_is_part_of_key(self, mock_openai):
+        """测试模型配置变化时不命中缓存"""
+        mock_llm = MagicMock()
+        mock_llm.bind_tools.return_value.invoke.return_value = AIMessage(content="响应")
+        mock_openai.return_value = mock_llm
+
+        agent = UniversalAgent(ModelConfig(), cache=InMemoryLRUCache())
+        agent.run("你好")
+        agent.update_model_config(temperature=0.1)
+        agent.run("你好")
+
+        self.assertEqual(mock_llm.bind_tools.return_value.invoke.call_count, 2)
+
+    @patch('lightce.agent.system.ChatOpenAI')
+    def test_default_cache_shared(self, mock_openai):
+        """测试未指定缓存的agent共享全局默认缓存"""
+        mock_llm = MagicMock()
+        mock_llm.bind_tools.return_value.invoke.return_value = AIMessage(content="响应")
+        mock_openai.return_value = mock_llm
+
+        set_default_cache(InMemoryLRUCache())
+        UniversalAgent(ModelConfig()).run("你好")
+        UniversalAgent(ModelConfig()).run("你好")
+
+        self.assertEqual(mock_llm.bind_tools.return_value.invoke.call_count, 1)
+        self.assertEqual(get_default_cache().get_stats()["hits"], 1)
+
+    @patch('lightce.agent.system.ChatOpenAI')
+    def test_no_cache_by_default(self, mock_openai):
+        """测试未配置缓存时每次都调用模型"""
+        mock_llm = MagicMock()
+        mock_llm.bind_tools.return_value.invoke.return_value = AIMessage(content="响应")
+        mock_openai.return_value = mock_llm
+
+        set_default_cache(None)
+        agent = UniversalAgent(ModelConfig())
+        agent.run("你好")
+        agent.run("你好")
+
+        self.assertEqual(mock_llm.bind_tools.return_value.invoke.call_count, 2)
+        self.assertIsNone(agent.get_cache_stats())
+
+if __name__ == '__main__':
+    unittest.main()
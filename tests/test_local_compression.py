@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地压缩测试
+验证各压缩类型的本地压缩不依赖模型即可接近目标比例并保留关键内容
+"""
+
+import unittest
+
+from lightce.prompt.mini_contents import CompressionType
+from lightce.tools.local_compression import (
+    compress_prose, compress_code, compress_table, canonicalize_url, compress_links, compress_locally
+)
+
+class TestLocalCompression(unittest.TestCase):
+    """测试本地压缩"""
+
+    def test_prose_reaches_target(self):
+        """测试正文按句子抽取，重复句只保留一次且不超过目标长度"""
+        sentences = [f"第{i}个观点涉及主题{i}和细节{i * 7}。" for i in range(20)]
+        text = "".join(sentences) + sentences[3] * 5
+
+        result = compress_prose(text, len(text) // 2)
+
+        self.assertLessEqual(len(result), len(text) // 2)
+        self.assertEqual(result.count(sentences[3]), min(result.count(sentences[3]), 1))
+        self.assertTrue(result.startswith(sentences[0]))
+
+    def test_code_strips_comments(self):
+        """测试代码去掉注释和文档字符串，字符串中的井号保留"""
+        code = (
+            'def greet(name):\n'
+            '    """打招呼"""\n'
+            '    # 拼接问候语\n'
+            '    return "#hello " + name\n'
+        )
+
+        result = compress_code(code, len(code) // 2)
+
+        self.assertNotIn("打招呼", result)
+        self.assertNotIn("拼接问候语", result)
+        self.assertIn('"#hello "', result)
+        self.assertIn("return", result)
+
+    def test_canonicalize_url_keeps_target(self):
+        """测试决定链接内容的参数、片段和签名查询字符串保持不变"""
+        self.assertEqual(
+            canonicalize_url("https://github.com/org/repo/blob/main/a.py?ref=dev#L10"),
+            "https://github.com/org/repo/blob/main/a.py?ref=dev#L10"
+        )
+        self.assertEqual(canonicalize_url("https://example.com/app#/users/1"), "https://example.com/app#/users/1")
+        self.assertEqual(
+            canonicalize_url("https://example.com/f?z=1&a=%2Fx+y&sig=AB%3D"),
+            "https://example.com/f?z=1&a=%2Fx+y&sig=AB%3D"
+        )
+        self.assertEqual(
+            canonicalize_url("https://example.com/f?z=1&gclid=abc&a=%2Fx&utm_medium=mail"),
+            "https://example.com/f?z=1&a=%2Fx"
+        )
+
+    def test_code_shortens_local_names_only(self):
+        """测试只缩写局部变量和参数，字符串、属性、关键字参数和函数名保持不变"""
+        code = (
+            'def load_settings(settings_path, reload_interval=3):\n'
+            '    parsed_settings = read(settings_path, reload_interval=reload_interval)\n'
+            '    cache.parsed_settings = parsed_settings\n'
+            '    total_entries_count = len(settings_path)\n'
+            '    message = f"{total_entries_count} in settings_path"\n'
+            '    total_entries_count += 1\n'
+            '    return load_settings(total_entries_count)\n'
+        )
+
+        result = compress_code(code, 0)
+
+        self.assertIn("def load_settings(", result)
+        self.assertIn("settings_path", result)
+        self.assertIn("reload_interval=reload_interval", result)
+        self.assertIn("cache.parsed_settings = parsed_settings", result)
+        self.assertIn('f"{total_entries_count} in settings_path"', result)
+        self.assertIn("total_entries_count += 1", result)
+
+    def test_code_shortens_repeated_locals(self):
+        """测试多次出现的长局部变量被一致地缩写"""
+        code = (
+            'def count(items):\n'
+            '    accumulated_total = 0\n'
+            '    for current_element in items:\n'
+            '        accumulated_total += current_element\n'
+            '    return accumulated_total\n'
+        )
+
+        result = compress_code(code, 0)
+
+        self.assertNotIn("accumulated_total", result)
+        self.assertNotIn("current_element", result)
+        self.assertEqual(result.count("at"), 3)
+        self.assertIn("at+=ce", result.replace(" ", ""))
+
+    def test_table_prunes_rows_and_columns(self):
+        """测试表格去掉重复行和取值相同的列"""
+        rows = ["| 名称 | 状态 | 数量 |", "| --- | --- | --- |"]
+        rows += [f"| 项目{i} | 正常 | {i} |" for i in range(5)] + ["| 项目0 | 正常 | 0 |"]
+        text = "\n".join(rows)
+
+        result = compress_table(text, len(text))
+
+        self.assertNotIn("状态", result)
+        self.assertEqual(result.count("项目0"), 1)
+        self.assertIn("项目4", result)
+
+    def test_canonicalize_url(self):
+        """测试URL去掉跟踪参数，规范化后重复的行只保留一行"""
+        self.assertEqual(
+            canonicalize_url("HTTPS://Example.com/path/?utm_source=x&id=1#top"),
+            "https://example.com/path?id=1#top"
+        )
+        text = "见 https://example.com/a?utm_medium=mail\n见 https://example.com/a/"
+        self.assertEqual(compress_links(text, len(text)).count("https://example.com/a"), 1)
+
+    def test_detects_type(self):
+        """测试未指定类型时按内容选择压缩方式"""
+        code = "def add(a, b):\n    # 相加\n    return a + b\n"
+
+        self.assertNotIn("相加", compress_locally(code, 50.0))
+        self.assertEqual(compress_locally(""), "")
+        self.assertLessEqual(len(compress_locally("很长的句子。" * 50, 80.0, CompressionType.TEXT)), 60)
+
+    def test_mixed_content_segments(self):
+        """测试未指定类型时各段分别压缩：代码去注释，表格去重复行，链接去跟踪参数"""
+        text = (
+            "缓存可以减少重复请求。\n\n"
+            "```python\ndef load(path):\n    # 读取文件\n    return open(path).read()\n```\n\n"
+            "| 名称 | 状态 |\n| --- | --- |\n| a | 正常 |\n| a | 正常 |\n\n"
+            "参考 https://example.com/docs?utm_source=x\n"
+        )
+
+        result = compress_locally(text, 10.0)
+
+        self.assertIn("缓存可以减少重复请求。", result)
+        self.assertNotIn("读取文件", result)
+        self.assertEqual(result.count("|a|正常|"), 1)
+        self.assertIn("https://example.com/docs", result)
+        self.assertNotIn("utm_source", result)
+
+if __name__ == "__main__":
+    unittest.main()
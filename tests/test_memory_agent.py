@@ -6,6 +6,7 @@
 """
 
 import unittest
+import asyncio
 from unittest.mock import patch, MagicMock
 from lightce.agent.memory_agent import MemoryAgent, create_memory_agent, MemoryAgentConfig, MemoryItem, Rule
 from lightce.tools.example_tools import get_current_time, calculate
@@ -235,6 +236,139 @@ class TestRuleIntegration(unittest.TestCase):
         self.assertEqual(rule.priority, 8)
         self.assertTrue(rule.active)
 
+class TestMemoryAgentAsync(unittest.TestCase):
+    """测试记忆Agent异步执行路径"""
+    
+    def test_arun_uses_ainvoke(self):
+        """测试arun通过ainvoke执行工作流"""
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(MemoryAgentConfig())
+            
+            async def fake_ainvoke(state):
+                state["output_text"] = "异步响应"
+                state["current_step"] = "output_generated"
+                return state
+            
+            agent.graph = MagicMock()
+            agent.graph.ainvoke = fake_ainvoke
+            
+            result = asyncio.run(agent.arun("你好"))
+            
+            self.assertTrue(result["success"])
+            self.assertEqual(result["response"], "异步响应")
+            agent.graph.invoke.assert_not_called()
+
+class TestMemoryRetrieval(unittest.TestCase):
+    """测试基于向量索引的记忆检索"""
+    
+    def test_irrelevant_important_memory_not_returned(self):
+        """测试与查询无关的高重要性记忆不会被返回"""
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(MemoryAgentConfig())
+            agent.add_memory("用户喜欢编程", importance=0.5)
+            agent.add_memory("用户住在北京", importance=0.9)
+            
+            relevant = agent.get_relevant_memories("编程")
+            
+            self.assertEqual([m.content for m in relevant], ["用户喜欢编程"])
+    
+    def test_importance_and_recency_ranking(self):
+        """测试相似记忆按重要性和时效排序"""
+        from datetime import datetime, timedelta
+        
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(MemoryAgentConfig(memory_recency_half_life_days=1.0))
+            agent.add_memory("用户喜欢Python编程", importance=0.4)
+            agent.add_memory("用户喜欢Java编程", importance=0.9)
+            agent.add_memory("用户喜欢Go编程", importance=0.9)
+            agent.long_term_memory[2].timestamp = datetime.now() - timedelta(days=10)
+            
+            relevant = agent.get_relevant_memories("编程", limit=3)
+            
+            self.assertEqual(relevant[0].content, "用户喜欢Java编程")
+            self.assertEqual(relevant[-1].content, "用户喜欢Go编程")
+    
+    def test_index_follows_eviction_and_clear(self):
+        """测试淘汰和清除记忆时同步更新索引"""
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(MemoryAgentConfig(max_long_term_memory=2))
+            agent.add_memory("低重要性的编程记忆", importance=0.1)
+            agent.add_memory("用户喜欢编程", importance=0.8, category="preference")
+            agent.add_memory("用户住在北京", importance=0.7, category="location")
+            
+            self.assertEqual(len(agent.memory_index), 2)
+            self.assertNotIn("低重要性的编程记忆", [m.content for m in agent.get_relevant_memories("编程")])
+            
+            agent.clear_memory("preference")
+            self.assertEqual(agent.get_relevant_memories("编程"), [])
+            
+            agent.clear_memory()
+            self.assertEqual(len(agent.memory_index), 0)
+    
+    def test_decayed_memory_evicted_first(self):
+        """测试容量已满时优先淘汰衰减后重要性最低的记忆"""
+        from datetime import datetime, timedelta
+
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(MemoryAgentConfig(max_long_term_memory=2, memory_recency_half_life_days=1.0))
+            agent.add_memory("很久以前的重要记忆", importance=0.9)
+            agent.add_memory("最近的普通记忆", importance=0.3)
+            old = agent.long_term_memory[0]
+            old.timestamp = datetime.now() - timedelta(days=5)
+            agent.long_term_memory.update(old.id)
+
+            agent.add_memory("新的记忆", importance=0.5)
+
+            self.assertNotIn(old.id, agent.long_term_memory)
+            self.assertEqual(len(agent.memory_index), 2)
+
+    def test_keyword_scan_fallback(self):
+        """测试关闭向量索引时使用关键词扫描"""
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(MemoryAgentConfig(enable_vector_index=False))
+            agent.add_memory("用户喜欢编程", importance=0.2)
+            agent.add_memory("用户住在北京", importance=0.9)
+            
+            contents = [m.content for m in agent.get_relevant_memories("编程")]
+            
+            self.assertIn("用户喜欢编程", contents)
+            self.assertIn("用户住在北京", contents)
+
+    def test_memories_used_counts_context_memories(self):
+        """测试初始状态只记录记忆条数，memories_used为实际放入上下文的记忆数"""
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(MemoryAgentConfig(memory_backend_path=None))
+            agent.add_memory("用户喜欢编程", importance=0.9)
+            agent.add_memory("用户住在北京", importance=0.5)
+            
+            state = agent._build_initial_state("我喜欢什么编程语言")
+            result = agent.run("我喜欢什么编程语言")
+            
+            self.assertEqual(state["memory_count"], 2)
+            self.assertNotIn("long_term_memory", state)
+            self.assertEqual(result["memories_used"], 1)
+            self.assertEqual(result["memories_used"], result["context_report"]["included"]["memories"])
+
+class TestMemoryAgentBindingReuse(unittest.TestCase):
+    """测试记忆Agent绑定对象的复用"""
+    
+    def test_bindings_reused_until_tools_change(self):
+        """测试工具不变时复用绑定，添加工具后重新绑定"""
+        with patch('lightce.agent.memory_agent.ChatOpenAI') as mock_openai:
+            agent = MemoryAgent(MemoryAgentConfig())
+            agent.add_tool(get_current_time)
+            
+            agent._get_llm_with_tools()
+            agent._get_llm_with_tools()
+            tool_node = agent._get_tool_node()
+            self.assertIs(agent._get_tool_node(), tool_node)
+            self.assertEqual(mock_openai.return_value.bind_tools.call_count, 1)
+            
+            agent.add_tool(calculate)
+            agent._get_llm_with_tools()
+            self.assertIsNot(agent._get_tool_node(), tool_node)
+            self.assertEqual(mock_openai.return_value.bind_tools.call_count, 2)
+
 def run_basic_functionality_test():
     """运行基本功能测试（不需要API密钥）"""
     print("运行记忆Agent基本功能测试...")
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+长期记忆持久化后端测试
+验证延迟打开、全文检索、批量导入导出以及MemoryAgent重启后恢复记忆
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import patch
+
+from lightce.agent.memory_backend import SQLiteMemoryBackend, memory_terms
+from lightce.agent.memory_agent import MemoryAgent, MemoryAgentConfig
+
+def make_memory(memory_id: str, content: str, importance: float = 0.5, category: str = "general"):
+    """构造记忆字典"""
+    return {
+        "id": memory_id,
+        "content": content,
+        "timestamp": datetime(2024, 1, 1),
+        "importance": importance,
+        "category": category,
+        "metadata": {"source": "test"}
+    }
+
+class TestSQLiteMemoryBackend(unittest.TestCase):
+    """测试SQLiteMemoryBackend"""
+
+    def setUp(self):
+        """创建临时目录"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmpdir, "memory.db")
+        self.backend = SQLiteMemoryBackend(self.path)
+
+    def tearDown(self):
+        """关闭数据库并删除临时目录"""
+        self.backend.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_lazy_open(self):
+        """测试首次访问时才打开数据库"""
+        self.assertFalse(self.backend.is_open)
+        self.assertFalse(os.path.exists(self.path))
+
+        self.assertEqual(len(self.backend), 0)
+        self.assertTrue(self.backend.is_open)
+
+    def test_memory_terms(self):
+        """测试中文按单字和双字、英文按词提取特征"""
+        self.assertEqual(memory_terms("喜欢Python"), ["喜", "欢", "喜欢", "python"])
+
+    def test_add_search_and_replace(self):
+        """测试写入、检索以及相同ID覆盖"""
+        self.backend.add_many([
+            make_memory("1", "用户喜欢Python编程"),
+            make_memory("2", "用户住在北京"),
+            make_memory("3", "今天天气晴朗")
+        ])
+
+        results = self.backend.search("编程", 5)
+        self.assertEqual([m["id"] for m in results], ["1"])
+        self.assertEqual(results[0]["metadata"], {"source": "test"})
+        self.assertEqual(results[0]["timestamp"], datetime(2024, 1, 1))
+
+        self.backend.add(make_memory("1", "用户喜欢Go语言"))
+        self.assertEqual(len(self.backend), 3)
+        self.assertEqual(self.backend.search("编程", 5), [])
+        self.assertEqual(self.backend.search("go", 5)[0]["id"], "1")
+
+    def test_scan_limit(self):
+        """测试匹配数超过扫描窗口时只在最新写入的记忆中选取"""
+        self.backend.add_many([make_memory(str(i), f"编程记录{i}") for i in range(5)])
+
+        self.assertEqual(len(self.backend.search("编程", 10, scan_limit=None)), 5)
+        self.assertEqual(
+            sorted(m["id"] for m in self.backend.search("编程", 2, scan_limit=2)),
+            ["3", "4"]
+        )
+
+    def test_remove(self):
+        """测试按ID、类别删除以及清空"""
+        self.backend.add_many([
+            make_memory("1", "用户喜欢编程", category="preference"),
+            make_memory("2", "用户喜欢跑步", category="preference"),
+            make_memory("3", "用户住在北京", category="location")
+        ])
+
+        self.assertTrue(self.backend.remove("3"))
+        self.assertFalse(self.backend.remove("3"))
+        self.assertEqual(self.backend.search("北京", 5), [])
+
+        self.assertEqual(self.backend.remove_category("preference"), 2)
+        self.assertEqual(self.backend.search("喜欢", 5), [])
+
+        self.backend.add(make_memory("4", "新的记忆"))
+        self.backend.clear()
+        self.assertEqual(len(self.backend), 0)
+
+    def test_bulk_load_and_jsonl_roundtrip(self):
+        """测试批量导入以及JSONL导出后导入到新数据库"""
+        count = self.backend.bulk_load(
+            (make_memory(str(i), f"第{i}条记忆关于主题{i % 5}") for i in range(250)),
+            batch_size=100
+        )
+        self.assertEqual(count, 250)
+        self.assertEqual(len(self.backend), 250)
+
+        export_path = os.path.join(self.tmpdir, "memories.jsonl")
+        self.assertEqual(self.backend.export_jsonl(export_path), 250)
+
+        other = SQLiteMemoryBackend(os.path.join(self.tmpdir, "other.db"))
+        try:
+            self.assertEqual(other.import_jsonl(export_path), 250)
+            self.assertEqual(other.get("42")["content"], "第42条记忆关于主题2")
+            self.assertEqual(len(other.get_many([str(i) for i in range(1000)])), 250)
+        finally:
+            other.close()
+
+    def test_like_fallback(self):
+        """测试关闭全文索引时使用LIKE匹配"""
+        backend = SQLiteMemoryBackend(os.path.join(self.tmpdir, "plain.db"), enable_fts=False)
+        try:
+            backend.add_many([make_memory("1", "用户喜欢编程", 0.3), make_memory("2", "用户住在北京", 0.9)])
+            self.assertFalse(backend.has_fts)
+            self.assertEqual([m["id"] for m in backend.search("编程", 5)], ["1"])
+        finally:
+            backend.close()
+
+class TestMemoryAgentPersistence(unittest.TestCase):
+    """测试MemoryAgent使用持久化后端"""
+
+    def setUp(self):
+        """创建临时目录"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.config = MemoryAgentConfig(memory_backend_path=os.path.join(self.tmpdir, "memory.db"))
+
+    def tearDown(self):
+        """删除临时目录"""
+        shutil.rmtree(self.tmpdir)
+
+    def test_memories_survive_restart(self):
+        """测试新进程按需载入与查询相关的持久化记忆"""
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(self.config)
+            agent.add_memory("用户喜欢编程", importance=0.8)
+            agent.add_memory("用户住在北京", importance=0.7)
+            agent.memory_backend.close()
+
+            restarted = MemoryAgent(self.config)
+            self.assertFalse(restarted.memory_backend.is_open)
+            self.assertEqual(len(restarted.long_term_memory), 0)
+
+            relevant = restarted.get_relevant_memories("编程")
+
+            self.assertEqual([m.content for m in relevant], ["用户喜欢编程"])
+            self.assertEqual(len(restarted.long_term_memory), 1)
+            self.assertEqual(restarted.get_memory_stats()["persisted_memories"], 2)
+            restarted.memory_backend.close()
+
+    def test_clear_memory_clears_backend(self):
+        """测试清除记忆时同步删除持久化数据"""
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            agent = MemoryAgent(self.config)
+            agent.add_memory("用户喜欢编程", category="preference")
+            agent.add_memory("用户住在北京", category="location")
+
+            agent.clear_memory("preference")
+            self.assertEqual(len(agent.memory_backend), 1)
+
+            agent.clear_memory()
+            self.assertEqual(len(agent.memory_backend), 0)
+            agent.memory_backend.close()
+
+if __name__ == '__main__':
+    unittest.main()
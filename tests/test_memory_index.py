@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+记忆向量索引测试
+验证哈希嵌入、暴力检索、LSH近似检索以及增量添加删除
+"""
+
+import unittest
+
+import numpy as np
+
+from lightce.agent.memory_index import (
+    Embedder, HashingEmbedder, BruteForceIndex, LSHIndex, MemoryVectorIndex
+)
+
+class TestHashingEmbedder(unittest.TestCase):
+    """测试哈希嵌入"""
+
+    def test_normalized_and_deterministic(self):
+        """测试向量归一化且结果稳定"""
+        embedder = HashingEmbedder(dim=64)
+        vectors = embedder.embed(["用户喜欢编程", "user likes python", ""])
+
+        self.assertEqual(vectors.shape, (3, 64))
+        self.assertAlmostEqual(float(np.linalg.norm(vectors[0])), 1.0, places=5)
+        self.assertAlmostEqual(float(np.linalg.norm(vectors[2])), 0.0, places=5)
+        np.testing.assert_array_equal(vectors[0], embedder.embed_one("用户喜欢编程"))
+
+    def test_similarity(self):
+        """测试共享词语的文本相似度更高"""
+        embedder = HashingEmbedder()
+        query = embedder.embed_one("编程")
+        related = embedder.embed_one("用户喜欢编程")
+        unrelated = embedder.embed_one("今天是晴天")
+
+        self.assertGreater(float(query @ related), float(query @ unrelated))
+
+    def test_base_class_is_abstract(self):
+        """测试嵌入基类不能直接实例化，子类只需实现embed"""
+        with self.assertRaises(TypeError):
+            Embedder()
+
+        class ConstantEmbedder(Embedder):
+            dim = 2
+
+            def embed(self, texts):
+                return np.ones((len(texts), self.dim), dtype=np.float32) / np.sqrt(2)
+
+        np.testing.assert_allclose(ConstantEmbedder().embed_one("任意文本"), [0.70710677, 0.70710677])
+
+class TestBruteForceIndex(unittest.TestCase):
+    """测试暴力检索索引"""
+
+    def test_add_remove_search(self):
+        """测试添加、删除后检索结果正确"""
+        index = BruteForceIndex(dim=3, initial_capacity=1)
+        index.add("x", np.array([1, 0, 0], dtype=np.float32))
+        index.add("y", np.array([0, 1, 0], dtype=np.float32))
+        index.add("z", np.array([0, 0, 1], dtype=np.float32))
+
+        self.assertEqual(index.search(np.array([0, 1, 0], dtype=np.float32), 1)[0][0], "y")
+
+        self.assertTrue(index.remove("x"))
+        self.assertFalse(index.remove("x"))
+        self.assertEqual(len(index), 2)
+        self.assertEqual(index.search(np.array([0, 0, 1], dtype=np.float32), 1)[0][0], "z")
+        self.assertEqual(index.search(np.array([0, 1, 0], dtype=np.float32), 1)[0][0], "y")
+
+    def test_search_candidates(self):
+        """测试仅在候选集合中检索"""
+        index = BruteForceIndex(dim=2)
+        index.add("a", np.array([1, 0], dtype=np.float32))
+        index.add("b", np.array([0.8, 0.6], dtype=np.float32))
+
+        result = index.search(np.array([1, 0], dtype=np.float32), 5, candidates={"b", "missing"})
+
+        self.assertEqual([item_id for item_id, _ in result], ["b"])
+
+class TestLSHIndex(unittest.TestCase):
+    """测试LSH索引"""
+
+    def test_candidates_contain_identical_vector(self):
+        """测试相同向量必定出现在候选中，删除后不再出现"""
+        embedder = HashingEmbedder()
+        lsh = LSHIndex(embedder.dim)
+        texts = [f"第{i}条记忆内容" for i in range(50)]
+        lsh.add_batch([str(i) for i in range(50)], embedder.embed(texts))
+
+        self.assertIn("7", lsh.candidates(embedder.embed_one(texts[7])))
+
+        lsh.remove("7")
+        self.assertNotIn("7", lsh.candidates(embedder.embed_one(texts[7])))
+        self.assertEqual(len(lsh), 49)
+
+class TestMemoryVectorIndex(unittest.TestCase):
+    """测试记忆向量索引"""
+
+    def test_search(self):
+        """测试检索最相关的记忆"""
+        index = MemoryVectorIndex()
+        index.add_many([("1", "用户喜欢编程"), ("2", "今天是晴天"), ("3", "用户住在北京")])
+
+        self.assertEqual(index.search("编程", 1)[0][0], "1")
+        self.assertEqual(index.search("北京", 1)[0][0], "3")
+
+        index.remove("1")
+        self.assertNotIn("1", [item_id for item_id, _ in index.search("编程", 3)])
+
+    def test_switch_to_ann(self):
+        """测试超过阈值后启用LSH并保持可检索"""
+        index = MemoryVectorIndex(ann_threshold=20)
+        index.add_many([(str(i), f"记忆编号{i}关于主题{i % 7}") for i in range(10)])
+        self.assertFalse(index.uses_ann)
+
+        index.add_many([(str(i), f"记忆编号{i}关于主题{i % 7}") for i in range(10, 40)])
+        self.assertTrue(index.uses_ann)
+
+        self.assertEqual(index.search("记忆编号33关于主题5", 1)[0][0], "33")
+        index.remove("33")
+        self.assertNotIn("33", [item_id for item_id, _ in index.search("记忆编号33关于主题5", 5)])
+
+if __name__ == '__main__':
+    unittest.main()
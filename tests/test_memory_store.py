@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+MemoryStore测试
+验证按优先级淘汰、惰性删除、时间衰减以及列表式访问
+"""
+
+import unittest
+from datetime import datetime, timedelta
+
+from pydantic import BaseModel
+
+from lightce.agent.memory_store import MemoryStore
+
+class Item(BaseModel):
+    """测试条目"""
+    id: str
+    importance: float
+    timestamp: datetime = datetime(2024, 1, 1)
+
+class TestMemoryStore(unittest.TestCase):
+    """测试MemoryStore"""
+
+    def test_evicts_lowest_priority(self):
+        """测试已满时淘汰优先级最低的条目，新条目不会被立即淘汰"""
+        store = MemoryStore(max_size=3)
+        for item_id, importance in [("a", 0.5), ("b", 0.2), ("c", 0.9)]:
+            self.assertEqual(store.add(Item(id=item_id, importance=importance)), [])
+
+        evicted = store.add(Item(id="d", importance=0.1))
+
+        self.assertEqual([item.id for item in evicted], ["b"])
+        self.assertEqual([item.id for item in store], ["a", "c", "d"])
+        self.assertEqual(store.pop_lowest().id, "d")
+
+    def test_ties_evict_oldest_insert(self):
+        """测试优先级相同时先淘汰较早插入的条目"""
+        store = MemoryStore(max_size=2)
+        store.add(Item(id="a", importance=0.5))
+        store.add(Item(id="b", importance=0.5))
+
+        self.assertEqual(store.add(Item(id="c", importance=0.5))[0].id, "a")
+
+    def test_remove_and_replace(self):
+        """测试删除后的堆记录被惰性丢弃，相同ID替换原条目"""
+        store = MemoryStore(max_size=10)
+        for i in range(5):
+            store.add(Item(id=str(i), importance=i / 10))
+
+        self.assertEqual(store.remove("0").id, "0")
+        self.assertIsNone(store.remove("0"))
+        self.assertEqual(store.peek_lowest().id, "1")
+
+        store.add(Item(id="1", importance=0.95))
+        self.assertEqual(len(store), 4)
+        self.assertEqual(store.get("1").importance, 0.95)
+        self.assertEqual(store.pop_lowest().id, "2")
+        self.assertEqual([item.id for item in store.top(2)], ["1", "4"])
+
+        removed = store.remove_where(lambda item: item.importance > 0.35)
+        self.assertEqual(sorted(item.id for item in removed), ["1", "4"])
+        self.assertEqual(store.copy()[0].id, "3")
+
+    def test_time_decay(self):
+        """测试较旧的条目按半衰期衰减后被优先淘汰"""
+        day = 86400
+        store = MemoryStore(max_size=2, timestamp=lambda item: item.timestamp, half_life=day)
+        now = datetime(2024, 1, 10)
+        old = Item(id="old", importance=0.9, timestamp=now - timedelta(days=3))
+        new = Item(id="new", importance=0.3, timestamp=now)
+        store.add(old)
+        store.add(new)
+
+        self.assertAlmostEqual(store.effective_priority(old, now), 0.9 / 8)
+        self.assertAlmostEqual(store.effective_priority(new, now), 0.3)
+        self.assertEqual([item.id for item in store.top(2)], ["new", "old"])
+        self.assertEqual(store.add(Item(id="x", importance=0.5, timestamp=now))[0].id, "old")
+
+    def test_update_rekeys(self):
+        """测试修改优先级后调用update重新排序"""
+        store = MemoryStore()
+        store.add(Item(id="a", importance=0.1))
+        store.add(Item(id="b", importance=0.5))
+
+        store.get("a").importance = 0.9
+        self.assertTrue(store.update("a"))
+
+        self.assertEqual(store.peek_lowest().id, "b")
+        self.assertFalse(store.update("missing"))
+
+    def test_list_access_and_compaction(self):
+        """测试下标访问以及大量删除后堆被压缩"""
+        store = MemoryStore()
+        for i in range(1000):
+            store.add(Item(id=str(i), importance=(i * 37 % 1000) / 1000))
+
+        self.assertEqual(store[0].id, "0")
+        self.assertEqual(store[-1].id, "999")
+        self.assertEqual([item.id for item in store[1:3]], ["1", "2"])
+        with self.assertRaises(IndexError):
+            store[1000]
+
+        for i in range(900):
+            store.remove(str(i))
+        self.assertLessEqual(len(store._heap), 2 * len(store) + 64)
+        self.assertEqual(len(store), 100)
+
+        lowest = [store.pop_lowest().importance for _ in range(100)]
+        self.assertEqual(lowest, sorted(lowest))
+        self.assertIsNone(store.pop_lowest())
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,82 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+多模式匹配测试
+验证自动机与逐个子串判断结果一致，以及ReactAgent使用编译后的匹配器查找规则和模式
+"""
+
+import random
+import unittest
+from unittest.mock import patch
+
+from lightce.agent.pattern_matcher import AhoCorasickAutomaton, MultiPatternMatcher
+from lightce.agent.react_agent import ReactAgent, ReactAgentConfig, AdaptiveRule, BehaviorPattern
+
+class TestAhoCorasickAutomaton(unittest.TestCase):
+    """测试AhoCorasickAutomaton"""
+
+    def test_overlapping_patterns(self):
+        """测试重叠和互为后缀的模式都能找到"""
+        automaton = AhoCorasickAutomaton(["he", "she", "his", "hers", "", "he"])
+
+        self.assertEqual(len(automaton), 4)
+        self.assertEqual(automaton.find("ushers"), {"he", "she", "hers"})
+        self.assertEqual(automaton.find("xyz"), set())
+
+    def test_matches_substring_search(self):
+        """测试随机模式和文本下与逐个子串判断结果一致"""
+        rng = random.Random(0)
+        alphabet = "ab错误"
+        for _ in range(200):
+            patterns = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 4))) for _ in range(rng.randint(1, 8))]
+            text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+            automaton = AhoCorasickAutomaton(patterns)
+            self.assertEqual(automaton.find(text), {p for p in patterns if p in text})
+
+class TestMultiPatternMatcher(unittest.TestCase):
+    """测试MultiPatternMatcher"""
+
+    def test_owners(self):
+        """测试共享关键词、忽略大小写以及空关键词总是命中"""
+        matcher = MultiPatternMatcher([
+            ("a", ["错误", "Error"]),
+            ("b", ["error"]),
+            ("c", ["超时"]),
+            ("d", [""])
+        ])
+
+        self.assertEqual(matcher.match("发生ERROR"), {"a", "b", "d"})
+        self.assertEqual(matcher.match("一切正常"), {"d"})
+
+class TestReactAgentMatching(unittest.TestCase):
+    """测试ReactAgent按关键词查找规则和模式"""
+
+    def test_analyze_context_matches(self):
+        """测试规则可由消息或上下文触发，模式只由消息触发，增删后重建匹配器"""
+        with patch('lightce.agent.react_agent.ChatOpenAI'):
+            agent = ReactAgent(ReactAgentConfig())
+            agent.add_adaptive_rule(AdaptiveRule(name="错误处理", description="处理错误", condition="错误 失败", action="提供方案", priority=1))
+            agent.add_adaptive_rule(AdaptiveRule(name="性能", description="响应慢", condition="慢", action="优化", priority=5))
+            agent.add_adaptive_rule(AdaptiveRule(name="停用", description="已停用", condition="错误", action="无", priority=9, active=False))
+            agent.add_behavior_pattern(BehaviorPattern(
+                pattern_name="问候", description="问候语", triggers=["你好"], responses=["你好！"], success_rate=0.9
+            ))
+
+            context = agent.analyze_context("你好，页面有点慢")
+            self.assertEqual([r["name"] for r in context["applicable_rules"]], ["性能"])
+            self.assertEqual([p["name"] for p in context["matching_patterns"]], ["问候"])
+
+            agent.add_environment_event("系统错误", "数据库连接失败", 0.8)
+            matcher = agent._get_matcher()
+            context = agent.analyze_context("请帮我看看")
+            self.assertEqual([r["name"] for r in context["applicable_rules"]], ["错误处理"])
+            self.assertEqual(context["matching_patterns"], [])
+            self.assertIs(agent._get_matcher(), matcher)
+
+            agent.add_adaptive_rule(AdaptiveRule(name="帮助", description="请求帮助", condition="帮我", action="协助", priority=3))
+            context = agent.analyze_context("请帮我看看")
+            self.assertEqual([r["name"] for r in context["applicable_rules"]], ["帮助", "错误处理"])
+            self.assertIsNot(agent._get_matcher(), matcher)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+策略选择模式测试
+验证单次调用模式、启发式模式以及多次调用模式的级别解析
+"""
+
+import unittest
+from unittest.mock import patch, MagicMock
+import json
+
+from lightce.tools.policy_select import (
+    PolicySelectAgent, PolicySelectConfig, PolicySelectMode, MemoryType
+)
+
+class TestPolicySelectModes(unittest.TestCase):
+    """策略选择模式测试类"""
+
+    def setUp(self):
+        """测试前的准备工作"""
+        self.test_prompt = "请总结以下技术文档，必须保留所有参数：learning_rate=0.01, batch_size=32。"
+        self.valid_response = json.dumps({
+            "analysis": {"content_type": "文本", "complexity": "中等"},
+            "compression_levels": {"short_term": 3, "long_term": 2, "parameter": 1, "rule": 1}
+        }, ensure_ascii=False)
+
+    def _create_agent(self, mock_agent_class, mode, response=None):
+        """创建指定模式的策略选择代理"""
+        mock_agent = MagicMock()
+        mock_agent.run.return_value = {"success": True, "response": response}
+        mock_agent_class.return_value = mock_agent
+        return PolicySelectAgent(PolicySelectConfig(select_mode=mode)), mock_agent
+
+    def test_default_mode(self):
+        """测试默认使用单次调用模式"""
+        config = PolicySelectConfig()
+        self.assertEqual(config.select_mode, PolicySelectMode.SINGLE_CALL)
+
+    @patch('lightce.tools.policy_select.UniversalAgent')
+    def test_single_call(self, mock_agent_class):
+        """测试单次调用返回分析和全部压缩级别"""
+        agent, mock_agent = self._create_agent(
+            mock_agent_class, PolicySelectMode.SINGLE_CALL, self.valid_response
+        )
+
+        result = agent.select_policy(self.test_prompt)
+
+        self.assertTrue(result.success)
+        self.assertEqual(mock_agent.run.call_count, 1)
+        self.assertEqual(result.compression_levels[MemoryType.SHORT_TERM], 3)
+        self.assertEqual(result.compression_levels[MemoryType.PARAMETER], 1)
+        self.assertEqual(result.prompt_analysis["complexity"], "中等")
+        self.assertEqual(result.prompt_analysis["select_mode"], "single_call")
+
+    @patch('lightce.tools.policy_select.UniversalAgent')
+    def test_single_call_invalid_response_falls_back(self, mock_agent_class):
+        """测试单次调用输出无效时回退到启发式选择"""
+        invalid_responses = [
+            "无法给出JSON",
+            '{"compression_levels": {"short_term": 5, "long_term": 2, "parameter": 1, "rule": 1}}',
+            '{"compression_levels": {"short_term": 2}}'
+        ]
+
+        for response in invalid_responses:
+            agent, mock_agent = self._create_agent(
+                mock_agent_class, PolicySelectMode.SINGLE_CALL, response
+            )
+            result = agent.select_policy(self.test_prompt)
+
+            self.assertTrue(result.success)
+            self.assertEqual(result.prompt_analysis["select_mode"], "heuristic")
+            self.assertEqual(set(result.compression_levels), set(MemoryType))
+
+    @patch('lightce.tools.policy_select.UniversalAgent')
+    def test_heuristic_mode(self, mock_agent_class):
+        """测试启发式模式不调用LLM"""
+        agent, mock_agent = self._create_agent(mock_agent_class, PolicySelectMode.HEURISTIC)
+
+        result = agent.select_policy(self.test_prompt)
+
+        mock_agent.run.assert_not_called()
+        self.assertTrue(result.success)
+        self.assertEqual(result.compression_levels[MemoryType.PARAMETER], 1)
+        self.assertEqual(result.compression_levels[MemoryType.RULE], 1)
+        for level in result.compression_levels.values():
+            self.assertGreaterEqual(level, 1)
+            self.assertLessEqual(level, 4)
+
+    @patch('lightce.tools.policy_select.UniversalAgent')
+    def test_heuristic_long_prompt(self, mock_agent_class):
+        """测试长prompt选择更激进的压缩级别"""
+        agent, _ = self._create_agent(mock_agent_class, PolicySelectMode.HEURISTIC)
+
+        short_result = agent.select_policy("简短的问题")
+        long_result = agent.select_policy("这是一段很长的背景描述。" * 800)
+
+        self.assertGreater(
+            long_result.compression_levels[MemoryType.LONG_TERM],
+            short_result.compression_levels[MemoryType.LONG_TERM]
+        )
+        self.assertEqual(long_result.compression_levels[MemoryType.SHORT_TERM], 4)
+
+    @patch('lightce.tools.policy_select.UniversalAgent')
+    def test_multi_call_parses_level(self, mock_agent_class):
+        """测试多次调用模式解析LLM给出的级别"""
+        agent, mock_agent = self._create_agent(
+            mock_agent_class, PolicySelectMode.MULTI_CALL,
+            '{"compression_level": 3, "reason": "次要内容"}'
+        )
+
+        result = agent.select_policy(self.test_prompt)
+
+        self.assertEqual(mock_agent.run.call_count, 1 + len(MemoryType))
+        self.assertTrue(all(level == 3 for level in result.compression_levels.values()))
+
+    @patch('lightce.tools.policy_select.UniversalAgent')
+    def test_strategy_selection_disabled(self, mock_agent_class):
+        """测试关闭策略选择时不返回压缩级别"""
+        agent, _ = self._create_agent(
+            mock_agent_class, PolicySelectMode.SINGLE_CALL, self.valid_response
+        )
+        agent.config.enable_strategy_selection = False
+
+        result = agent.select_policy(self.test_prompt)
+
+        self.assertEqual(result.compression_levels, {})
+        self.assertIn("complexity", result.prompt_analysis)
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
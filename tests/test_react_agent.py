@@ -6,6 +6,7 @@ React Agent测试文件
 """
 
 import unittest
+import asyncio
 from unittest.mock import patch, MagicMock
 from lightce.agent.react_agent import ReactAgent, create_react_agent, ReactAgentConfig, EnvironmentEvent, UserFeedback, AdaptiveRule, BehaviorPattern, ReactionType
 from lightce.tools.example_tools import get_current_time, calculate
@@ -191,7 +192,56 @@ class TestReactAgent(unittest.TestCase):
             
             # 应该保持在限制内
             self.assertLessEqual(len(agent.user_feedback), self.config.max_user_feedback)
-    
+
+    def test_incremental_context_analysis(self):
+        """测试没有新事件时复用最近窗口，新事件到达后重新计算"""
+        with patch('lightce.agent.react_agent.ChatOpenAI'):
+            agent = ReactAgent(self.config)
+            agent.add_environment_event("系统错误", "数据库连接失败", 0.8)
+
+            first = agent.analyze_context("你好")
+            recent = agent._get_recent_context()
+            second = agent.analyze_context("你好")
+            self.assertIs(agent._get_recent_context(), recent)
+            self.assertEqual(first["recent_events"], second["recent_events"])
+            self.assertAlmostEqual(second["adaptation_score"], 0.8 * self.config.event_weight)
+
+            agent.add_user_feedback(ReactionType.NEGATIVE, "回答不够详细", 0.5)
+            third = agent.analyze_context("你好")
+            self.assertIsNot(agent._get_recent_context(), recent)
+            self.assertEqual(len(third["recent_feedback"]), 1)
+            self.assertAlmostEqual(
+                third["adaptation_score"],
+                0.8 * self.config.event_weight + 0.5 * self.config.feedback_weight
+            )
+
+            for i in range(8):
+                agent.add_environment_event(f"事件{i}", f"描述{i}", 0.1)
+            context = agent.analyze_context("你好")
+            self.assertEqual([e["description"] for e in context["recent_events"]], [f"描述{i}" for i in range(3, 8)])
+
+    def test_feedback_stats_track_eviction(self):
+        """测试反馈被淘汰和容量调整后运行统计与全量重算一致"""
+        with patch('lightce.agent.react_agent.ChatOpenAI'):
+            agent = ReactAgent(self.config)
+            for i in range(15):
+                feedback_type = [ReactionType.NEGATIVE, ReactionType.POSITIVE, ReactionType.NEUTRAL][i % 3]
+                agent.add_user_feedback(feedback_type, f"反馈{i}", (i + 1) / 20)
+
+            def expected_average(feedbacks):
+                scores = [f.confidence if f.feedback_type == ReactionType.NEGATIVE else -f.confidence * 0.5
+                          for f in feedbacks if f.feedback_type != ReactionType.NEUTRAL]
+                return sum(scores) / len(scores)
+
+            stats = agent.get_adaptation_stats()
+            self.assertEqual(stats["total_feedback"], 10)
+            self.assertEqual(sum(stats["feedback_distribution"].values()), 10)
+            self.assertAlmostEqual(stats["average_adaptation"], expected_average(agent.user_feedback))
+
+            agent.update_model_config(max_user_feedback=4)
+            self.assertEqual([f.content for f in agent.user_feedback], [f"反馈{i}" for i in range(11, 15)])
+            self.assertAlmostEqual(agent.get_adaptation_stats()["average_adaptation"], expected_average(agent.user_feedback))
+
     def test_get_adaptation_stats(self):
         """测试适应统计"""
         with patch('lightce.agent.react_agent.ChatOpenAI'):
@@ -306,6 +356,62 @@ class TestAdaptiveRulesIntegration(unittest.TestCase):
         self.assertEqual(rule.adaptation_factor, 1.2)
         self.assertTrue(rule.active)
 
+class TestReactAgentAsync(unittest.TestCase):
+    """测试React Agent异步执行路径"""
+    
+    def test_arun_uses_ainvoke(self):
+        """测试arun通过ainvoke执行工作流"""
+        with patch('lightce.agent.react_agent.ChatOpenAI'):
+            agent = ReactAgent(ReactAgentConfig())
+            
+            async def fake_ainvoke(state):
+                state["output_text"] = "异步响应"
+                state["reaction_applied"] = "适应水平: 0.00, 响应风格: normal"
+                state["current_step"] = "output_generated"
+                return state
+            
+            agent.graph = MagicMock()
+            agent.graph.ainvoke = fake_ainvoke
+            
+            result = asyncio.run(agent.arun("你好"))
+            
+            self.assertTrue(result["success"])
+            self.assertEqual(result["response"], "异步响应")
+            agent.graph.invoke.assert_not_called()
+
+class TestReactAgentClientReuse(unittest.TestCase):
+    """测试React Agent按温度复用LLM客户端"""
+    
+    def test_adapted_llm_cached_per_temperature(self):
+        """测试相同调整温度只创建一次客户端"""
+        with patch('lightce.agent.react_agent.ChatOpenAI') as mock_openai:
+            agent = ReactAgent(ReactAgentConfig(temperature=0.7))
+            state = {"current_context": {"adaptation": {"temperature_adjustment": 0.1}}}
+            
+            first = agent._get_adapted_llm(state)
+            second = agent._get_adapted_llm(state)
+            self.assertIs(first, second)
+            self.assertEqual(mock_openai.call_count, 2)  # 默认LLM + 调整温度后的LLM
+            
+            agent._get_adapted_llm({"current_context": {"adaptation": {"temperature_adjustment": -0.1}}})
+            self.assertEqual(mock_openai.call_count, 3)
+    
+    def test_cache_invalidated_on_add_tool(self):
+        """测试添加工具后重新创建绑定"""
+        with patch('lightce.agent.react_agent.ChatOpenAI') as mock_openai:
+            agent = ReactAgent(ReactAgentConfig())
+            state = {"current_context": {"adaptation": {}}}
+            
+            agent._get_adapted_llm(state)
+            tool_node = agent._get_tool_node()
+            agent.add_tool(get_current_time)
+            agent._get_adapted_llm(state)
+            
+            # 温度未调整时复用默认客户端，只重新绑定工具
+            self.assertEqual(mock_openai.call_count, 1)
+            self.assertEqual(mock_openai.return_value.bind_tools.call_count, 2)
+            self.assertIsNot(agent._get_tool_node(), tool_node)
+
 def run_basic_functionality_test():
     """运行基本功能测试（不需要API密钥）"""
     print("运行React Agent基本功能测试...")
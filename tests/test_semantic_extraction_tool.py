@@ -33,9 +33,9 @@ class TestSemanticExtractionTool(unittest.TestCase):
         """测试语义提取配置"""
         config = SemanticExtractionConfig()
         
-        self.assertEqual(config.extraction_level, ExtractionLevel.BASIC)
+        self.assertEqual(config.extraction_level, ExtractionLevel.SHORT)
         self.assertIsNone(config.extraction_types)
-        self.assertIsNone(config.model_config)
+        self.assertIsNone(config.agent_model_config)
         self.assertTrue(config.enable_multi_stage)
         self.assertEqual(config.quality_threshold, 0.8)
     
@@ -82,10 +82,10 @@ class TestSemanticExtractionTool(unittest.TestCase):
         agent = create_semantic_extraction_agent("basic", "gpt-3.5-turbo", 0.1)
         
         self.assertIsInstance(agent, SemanticExtractionAgent)
-        self.assertEqual(agent.config.extraction_level, ExtractionLevel.BASIC)
-        self.assertIsNotNone(agent.config.model_config)
-        self.assertEqual(agent.config.model_config.model_name, "gpt-3.5-turbo")
-        self.assertEqual(agent.config.model_config.temperature, 0.1)
+        self.assertEqual(agent.config.extraction_level, ExtractionLevel.SHORT)
+        self.assertIsNotNone(agent.config.agent_model_config)
+        self.assertEqual(agent.config.agent_model_config.model_name, "gpt-3.5-turbo")
+        self.assertEqual(agent.config.agent_model_config.temperature, 0.1)
     
     @patch('lightce.tools.semantic_extraction.UniversalAgent')
     def test_extract_semantic_with_agent(self, mock_agent_class):
@@ -109,7 +109,7 @@ class TestSemanticExtractionTool(unittest.TestCase):
         result = extract_semantic_with_agent(self.test_text, "basic")
         
         self.assertTrue(result["success"])
-        self.assertEqual(result["extraction_level"], "basic")
+        self.assertEqual(result["extraction_level"], "short")
         self.assertEqual(result["quality_score"], 0.8)
     
     def test_quality_evaluation_methods(self):
@@ -231,7 +231,7 @@ class TestSemanticExtractionTool(unittest.TestCase):
         result = tool._run(self.test_text, "basic", ["keywords"])
         
         self.assertTrue(result["success"])
-        self.assertEqual(result["extraction_level"], "basic")
+        self.assertEqual(result["extraction_level"], "short")
         self.assertEqual(result["quality_score"], 0.8)
     
     def test_error_handling(self):
@@ -260,6 +260,72 @@ class TestSemanticExtractionTool(unittest.TestCase):
         with self.assertRaises(ValueError):
             SemanticExtractionConfig(quality_threshold=-0.1)
 
+class TestSemanticExtractionConcurrency(unittest.TestCase):
+    """语义提取并发执行测试"""
+    
+    def setUp(self):
+        """测试前的准备工作"""
+        self.test_text = "人工智能技术正在快速发展，为各行各业带来了革命性的变化。"
+        self.config = SemanticExtractionConfig(
+            extraction_level=ExtractionLevel.SHORT,
+            extraction_types=[ExtractionType.KEYWORDS, ExtractionType.SUMMARY]
+        )
+    
+    @patch('lightce.tools.semantic_extraction.UniversalAgent')
+    def test_types_run_concurrently(self, mock_agent_class):
+        """测试各提取类型并发执行"""
+        def slow_run(message):
+            time.sleep(0.3)
+            return {"success": True, "response": "提取内容"}
+        
+        mock_agent_class.return_value.run.side_effect = slow_run
+        agent = SemanticExtractionAgent(self.config)
+        
+        start_time = time.time()
+        result = agent.extract_semantic(self.test_text)
+        elapsed = time.time() - start_time
+        
+        self.assertTrue(result.success)
+        self.assertEqual(list(result.results.keys()), ["keywords", "summary"])
+        self.assertLess(elapsed, 0.55)
+    
+    @patch('lightce.tools.semantic_extraction.UniversalAgent')
+    def test_failure_isolated_per_type(self, mock_agent_class):
+        """测试单一类型失败不影响其他类型"""
+        def run(message):
+            if "摘要" in message:
+                return {"success": False, "error": "超时"}
+            return {"success": True, "response": "关键词"}
+        
+        mock_agent_class.return_value.run.side_effect = run
+        agent = SemanticExtractionAgent(self.config)
+        
+        result = agent.extract_semantic(self.test_text)
+        
+        self.assertTrue(result.success)
+        self.assertEqual(result.results["keywords"]["extracted_content"], "关键词")
+        self.assertIn("error", result.results["summary"])
+    
+    @patch('lightce.tools.semantic_extraction.UniversalAgent')
+    def test_aextract_semantic(self, mock_agent_class):
+        """测试异步并发提取"""
+        import asyncio
+        
+        async def fake_arun(message):
+            await asyncio.sleep(0.3)
+            return {"success": True, "response": "异步提取"}
+        
+        mock_agent_class.return_value.arun = fake_arun
+        agent = SemanticExtractionAgent(self.config)
+        
+        start_time = time.time()
+        result = asyncio.run(agent.aextract_semantic(self.test_text))
+        elapsed = time.time() - start_time
+        
+        self.assertTrue(result.success)
+        self.assertEqual(result.results["summary"]["extracted_content"], "异步提取")
+        self.assertLess(elapsed, 0.55)
+
 def run_quick_test():
     """运行快速测试"""
     print("运行语义提取工具快速测试...")
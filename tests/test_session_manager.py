@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+会话管理器测试
+验证会话记忆隔离、共享Agent、LRU/TTL换出以及从会话数据库载入
+"""
+
+import asyncio
+import os
+import shutil
+import tempfile
+import unittest
+from unittest.mock import patch, MagicMock
+
+from lightce.agent.memory_agent import MemoryAgent, MemoryAgentConfig
+from lightce.agent.session import SessionManager
+
+class TestSessionManager(unittest.TestCase):
+    """测试SessionManager"""
+
+    def setUp(self):
+        """创建共享Agent，工作流替换为把用户消息写入长期记忆"""
+        self.tmpdir = tempfile.mkdtemp()
+        self.spill_path = os.path.join(self.tmpdir, "sessions.db")
+
+        with patch('lightce.agent.memory_agent.ChatOpenAI'):
+            self.agent = MemoryAgent(MemoryAgentConfig(memory_backend_path=None))
+
+        def fake_invoke(state):
+            self.agent.add_memory(state["messages"][0].content, importance=0.8)
+            state["output_text"] = f"记住了{len(self.agent.long_term_memory)}条"
+            return state
+
+        async def fake_ainvoke(state):
+            return fake_invoke(state)
+
+        self.agent.graph = MagicMock()
+        self.agent.graph.invoke.side_effect = fake_invoke
+        self.agent.graph.ainvoke.side_effect = fake_ainvoke
+
+    def tearDown(self):
+        """删除临时目录"""
+        shutil.rmtree(self.tmpdir)
+
+    def test_sessions_are_isolated(self):
+        """测试不同会话的记忆互不影响，Agent自身的记忆不受影响"""
+        manager = SessionManager(self.agent, spill_path=None)
+
+        manager.run("alice", "我喜欢编程")
+        result = manager.run("alice", "我住在北京")
+        manager.run("bob", "我喜欢跑步")
+
+        self.assertEqual(result["session_id"], "alice")
+        self.assertEqual(result["response"], "记住了2条")
+        self.assertEqual(len(manager.get_session("alice").scope.long_term_memory), 2)
+        self.assertEqual(len(manager.get_session("bob").scope.long_term_memory), 1)
+        self.assertEqual(len(self.agent.long_term_memory), 0)
+        self.assertEqual(self.agent.graph.invoke.call_count, 3)
+
+        contents = [m.content for m in manager.get_relevant_memories("bob", "编程")]
+        self.assertNotIn("我喜欢编程", contents)
+
+    def test_lru_spill_and_reload(self):
+        """测试超过常驻上限时换出最久未用的会话，再次访问时从数据库恢复"""
+        manager = SessionManager(self.agent, max_active_sessions=2, spill_path=self.spill_path)
+        manager.run("alice", "我喜欢编程")
+        manager.run("bob", "我喜欢跑步")
+        manager.run("carol", "我住在上海")
+
+        self.assertNotIn("alice", manager)
+        self.assertEqual(manager.get_stats()["stored_sessions"], 1)
+
+        alice = manager.get_session("alice")
+        self.assertEqual(alice.turns, 1)
+        self.assertEqual([m.content for m in manager.get_relevant_memories("alice", "编程")], ["我喜欢编程"])
+        self.assertNotIn("bob", manager)
+        self.assertEqual(manager.get_stats()["loads"], 1)
+        manager.close()
+
+        reopened = SessionManager(self.agent, spill_path=self.spill_path)
+        self.assertEqual(len(reopened.get_session("carol").scope.long_term_memory), 1)
+        reopened.close()
+
+    def test_idle_ttl(self):
+        """测试空闲超时的会话被换出"""
+        manager = SessionManager(self.agent, idle_ttl=60, spill_path=self.spill_path)
+        manager.add_memory("alice", "我喜欢编程")
+        manager.add_memory("bob", "我喜欢跑步")
+        manager._sessions["alice"].last_active -= 120
+
+        self.assertEqual(manager.evict_idle(), 1)
+        self.assertNotIn("alice", manager)
+        self.assertIn("bob", manager)
+        manager.close()
+
+    def test_without_spill_path(self):
+        """测试未配置会话数据库时换出的会话被丢弃"""
+        manager = SessionManager(self.agent, max_active_sessions=1, spill_path=None)
+        manager.add_memory("alice", "我喜欢编程")
+        manager.add_memory("bob", "我喜欢跑步")
+
+        self.assertEqual(len(manager.get_session("alice").scope.long_term_memory), 0)
+
+    def test_in_use_session_not_evicted(self):
+        """测试执行中的会话不会被换出"""
+        manager = SessionManager(self.agent, max_active_sessions=1, spill_path=self.spill_path)
+        alice = manager._acquire("alice")
+        manager.get_session("bob")
+
+        self.assertIn("alice", manager)
+        self.assertFalse(manager.spill_session("alice"))
+        alice.in_use -= 1
+        self.assertTrue(manager.spill_session("alice"))
+        manager.close()
+
+    def test_memory_access_marks_session_in_use(self):
+        """测试添加和检索记忆期间会话标记为执行中，结束或出错后恢复"""
+        manager = SessionManager(self.agent, spill_path=None)
+        seen = []
+
+        def record_in_use(*args, **kwargs):
+            seen.append(manager._sessions["alice"].in_use)
+            return []
+
+        with patch.object(self.agent, "add_memory", side_effect=record_in_use):
+            manager.add_memory("alice", "我喜欢编程")
+        with patch.object(self.agent, "get_relevant_memories", side_effect=record_in_use):
+            manager.get_relevant_memories("alice", "编程")
+        with patch.object(self.agent, "add_memory", side_effect=RuntimeError("写入失败")):
+            with self.assertRaises(RuntimeError):
+                manager.add_memory("alice", "我住在北京")
+
+        self.assertEqual(seen, [1, 1])
+        self.assertEqual(manager.get_session("alice").in_use, 0)
+        self.assertEqual(manager.get_session("alice").turns, 0)
+
+    def test_arun(self):
+        """测试异步运行使用会话记忆"""
+        manager = SessionManager(self.agent, spill_path=None)
+
+        async def run_both():
+            return await asyncio.gather(manager.arun("alice", "我喜欢编程"), manager.arun("bob", "我喜欢跑步"))
+
+        results = asyncio.run(run_both())
+
+        self.assertEqual([r["session_id"] for r in results], ["alice", "bob"])
+        self.assertEqual(len(manager.get_session("alice").scope.long_term_memory), 1)
+        self.assertEqual(len(self.agent.long_term_memory), 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -34,9 +34,9 @@ class TestStaticInformationTool(unittest.TestCase):
         """测试静态信息提取配置"""
         config = StaticInformationConfig()
         
-        self.assertEqual(config.information_level, InformationLevel.BASIC)
+        self.assertEqual(config.information_level, InformationLevel.MINIMAL)
         self.assertIsNone(config.information_types)
-        self.assertIsNone(config.model_config)
+        self.assertIsNone(config.agent_model_config)
         self.assertTrue(config.enable_validation)
         self.assertEqual(config.quality_threshold, 0.8)
         self.assertTrue(config.enable_format_check)
@@ -86,10 +86,10 @@ class TestStaticInformationTool(unittest.TestCase):
         agent = create_static_information_agent("basic", "gpt-3.5-turbo", 0.1)
         
         self.assertIsInstance(agent, StaticInformationAgent)
-        self.assertEqual(agent.config.information_level, InformationLevel.BASIC)
-        self.assertIsNotNone(agent.config.model_config)
-        self.assertEqual(agent.config.model_config.model_name, "gpt-3.5-turbo")
-        self.assertEqual(agent.config.model_config.temperature, 0.1)
+        self.assertEqual(agent.config.information_level, InformationLevel.MINIMAL)
+        self.assertIsNotNone(agent.config.agent_model_config)
+        self.assertEqual(agent.config.agent_model_config.model_name, "gpt-3.5-turbo")
+        self.assertEqual(agent.config.agent_model_config.temperature, 0.1)
     
     @patch('lightce.tools.static_information.UniversalAgent')
     def test_extract_static_information_with_agent(self, mock_agent_class):
@@ -114,7 +114,7 @@ class TestStaticInformationTool(unittest.TestCase):
         result = extract_static_information_with_agent(self.test_text, "basic")
         
         self.assertTrue(result["success"])
-        self.assertEqual(result["information_level"], "basic")
+        self.assertEqual(result["information_level"], "minimal")
         self.assertEqual(result["quality_score"], 0.8)
         self.assertTrue(result["validation_passed"])
     
@@ -336,7 +336,7 @@ class TestStaticInformationTool(unittest.TestCase):
         result = tool._run(self.test_text, "basic", ["contact"])
         
         self.assertTrue(result["success"])
-        self.assertEqual(result["information_level"], "basic")
+        self.assertEqual(result["information_level"], "minimal")
         self.assertEqual(result["quality_score"], 0.8)
         self.assertTrue(result["validation_passed"])
     
@@ -409,6 +409,73 @@ class TestStaticInformationTool(unittest.TestCase):
         self.assertTrue(re.search(currency_pattern, "¥500"))
         self.assertTrue(re.search(currency_pattern, "€300.50"))
 
+class TestCombinedExtraction(unittest.TestCase):
+    """合并提取测试类"""
+    
+    def setUp(self):
+        """测试前的准备工作"""
+        self.test_text = "张三在北京的清华大学工作，他的导师是李四。"
+    
+    def _create_agent(self, mock_agent_class, responses):
+        """创建按顺序返回给定响应的代理"""
+        mock_agent = MagicMock()
+        mock_agent.run.side_effect = [
+            {"success": True, "response": response} for response in responses
+        ]
+        mock_agent_class.return_value = mock_agent
+        config = StaticInformationConfig(information_level=InformationLevel.MODERATE)
+        return StaticInformationAgent(config), mock_agent
+    
+    @patch('lightce.tools.static_information.UniversalAgent')
+    def test_single_call_for_all_types(self, mock_agent_class):
+        """测试所有类型通过一次调用完成，输入文本只发送一次"""
+        response = '{"entity": "实体：张三、李四", "relation": "关系：张三-导师-李四"}'
+        agent, mock_agent = self._create_agent(mock_agent_class, [response])
+        
+        result = agent.extract_information(self.test_text)
+        
+        self.assertTrue(result.success)
+        self.assertEqual(mock_agent.run.call_count, 1)
+        sent_message = mock_agent.run.call_args[0][0]
+        self.assertEqual(sent_message.count(self.test_text), 1)
+        self.assertEqual(result.results["entity"]["extracted_content"], "实体：张三、李四")
+        self.assertEqual(result.results["relation"]["extracted_content"], "关系：张三-导师-李四")
+    
+    @patch('lightce.tools.static_information.UniversalAgent')
+    def test_sectioned_response(self, mock_agent_class):
+        """测试分段格式的响应"""
+        response = "### 任务 entity\n张三\n\n### 任务 relation\n张三-导师-李四"
+        agent, mock_agent = self._create_agent(mock_agent_class, [response])
+        
+        result = agent.extract_information(self.test_text)
+        
+        self.assertEqual(mock_agent.run.call_count, 1)
+        self.assertEqual(result.results["entity"]["extracted_content"], "张三")
+        self.assertEqual(result.results["relation"]["extracted_content"], "张三-导师-李四")
+    
+    @patch('lightce.tools.static_information.UniversalAgent')
+    def test_fallback_to_per_type(self, mock_agent_class):
+        """测试响应无法解析时回退到逐类型提取"""
+        responses = ['{"entity": "只有实体"}', "实体结果", "关系结果"]
+        agent, mock_agent = self._create_agent(mock_agent_class, responses)
+        
+        result = agent.extract_information(self.test_text)
+        
+        self.assertTrue(result.success)
+        self.assertEqual(mock_agent.run.call_count, 3)
+        self.assertEqual(result.results["entity"]["extracted_content"], "实体结果")
+        self.assertEqual(result.results["relation"]["extracted_content"], "关系结果")
+    
+    @patch('lightce.tools.static_information.UniversalAgent')
+    def test_combined_extraction_disabled(self, mock_agent_class):
+        """测试关闭合并提取"""
+        agent, mock_agent = self._create_agent(mock_agent_class, ["实体结果", "关系结果"])
+        agent.config.enable_combined_extraction = False
+        
+        agent.extract_information(self.test_text)
+        
+        self.assertEqual(mock_agent.run.call_count, 2)
+
 def run_quick_test():
     """运行快速测试"""
     print("运行静态信息提取工具快速测试...")
@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+本地模拟LLM服务测试
+验证OpenAI兼容接口（含流式输出和工具调用）、Ollama接口、错误注入以及长连接复用
+"""
+
+import asyncio
+import json
+import os
+import unittest
+
+import httpx
+
+from lightce.api.stub_server import StubLLMServer, StubServerConfig, tokenize
+
+TOOL = {
+    "type": "function",
+    "function": {
+        "name": "get_weather",
+        "description": "查询天气",
+        "parameters": {
+            "type": "object",
+            "properties": {"city": {"type": "string"}, "days": {"type": "integer"}},
+            "required": ["city", "days"]
+        }
+    }
+}
+
+class TestStubServer(unittest.TestCase):
+    """测试模拟服务"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = StubLLMServer(StubServerConfig(responses=["你好，这是 scripted reply 1。", "第二条回复"])).start_in_thread()
+        cls.client = httpx.Client(timeout=5)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.client.close()
+        cls.server.stop_thread()
+
+    def setUp(self):
+        self.server._request_index = 0
+
+    def chat(self, **payload):
+        payload.setdefault("messages", [{"role": "user", "content": "你好"}])
+        return self.client.post(f"{self.server.base_url}/chat/completions", json=payload)
+
+    def test_tokenize_roundtrip(self):
+        """测试词元拼接后还原原文"""
+        text = "Hello world, 你好  世界！\n"
+        self.assertEqual("".join(tokenize(text)), text)
+        self.assertEqual(tokenize("Hello world"), ["Hello", " world"])
+
+    def test_chat_completion(self):
+        """测试非流式回复按脚本循环并统计用量"""
+        first = self.chat().json()
+        second = self.chat(max_tokens=2).json()
+        self.assertEqual(first["object"], "chat.completion")
+        self.assertEqual(first["choices"][0]["message"]["content"], "你好，这是 scripted reply 1。")
+        self.assertEqual(first["choices"][0]["finish_reason"], "stop")
+        self.assertEqual(first["usage"]["prompt_tokens"], 2)
+        self.assertEqual(second["choices"][0]["message"]["content"], "第二")
+        self.assertEqual(second["choices"][0]["finish_reason"], "length")
+
+    def test_chat_stream(self):
+        """测试SSE流式输出"""
+        with self.client.stream("POST", f"{self.server.base_url}/chat/completions", json={
+            "messages": [{"role": "user", "content": "你好"}],
+            "stream": True,
+            "stream_options": {"include_usage": True}
+        }) as response:
+            events = [line[len("data: "):] for line in response.iter_lines() if line.startswith("data: ")]
+        self.assertEqual(events[-1], "[DONE]")
+        chunks = [json.loads(event) for event in events[:-1]]
+        content = "".join(c["choices"][0]["delta"].get("content", "") for c in chunks if c["choices"])
+        self.assertEqual(content, "你好，这是 scripted reply 1。")
+        self.assertEqual(chunks[-2]["choices"][0]["finish_reason"], "stop")
+        self.assertEqual(chunks[-1]["usage"]["completion_tokens"], len(tokenize(content)))
+
+    def test_tool_call(self):
+        """测试带工具的请求返回工具调用，工具结果之后返回文本"""
+        data = self.chat(tools=[TOOL]).json()
+        choice = data["choices"][0]
+        self.assertEqual(choice["finish_reason"], "tool_calls")
+        call = choice["message"]["tool_calls"][0]
+        self.assertEqual(call["function"]["name"], "get_weather")
+        self.assertEqual(json.loads(call["function"]["arguments"]), {"city": "stub", "days": 1})
+
+        messages = [
+            {"role": "user", "content": "北京天气"},
+            {"role": "assistant", "content": None, "tool_calls": [call]},
+            {"role": "tool", "tool_call_id": call["id"], "content": "晴"}
+        ]
+        data = self.chat(messages=messages, tools=[TOOL]).json()
+        self.assertEqual(data["choices"][0]["finish_reason"], "stop")
+
+    def test_ollama_endpoints(self):
+        """测试Ollama的流式generate和非流式chat"""
+        response = self.client.post(f"{self.server.ollama_url}/api/generate", json={"model": "m", "prompt": "你好"})
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        self.assertTrue(lines[-1]["done"])
+        self.assertFalse(any(line["done"] for line in lines[:-1]))
+        self.assertEqual("".join(line["response"] for line in lines), "你好，这是 scripted reply 1。")
+
+        data = self.client.post(f"{self.server.ollama_url}/api/chat", json={
+            "messages": [{"role": "user", "content": "你好"}],
+            "stream": False
+        }).json()
+        self.assertTrue(data["done"])
+        self.assertEqual(data["message"]["content"], "第二条回复")
+
+    def test_unknown_path(self):
+        """测试未知接口返回404"""
+        self.assertEqual(self.client.get(f"{self.server.base_url}/unknown").status_code, 404)
+
+    def test_keep_alive(self):
+        """测试同一连接上连续处理多个请求"""
+        connections = self.server.stats["connections"]
+        with httpx.Client(timeout=5) as client:
+            for _ in range(20):
+                client.post(f"{self.server.base_url}/chat/completions", json={"messages": []}).raise_for_status()
+        self.assertEqual(self.server.stats["connections"], connections + 1)
+
+class TestStubServerErrors(unittest.TestCase):
+    """测试错误注入和延迟"""
+
+    def test_error_rates(self):
+        """测试按错误率返回错误，429附带Retry-After"""
+        with StubLLMServer(error_rates={429: 1.0}, retry_after=2) as server:
+            response = httpx.post(f"{server.base_url}/chat/completions", json={"messages": []})
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response.headers["retry-after"], "2")
+        self.assertEqual(response.json()["error"]["code"], 429)
+
+    def test_error_distribution(self):
+        """测试错误比例接近配置值"""
+        with StubLLMServer(error_rates={503: 0.25}, seed=1) as server, httpx.Client(timeout=5) as client:
+            statuses = [
+                client.post(f"{server.base_url}/chat/completions", json={"messages": []}).status_code
+                for _ in range(200)
+            ]
+        self.assertTrue(30 <= statuses.count(503) <= 70)
+        self.assertEqual(set(statuses), {200, 503})
+
+    def test_template(self):
+        """测试模板回复"""
+        with StubLLMServer(template="[{model}#{index}] {prompt}") as server:
+            data = httpx.post(f"{server.base_url}/chat/completions", json={
+                "messages": [{"role": "user", "content": "测试"}]
+            }).json()
+        self.assertEqual(data["choices"][0]["message"]["content"], "[stub-model#0] 测试")
+
+class TestUniversalAgentWithStubServer(unittest.TestCase):
+    """测试UniversalAgent通过base_url连接模拟服务"""
+
+    def test_agent_run(self):
+        from lightce.agent.system import UniversalAgent, ModelConfig
+        os.environ.setdefault("OPENAI_API_KEY", "sk-stub")
+        with StubLLMServer(responses=["模拟服务的回复"]) as server:
+            agent = UniversalAgent(ModelConfig(base_url=server.base_url))
+            result = agent.run("你好")
+        self.assertTrue(result["success"])
+        self.assertEqual(result["response"], "模拟服务的回复")
+
+    def test_agent_arun_across_event_loops(self):
+        """测试共享的LLM客户端在不同事件循环中异步调用时各自使用当前循环的连接池"""
+        from lightce.agent.system import UniversalAgent, ModelConfig
+        os.environ.setdefault("OPENAI_API_KEY", "sk-stub")
+        with StubLLMServer(responses=["异步回复"]) as server:
+            agent = UniversalAgent(ModelConfig(base_url=server.base_url))
+            results = [asyncio.run(agent.arun("你好")) for _ in range(2)]
+        self.assertEqual([r["response"] for r in results], ["异步回复", "异步回复"])
+
+if __name__ == "__main__":
+    unittest.main()
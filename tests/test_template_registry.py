@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+提示词模板注册表测试
+验证预解析渲染与str.format结果一致，不含变量的段落排在前面，同一模板的前缀不随输入变化
+"""
+
+import unittest
+
+from lightce.prompt.template_registry import PromptTemplate, PromptRegistry, PROMPT_REGISTRY, stable_prefix_layout
+from lightce.prompt.mini_contents import (
+    CompressionStage, CompressionType, get_compression_prompt
+)
+from lightce.prompt.semantic_extration import (
+    ExtractionLevel, ExtractionType, get_extraction_prompt, get_extraction_types, get_all_extraction_prompts
+)
+from lightce.prompt.static_information import (
+    InformationLevel, get_information_types, get_all_information_prompts
+)
+
+SOURCE = """请压缩以下文本：
+
+原文：
+{text}
+
+目标比例：{ratio:.1f}%
+
+要求：
+1. 保留关键信息
+2. 删除冗余内容
+
+请输出压缩后的文本："""
+
+class TestPromptTemplate(unittest.TestCase):
+    """测试预解析模板"""
+
+    def test_layout_moves_static_paragraphs_forward(self):
+        """测试说明段落排在变量段落之前，应答提示仍在最后"""
+        layout = stable_prefix_layout(SOURCE)
+        self.assertLess(layout.index("要求："), layout.index("{text}"))
+        self.assertLess(layout.index("{text}"), layout.index("{ratio:.1f}"))
+        self.assertTrue(layout.endswith("请输出压缩后的文本："))
+        self.assertEqual(sorted(layout.split("\n\n")), sorted(SOURCE.split("\n\n")))
+
+    def test_render_matches_format(self):
+        """测试渲染结果与str.format一致"""
+        template = PromptTemplate(SOURCE)
+        self.assertEqual(template.render(text="内容", ratio=50), template.layout.format(text="内容", ratio=50))
+        self.assertEqual(
+            PromptTemplate(SOURCE, stable_prefix=False).render(text="内容", ratio=50, extra="忽略"),
+            SOURCE.format(text="内容", ratio=50)
+        )
+        self.assertEqual(template.fields, ("text", "ratio"))
+
+    def test_static_prefix_shared(self):
+        """测试不同输入渲染出的提示词共享固定前缀"""
+        template = PromptTemplate(SOURCE)
+        first = template.render(text="第一段", ratio=30)
+        second = template.render(text="完全不同的第二段", ratio=70)
+        self.assertIn("要求：", template.static_prefix)
+        self.assertTrue(first.startswith(template.static_prefix))
+        self.assertTrue(second.startswith(template.static_prefix))
+
+    def test_missing_field(self):
+        """测试缺少变量时抛出KeyError"""
+        with self.assertRaises(KeyError):
+            PromptTemplate(SOURCE).render(text="内容")
+
+class TestPromptRegistry(unittest.TestCase):
+    """测试模板注册表"""
+
+    def test_register_and_render(self):
+        """测试注册、按命名空间列出和替换模板"""
+        registry = PromptRegistry()
+        registry.register_table("demo", {"a": "A {x}", "b": "B {x}"})
+        self.assertIn(("demo", "a"), registry)
+        self.assertEqual(registry.keys("demo"), ["a", "b"])
+        self.assertEqual(registry.render(("demo", "a"), x=1), "A 1")
+        self.assertIs(registry.get(("demo", "a")), registry.get(("demo", "a")))
+
+        registry.register(("demo", "a"), "新A {x}")
+        self.assertEqual(registry.render(("demo", "a"), x=1), "新A 1")
+        with self.assertRaises(KeyError):
+            registry.get(("demo", "c"))
+
+    def test_compression_prompts(self):
+        """测试压缩提示词经注册表渲染"""
+        text = "这是一段需要压缩的文本。"
+        prompt = get_compression_prompt(
+            CompressionStage.COMPRESS, CompressionType.TEXT,
+            text=text, preprocess_result="无", compression_ratio=50
+        )
+        self.assertIn(text, prompt)
+        template = PROMPT_REGISTRY.get((CompressionStage.COMPRESS, CompressionType.TEXT))
+        self.assertTrue(prompt.startswith(template.static_prefix))
+        self.assertEqual(prompt, template.layout.format(text=text, preprocess_result="无", compression_ratio=50))
+        with self.assertRaises(ValueError):
+            get_compression_prompt("unknown", CompressionType.TEXT, text=text)
+
+    def test_list_types_without_rendering(self):
+        """测试不渲染提示词即可列出各级别的类型"""
+        for level in ExtractionLevel:
+            types = get_extraction_types(level)
+            self.assertEqual([t.value for t in types], list(get_all_extraction_prompts(level, text="x")))
+        for level in InformationLevel:
+            types = get_information_types(level)
+            self.assertEqual([t.value for t in types], list(get_all_information_prompts(level, text="x")))
+
+        with self.assertRaises(ValueError):
+            get_extraction_types("unknown")
+        unsupported = [t for t in ExtractionType if t not in get_extraction_types(ExtractionLevel.SHORT)]
+        if unsupported:
+            with self.assertRaises(ValueError):
+                get_extraction_prompt(ExtractionLevel.SHORT, unsupported[0], text="x")
+
+if __name__ == "__main__":
+    unittest.main()